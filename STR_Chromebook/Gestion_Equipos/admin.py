@@ -1,5 +1,12 @@
 from django.contrib import admin
-from .models import EstadoEquipo, Equipo, Reserva, AsignacionEquipo, SupervisorReserva, EvidenciaReserva
+from django.core.files.storage import default_storage
+from django.urls import reverse
+from django.utils.html import format_html
+from .models import (
+    EstadoEquipo, Equipo, HistorialEquipo, SerieReserva, Reserva, AsignacionEquipo,
+    SupervisorReserva, EvidenciaReserva, Notificacion, UsoEquipoMensual,
+    ReservaHistorica, AsignacionEquipoHistorica, SupervisorReservaHistorica, EvidenciaReservaHistorica
+)
 
 # ==================== EQUIPOS ====================
 
@@ -13,6 +20,7 @@ class EstadoEquipoAdmin(admin.ModelAdmin):
 class EquipoAdmin(admin.ModelAdmin):
     list_display = ('id_equipo', 'nom_equipo', 'num_serie', 'modelo', 'get_estado', 'get_rack')
     list_filter = ('id_estado_equipo', 'id_rack')
+    list_select_related = ('id_estado_equipo', 'id_rack')
     search_fields = ('nom_equipo', 'num_serie', 'modelo')
     fieldsets = (
         ('Información del Equipo', {
@@ -32,13 +40,43 @@ class EquipoAdmin(admin.ModelAdmin):
     get_rack.short_description = 'Rack'
 
 
+@admin.register(HistorialEquipo)
+class HistorialEquipoAdmin(admin.ModelAdmin):
+    list_display = ('id_historial', 'id_equipo', 'id_estado_anterior', 'id_estado_nuevo',
+                    'id_rack_anterior', 'id_rack_nuevo', 'id_usuario', 'fecha_cambio')
+    list_filter = ('id_estado_nuevo', 'id_rack_nuevo')
+    search_fields = ('id_equipo__nom_equipo', 'id_equipo__num_serie')
+    date_hierarchy = 'fecha_cambio'
+    list_select_related = ('id_equipo', 'id_estado_anterior', 'id_estado_nuevo',
+                           'id_rack_anterior', 'id_rack_nuevo', 'id_usuario')
+    readonly_fields = ('fecha_cambio',)
+
+
+@admin.register(UsoEquipoMensual)
+class UsoEquipoMensualAdmin(admin.ModelAdmin):
+    list_display = ('id_uso', 'id_equipo', 'mes', 'horas', 'reservas', 'calculado_hasta')
+    search_fields = ('id_equipo__nom_equipo', 'id_equipo__num_serie')
+    date_hierarchy = 'mes'
+    list_select_related = ('id_equipo',)
+
+
 # ==================== RESERVAS ====================
 
+@admin.register(SerieReserva)
+class SerieReservaAdmin(admin.ModelAdmin):
+    list_display = ('id_serie', 'id_usuario', 'frecuencia', 'fecha_inicio', 'fecha_fin', 'fecha_creacion')
+    list_filter = ('frecuencia',)
+    list_select_related = ('id_usuario',)
+    search_fields = ('id_usuario__nom_completo',)
+    readonly_fields = ('fecha_creacion',)
+
+
 @admin.register(Reserva)
 class ReservaAdmin(admin.ModelAdmin):
     list_display = ('id_reserva', 'get_usuario', 'fecha_uso', 'hora_inicio', 'hora_fin', 
                     'cant_solicitada', 'estado_reserva', 'get_carrera')
     list_filter = ('estado_reserva', 'fecha_uso', 'id_carrera')
+    list_select_related = ('id_usuario', 'id_carrera')
     search_fields = ('id_usuario__nom_completo', 'id_asignatura__nom_asignatura')
     date_hierarchy = 'fecha_uso'
     fieldsets = (
@@ -66,6 +104,7 @@ class ReservaAdmin(admin.ModelAdmin):
 class AsignacionEquipoAdmin(admin.ModelAdmin):
     list_display = ('id_asig_equipo', 'get_reserva', 'get_equipo', 'fecha_registro')
     list_filter = ('fecha_registro',)
+    list_select_related = ('id_reserva__id_usuario', 'id_equipo')
     search_fields = ('id_reserva__id_usuario__nom_completo', 'id_equipo__num_serie')
     date_hierarchy = 'fecha_registro'
     
@@ -87,6 +126,7 @@ class SupervisorReservaAdmin(admin.ModelAdmin):
     list_display = ('id_supervisor_reserva', 'get_reserva_info', 'get_supervisor_nombre')
     search_fields = ('id_reserva__id_usuario__nom_completo', 'id_supervisor__nom_completo')
     list_filter = ('id_supervisor',)
+    list_select_related = ('id_reserva', 'id_supervisor')
     
     @admin.display(description='Reserva')
     def get_reserva_info(self, obj):
@@ -102,9 +142,73 @@ class EvidenciaReservaAdmin(admin.ModelAdmin):
     """Admin para las fotos de Evidencia de las Reservas."""
     list_display = ('id_evidencia', 'id_reserva', 'tipo_evidencia', 'fecha_subida')
     list_filter = ('tipo_evidencia', 'fecha_subida')
+    list_select_related = ('id_reserva__id_usuario',)
     search_fields = ('id_reserva__id_usuario__nom_completo', 'descripcion')
     readonly_fields = ('fecha_subida',)
     
     def get_reserva(self, obj):
         return f"Reserva #{obj.id_reserva.id_reserva}"
-    get_reserva.short_description = 'Reserva'
\ No newline at end of file
+    get_reserva.short_description = 'Reserva'
+
+
+# ==================== NOTIFICACIONES ====================
+
+@admin.register(Notificacion)
+class NotificacionAdmin(admin.ModelAdmin):
+    list_display = ('id_notificacion', 'id_usuario', 'id_reserva', 'tipo', 'fecha_creacion')
+    list_filter = ('tipo',)
+    list_select_related = ('id_usuario', 'id_reserva__id_usuario')
+    search_fields = ('id_usuario__nom_completo', 'mensaje')
+    date_hierarchy = 'fecha_creacion'
+    readonly_fields = ('fecha_creacion',)
+
+
+# ==================== ARCHIVO HISTÓRICO ====================
+# Solo lectura: las filas las escribe archivo.archivar()
+
+class SoloLecturaAdmin(admin.ModelAdmin):
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+class AsignacionEquipoHistoricaInline(admin.TabularInline):
+    model = AsignacionEquipoHistorica
+    extra = 0
+    can_delete = False
+    readonly_fields = ('id_asig_equipo', 'id_equipo', 'fecha_registro')
+
+
+class SupervisorReservaHistoricaInline(admin.TabularInline):
+    model = SupervisorReservaHistorica
+    extra = 0
+    can_delete = False
+    readonly_fields = ('id_supervisor_reserva', 'id_supervisor')
+
+
+class EvidenciaReservaHistoricaInline(admin.TabularInline):
+    model = EvidenciaReservaHistorica
+    extra = 0
+    can_delete = False
+    fields = ('id_evidencia', 'tipo_evidencia', 'ver_foto', 'descripcion', 'fecha_subida', 'paquete')
+    readonly_fields = fields
+
+    @admin.display(description='Foto')
+    def ver_foto(self, obj):
+        url = reverse('foto_evidencia_archivada', args=[obj.id_evidencia])
+        if obj.miniatura:
+            return format_html('<a href="{}"><img src="{}" height="80"></a>', url, default_storage.url(obj.miniatura))
+        return format_html('<a href="{}">{}</a>', url, obj.foto)
+
+
+@admin.register(ReservaHistorica)
+class ReservaHistoricaAdmin(SoloLecturaAdmin):
+    list_display = ('id_reserva', 'id_usuario', 'fecha_uso', 'hora_inicio', 'hora_fin',
+                    'cant_solicitada', 'estado_reserva', 'fecha_archivado')
+    list_filter = ('estado_reserva', 'id_carrera')
+    list_select_related = ('id_usuario',)
+    search_fields = ('id_usuario__nom_completo', 'id_asignatura__nom_asignatura')
+    date_hierarchy = 'fecha_uso'
+    inlines = (AsignacionEquipoHistoricaInline, SupervisorReservaHistoricaInline, EvidenciaReservaHistoricaInline)
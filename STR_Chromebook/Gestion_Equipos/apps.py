@@ -4,3 +4,16 @@ from django.apps import AppConfig
 class GestionEquiposConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'Gestion_Equipos'
+
+    def ready(self):
+        # Receptores de señales; cada módulo mantiene al día:
+        # los calendarios ICS cacheados por docente y por aula
+        from Gestion_Equipos import calendario  # noqa: F401
+        # el total de devoluciones vencidas que muestra el dashboard
+        from Gestion_Equipos import devoluciones  # noqa: F401
+        # los eventos en vivo del dashboard (views.api.eventos_dashboard)
+        from Gestion_Equipos import eventos  # noqa: F401
+        # las versiones de las tablas cacheadas de los dashboards
+        from Gestion_Equipos import fragmentos  # noqa: F401
+        # las notificaciones de los docentes (views.api.notificaciones_docente)
+        from Gestion_Equipos import notificaciones  # noqa: F401
@@ -0,0 +1,198 @@
+"""
+Archivo histórico de reservas: tablas vivas (calientes) e históricas (frías).
+
+Tb_RESERVA, Tb_ASIGNACION_EQUIPO y Tb_SUPERVISOR_RESERVA solo crecen, y cada
+consulta de operación paga por años de reservas terminadas. archivar()
+(comando `archivar_reservas`, programado cada noche o al cierre del periodo)
+mueve a las tablas *_HISTORICA las reservas Finalizadas, Rechazadas o
+Expiradas de hace más de ARCHIVO_PERIODOS periodos académicos, con sus
+asignaciones, supervisores y datos de evidencias (las fotos no se mueven de
+MEDIA_ROOT). Trabaja por lotes de ARCHIVO_LOTE reservas, cada uno en su
+transacción: copia con INSERT ... SELECT (mismos IDs) y borra de las tablas
+vivas.
+
+Los periodos empiezan en los meses de ARCHIVO_MESES_INICIO (semestres: enero
+y julio); el corte es el inicio del periodo de hace ARCHIVO_PERIODOS periodos.
+
+Los reportes leen las dos partes con historial() y asignaciones(): las mismas
+consultas sobre la tabla viva y la histórica, con los resultados combinados.
+Las vistas de operación siguen usando Reserva y solo ven las tablas vivas.
+"""
+
+import heapq
+from collections import defaultdict
+from datetime import date
+from operator import attrgetter
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Value
+from django.utils import timezone
+
+from Gestion_Equipos.models import (
+    AsignacionEquipo, AsignacionEquipoHistorica, EvidenciaReserva, EvidenciaReservaHistorica,
+    Notificacion, Reserva, ReservaHistorica, SupervisorReserva, SupervisorReservaHistorica
+)
+
+
+# Estados que ya no cambian
+ESTADOS_ARCHIVABLES = ('Finalizada', 'Rechazada', 'Expirada')
+
+# Tabla viva -> tabla histórica de los datos de cada reserva
+HIJAS = (
+    (AsignacionEquipo, AsignacionEquipoHistorica),
+    (SupervisorReserva, SupervisorReservaHistorica),
+    (EvidenciaReserva, EvidenciaReservaHistorica),
+)
+
+
+def _config(nombre, defecto):
+    return getattr(settings, f'ARCHIVO_{nombre}', defecto)
+
+
+# ======================================================
+# CONSULTAS SOBRE LAS DOS TABLAS
+# ======================================================
+
+class Historial:
+    """
+    La misma consulta sobre la tabla viva y la histórica. filter(), exclude(),
+    select_related(), values_list() y order_by() se aplican a las dos;
+    count(), agrupar(), unidas() y la iteración combinan los resultados.
+    """
+
+    def __init__(self, *consultas, orden=()):
+        self.consultas = consultas
+        self.orden = orden
+
+    def _aplicar(self, metodo, *args, **kwargs):
+        return Historial(*(getattr(c, metodo)(*args, **kwargs) for c in self.consultas), orden=self.orden)
+
+    def filter(self, *args, **kwargs):
+        return self._aplicar('filter', *args, **kwargs)
+
+    def exclude(self, *args, **kwargs):
+        return self._aplicar('exclude', *args, **kwargs)
+
+    def select_related(self, *campos):
+        return self._aplicar('select_related', *campos)
+
+    def values_list(self, *campos, **kwargs):
+        return self._aplicar('values_list', *campos, **kwargs)
+
+    def order_by(self, *campos):
+        """Orden por campos propios, todos ascendentes o todos descendentes."""
+        historial = self._aplicar('order_by', *campos)
+        historial.orden = campos
+        return historial
+
+    def count(self):
+        return sum(c.count() for c in self.consultas)
+
+    def agrupar(self, *campos, **agregados):
+        """
+        values(*campos).annotate(**agregados) de las dos tablas, sumando los
+        grupos iguales (solo Count y Sum, que se pueden sumar). Ordenado por el
+        primer agregado, de mayor a menor.
+        """
+        totales = defaultdict(lambda: dict.fromkeys(agregados, 0))
+        for consulta in self.consultas:
+            for fila in consulta.values(*campos).annotate(**agregados).order_by():
+                grupo = totales[tuple(fila[campo] for campo in campos)]
+                for nombre in agregados:
+                    grupo[nombre] += fila[nombre] or 0
+        filas = [{**dict(zip(campos, clave)), **valores} for clave, valores in totales.items()]
+        return sorted(filas, key=lambda fila: fila[next(iter(agregados))], reverse=True)
+
+    def unidas(self):
+        """Las dos consultas en una con UNION ALL (después de values_list(); admite order_by())."""
+        return self.consultas[0].union(*self.consultas[1:], all=True)
+
+    def __iter__(self):
+        if not self.orden:
+            return (objeto for consulta in self.consultas for objeto in consulta)
+        # Cada consulta ya viene ordenada: basta intercalarlas
+        descendente = self.orden[0].startswith('-')
+        clave = attrgetter(*(campo.lstrip('-') for campo in self.orden))
+        return heapq.merge(*self.consultas, key=clave, reverse=descendente)
+
+
+def historial(**filtros):
+    """Reservas vivas y archivadas que cumplen `filtros`."""
+    return Historial(Reserva.objects.filter(**filtros), ReservaHistorica.objects.filter(**filtros))
+
+
+def asignaciones(**filtros):
+    """Asignaciones de equipos vivas y archivadas (los filtros pueden cruzar a id_reserva__...)."""
+    return Historial(AsignacionEquipo.objects.filter(**filtros), AsignacionEquipoHistorica.objects.filter(**filtros))
+
+
+# ======================================================
+# ARCHIVADO
+# ======================================================
+
+def inicio_periodo(fecha, atras=0):
+    """Primer día del periodo de `fecha`, o del de `atras` periodos antes."""
+    meses = sorted(_config('MESES_INICIO', (1, 7)))
+    # Periodos contados desde el año 0 para poder restar
+    actual = fecha.year * len(meses) + sum(1 for mes in meses if mes <= fecha.month) - 1
+    anio, indice = divmod(actual - atras, len(meses))
+    return date(anio, meses[indice], 1)
+
+
+def corte(hoy=None, periodos=None):
+    """Se archivan las reservas con fecha de uso anterior a esta fecha."""
+    periodos = _config('PERIODOS', 2) if periodos is None else periodos
+    return inicio_periodo(hoy or timezone.localdate(), periodos)
+
+
+def archivables(hoy=None, periodos=None):
+    return Reserva.objects.filter(estado_reserva__in=ESTADOS_ARCHIVABLES, fecha_uso__lt=corte(hoy, periodos))
+
+
+def _copiar(historico, origen):
+    """
+    INSERT ... SELECT de `origen` en la tabla histórica, sin pasar por Python.
+    Los campos que la tabla viva no tiene llevan su valor por defecto.
+    """
+    campos = historico._meta.concrete_fields
+    en_origen = {campo.attname for campo in origen.model._meta.concrete_fields}
+    ahora = timezone.now()
+    origen = origen.order_by().values_list(*(
+        campo.attname if campo.attname in en_origen
+        else Value(ahora if campo.attname == 'fecha_archivado' else campo.get_default(), output_field=campo)
+        for campo in campos
+    ))
+    select, parametros = origen.query.get_compiler(using=origen.db).as_sql()
+    nombre = connection.ops.quote_name
+    columnas = ', '.join(nombre(campo.column) for campo in campos)
+    with connection.cursor() as cursor:
+        cursor.execute(f'INSERT INTO {nombre(historico._meta.db_table)} ({columnas}) {select}', parametros)
+
+
+def archivar_lote(reserva_ids):
+    """Copia las reservas y sus datos a las tablas históricas y las borra de las vivas."""
+    with transaction.atomic():
+        reservas = Reserva.objects.filter(pk__in=reserva_ids)
+        _copiar(ReservaHistorica, reservas)
+        for modelo, historico in HIJAS:
+            hijas = modelo.objects.filter(id_reserva_id__in=reserva_ids)
+            _copiar(historico, hijas)
+            hijas.delete()
+        # Avisos ya vistos hace meses: no se archivan
+        Notificacion.objects.filter(id_reserva_id__in=reserva_ids).delete()
+        reservas.delete()
+    return len(reserva_ids)
+
+
+def archivar(hoy=None, periodos=None, lote=None, limite=None):
+    """Archiva por lotes hasta no dejar reservas archivables (o hasta `limite`). Devuelve cuántas movió."""
+    lote = lote or _config('LOTE', 1000)
+    consulta = archivables(hoy, periodos).order_by('pk').values_list('pk', flat=True)
+    total = 0
+    while limite is None or total < limite:
+        reserva_ids = list(consulta[:lote if limite is None else min(lote, limite - total)])
+        if not reserva_ids:
+            break
+        total += archivar_lote(reserva_ids)
+    return total
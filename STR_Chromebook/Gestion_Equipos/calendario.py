@@ -0,0 +1,177 @@
+"""
+Calendarios iCalendar (.ics) de reservas, por docente y por aula.
+
+Cada calendario tiene una URL con un token secreto (HMAC de SECRET_KEY, sin
+tabla extra) para que el docente la agregue en Google Calendar, Outlook, etc.
+sin iniciar sesión. Incluye las reservas Aprobadas (CONFIRMED) y Pendientes
+(TENTATIVE) desde CALENDARIO_DIAS_ATRAS días atrás.
+
+Los clientes de calendario consultan cada pocos minutos, así que el .ics se
+guarda en la cache con su ETag y solo se regenera cuando cambia una reserva
+de ese docente o de esa aula (señales de Reserva, al confirmarse la
+transacción). Una consulta con el ETag vigente responde 304 sin tocar la BD.
+"""
+
+import hashlib
+from datetime import datetime, timedelta, timezone as zona
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.signals import post_delete, post_init, post_save
+from django.dispatch import receiver
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.crypto import constant_time_compare, salted_hmac
+
+from Gestion_Equipos.models import Reserva
+
+
+DOCENTE = 'docente'
+AULA = 'aula'
+
+ESTADOS_ICS = {'Aprobada': 'CONFIRMED', 'Pendiente': 'TENTATIVE'}
+
+
+# ======================================================
+# TOKEN Y URL
+# ======================================================
+
+def token(tipo, id_objeto):
+    return salted_hmac('calendario', f'{tipo}:{id_objeto}').hexdigest()[:32]
+
+
+def token_valido(tipo, id_objeto, recibido):
+    return constant_time_compare(token(tipo, id_objeto), recibido)
+
+
+def url_calendario(tipo, id_objeto):
+    """Ruta (sin dominio) del calendario; la plantilla la completa con build_absolute_uri."""
+    return reverse('calendario_reservas', args=[tipo, id_objeto, token(tipo, id_objeto)])
+
+
+# ======================================================
+# GENERACIÓN DEL .ICS
+# ======================================================
+
+def _texto(valor):
+    """Escapa un valor TEXT de iCalendar (RFC 5545, 3.3.11)."""
+    return (
+        str(valor).replace('\\', '\\\\').replace(';', '\\;').replace(',', '\\,')
+        .replace('\r\n', '\\n').replace('\n', '\\n')
+    )
+
+
+def _plegar(linea):
+    """Líneas de máximo 75 octetos; las continuaciones empiezan con un espacio."""
+    partes, actual = [], ''
+    for caracter in linea:
+        if len((actual + caracter).encode()) > (75 if not partes else 74):
+            partes.append(actual)
+            actual = ''
+        actual += caracter
+    partes.append(actual)
+    return '\r\n '.join(partes)
+
+
+def _fecha_utc(momento):
+    return momento.astimezone(zona.utc).strftime('%Y%m%dT%H%M%SZ')
+
+
+def _momento(fecha, hora):
+    # Igual que mis_reservas: la fecha y hora de uso están en la zona horaria del proyecto
+    return timezone.make_aware(datetime.combine(fecha, hora))
+
+
+def _reservas(tipo, id_objeto):
+    desde = timezone.localdate() - timedelta(days=getattr(settings, 'CALENDARIO_DIAS_ATRAS', 30))
+    filtro = {'id_usuario_id': id_objeto} if tipo == DOCENTE else {'id_aula_id': id_objeto}
+    return Reserva.objects.filter(
+        estado_reserva__in=ESTADOS_ICS, fecha_uso__gte=desde, **filtro
+    ).order_by('fecha_uso', 'hora_inicio').values(
+        'id_reserva', 'fecha_uso', 'hora_inicio', 'hora_fin', 'estado_reserva', 'cant_solicitada',
+        'responsable_entrega', 'fecha_actualizacion', 'id_usuario__nom_completo',
+        'id_asignatura__nom_asignatura', 'id_aula__nom_aula', 'id_aula__id_bloque__nom_bloque',
+    )
+
+
+def generar_ics(tipo, id_objeto):
+    lineas = [
+        'BEGIN:VCALENDAR',
+        'VERSION:2.0',
+        'PRODID:-//STR Chromebook//Reservas//ES',
+        'CALSCALE:GREGORIAN',
+        'METHOD:PUBLISH',
+        'X-WR-CALNAME:Reservas de Chromebooks',
+    ]
+    for r in _reservas(tipo, id_objeto):
+        # En el calendario del docente importa el aula; en el del aula, quién la usa
+        detalle = r['id_aula__nom_aula'] if tipo == DOCENTE else r['id_usuario__nom_completo']
+        resumen = f"Chromebooks: {r['id_asignatura__nom_asignatura']} - {detalle}"
+        ubicacion = f"{r['id_aula__id_bloque__nom_bloque']} - {r['id_aula__nom_aula']}"
+        descripcion = (
+            f"Reserva #{r['id_reserva']} ({r['estado_reserva']})\n"
+            f"{r['cant_solicitada']} equipos\nResponsable: {r['responsable_entrega']}"
+        )
+        lineas += [
+            'BEGIN:VEVENT',
+            f"UID:reserva-{r['id_reserva']}@str-chromebook",
+            f"DTSTAMP:{_fecha_utc(r['fecha_actualizacion'])}",
+            f"DTSTART:{_fecha_utc(_momento(r['fecha_uso'], r['hora_inicio']))}",
+            f"DTEND:{_fecha_utc(_momento(r['fecha_uso'], r['hora_fin']))}",
+            f'SUMMARY:{_texto(resumen)}',
+            f'LOCATION:{_texto(ubicacion)}',
+            f'DESCRIPTION:{_texto(descripcion)}',
+            f"STATUS:{ESTADOS_ICS[r['estado_reserva']]}",
+            'END:VEVENT',
+        ]
+    lineas.append('END:VCALENDAR')
+    return '\r\n'.join(_plegar(linea) for linea in lineas) + '\r\n'
+
+
+# ======================================================
+# CACHE
+# ======================================================
+
+def _clave(tipo, id_objeto):
+    # La fecha es parte de la clave: la ventana de CALENDARIO_DIAS_ATRAS avanza cada día
+    return f'calendario:{tipo}:{id_objeto}:{timezone.localdate():%Y%m%d}'
+
+
+def obtener(tipo, id_objeto):
+    """(etag, contenido) del calendario, desde la cache o generado en una consulta."""
+    guardado = cache.get(_clave(tipo, id_objeto))
+    if guardado is None:
+        contenido = generar_ics(tipo, id_objeto)
+        guardado = (f'"{hashlib.sha1(contenido.encode()).hexdigest()}"', contenido)
+        cache.set(_clave(tipo, id_objeto), guardado, getattr(settings, 'CALENDARIO_CACHE_SEGUNDOS', 86400))
+    return guardado
+
+
+def invalidar(tipo, *ids):
+    cache.delete_many([_clave(tipo, id_objeto) for id_objeto in ids])
+
+
+# ======================================================
+# SEÑALES
+# ======================================================
+
+@receiver(post_init, sender=Reserva)
+def _reserva_cargada(sender, instance, **kwargs):
+    # __dict__: no disparar la consulta de un campo diferido (.only()/.defer())
+    instance._calendarios_guardados = (instance.__dict__.get('id_usuario_id'), instance.__dict__.get('id_aula_id'))
+
+
+@receiver([post_save, post_delete], sender=Reserva)
+def _reserva_modificada(sender, instance, **kwargs):
+    # También los calendarios anteriores, si la reserva cambió de docente o de aula
+    usuario_anterior, aula_anterior = instance._calendarios_guardados
+    usuarios = {instance.id_usuario_id, usuario_anterior} - {None}
+    aulas = {instance.id_aula_id, aula_anterior} - {None}
+    instance._calendarios_guardados = (instance.id_usuario_id, instance.id_aula_id)
+
+    def invalidar_calendarios():
+        invalidar(DOCENTE, *usuarios)
+        invalidar(AULA, *aulas)
+
+    transaction.on_commit(invalidar_calendarios)
@@ -0,0 +1,124 @@
+"""
+Devoluciones de equipos: finalizar una reserva y detectar las vencidas.
+
+finalizar_reserva() es lo que hace api_finalizar_reserva: devuelve los equipos
+a 'Disponible' (sumándoles las horas de uso), sella la devolución y marca la
+reserva 'Finalizada'. Si el administrador lo olvida, los equipos quedan
+'En uso' y desaparecen de los racks disponibles.
+
+detectar() (comando `detectar_vencidas`, programado cada pocos minutos) busca
+las reservas Aprobadas que ya terminaron y no tienen fecha_devolucion con el
+índice (estado_reserva, fecha_uso, hora_fin), las marca con un update()
+masivo (devolucion_vencida) y, pasadas VENCIDAS_GRACIA_HORAS desde su hora
+de fin (0: nunca), las finaliza solas. El total de vencidas pendientes queda
+en la cache para el dashboard (contar()); se recalcula cuando cambia una
+reserva marcada.
+"""
+
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import F, Q
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from Gestion_Equipos.eventos import publicar_equipos
+from Gestion_Equipos.fragmentos import invalidar_tablas
+from Gestion_Equipos.models import AsignacionEquipo, Equipo, EstadoEquipo, Reserva
+from Gestion_Equipos.uso_equipos import horas_reserva
+
+
+CLAVE_TOTAL = 'reservas_vencidas:total'
+
+NOTA_FINALIZADA_SOLA = 'Finalizada automáticamente: no se registró la devolución de los equipos.'
+
+
+def finalizar_reserva(reserva):
+    """
+    Devuelve los equipos de una reserva Aprobada y la marca 'Finalizada'. Usar
+    dentro de una transacción, con la reserva leída con select_for_update().
+    """
+    equipo_ids = list(AsignacionEquipo.objects.filter(id_reserva=reserva).values_list('id_equipo_id', flat=True))
+
+    # Sellar la fecha de devolución si está vacía
+    if not reserva.fecha_devolucion:
+        reserva.fecha_devolucion = timezone.now()
+
+    # Equipos a 'Disponible' sumándoles las horas de uso (las asignaciones quedan para el historial)
+    estado_disponible, _ = EstadoEquipo.objects.get_or_create(nom_estado='Disponible')
+    Equipo.objects.filter(id_equipo__in=equipo_ids).update(
+        id_estado_equipo=estado_disponible,
+        horas_uso=F('horas_uso') + horas_reserva(reserva)
+    )
+    publicar_equipos(equipo_ids)
+
+    reserva.estado_reserva = 'Finalizada'
+    reserva.save()
+    return equipo_ids
+
+
+# ======================================================
+# DETECCIÓN DE VENCIDAS
+# ======================================================
+
+def vencidas(ahora=None):
+    """Aprobadas cuya hora de fin ya pasó y sin devolución registrada."""
+    ahora = timezone.localtime(ahora)
+    # Dos rangos sobre el índice (estado_reserva, fecha_uso, hora_fin)
+    terminadas = Q(fecha_uso__lt=ahora.date()) | Q(fecha_uso=ahora.date(), hora_fin__lte=ahora.time())
+    return Reserva.objects.filter(terminadas, estado_reserva='Aprobada', fecha_devolucion__isnull=True)
+
+
+def detectar(ahora=None, gracia_horas=None):
+    """
+    Marca las vencidas nuevas y finaliza las que superan la gracia. Devuelve
+    {'marcadas', 'finalizadas', 'pendientes'}.
+    """
+    ahora = timezone.localtime(ahora)
+    if gracia_horas is None:
+        gracia_horas = getattr(settings, 'VENCIDAS_GRACIA_HORAS', 0)
+
+    marcadas = vencidas(ahora).filter(devolucion_vencida=False).update(devolucion_vencida=True)
+    if marcadas:
+        # update() no envía señales: la tabla de aprobadas del dashboard muestra la marca
+        invalidar_tablas('aprobadas')
+
+    finalizadas = 0
+    if gracia_horas:
+        limite = ahora - timedelta(hours=gracia_horas)
+        for reserva_id in list(vencidas(limite).order_by('id_reserva').values_list('id_reserva', flat=True)):
+            with transaction.atomic():
+                # Bloquear y volver a comprobar: el administrador pudo finalizarla mientras tanto
+                reserva = vencidas(limite).select_for_update().filter(id_reserva=reserva_id).first()
+                if reserva is None:
+                    continue
+                nota = '\n'.join(filter(None, [reserva.observaciones, NOTA_FINALIZADA_SOLA]))
+                reserva.observaciones = nota
+                reserva.devolucion_vencida = True
+                finalizar_reserva(reserva)
+            finalizadas += 1
+
+    pendientes = vencidas(ahora).count()
+    cache.set(CLAVE_TOTAL, pendientes, None)
+    return {'marcadas': marcadas, 'finalizadas': finalizadas, 'pendientes': pendientes}
+
+
+def contar():
+    """Vencidas marcadas que siguen sin devolución (desde la cache)."""
+    total = cache.get(CLAVE_TOTAL)
+    if total is None:
+        total = Reserva.objects.filter(
+            estado_reserva='Aprobada', devolucion_vencida=True, fecha_devolucion__isnull=True
+        ).count()
+        cache.set(CLAVE_TOTAL, total, getattr(settings, 'VENCIDAS_CACHE_SEGUNDOS', 300))
+    return total
+
+
+@receiver(post_save, sender=Reserva)
+def _reserva_guardada(sender, instance, **kwargs):
+    # Finalizada o con devolución registrada: el total baja
+    if instance.devolucion_vencida:
+        transaction.on_commit(lambda: cache.delete(CLAVE_TOTAL))
@@ -0,0 +1,186 @@
+"""
+Eventos en vivo para el dashboard del administrador (ver views.api.eventos_dashboard).
+
+Pub/sub mínimo sobre la cache de Django: cada evento recibe un número
+correlativo (cache.incr) y se guarda en su propia clave durante
+EVENTOS_RETENCION_SEGUNDOS. Los suscriptores leen el contador y piden solo
+los eventos nuevos, así que un cliente que se reconecta con Last-Event-ID
+recupera lo que se perdió. Con Redis (ver settings/prod.py) los eventos llegan
+a todos los workers; con LocMemCache solo a los del mismo proceso.
+
+Con la tabla de cache de Django (prod sin REDIS_URL) incr() es un get + set y
+dos publicaciones simultáneas podrían recibir el mismo número: ahí el
+registro va a Tb_EVENTO_DASHBOARD y el número es su ID autoincremental
+(EVENTOS_EN_BD fuerza la elección). Un ID más alto puede confirmarse antes
+que uno más bajo, así que la lectura se detiene en un hueco reciente hasta
+que se confirme o pasen HUECO_SEGUNDOS.
+
+Los eventos se publican desde señales de los modelos al confirmarse la
+transacción y llevan solo IDs: el stream consulta los datos a mostrar una vez
+por lote, no cada escritura. Las actualizaciones masivas (QuerySet.update,
+bulk_update) no envían señales; esas vistas llaman a publicar_equipos().
+"""
+
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache, caches
+from django.core.cache.backends.db import BaseDatabaseCache
+from django.db import transaction
+from django.db.models import Max
+from django.db.models.signals import post_init, post_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from Gestion_Equipos.models import Equipo, EventoDashboard, Reserva
+from Gestion_Equipos.senales import estado_reserva_cambiado
+
+
+CLAVE_SECUENCIA = 'eventos_dashboard:secuencia'
+
+# Registro en la BD: espera máxima por un ID que aún no se confirma
+HUECO_SEGUNDOS = 2
+
+# Estado de la reserva -> tipo de evento
+EVENTOS_RESERVA = {
+    'Aprobada': 'reserva_aprobada',
+    'Rechazada': 'reserva_rechazada',
+    'Finalizada': 'reserva_finalizada',
+}
+
+
+def _clave_evento(numero):
+    return f'eventos_dashboard:{numero}'
+
+
+def _retencion():
+    return getattr(settings, 'EVENTOS_RETENCION_SEGUNDOS', 600)
+
+
+def en_bd():
+    """True si el registro va a Tb_EVENTO_DASHBOARD (la cache no numera de forma atómica)."""
+    forzado = getattr(settings, 'EVENTOS_EN_BD', None)
+    if forzado is not None:
+        return forzado
+    return isinstance(caches['default'], BaseDatabaseCache)
+
+
+def publicar(tipo, **datos):
+    """Agrega un evento al registro y devuelve su número."""
+    if en_bd():
+        evento = EventoDashboard.objects.create(tipo=tipo, datos=datos)
+        EventoDashboard.objects.filter(fecha__lt=evento.fecha - timedelta(seconds=_retencion())).delete()
+        return evento.id_evento
+
+    cache.add(CLAVE_SECUENCIA, 0, None)
+    numero = cache.incr(CLAVE_SECUENCIA)
+    cache.set(_clave_evento(numero), {'id': numero, 'tipo': tipo, **datos}, _retencion())
+    return numero
+
+
+def publicar_al_confirmar(tipo, **datos):
+    """Publica cuando la transacción actual se confirma (nada si se revierte)."""
+    transaction.on_commit(lambda: publicar(tipo, **datos))
+
+
+def publicar_equipos(equipo_ids):
+    """Para cambios de estado hechos con update()/bulk_update(), que no envían señales."""
+    equipo_ids = list(equipo_ids)
+    if equipo_ids:
+        publicar_al_confirmar('equipo_estado', equipos=equipo_ids)
+
+
+def ultimo_evento():
+    """Número del último evento publicado (la página lo pasa al abrir el stream)."""
+    if en_bd():
+        return EventoDashboard.objects.aggregate(ultimo=Max('id_evento'))['ultimo'] or 0
+    return cache.get(CLAVE_SECUENCIA, 0)
+
+
+async def aultimo_evento():
+    if en_bd():
+        return (await EventoDashboard.objects.aaggregate(ultimo=Max('id_evento')))['ultimo'] or 0
+    return await cache.aget(CLAVE_SECUENCIA, 0)
+
+
+async def _aeventos_bd(ultimo, maximo):
+    filas = [
+        fila async for fila in EventoDashboard.objects.filter(id_evento__gt=ultimo).order_by(
+            'id_evento'
+        ).values_list('id_evento', 'tipo', 'datos', 'fecha')[:maximo]
+    ]
+    if not filas:
+        return [], True
+
+    # La retención borra por antigüedad: si el último entregado ya no está, pudo borrarse algo posterior
+    perdidos = bool(ultimo) and filas[0][0] > ultimo + 1 and not await EventoDashboard.objects.filter(
+        id_evento=ultimo
+    ).aexists()
+
+    eventos, anterior = [], ultimo
+    reciente = timezone.now() - timedelta(seconds=HUECO_SEGUNDOS)
+    for id_evento, tipo, datos, fecha in filas:
+        if id_evento != anterior + 1 and fecha > reciente and not perdidos:
+            break  # el ID del hueco puede estar aún sin confirmar: se lee en la próxima vuelta
+        eventos.append({'id': id_evento, 'tipo': tipo, **datos})
+        anterior = id_evento
+    return eventos, not perdidos
+
+
+async def aeventos_desde(ultimo):
+    """
+    Eventos posteriores a `ultimo`, en orden. Devuelve (eventos, completo):
+    completo es False si alguno ya expiró y el cliente debe recargar la página.
+    """
+    if en_bd():
+        return await _aeventos_bd(ultimo, getattr(settings, 'EVENTOS_MAX_LOTE', 200))
+
+    actual = await aultimo_evento()
+    if actual <= ultimo:
+        return [], True
+
+    maximo = getattr(settings, 'EVENTOS_MAX_LOTE', 200)
+    numeros = range(max(ultimo + 1, actual - maximo + 1), actual + 1)
+    guardados = await cache.aget_many([_clave_evento(numero) for numero in numeros])
+
+    eventos = []
+    perdidos = numeros.start > ultimo + 1
+    for numero in numeros:
+        evento = guardados.get(_clave_evento(numero))
+        if evento is not None:
+            eventos.append(evento)
+        elif eventos or numero == actual:
+            break  # publicado con incr() pero aún sin set(): se lee en la próxima vuelta
+        else:
+            perdidos = True  # ya expiró
+    return eventos, not perdidos
+
+
+# ======================================================
+# SEÑALES
+# ======================================================
+
+@receiver(post_save, sender=Reserva)
+def _reserva_creada(sender, instance, created, **kwargs):
+    if created:
+        publicar_al_confirmar('reserva_creada', reserva=instance.id_reserva, estado=instance.estado_reserva)
+
+
+@receiver(estado_reserva_cambiado)
+def _estado_reserva_cambiado(sender, reserva, anterior, **kwargs):
+    estado = reserva.estado_reserva
+    if estado in EVENTOS_RESERVA:
+        publicar_al_confirmar(EVENTOS_RESERVA[estado], reserva=reserva.id_reserva, estado=estado)
+
+
+@receiver(post_init, sender=Equipo)
+def _equipo_cargado(sender, instance, **kwargs):
+    # __dict__: no disparar la consulta de un campo diferido (.only()/.defer())
+    instance._estado_guardado = instance.__dict__.get('id_estado_equipo_id')
+
+
+@receiver(post_save, sender=Equipo)
+def _equipo_guardado(sender, instance, created, **kwargs):
+    if created or instance.id_estado_equipo_id != instance._estado_guardado:
+        publicar_al_confirmar('equipo_estado', equipos=[instance.id_equipo])
+    instance._estado_guardado = instance.id_estado_equipo_id
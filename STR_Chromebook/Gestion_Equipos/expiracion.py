@@ -0,0 +1,61 @@
+"""
+Expiración de reservas Pendientes que nadie aprobó ni rechazó a tiempo.
+
+expirar() (comando `expirar_pendientes`, programado una vez al día) pasa a
+'Expirada' todas las Pendientes con fecha de uso anterior a hoy con un solo
+UPDATE (índice estado_reserva, fecha_uso), así la cola de pendientes y su
+contador solo muestran lo que el administrador todavía puede atender.
+
+update() no envía señales: aquí se hace lo que harían con save() en bloque.
+Las notificaciones de los docentes se insertan con bulk_create en la misma
+transacción, y al confirmarse se invalidan las tablas de los dashboards y los
+calendarios afectados y se pide a los dashboards abiertos que recarguen.
+"""
+
+from django.db import transaction
+from django.utils import timezone
+
+from Gestion_Equipos import calendario
+from Gestion_Equipos.eventos import publicar
+from Gestion_Equipos.fragmentos import TABLAS_ADMINISTRADOR, invalidar_tablas, tabla_proximas
+from Gestion_Equipos.models import Reserva
+from Gestion_Equipos.notificaciones import notificar
+
+
+ESTADO_EXPIRADA = 'Expirada'
+
+
+def expirables(hoy=None):
+    """Pendientes cuya fecha de uso ya pasó."""
+    return Reserva.objects.filter(estado_reserva='Pendiente', fecha_uso__lt=hoy or timezone.localdate())
+
+
+def expirar(hoy=None):
+    """Expira las Pendientes vencidas y avisa a sus docentes. Devuelve cuántas expiró."""
+    with transaction.atomic():
+        # Bloquea las filas: una aprobación simultánea espera y ya no las ve Pendientes
+        reservas = list(
+            expirables(hoy).select_for_update()
+            .only('id_reserva', 'id_usuario_id', 'id_aula_id', 'fecha_uso', 'estado_reserva', 'motivo_rechazo')
+        )
+        if not reservas:
+            return 0
+
+        # Exactamente las filas bloqueadas y notificadas, no un nuevo filtro
+        Reserva.objects.filter(pk__in=[r.pk for r in reservas]).update(estado_reserva=ESTADO_EXPIRADA)
+        for reserva in reservas:
+            reserva.estado_reserva = ESTADO_EXPIRADA
+        notificar(reservas)
+
+        usuarios = {r.id_usuario_id for r in reservas}
+        aulas = {r.id_aula_id for r in reservas}
+
+        def al_confirmar():
+            invalidar_tablas(TABLAS_ADMINISTRADOR['Pendiente'], *(tabla_proximas(u) for u in usuarios))
+            calendario.invalidar(calendario.DOCENTE, *usuarios)
+            calendario.invalidar(calendario.AULA, *aulas)
+            publicar('recargar')
+
+        transaction.on_commit(al_confirmar)
+    return len(reservas)
+
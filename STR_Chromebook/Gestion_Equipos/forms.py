@@ -1,7 +1,8 @@
 from django import forms
-from .models import Reserva, EvidenciaReserva
+from django.conf import settings
+from .models import Reserva, SerieReserva, EvidenciaReserva
 from core.models import Asignatura, Carrera, Aula, Bloque
-from datetime import time
+from datetime import time, timedelta
 
 class ReservaForm(forms.ModelForm):
     """Formulario para crear una nueva reserva de Chromebooks"""
@@ -57,7 +58,7 @@ class ReservaForm(forms.ModelForm):
     )
     
     id_aula = forms.ModelChoiceField(
-        queryset=Aula.objects.all(),
+        queryset=Aula.objects.select_related('id_bloque'),
         widget=forms.Select(attrs={'class': 'select'}),
         label='Aula',
         empty_label='Seleccione un aula'
@@ -98,6 +99,29 @@ class ReservaForm(forms.ModelForm):
         label='Teléfono de Contacto'
     )
     
+    # Repetición (no son campos del modelo: ver Gestion_Equipos.recurrencia.crear_serie)
+    repetir = forms.ChoiceField(
+        choices=[('', 'No repetir')] + SerieReserva.FRECUENCIA_CHOICES,
+        widget=forms.Select(attrs={'id': 'id_repetir'}),
+        label='Repetir',
+        required=False
+    )
+    
+    repetir_hasta = forms.DateField(
+        widget=forms.DateInput(attrs={
+            'type': 'date',
+            'class': 'input'
+        }),
+        label='Repetir hasta',
+        required=False
+    )
+    
+    omitir_feriados = forms.BooleanField(
+        initial=True,
+        label='Omitir feriados',
+        required=False
+    )
+    
     class Meta:
         model = Reserva
         fields = ['fecha_uso', 'hora_inicio', 'hora_fin', 'id_asignatura', 
@@ -134,6 +158,17 @@ class ReservaForm(forms.ModelForm):
             if hora_fin <= hora_inicio:
                 raise forms.ValidationError('La hora de fin debe ser posterior a la hora de inicio.')
         
+        fecha_uso = cleaned_data.get('fecha_uso')
+        repetir_hasta = cleaned_data.get('repetir_hasta')
+        if cleaned_data.get('repetir') and fecha_uso:
+            max_dias = getattr(settings, 'RESERVAS_SERIE_MAX_DIAS', 182)
+            if not repetir_hasta:
+                self.add_error('repetir_hasta', 'Indique hasta qué fecha se repite la reserva.')
+            elif repetir_hasta <= fecha_uso:
+                self.add_error('repetir_hasta', 'La fecha final debe ser posterior a la fecha de uso.')
+            elif repetir_hasta > fecha_uso + timedelta(days=max_dias):
+                self.add_error('repetir_hasta', f'Una serie puede durar como máximo {max_dias} días.')
+        
         return cleaned_data
     
 # ======================================================
@@ -0,0 +1,87 @@
+"""
+Versiones de las tablas de los dashboards para la cache de fragmentos.
+
+Las tablas de reservas de templates/administrador/dashboard.html (pendientes,
+aprobadas, rechazadas) y las próximas reservas de templates/docente/dashboard.html
+se guardan con {% cache %} usando la versión de sus datos como parte de la
+clave. La vista solo lee las versiones (un get_many a la cache) y deja los
+querysets perezosos: con el fragmento vigente no se consulta ni se renderiza
+esa tabla.
+
+Las señales de Reserva cambian la versión de las tablas afectadas al
+confirmarse la transacción (como los eventos en vivo, ver eventos.py). Los
+update() masivos de Reserva no envían señales: llamar a invalidar_tablas().
+Los nombres de docentes, carreras y aulas que muestran las filas no cambian la
+versión; esos cambios aparecen cuando el fragmento expira
+(DASHBOARD_FRAGMENTOS_SEGUNDOS).
+"""
+
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from Gestion_Equipos.models import Reserva
+from Gestion_Equipos.senales import estado_reserva_cambiado
+
+
+# Estado de la reserva -> tabla del dashboard del administrador
+TABLAS_ADMINISTRADOR = {
+    'Pendiente': 'pendientes',
+    'Aprobada': 'aprobadas',
+    'Rechazada': 'rechazadas',
+}
+
+
+def tabla_proximas(usuario_id):
+    """Tabla de próximas reservas del dashboard de un docente."""
+    return f'proximas:{usuario_id}'
+
+
+def _clave_version(tabla):
+    return f'dashboard_version:{tabla}'
+
+
+def duracion():
+    """Segundos que vive un fragmento aunque su versión no cambie."""
+    return getattr(settings, 'DASHBOARD_FRAGMENTOS_SEGUNDOS', 300)
+
+
+def versiones(*tablas):
+    """{tabla: versión} en una lectura de la cache; crea las que falten."""
+    claves = {tabla: _clave_version(tabla) for tabla in tablas}
+    en_cache = cache.get_many(claves.values())
+    nuevas = {clave: time.time_ns() for clave in claves.values() if clave not in en_cache}
+    if nuevas:
+        cache.set_many(nuevas, None)
+    return {tabla: en_cache.get(clave, nuevas.get(clave)) for tabla, clave in claves.items()}
+
+
+def invalidar_tablas(*tablas):
+    """Cambia la versión de estas tablas: su próximo renderizado consulta de nuevo."""
+    version = time.time_ns()
+    cache.set_many({_clave_version(tabla): version for tabla in tablas}, None)
+
+
+def _invalidar_al_confirmar(reserva, *estados):
+    tablas = [TABLAS_ADMINISTRADOR[estado] for estado in estados if estado in TABLAS_ADMINISTRADOR]
+    tablas.append(tabla_proximas(reserva.id_usuario_id))
+    transaction.on_commit(lambda: invalidar_tablas(*tablas))
+
+
+# ======================================================
+# SEÑALES
+# ======================================================
+
+@receiver([post_save, post_delete], sender=Reserva)
+def _reserva_modificada(sender, instance, **kwargs):
+    _invalidar_al_confirmar(instance, instance.estado_reserva)
+
+
+@receiver(estado_reserva_cambiado)
+def _reserva_cambio_de_tabla(sender, reserva, anterior, **kwargs):
+    # La tabla del estado nuevo ya la invalida post_save; aquí, la que deja
+    _invalidar_al_confirmar(reserva, anterior)
@@ -0,0 +1,35 @@
+"""
+Actualiza las horas de uso por equipo y mes (UsoEquipoMensual) desde la marca
+de agua, ver Gestion_Equipos.uso_equipos. Pensado para ejecutarse programado,
+por ejemplo con cron cada noche:
+
+    30 2 * * *  cd /srv/STR_Chromebook && python manage.py actualizar_uso_equipos
+
+La primera ejecución (o con --completo) recorre todo el historial.
+"""
+
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from Gestion_Equipos import uso_equipos
+
+
+class Command(BaseCommand):
+    help = 'Recalcula las horas de uso de cada equipo desde la última actualización.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--completo', action='store_true',
+                            help='Recalcula todo el historial en lugar de solo los días desde la marca de agua.')
+
+    def handle(self, *args, **options):
+        if uso_equipos.np is None:
+            raise CommandError("La librería numpy no está instalada. Ejecuta: pip install numpy")
+
+        inicio = time.perf_counter()
+        resultado = uso_equipos.actualizar(completo=options['completo'])
+        desde = resultado['desde'] or 'el inicio del historial'
+        self.stdout.write(self.style.SUCCESS(
+            f"Uso de equipos recalculado desde {desde}: {resultado['filas']} meses-equipo, "
+            f"{resultado['equipos']} equipos con cambios ({time.perf_counter() - inicio:.2f} s)."
+        ))
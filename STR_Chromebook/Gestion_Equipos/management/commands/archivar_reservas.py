@@ -0,0 +1,36 @@
+"""
+Mueve a las tablas históricas las reservas terminadas de hace más de
+ARCHIVO_PERIODOS periodos, con sus asignaciones, supervisores y evidencias;
+ver Gestion_Equipos.archivo. Pensado para ejecutarse programado, por ejemplo
+con cron cada noche (solo hay trabajo al empezar un periodo nuevo):
+
+    30 2 * * *  cd /srv/STR_Chromebook && python manage.py archivar_reservas
+"""
+
+from django.core.management.base import BaseCommand
+
+from Gestion_Equipos import archivo
+
+
+class Command(BaseCommand):
+    help = 'Archiva las reservas terminadas de periodos anteriores en las tablas históricas.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--periodos', type=int, default=None,
+                            help='Periodos que se mantienen en las tablas vivas (por defecto ARCHIVO_PERIODOS).')
+        parser.add_argument('--lote', type=int, default=None,
+                            help='Reservas por transacción (por defecto ARCHIVO_LOTE).')
+        parser.add_argument('--limite', type=int, default=None,
+                            help='Máximo de reservas a archivar en esta ejecución.')
+        parser.add_argument('--simular', action='store_true',
+                            help='Solo cuenta las reservas que se archivarían.')
+
+    def handle(self, *args, **options):
+        corte = archivo.corte(periodos=options['periodos'])
+        if options['simular']:
+            total = archivo.archivables(periodos=options['periodos']).count()
+            self.stdout.write(f'{total} reservas anteriores al {corte:%d/%m/%Y} se archivarían.')
+            return
+
+        total = archivo.archivar(periodos=options['periodos'], lote=options['lote'], limite=options['limite'])
+        self.stdout.write(self.style.SUCCESS(f'{total} reservas anteriores al {corte:%d/%m/%Y} archivadas.'))
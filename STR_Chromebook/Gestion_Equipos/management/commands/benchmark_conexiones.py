@@ -0,0 +1,124 @@
+"""
+Mide cuánto ahorra por petición reutilizar la conexión a la base de datos
+(CONN_MAX_AGE > 0) frente a abrir una conexión nueva en cada petición.
+
+Ejecuta las vistas GET con presupuesto de consultas declarado dos veces:
+una con CONN_MAX_AGE=0 y otra con conexiones persistentes. Entre petición
+y petición se llama a close_old_connections(), igual que hace el handler
+WSGI/ASGI de Django (el cliente de pruebas no lo hace por sí solo).
+
+    python manage.py seed_benchmark --scale 0.05
+    python manage.py benchmark_conexiones --repeticiones 100
+    STR_ENTORNO=bench python manage.py benchmark_conexiones --max-age 300
+"""
+
+import json
+import logging
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections, connection
+from django.test import Client
+
+from core.metricas import percentil
+from core.testing import ejecutar_peticion, iniciar_sesion
+from Gestion_Equipos.management.commands.benchmark_vistas import cargar_datos, escenarios
+
+
+class Command(BaseCommand):
+    help = 'Compara la latencia por petición con y sin reutilización de conexiones a la BD.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeticiones', type=int, default=50,
+                            help='Peticiones medidas por vista y modo.')
+        parser.add_argument('--max-age', type=int, default=300,
+                            help='CONN_MAX_AGE del modo con conexiones persistentes.')
+        parser.add_argument('--filtro', default='',
+                            help='Medir solo las vistas cuyo nombre contenga este texto.')
+        parser.add_argument('--clave', default='bench',
+                            help='Contraseña de los usuarios generados por seed_benchmark.')
+        parser.add_argument('--host', default='localhost',
+                            help='Cabecera Host de las peticiones (debe estar en ALLOWED_HOSTS).')
+        parser.add_argument('--salida', help='Archivo JSON donde guardar los resultados.')
+
+    def handle(self, *args, **options):
+        logging.getLogger('str_chromebook.acceso').setLevel(logging.WARNING)
+        datos = cargar_datos(options['clave'])
+        original = dict(connection.settings_dict)
+
+        # Sin transacción que revertir: solo los GET que no necesitan crear datos (preparar)
+        vistas = {
+            nombre: presupuesto for nombre, presupuesto in escenarios().items()
+            if presupuesto.metodo == 'get' and presupuesto.preparar is None and options['filtro'] in nombre
+        }
+
+        self.stdout.write(
+            f"Motor: {connection.vendor}  |  apertura de conexión: {self.medir_conexion():.2f}ms (media de 20)\n"
+        )
+        self.stdout.write(
+            f"{'vista':32} {'p50 sin reuso':>14} {'p50 con reuso':>14} {'ahorro p50':>11} {'ahorro media':>13}"
+        )
+
+        resultados = {}
+        try:
+            for nombre, presupuesto in vistas.items():
+                sin_reuso = self.medir(nombre, presupuesto, datos, options, max_age=0, health=False)
+                con_reuso = self.medir(nombre, presupuesto, datos, options, max_age=options['max_age'], health=True)
+                resultados[nombre] = {'sin_reuso': sin_reuso, 'con_reuso': con_reuso}
+                self.stdout.write(
+                    f"{nombre:32} {sin_reuso['p50_ms']:12.2f}ms {con_reuso['p50_ms']:12.2f}ms "
+                    f"{sin_reuso['p50_ms'] - con_reuso['p50_ms']:9.2f}ms "
+                    f"{sin_reuso['media_ms'] - con_reuso['media_ms']:11.2f}ms"
+                )
+        finally:
+            connection.close()
+            connection.settings_dict.update(original)
+
+        if resultados:
+            # Mediana entre vistas: las vistas lentas tienen más ruido que el propio ahorro
+            ahorros = sorted(r['sin_reuso']['p50_ms'] - r['con_reuso']['p50_ms'] for r in resultados.values())
+            self.stdout.write(self.style.SUCCESS(
+                f"\nAhorro típico por petición con CONN_MAX_AGE={options['max_age']}: "
+                f"{percentil(ahorros, 50):.2f}ms (mediana del ahorro p50 entre vistas)"
+            ))
+
+        if options['salida']:
+            with open(options['salida'], 'w', encoding='utf-8') as archivo:
+                json.dump({'base_datos': connection.vendor, 'max_age': options['max_age'],
+                           'vistas': resultados}, archivo, indent=2, ensure_ascii=False)
+
+    def medir_conexion(self, veces=20):
+        tiempos = []
+        for _ in range(veces):
+            connection.close()
+            inicio = time.perf_counter()
+            connection.ensure_connection()
+            tiempos.append(time.perf_counter() - inicio)
+        return sum(tiempos) / len(tiempos) * 1000
+
+    def medir(self, nombre, presupuesto, datos, options, max_age, health):
+        connection.close()
+        connection.settings_dict['CONN_MAX_AGE'] = max_age
+        connection.settings_dict['CONN_HEALTH_CHECKS'] = health
+
+        client = Client(HTTP_HOST=options['host'])
+        if presupuesto.rol:
+            usuario = datos['administrador' if presupuesto.rol == 'administrador' else 'docente']
+            iniciar_sesion(client, usuario, presupuesto.rol)
+        close_old_connections()
+
+        tiempos = []
+        for _ in range(options['repeticiones']):
+            inicio = time.perf_counter()
+            # request_started / request_finished del handler real
+            close_old_connections()
+            ejecutar_peticion(client, nombre, presupuesto, datos)
+            close_old_connections()
+            tiempos.append((time.perf_counter() - inicio) * 1000)
+
+        tiempos.sort()
+        return {
+            'p50_ms': round(percentil(tiempos, 50), 3),
+            'p95_ms': round(percentil(tiempos, 95), 3),
+            'media_ms': round(sum(tiempos) / len(tiempos), 3),
+        }
@@ -0,0 +1,107 @@
+"""
+Compara el costo de cada motor de sesiones (SESION_MOTOR) en el login, los
+dashboards y una acción AJAX que deja un mensaje (aprobar_reserva).
+
+Por cada motor y vista mide p50/p95 y cuántas consultas van a django_session.
+El login se mide con un cliente nuevo en cada repetición (sesión nueva);
+aprobar_reserva se ejecuta dentro de una transacción que se revierte.
+
+    python manage.py seed_benchmark --scale 0.05
+    python manage.py benchmark_sesiones --repeticiones 30
+"""
+
+import json
+import logging
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections, transaction
+from django.test import Client
+from django.test.utils import override_settings
+
+from core.metricas import percentil
+from core.middleware import RegistroConsultas
+from core.testing import ejecutar_peticion, iniciar_sesion, preparar_datos
+from Gestion_Equipos.management.commands.benchmark_vistas import cargar_datos, escenarios
+
+VISTAS = ['login', 'dashboard_docente', 'dashboard_administrador', 'aprobar_reserva']
+
+
+class Command(BaseCommand):
+    help = 'Mide login, dashboards y una acción AJAX con cada motor de sesiones.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeticiones', type=int, default=20,
+                            help='Peticiones medidas por vista y motor.')
+        parser.add_argument('--motores', default=','.join(settings.SESION_MOTORES),
+                            help='Motores a comparar, separados por coma (db,cached_db,cache,cookie).')
+        parser.add_argument('--clave', default='bench',
+                            help='Contraseña de los usuarios generados por seed_benchmark.')
+        parser.add_argument('--host', default='localhost',
+                            help='Cabecera Host de las peticiones (debe estar en ALLOWED_HOSTS).')
+        parser.add_argument('--salida', help='Archivo JSON donde guardar los resultados.')
+
+    def handle(self, *args, **options):
+        logging.getLogger('str_chromebook.acceso').setLevel(logging.WARNING)
+        datos = cargar_datos(options['clave'])
+        presupuestos = escenarios()
+
+        motores = [motor.strip() for motor in options['motores'].split(',') if motor.strip()]
+        desconocidos = set(motores) - set(settings.SESION_MOTORES)
+        if desconocidos:
+            raise CommandError(f'Motores desconocidos: {", ".join(sorted(desconocidos))}')
+
+        self.stdout.write(f"{'motor':10} {'vista':26} {'p50':>9} {'p95':>9} {'consultas':>10} {'a sesión':>9}")
+        resultados = {}
+        for motor in motores:
+            with override_settings(SESSION_ENGINE=settings.SESION_MOTORES[motor]):
+                cache.clear()
+                resultados[motor] = {}
+                for nombre in VISTAS:
+                    r = self.medir(nombre, presupuestos[nombre], datos, options)
+                    resultados[motor][nombre] = r
+                    self.stdout.write(
+                        f"{motor:10} {nombre:26} {r['p50_ms']:7.2f}ms {r['p95_ms']:7.2f}ms "
+                        f"{r['consultas']:10d} {r['consultas_sesion']:9d}"
+                    )
+
+        if options['salida']:
+            with open(options['salida'], 'w', encoding='utf-8') as archivo:
+                json.dump(resultados, archivo, indent=2, ensure_ascii=False)
+            self.stdout.write(self.style.SUCCESS(f"Resultados guardados en {options['salida']}"))
+
+    def medir(self, nombre, presupuesto, datos, options):
+        client = None
+        tiempos = []
+        for _ in range(options['repeticiones']):
+            # El login siempre parte de una sesión nueva; el resto reutiliza la del usuario
+            if client is None or nombre == 'login':
+                client = Client(HTTP_HOST=options['host'])
+                if presupuesto.rol:
+                    usuario = datos['administrador' if presupuesto.rol == 'administrador' else 'docente']
+                    iniciar_sesion(client, usuario, presupuesto.rol)
+
+            registro = RegistroConsultas()
+            with transaction.atomic():
+                datos_vista = preparar_datos(presupuesto, datos)
+                with ExitStack() as stack:
+                    for conexion in connections.all():
+                        stack.enter_context(conexion.execute_wrapper(registro))
+                    inicio = time.perf_counter()
+                    ejecutar_peticion(client, nombre, presupuesto, datos_vista)
+                    tiempos.append((time.perf_counter() - inicio) * 1000)
+                transaction.set_rollback(True)
+
+        tiempos.sort()
+        return {
+            'p50_ms': round(percentil(tiempos, 50), 3),
+            'p95_ms': round(percentil(tiempos, 95), 3),
+            'consultas': registro.total,
+            'consultas_sesion': sum(
+                datos_sql['cantidad'] for sql, datos_sql in registro.por_consulta.items()
+                if 'django_session' in sql
+            ),
+        }
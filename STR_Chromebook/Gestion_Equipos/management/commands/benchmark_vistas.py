@@ -0,0 +1,201 @@
+"""
+Mide la latencia (p50/p95), el tiempo de renderizado de plantillas y el
+número de consultas de cada vista.
+
+Recorre todas las URLs con presupuesto de consultas declarado en
+core/presupuestos.py y Gestion_Equipos/presupuestos.py, ejecutándolas con el cliente de
+pruebas de Django contra la base de datos configurada (SQLite o MySQL,
+según los settings activos). Las vistas que modifican datos se ejecutan
+dentro de una transacción que se revierte.
+
+    python manage.py seed_benchmark --scale 0.05
+    python manage.py benchmark_vistas --salida bench_antes.json
+    ... cambios ...
+    python manage.py benchmark_vistas --salida bench_despues.json --comparar bench_antes.json
+"""
+
+import json
+import logging
+import subprocess
+import time
+from contextlib import ExitStack
+from datetime import date, datetime
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections, transaction
+from django.db.models import Count, Q
+from django.test import Client
+
+from core import presupuestos as presupuestos_core
+from core.metricas import percentil
+from core.middleware import RegistroConsultas
+from core.models import Usuario, Carrera, Bloque, Rack
+from core.testing import ejecutar_peticion, iniciar_sesion, preparar_datos
+from Gestion_Equipos import presupuestos as presupuestos_gestion
+from Gestion_Equipos.models import Reserva, Equipo
+
+
+def tiempo_plantillas(response):
+    """Métrica tpl (ms) de la cabecera Server-Timing (core.middleware.MetricasPeticionMiddleware)."""
+    for metrica in response.get('Server-Timing', '').split(','):
+        nombre, _, resto = metrica.strip().partition(';')
+        if nombre == 'tpl':
+            return float(resto.partition('dur=')[2].split(';')[0])
+    return 0.0
+
+
+def escenarios():
+    """Todas las URLs con presupuesto declarado, en el orden de los tests."""
+    return {**presupuestos_core.PRESUPUESTOS, **presupuestos_gestion.PRESUPUESTOS}
+
+
+def cargar_datos(clave):
+    """
+    Construye, a partir de la base de datos actual, el mismo diccionario que
+    core.testing.crear_datos_base() para poder reutilizar los escenarios.
+    """
+    reserva_pendiente = Reserva.objects.filter(
+        estado_reserva='Pendiente'
+    ).select_related('id_usuario').order_by('-fecha_uso').first()
+    reserva_aprobada = Reserva.objects.filter(
+        estado_reserva='Aprobada', fecha_uso__gte=date.today()
+    ).order_by('fecha_uso').first()
+    administrador = Usuario.objects.filter(id_tipo_usuario__nom_rol__iexact='Administrador').first()
+    supervisor = Usuario.objects.filter(id_tipo_usuario__nom_rol='Supervisor').first()
+
+    if not all((reserva_pendiente, reserva_aprobada, administrador, supervisor)):
+        raise CommandError('Faltan datos. Ejecute primero: python manage.py seed_benchmark')
+
+    # Rack con más equipos disponibles, para que la asignación no falle
+    rack = Rack.objects.annotate(
+        disponibles=Count('equipo', filter=Q(equipo__id_estado_equipo__nom_estado__iexact='Disponible'))
+    ).order_by('-disponibles').first()
+
+    return {
+        'clave': clave,
+        'administrador': administrador,
+        'docente': reserva_pendiente.id_usuario,
+        'supervisor': supervisor,
+        'carrera': Carrera.objects.first(),
+        'bloque': Bloque.objects.first(),
+        'rack': rack,
+        'equipos': list(Equipo.objects.filter(id_rack=rack).select_related('id_estado_equipo')),
+        'reserva_pendiente': reserva_pendiente,
+        'reserva_aprobada': reserva_aprobada,
+    }
+
+
+class Command(BaseCommand):
+    help = 'Mide p50/p95 de latencia y consultas SQL por vista y guarda el resultado en JSON.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeticiones', type=int, default=20,
+                            help='Peticiones medidas por vista (además del calentamiento).')
+        parser.add_argument('--calentamiento', type=int, default=2,
+                            help='Peticiones iniciales por vista que no se cuentan.')
+        parser.add_argument('--filtro', default='',
+                            help='Medir solo las vistas cuyo nombre contenga este texto.')
+        parser.add_argument('--clave', default='bench',
+                            help='Contraseña de los usuarios generados (para medir el login).')
+        parser.add_argument('--host', default='localhost',
+                            help='Cabecera Host de las peticiones (debe estar en ALLOWED_HOSTS).')
+        parser.add_argument('--salida', default='bench_vistas.json',
+                            help='Archivo JSON donde guardar los resultados.')
+        parser.add_argument('--comparar',
+                            help='Archivo JSON de una ejecución anterior para comparar.')
+
+    def handle(self, *args, **options):
+        # Una línea JSON por petición medida no aporta nada aquí
+        logging.getLogger('str_chromebook.acceso').setLevel(logging.WARNING)
+        datos = cargar_datos(options['clave'])
+        resultados = {}
+
+        for nombre, presupuesto in escenarios().items():
+            if options['filtro'] not in nombre:
+                continue
+            resultados[nombre] = self.medir(nombre, presupuesto, datos, options)
+            r = resultados[nombre]
+            self.stdout.write(
+                f"{nombre:32} p50 {r['p50_ms']:8.2f}ms  p95 {r['p95_ms']:8.2f}ms  "
+                f"tpl {r['tpl_p50_ms']:7.2f}ms  {r['consultas']:4d} consultas  HTTP {r['status']}"
+            )
+
+        informe = {
+            'fecha': datetime.now().isoformat(timespec='seconds'),
+            'commit': self.commit_actual(),
+            'base_datos': connection.vendor,
+            'reservas': Reserva.objects.count(),
+            'equipos': Equipo.objects.count(),
+            'repeticiones': options['repeticiones'],
+            'vistas': resultados,
+        }
+        with open(options['salida'], 'w', encoding='utf-8') as archivo:
+            json.dump(informe, archivo, indent=2, ensure_ascii=False)
+        self.stdout.write(self.style.SUCCESS(f"Resultados guardados en {options['salida']}"))
+
+        if options['comparar']:
+            self.comparar(options['comparar'], resultados)
+
+    def medir(self, nombre, presupuesto, datos, options):
+        client = Client(HTTP_HOST=options['host'])
+        if presupuesto.rol:
+            usuario = datos['administrador' if presupuesto.rol == 'administrador' else 'docente']
+            iniciar_sesion(client, usuario, presupuesto.rol)
+
+        tiempos, plantillas = [], []
+        for i in range(options['calentamiento'] + options['repeticiones']):
+            registro = RegistroConsultas()
+            with transaction.atomic():
+                datos_vista = preparar_datos(presupuesto, datos)
+                with ExitStack() as stack:
+                    for conexion in connections.all():
+                        stack.enter_context(conexion.execute_wrapper(registro))
+                    inicio = time.perf_counter()
+                    response = ejecutar_peticion(client, nombre, presupuesto, datos_vista)
+                    duracion = time.perf_counter() - inicio
+                transaction.set_rollback(True)
+            if i >= options['calentamiento']:
+                tiempos.append(duracion * 1000)
+                plantillas.append(tiempo_plantillas(response))
+
+        tiempos.sort()
+        plantillas.sort()
+        return {
+            'p50_ms': round(percentil(tiempos, 50), 3),
+            'p95_ms': round(percentil(tiempos, 95), 3),
+            'media_ms': round(sum(tiempos) / len(tiempos), 3),
+            # Renderizado sin el SQL de los querysets perezosos; con la cache de
+            # fragmentos de los dashboards, el calentamiento deja las tablas cacheadas
+            'tpl_p50_ms': round(percentil(plantillas, 50), 3),
+            'consultas': registro.total,
+            'bd_ms': round(registro.duracion_ms, 3),
+            'status': response.status_code,
+        }
+
+    def comparar(self, ruta, resultados):
+        with open(ruta, encoding='utf-8') as archivo:
+            anterior = json.load(archivo)
+        self.stdout.write(f"\nComparación con {ruta} (commit {anterior.get('commit') or '?'}):")
+        for nombre, actual in resultados.items():
+            previo = anterior['vistas'].get(nombre)
+            if not previo:
+                continue
+            cambio = (actual['p50_ms'] - previo['p50_ms']) / previo['p50_ms'] * 100 if previo['p50_ms'] else 0
+            linea = (
+                f"{nombre:32} p50 {previo['p50_ms']:8.2f} -> {actual['p50_ms']:8.2f}ms ({cambio:+6.1f}%)  "
+                f"tpl {previo.get('tpl_p50_ms', 0):7.2f} -> {actual['tpl_p50_ms']:7.2f}ms  "
+                f"consultas {previo['consultas']} -> {actual['consultas']}"
+            )
+            if cambio > 10 or actual['consultas'] > previo['consultas']:
+                linea = self.style.WARNING(linea)
+            self.stdout.write(linea)
+
+    @staticmethod
+    def commit_actual():
+        try:
+            return subprocess.run(
+                ['git', 'rev-parse', '--short', 'HEAD'],
+                capture_output=True, text=True, check=True
+            ).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            return None
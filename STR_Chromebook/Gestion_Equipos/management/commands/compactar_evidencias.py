@@ -0,0 +1,34 @@
+"""
+Empaqueta por mes las fotos de evidencia de las reservas archivadas
+(recodificadas con menos calidad, con índice y miniatura) y borra las
+originales; ver Gestion_Equipos.paquetes_evidencias. Pensado para ejecutarse
+programado después de archivar_reservas, por ejemplo con cron:
+
+    0 3 * * *  cd /srv/STR_Chromebook && python manage.py compactar_evidencias
+"""
+
+from django.core.management.base import BaseCommand
+
+from Gestion_Equipos import paquetes_evidencias
+
+
+class Command(BaseCommand):
+    help = 'Empaqueta por mes las fotos de evidencia de las reservas archivadas.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--simular', action='store_true',
+                            help='Solo cuenta las fotos que se empaquetarían.')
+
+    def handle(self, *args, **options):
+        if options['simular']:
+            self.stdout.write(f'{paquetes_evidencias.pendientes().count()} fotos de evidencia se empaquetarían.')
+            return
+
+        resultado = paquetes_evidencias.compactar()
+        self.stdout.write(self.style.SUCCESS(
+            f"{resultado['fotos']} fotos empaquetadas en {resultado['paquetes']} paquetes mensuales."
+        ))
+        if resultado['faltantes']:
+            self.stdout.write(self.style.WARNING(
+                f"{resultado['faltantes']} fotos no se encontraron o no son imágenes; quedan pendientes."
+            ))
@@ -0,0 +1,34 @@
+"""
+Marca las reservas Aprobadas que terminaron sin registrar la devolución y,
+con --finalizar-despues (o VENCIDAS_GRACIA_HORAS), finaliza las que llevan
+más de esas horas vencidas, ver Gestion_Equipos.devoluciones. Pensado para
+ejecutarse programado, por ejemplo con cron cada 15 minutos:
+
+    */15 * * * *  cd /srv/STR_Chromebook && python manage.py detectar_vencidas --finalizar-despues 24
+"""
+
+from django.core.management.base import BaseCommand
+
+from Gestion_Equipos import devoluciones
+
+
+class Command(BaseCommand):
+    help = 'Marca las reservas con devolución vencida y, opcionalmente, las finaliza pasada la gracia.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--finalizar-despues', type=int, default=None, metavar='HORAS',
+                            help='Finaliza las vencidas hace más de HORAS (0: no finalizar; '
+                                 'por defecto VENCIDAS_GRACIA_HORAS).')
+        parser.add_argument('--simular', action='store_true',
+                            help='Solo cuenta las reservas vencidas, sin marcarlas.')
+
+    def handle(self, *args, **options):
+        if options['simular']:
+            self.stdout.write(f'{devoluciones.vencidas().count()} reservas con devolución vencida.')
+            return
+
+        resultado = devoluciones.detectar(gracia_horas=options['finalizar_despues'])
+        self.stdout.write(self.style.SUCCESS(
+            f"{resultado['marcadas']} reservas marcadas como vencidas, {resultado['finalizadas']} finalizadas "
+            f"automáticamente; {resultado['pendientes']} siguen sin devolución."
+        ))
@@ -0,0 +1,27 @@
+"""
+Pasa a 'Expirada' las reservas Pendientes cuya fecha de uso ya pasó y avisa a
+sus docentes, ver Gestion_Equipos.expiracion. Pensado para ejecutarse una vez
+al día, por ejemplo con cron poco después de medianoche:
+
+    10 0 * * *  cd /srv/STR_Chromebook && python manage.py expirar_pendientes
+"""
+
+from django.core.management.base import BaseCommand
+
+from Gestion_Equipos import expiracion
+
+
+class Command(BaseCommand):
+    help = 'Expira las reservas Pendientes con fecha de uso pasada y notifica a los docentes.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--simular', action='store_true',
+                            help='Solo cuenta las reservas que expirarían, sin modificarlas.')
+
+    def handle(self, *args, **options):
+        if options['simular']:
+            self.stdout.write(f'{expiracion.expirables().count()} reservas pendientes expirarían.')
+            return
+
+        total = expiracion.expirar()
+        self.stdout.write(self.style.SUCCESS(f'{total} reservas pendientes expiradas.'))
@@ -0,0 +1,261 @@
+"""
+Genera datos sintéticos realistas para medir el rendimiento de las vistas.
+
+Con --scale 1 se generan 10.000 equipos, 2.000 docentes y 500.000 reservas
+(con sus asignaciones de equipos). Usar siempre una base de datos vacía y
+dedicada a benchmarks, nunca la de producción.
+
+    python manage.py seed_benchmark --scale 0.05
+"""
+
+import random
+from datetime import date, datetime, time, timedelta
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+
+from core.models import (
+    TipoUsuario, Usuario, Facultad, Carrera, Asignatura,
+    DocenteCarrera, Bloque, Aula, Rack
+)
+from Gestion_Equipos.models import EstadoEquipo, Equipo, Reserva, AsignacionEquipo
+
+USUARIO_ADMIN = 'benchadmin'
+CLAVE = 'bench'
+
+FACULTADES = 10
+CARRERAS_POR_FACULTAD = 6
+ASIGNATURAS_POR_CARRERA = 10
+BLOQUES = 8
+AULAS_POR_BLOQUE = 20
+SUPERVISORES = 20
+EQUIPOS_POR_RACK = 30
+
+EQUIPOS_BASE = 10_000
+DOCENTES_BASE = 2_000
+RESERVAS_BASE = 500_000
+
+# Bloques horarios de 1 a 3 horas entre las 07:00 y las 17:00
+HORAS_INICIO = list(range(7, 16))
+
+
+class Command(BaseCommand):
+    help = 'Genera datos sintéticos (facultades, aulas, racks, equipos, docentes y reservas) para benchmarks.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scale', type=float, default=0.01,
+                            help='Factor de escala: 1.0 = 10k equipos, 2k docentes, 500k reservas.')
+        parser.add_argument('--semilla', type=int, default=42,
+                            help='Semilla aleatoria, para generar siempre los mismos datos.')
+        parser.add_argument('--lote', type=int, default=5000,
+                            help='Tamaño de lote para bulk_create.')
+
+    def handle(self, *args, **options):
+        escala = options['scale']
+        if escala <= 0:
+            raise CommandError('--scale debe ser mayor que 0.')
+        if Usuario.objects.filter(username=USUARIO_ADMIN).exists():
+            raise CommandError('Ya existen datos de benchmark. Use una base de datos vacía.')
+
+        self.rng = random.Random(options['semilla'])
+        self.lote = options['lote']
+
+        num_equipos = max(int(EQUIPOS_BASE * escala), EQUIPOS_POR_RACK)
+        num_docentes = max(int(DOCENTES_BASE * escala), 5)
+        num_reservas = max(int(RESERVAS_BASE * escala), 50)
+
+        with transaction.atomic():
+            self.crear_catalogos()
+            self.crear_academico()
+            self.crear_infraestructura(num_equipos)
+            self.crear_usuarios(num_docentes)
+        self.crear_reservas(num_reservas)
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Datos generados: {num_equipos} equipos, {num_docentes} docentes, {num_reservas} reservas. '
+            f'Administrador: {USUARIO_ADMIN} / {CLAVE}'
+        ))
+
+    # ------------------------------------------------------
+    # Catálogos
+    # ------------------------------------------------------
+
+    def crear_catalogos(self):
+        self.roles = {
+            nombre: TipoUsuario.objects.get_or_create(nom_rol=nombre)[0]
+            for nombre in ('Administrador', 'Docente', 'Supervisor')
+        }
+        self.estados = {
+            nombre: EstadoEquipo.objects.get_or_create(nom_estado=nombre)[0]
+            for nombre in ('Disponible', 'En uso', 'En Mantenimiento', 'Dado de baja')
+        }
+
+    def crear_academico(self):
+        # bulk_create no devuelve PKs en MySQL: se releen las filas creadas
+        nombres = [f'Facultad {i + 1}' for i in range(FACULTADES)]
+        Facultad.objects.bulk_create([Facultad(nom_facultad=nombre) for nombre in nombres])
+        facultades = list(Facultad.objects.filter(nom_facultad__in=nombres))
+        carreras = Carrera.objects.bulk_create([
+            Carrera(nom_carrera=f'Carrera {f.id_facultad}-{j + 1}', id_facultad=f)
+            for f in facultades for j in range(CARRERAS_POR_FACULTAD)
+        ])
+        self.carreras = list(Carrera.objects.filter(id_facultad__in=facultades))
+        Asignatura.objects.bulk_create([
+            Asignatura(nom_asignatura=f'Asignatura {c.id_carrera}-{k + 1}', id_carrera=c)
+            for c in self.carreras for k in range(ASIGNATURAS_POR_CARRERA)
+        ], batch_size=self.lote)
+        self.asignaturas_por_carrera = {}
+        for id_asignatura, id_carrera in Asignatura.objects.filter(
+            id_carrera__in=self.carreras
+        ).values_list('id_asignatura', 'id_carrera_id'):
+            self.asignaturas_por_carrera.setdefault(id_carrera, []).append(id_asignatura)
+        self.stdout.write(f'  {len(facultades)} facultades, {len(carreras)} carreras')
+
+    def crear_infraestructura(self, num_equipos):
+        bloques = Bloque.objects.bulk_create([
+            Bloque(nom_bloque=f'Bloque {chr(65 + i)}') for i in range(BLOQUES)
+        ])
+        bloques = list(Bloque.objects.filter(nom_bloque__in=[b.nom_bloque for b in bloques]))
+        Aula.objects.bulk_create([
+            Aula(nom_aula=f'{b.nom_bloque[-1]}-{100 + j}', id_bloque=b)
+            for b in bloques for j in range(AULAS_POR_BLOQUE)
+        ])
+        self.aulas = list(Aula.objects.filter(id_bloque__in=bloques).values_list('id_aula', flat=True))
+
+        num_racks = -(-num_equipos // EQUIPOS_POR_RACK)
+        Rack.objects.bulk_create([
+            Rack(nom_rack=f'BR-{i + 1:04d}', ubicacion=f'Bodega {i % BLOQUES + 1}',
+                 capacidad_total=EQUIPOS_POR_RACK, capacidad_func=EQUIPOS_POR_RACK,
+                 estado_rack='Disponible' if self.rng.random() > 0.05 else 'Mantenimiento')
+            for i in range(num_racks)
+        ])
+        racks = list(Rack.objects.filter(nom_rack__startswith='BR-').values_list('id_rack', flat=True))
+
+        estados = [self.estados['Disponible']] * 95 + [self.estados['En Mantenimiento']] * 4 + [self.estados['Dado de baja']]
+        Equipo.objects.bulk_create([
+            Equipo(nom_equipo=f'CHR-{i + 1:05d}', num_serie=f'BN{i + 1:08d}',
+                   modelo=self.rng.choice(('HP Chromebook 14', 'Lenovo 100e', 'Acer C733', 'Dell 3100')),
+                   id_rack_id=racks[i // EQUIPOS_POR_RACK], id_estado_equipo=self.rng.choice(estados))
+            for i in range(num_equipos)
+        ], batch_size=self.lote)
+
+        self.equipos_por_rack = {}
+        for id_equipo, id_rack in Equipo.objects.filter(
+            num_serie__startswith='BN'
+        ).values_list('id_equipo', 'id_rack_id'):
+            self.equipos_por_rack.setdefault(id_rack, []).append(id_equipo)
+        self.stdout.write(f'  {len(bloques)} bloques, {len(self.aulas)} aulas, {num_racks} racks, {num_equipos} equipos')
+
+    def crear_usuarios(self, num_docentes):
+        # Un solo hash para todos: make_password es deliberadamente lento
+        clave = make_password(CLAVE)
+
+        def usuario(username, nombre, cedula, rol):
+            return Usuario(
+                username=username, nom_completo=nombre, cedula=cedula, telefono='0999999999',
+                email=f'{username}@bench.local', password=clave, id_tipo_usuario=rol
+            )
+
+        usuarios = [usuario(USUARIO_ADMIN, 'ADMINISTRADOR BENCHMARK', '9000000000', self.roles['Administrador'])]
+        usuarios += [
+            usuario(f'sup{i:05d}', f'SUPERVISOR {i}', f'91{i:08d}', self.roles['Supervisor'])
+            for i in range(SUPERVISORES)
+        ]
+        usuarios += [
+            usuario(f'doc{i:06d}', f'DOCENTE {i}', f'92{i:08d}', self.roles['Docente'])
+            for i in range(num_docentes)
+        ]
+        Usuario.objects.bulk_create(usuarios, batch_size=self.lote)
+
+        self.docentes = list(Usuario.objects.filter(
+            username__startswith='doc', id_tipo_usuario=self.roles['Docente']
+        ).values_list('id_usuario', flat=True))
+
+        # Cada docente dicta en una o dos carreras
+        self.carreras_por_docente = {
+            id_usuario: self.rng.sample(self.carreras, self.rng.choice((1, 1, 2)))
+            for id_usuario in self.docentes
+        }
+        DocenteCarrera.objects.bulk_create([
+            DocenteCarrera(id_usuario_id=id_usuario, id_carrera=carrera)
+            for id_usuario, carreras in self.carreras_por_docente.items()
+            for carrera in carreras
+        ], batch_size=self.lote)
+        self.stdout.write(f'  {len(self.docentes)} docentes, {SUPERVISORES} supervisores')
+
+    # ------------------------------------------------------
+    # Reservas y asignaciones
+    # ------------------------------------------------------
+
+    def estado_para(self, fecha_uso, hoy):
+        """Distribución de estados según la fecha: el pasado está cerrado."""
+        r = self.rng.random()
+        if fecha_uso < hoy - timedelta(days=7):
+            return 'Finalizada' if r < 0.85 else 'Rechazada'
+        if fecha_uso < hoy:
+            # Alguna reserva reciente quedó sin finalizar (equipos sin devolver)
+            return 'Finalizada' if r < 0.80 else 'Rechazada' if r < 0.95 else 'Aprobada'
+        return 'Pendiente' if r < 0.50 else 'Aprobada' if r < 0.90 else 'Rechazada'
+
+    def crear_reservas(self, num_reservas):
+        hoy = date.today()
+        inicio = hoy - timedelta(days=3 * 365)
+        dias = (hoy + timedelta(days=60) - inicio).days
+        racks = list(self.equipos_por_rack)
+        creadas = 0
+
+        while creadas < num_reservas:
+            cantidad = min(self.lote, num_reservas - creadas)
+            reservas = []
+            for _ in range(cantidad):
+                fecha_uso = inicio + timedelta(days=self.rng.randrange(dias))
+                if fecha_uso.weekday() >= 5:
+                    fecha_uso -= timedelta(days=fecha_uso.weekday() - 4)
+                hora = self.rng.choice(HORAS_INICIO)
+                duracion = min(self.rng.choice((1, 2, 2, 3)), 17 - hora)
+                id_usuario = self.rng.choice(self.docentes)
+                carrera = self.rng.choice(self.carreras_por_docente[id_usuario])
+                estado = self.estado_para(fecha_uso, hoy)
+
+                reserva = Reserva(
+                    fecha_uso=fecha_uso, hora_inicio=time(hora), hora_fin=time(hora + duracion),
+                    cant_solicitada=self.rng.randint(2, 25), estado_reserva=estado,
+                    responsable_entrega=f'RESPONSABLE {id_usuario}', telefono_contacto='0999999999',
+                    id_usuario_id=id_usuario, id_carrera=carrera,
+                    id_asignatura_id=self.rng.choice(self.asignaturas_por_carrera[carrera.id_carrera]),
+                    id_aula_id=self.rng.choice(self.aulas),
+                )
+                if estado == 'Rechazada':
+                    reserva.motivo_rechazo = 'Sin disponibilidad de equipos'
+                if estado == 'Finalizada':
+                    entrega = timezone.make_aware(datetime.combine(fecha_uso, reserva.hora_inicio))
+                    reserva.fecha_entrega = entrega
+                    reserva.fecha_devolucion = entrega + timedelta(hours=duracion)
+                reservas.append(reserva)
+
+            with transaction.atomic():
+                Reserva.objects.bulk_create(reservas)
+                # MySQL no devuelve PKs en bulk_create: recuperarlas por rango
+                ultimas = list(Reserva.objects.order_by('-id_reserva').values_list(
+                    'id_reserva', 'estado_reserva', 'fecha_uso', 'cant_solicitada'
+                )[:cantidad])
+
+                asignaciones = []
+                for id_reserva, estado, fecha_uso, cant in ultimas:
+                    if estado == 'Finalizada' or (estado == 'Aprobada' and fecha_uso < hoy):
+                        disponibles = self.equipos_por_rack[self.rng.choice(racks)]
+                        asignaciones.extend(
+                            AsignacionEquipo(id_reserva_id=id_reserva, id_equipo_id=id_equipo)
+                            for id_equipo in self.rng.sample(disponibles, min(cant, len(disponibles)))
+                        )
+                AsignacionEquipo.objects.bulk_create(asignaciones, batch_size=self.lote)
+
+                # Las reservas aprobadas ya vencidas siguen con sus equipos "En uso"
+                aprobadas = {id_reserva for id_reserva, estado, _, _ in ultimas if estado == 'Aprobada'}
+                en_uso = [a.id_equipo_id for a in asignaciones if a.id_reserva_id in aprobadas]
+                Equipo.objects.filter(id_equipo__in=en_uso).update(id_estado_equipo=self.estados['En uso'])
+
+            creadas += cantidad
+            self.stdout.write(f'  {creadas}/{num_reservas} reservas')
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.7 on 2026-10-19 11:12
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Gestion_Equipos', '0004_reserva_fecha_devolucion_reserva_fecha_entrega_and_more'),
+        ('core', '0006_asignatura_id_carrera'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='HistorialEquipo',
+            fields=[
+                ('id_historial', models.AutoField(db_column='ID_Historial', primary_key=True, serialize=False)),
+                ('fecha_cambio', models.DateTimeField(auto_now_add=True, db_column='Fecha_Cambio')),
+                ('id_equipo', models.ForeignKey(db_column='ID_Equipo', on_delete=django.db.models.deletion.CASCADE, related_name='historial', to='Gestion_Equipos.equipo')),
+                ('id_estado_anterior', models.ForeignKey(blank=True, db_column='ID_EstadoAnterior', null=True, on_delete=django.db.models.deletion.PROTECT, related_name='+', to='Gestion_Equipos.estadoequipo')),
+                ('id_estado_nuevo', models.ForeignKey(blank=True, db_column='ID_EstadoNuevo', null=True, on_delete=django.db.models.deletion.PROTECT, related_name='+', to='Gestion_Equipos.estadoequipo')),
+                ('id_rack_anterior', models.ForeignKey(blank=True, db_column='ID_RackAnterior', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='core.rack')),
+                ('id_rack_nuevo', models.ForeignKey(blank=True, db_column='ID_RackNuevo', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='core.rack')),
+                ('id_usuario', models.ForeignKey(blank=True, db_column='ID_Usuario', help_text='Administrador que realizó el cambio', null=True, on_delete=django.db.models.deletion.SET_NULL, to='core.usuario')),
+            ],
+            options={
+                'verbose_name': 'Historial de Equipo',
+                'verbose_name_plural': 'Historial de Equipos',
+                'db_table': 'Tb_HISTORIAL_EQUIPO',
+            },
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.2.7 on 2026-10-19 12:18
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Gestion_Equipos', '0005_historialequipo'),
+        ('core', '0006_asignatura_id_carrera'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Notificacion',
+            fields=[
+                ('id_notificacion', models.AutoField(db_column='ID_Notificacion', primary_key=True, serialize=False)),
+                ('tipo', models.CharField(choices=[('aprobada', 'Reserva aprobada'), ('rechazada', 'Reserva rechazada'), ('cancelada', 'Reserva cancelada'), ('finalizada', 'Reserva finalizada')], db_column='Tipo', max_length=20)),
+                ('mensaje', models.CharField(db_column='Mensaje', max_length=255)),
+                ('fecha_creacion', models.DateTimeField(auto_now_add=True, db_column='Fecha_Creacion')),
+                ('id_reserva', models.ForeignKey(db_column='ID_Reserva', on_delete=django.db.models.deletion.CASCADE, to='Gestion_Equipos.reserva')),
+                ('id_usuario', models.ForeignKey(db_column='ID_Usuario', help_text='Docente que recibe la notificación', on_delete=django.db.models.deletion.CASCADE, to='core.usuario')),
+            ],
+            options={
+                'verbose_name': 'Notificación',
+                'verbose_name_plural': 'Notificaciones',
+                'db_table': 'Tb_NOTIFICACION',
+                'indexes': [models.Index(fields=['id_usuario', 'id_notificacion'], name='notificacion_usuario_cursor')],
+            },
+        ),
+    ]
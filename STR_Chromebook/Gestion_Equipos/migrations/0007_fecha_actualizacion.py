@@ -0,0 +1,23 @@
+# Generated by Django 5.2.7 on 2026-10-19 12:23
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Gestion_Equipos', '0006_notificacion'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='equipo',
+            name='fecha_actualizacion',
+            field=models.DateTimeField(auto_now=True, db_column='Fecha_Actualizacion', db_index=True),
+        ),
+        migrations.AddField(
+            model_name='reserva',
+            name='fecha_actualizacion',
+            field=models.DateTimeField(auto_now=True, db_column='Fecha_Actualizacion', db_index=True),
+        ),
+    ]
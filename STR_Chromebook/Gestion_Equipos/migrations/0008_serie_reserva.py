@@ -0,0 +1,40 @@
+# Generated by Django 5.2.7 on 2026-10-19 12:35
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Gestion_Equipos', '0007_fecha_actualizacion'),
+        ('core', '0006_asignatura_id_carrera'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SerieReserva',
+            fields=[
+                ('id_serie', models.AutoField(db_column='ID_Serie', primary_key=True, serialize=False)),
+                ('frecuencia', models.CharField(choices=[('semanal', 'Cada semana'), ('quincenal', 'Cada dos semanas')], db_column='Frecuencia', max_length=20)),
+                ('fecha_inicio', models.DateField(db_column='Fecha_Inicio')),
+                ('fecha_fin', models.DateField(db_column='Fecha_Fin')),
+                ('fecha_creacion', models.DateTimeField(auto_now_add=True, db_column='Fecha_Creacion')),
+                ('id_usuario', models.ForeignKey(db_column='ID_Usuario', help_text='Docente que solicitó la serie', on_delete=django.db.models.deletion.CASCADE, to='core.usuario')),
+            ],
+            options={
+                'verbose_name': 'Serie de Reservas',
+                'verbose_name_plural': 'Series de Reservas',
+                'db_table': 'Tb_SERIE_RESERVA',
+            },
+        ),
+        migrations.AddField(
+            model_name='reserva',
+            name='id_serie',
+            field=models.ForeignKey(blank=True, db_column='ID_Serie', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='reservas', to='Gestion_Equipos.seriereserva'),
+        ),
+        migrations.AddIndex(
+            model_name='reserva',
+            index=models.Index(fields=['fecha_uso', 'hora_inicio'], name='reserva_fecha_hora'),
+        ),
+    ]
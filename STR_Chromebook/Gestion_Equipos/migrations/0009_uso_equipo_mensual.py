@@ -0,0 +1,32 @@
+# Generated by Django 5.2.7 on 2026-10-19 12:53
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Gestion_Equipos', '0008_serie_reserva'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UsoEquipoMensual',
+            fields=[
+                ('id_uso', models.AutoField(db_column='ID_Uso', primary_key=True, serialize=False)),
+                ('mes', models.DateField(db_column='Mes', help_text='Primer día del mes')),
+                ('horas', models.FloatField(db_column='Horas')),
+                ('reservas', models.IntegerField(db_column='Reservas')),
+                ('calculado_hasta', models.DateField(db_column='Calculado_Hasta', help_text='Día (excluido) hasta el que se calculó: la marca de agua')),
+                ('id_equipo', models.ForeignKey(db_column='ID_Equipo', on_delete=django.db.models.deletion.CASCADE, related_name='uso_mensual', to='Gestion_Equipos.equipo')),
+            ],
+            options={
+                'verbose_name': 'Uso Mensual de Equipo',
+                'verbose_name_plural': 'Uso Mensual de Equipos',
+                'db_table': 'Tb_USO_EQUIPO_MENSUAL',
+                'indexes': [models.Index(fields=['mes'], name='uso_equipo_mes')],
+                'unique_together': {('id_equipo', 'mes')},
+            },
+        ),
+    ]
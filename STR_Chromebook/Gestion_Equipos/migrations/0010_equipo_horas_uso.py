@@ -0,0 +1,23 @@
+# Generated by Django 5.2.7 on 2026-10-19 12:56
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Gestion_Equipos', '0009_uso_equipo_mensual'),
+        ('core', '0006_asignatura_id_carrera'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='equipo',
+            name='horas_uso',
+            field=models.FloatField(db_column='Horas_Uso', default=0),
+        ),
+        migrations.AddIndex(
+            model_name='equipo',
+            index=models.Index(fields=['id_rack', 'id_estado_equipo', 'horas_uso', 'id_equipo'], name='equipo_rack_estado_uso'),
+        ),
+    ]
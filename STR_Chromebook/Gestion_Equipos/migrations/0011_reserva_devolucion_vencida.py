@@ -0,0 +1,23 @@
+# Generated by Django 5.2.7 on 2026-10-19 12:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Gestion_Equipos', '0010_equipo_horas_uso'),
+        ('core', '0006_asignatura_id_carrera'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='reserva',
+            name='devolucion_vencida',
+            field=models.BooleanField(db_column='Devolucion_Vencida', default=False, help_text='Terminó sin registrar la devolución (ver Gestion_Equipos.devoluciones)'),
+        ),
+        migrations.AddIndex(
+            model_name='reserva',
+            index=models.Index(fields=['estado_reserva', 'fecha_uso', 'hora_fin'], name='reserva_estado_fecha_fin'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.7 on 2026-10-19 13:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Gestion_Equipos', '0011_reserva_devolucion_vencida'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='notificacion',
+            name='tipo',
+            field=models.CharField(choices=[('aprobada', 'Reserva aprobada'), ('rechazada', 'Reserva rechazada'), ('cancelada', 'Reserva cancelada'), ('finalizada', 'Reserva finalizada'), ('expirada', 'Reserva expirada')], db_column='Tipo', max_length=20),
+        ),
+    ]
@@ -0,0 +1,92 @@
+# Generated by Django 5.2.7 on 2026-10-19 13:06
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Gestion_Equipos', '0012_notificacion_expirada'),
+        ('core', '0006_asignatura_id_carrera'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReservaHistorica',
+            fields=[
+                ('id_reserva', models.IntegerField(db_column='ID_Reserva', primary_key=True, serialize=False)),
+                ('fecha_uso', models.DateField(db_column='Fecha_Uso')),
+                ('hora_inicio', models.TimeField(db_column='Hora_Inicio')),
+                ('hora_fin', models.TimeField(db_column='Hora_Fin')),
+                ('cant_solicitada', models.IntegerField(db_column='Cant_Solicitada')),
+                ('estado_reserva', models.CharField(db_column='Estado_Reserva', max_length=20)),
+                ('responsable_entrega', models.CharField(db_column='Responsable_Entrega', max_length=150)),
+                ('telefono_contacto', models.CharField(db_column='Telefono_Contacto', max_length=10)),
+                ('motivo_rechazo', models.TextField(blank=True, db_column='Motivo_Rechazo', null=True)),
+                ('observaciones', models.TextField(blank=True, db_column='Observaciones', null=True)),
+                ('fecha_entrega', models.DateTimeField(blank=True, db_column='Fecha_Entrega', null=True)),
+                ('fecha_devolucion', models.DateTimeField(blank=True, db_column='Fecha_Devolucion', null=True)),
+                ('devolucion_vencida', models.BooleanField(db_column='Devolucion_Vencida', default=False)),
+                ('fecha_actualizacion', models.DateTimeField(db_column='Fecha_Actualizacion')),
+                ('fecha_archivado', models.DateTimeField(auto_now_add=True, db_column='Fecha_Archivado')),
+                ('id_asignatura', models.ForeignKey(db_column='ID_Asignatura', on_delete=django.db.models.deletion.CASCADE, related_name='+', to='core.asignatura')),
+                ('id_aula', models.ForeignKey(db_column='ID_Aula', on_delete=django.db.models.deletion.CASCADE, related_name='+', to='core.aula')),
+                ('id_carrera', models.ForeignKey(db_column='ID_Carrera', on_delete=django.db.models.deletion.CASCADE, related_name='+', to='core.carrera')),
+                ('id_serie', models.ForeignKey(blank=True, db_column='ID_Serie', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='Gestion_Equipos.seriereserva')),
+                ('id_usuario', models.ForeignKey(db_column='ID_Usuario', on_delete=django.db.models.deletion.CASCADE, related_name='+', to='core.usuario')),
+            ],
+            options={
+                'verbose_name': 'Reserva Histórica',
+                'verbose_name_plural': 'Reservas Históricas',
+                'db_table': 'Tb_RESERVA_HISTORICA',
+            },
+        ),
+        migrations.CreateModel(
+            name='EvidenciaReservaHistorica',
+            fields=[
+                ('id_evidencia', models.IntegerField(db_column='ID_Evidencia', primary_key=True, serialize=False)),
+                ('tipo_evidencia', models.CharField(choices=[('uso', 'Uso de Equipos'), ('devolucion', 'Devolución de Equipos')], db_column='Tipo_Evidencia', max_length=20)),
+                ('foto', models.CharField(db_column='Foto', help_text='Ruta del archivo en MEDIA_ROOT', max_length=100)),
+                ('descripcion', models.TextField(blank=True, db_column='Descripcion', null=True)),
+                ('fecha_subida', models.DateTimeField(db_column='Fecha_Subida')),
+                ('id_reserva', models.ForeignKey(db_column='ID_Reserva', on_delete=django.db.models.deletion.CASCADE, related_name='evidencias', to='Gestion_Equipos.reservahistorica')),
+            ],
+            options={
+                'verbose_name': 'Evidencia de Reserva Histórica',
+                'verbose_name_plural': 'Evidencias de Reservas Históricas',
+                'db_table': 'Tb_EVIDENCIA_RESERVA_HISTORICA',
+            },
+        ),
+        migrations.CreateModel(
+            name='AsignacionEquipoHistorica',
+            fields=[
+                ('id_asig_equipo', models.IntegerField(db_column='ID_AsigEquipo', primary_key=True, serialize=False)),
+                ('fecha_registro', models.DateTimeField(db_column='Fecha_Registro')),
+                ('id_equipo', models.ForeignKey(db_column='ID_Equipo', on_delete=django.db.models.deletion.CASCADE, related_name='+', to='Gestion_Equipos.equipo')),
+                ('id_reserva', models.ForeignKey(db_column='ID_Reserva', on_delete=django.db.models.deletion.CASCADE, related_name='asignaciones', to='Gestion_Equipos.reservahistorica')),
+            ],
+            options={
+                'verbose_name': 'Asignación de Equipo Histórica',
+                'verbose_name_plural': 'Asignaciones de Equipos Históricas',
+                'db_table': 'Tb_ASIGNACION_EQUIPO_HISTORICA',
+            },
+        ),
+        migrations.CreateModel(
+            name='SupervisorReservaHistorica',
+            fields=[
+                ('id_supervisor_reserva', models.IntegerField(db_column='ID_SupervisorReserva', primary_key=True, serialize=False)),
+                ('id_reserva', models.ForeignKey(db_column='ID_Reserva', on_delete=django.db.models.deletion.CASCADE, related_name='supervisores', to='Gestion_Equipos.reservahistorica')),
+                ('id_supervisor', models.ForeignKey(db_column='ID_Supervisor', on_delete=django.db.models.deletion.CASCADE, related_name='+', to='core.usuario')),
+            ],
+            options={
+                'verbose_name': 'Supervisor de Reserva Histórica',
+                'verbose_name_plural': 'Supervisores de Reservas Históricas',
+                'db_table': 'Tb_SUPERVISOR_RESERVA_HISTORICA',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='reservahistorica',
+            index=models.Index(fields=['fecha_uso', 'estado_reserva'], name='reserva_hist_fecha_estado'),
+        ),
+    ]
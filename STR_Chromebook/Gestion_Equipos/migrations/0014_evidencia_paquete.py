@@ -0,0 +1,28 @@
+# Generated by Django 5.2.7 on 2026-10-19 13:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Gestion_Equipos', '0013_archivo_historico'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='evidenciareservahistorica',
+            name='miniatura',
+            field=models.CharField(blank=True, db_column='Miniatura', default='', help_text='Ruta de la miniatura en MEDIA_ROOT', max_length=100),
+        ),
+        migrations.AddField(
+            model_name='evidenciareservahistorica',
+            name='paquete',
+            field=models.CharField(blank=True, db_column='Paquete', help_text='Mes (AAAA-MM) del paquete donde quedó la foto (ver Gestion_Equipos.paquetes_evidencias)', max_length=7, null=True),
+        ),
+        migrations.AlterField(
+            model_name='evidenciareservahistorica',
+            name='foto',
+            field=models.CharField(db_column='Foto', help_text='Ruta original del archivo en MEDIA_ROOT', max_length=100),
+        ),
+    ]
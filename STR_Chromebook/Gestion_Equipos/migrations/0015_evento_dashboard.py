@@ -0,0 +1,27 @@
+# Generated by Django 5.2.7 on 2026-10-19 13:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Gestion_Equipos', '0014_evidencia_paquete'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EventoDashboard',
+            fields=[
+                ('id_evento', models.BigAutoField(db_column='ID_Evento', primary_key=True, serialize=False)),
+                ('tipo', models.CharField(db_column='Tipo', max_length=30)),
+                ('datos', models.JSONField(db_column='Datos', default=dict)),
+                ('fecha', models.DateTimeField(auto_now_add=True, db_column='Fecha', db_index=True)),
+            ],
+            options={
+                'verbose_name': 'Evento del dashboard',
+                'verbose_name_plural': 'Eventos del dashboard',
+                'db_table': 'Tb_EVENTO_DASHBOARD',
+            },
+        ),
+    ]
@@ -1,6 +1,25 @@
 from django.db import models
+from django.utils import timezone
 from core.models import Usuario, Asignatura, Carrera, Aula, Rack
 
+# ==================== MARCA DE ACTUALIZACIÓN ====================
+
+class MarcaActualizacionQuerySet(models.QuerySet):
+    """
+    QuerySet de los modelos con fecha_actualizacion (auto_now): save() la sella
+    solo, y update() aquí también, así que cubre los cambios masivos
+    (bulk_update() usa update() por debajo). La usan los GET condicionales.
+    """
+
+    def update(self, **kwargs):
+        kwargs.setdefault('fecha_actualizacion', timezone.now())
+        return super().update(**kwargs)
+
+    def tocar(self):
+        """Sella fecha_actualizacion sin cambiar nada más (p. ej. al cambiar sus asignaciones)."""
+        return self.update()
+
+
 # ==================== EQUIPOS ====================
 
 class EstadoEquipo(models.Model):
@@ -38,17 +57,122 @@ class Equipo(models.Model):
         db_column='ID_EstadoEquipo'
     )
     
+    # Horas de uso acumuladas: se suman al finalizar una reserva y se recalculan
+    # cada noche (ver Gestion_Equipos.uso_equipos). Asignar un rack elige primero
+    # los equipos con menos horas para repartir el desgaste.
+    horas_uso = models.FloatField(default=0, db_column='Horas_Uso')
+    
+    fecha_actualizacion = models.DateTimeField(auto_now=True, db_index=True, db_column='Fecha_Actualizacion')
+    
+    objects = MarcaActualizacionQuerySet.as_manager()
+    
     class Meta:
         db_table = 'Tb_EQUIPO'
         verbose_name = 'Equipo'
         verbose_name_plural = 'Equipos'
+        indexes = [
+            # Equipos disponibles de un rack, de menos a más usado (api_asignar_rack)
+            models.Index(fields=['id_rack', 'id_estado_equipo', 'horas_uso', 'id_equipo'], name='equipo_rack_estado_uso'),
+        ]
     
     def __str__(self):
         return f"{self.nom_equipo} - {self.num_serie}"
 
 
+class HistorialEquipo(models.Model):
+    """Tabla: Tb_HISTORIAL_EQUIPO - Cambios de estado y de rack de los equipos"""
+    id_historial = models.AutoField(primary_key=True, db_column='ID_Historial')
+    fecha_cambio = models.DateTimeField(auto_now_add=True, db_column='Fecha_Cambio')
+    
+    # Relaciones
+    id_equipo = models.ForeignKey(
+        Equipo,
+        on_delete=models.CASCADE,
+        db_column='ID_Equipo',
+        related_name='historial'
+    )
+    id_estado_anterior = models.ForeignKey(
+        EstadoEquipo,
+        on_delete=models.PROTECT,
+        null=True,
+        blank=True,
+        db_column='ID_EstadoAnterior',
+        related_name='+'
+    )
+    id_estado_nuevo = models.ForeignKey(
+        EstadoEquipo,
+        on_delete=models.PROTECT,
+        null=True,
+        blank=True,
+        db_column='ID_EstadoNuevo',
+        related_name='+'
+    )
+    id_rack_anterior = models.ForeignKey(
+        Rack,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        db_column='ID_RackAnterior',
+        related_name='+'
+    )
+    id_rack_nuevo = models.ForeignKey(
+        Rack,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        db_column='ID_RackNuevo',
+        related_name='+'
+    )
+    id_usuario = models.ForeignKey(
+        Usuario,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        db_column='ID_Usuario',
+        help_text='Administrador que realizó el cambio'
+    )
+    
+    class Meta:
+        db_table = 'Tb_HISTORIAL_EQUIPO'
+        verbose_name = 'Historial de Equipo'
+        verbose_name_plural = 'Historial de Equipos'
+    
+    def __str__(self):
+        return f"Historial {self.id_historial} - Equipo {self.id_equipo_id}"
+
+
 # ==================== RESERVAS Y ASIGNACIONES ====================
 
+class SerieReserva(models.Model):
+    """Tabla: Tb_SERIE_RESERVA - Reservas recurrentes del semestre (ver Gestion_Equipos.recurrencia)"""
+    FRECUENCIA_CHOICES = [
+        ('semanal', 'Cada semana'),
+        ('quincenal', 'Cada dos semanas'),
+    ]
+    
+    id_serie = models.AutoField(primary_key=True, db_column='ID_Serie')
+    frecuencia = models.CharField(max_length=20, choices=FRECUENCIA_CHOICES, db_column='Frecuencia')
+    fecha_inicio = models.DateField(db_column='Fecha_Inicio')
+    fecha_fin = models.DateField(db_column='Fecha_Fin')
+    fecha_creacion = models.DateTimeField(auto_now_add=True, db_column='Fecha_Creacion')
+    
+    # Relaciones
+    id_usuario = models.ForeignKey(
+        Usuario,
+        on_delete=models.CASCADE,
+        db_column='ID_Usuario',
+        help_text='Docente que solicitó la serie'
+    )
+    
+    class Meta:
+        db_table = 'Tb_SERIE_RESERVA'
+        verbose_name = 'Serie de Reservas'
+        verbose_name_plural = 'Series de Reservas'
+    
+    def __str__(self):
+        return f"Serie {self.id_serie} - {self.get_frecuencia_display()} ({self.fecha_inicio} a {self.fecha_fin})"
+
+
 class Reserva(models.Model):
     """Tabla: Tb_RESERVA"""
     id_reserva = models.AutoField(primary_key=True, db_column='ID_Reserva')
@@ -75,6 +199,8 @@ class Reserva(models.Model):
                                         help_text='Fecha y hora de entrega de equipos')
     fecha_devolucion = models.DateTimeField(db_column='Fecha_Devolucion', blank=True, null=True,
                                            help_text='Fecha y hora de devolución de equipos')
+    devolucion_vencida = models.BooleanField(default=False, db_column='Devolucion_Vencida',
+                                             help_text='Terminó sin registrar la devolución (ver Gestion_Equipos.devoluciones)')
     
     # Relaciones
     id_usuario = models.ForeignKey(
@@ -97,11 +223,29 @@ class Reserva(models.Model):
         on_delete=models.CASCADE,
         db_column='ID_Carrera'
     )
+    id_serie = models.ForeignKey(
+        SerieReserva,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        db_column='ID_Serie',
+        related_name='reservas'
+    )
+    
+    fecha_actualizacion = models.DateTimeField(auto_now=True, db_index=True, db_column='Fecha_Actualizacion')
+    
+    objects = MarcaActualizacionQuerySet.as_manager()
     
     class Meta:
         db_table = 'Tb_RESERVA'
         verbose_name = 'Reserva'
         verbose_name_plural = 'Reservas'
+        indexes = [
+            # Choques de horario al crear series (recurrencia.conflictos)
+            models.Index(fields=['fecha_uso', 'hora_inicio'], name='reserva_fecha_hora'),
+            # Aprobadas que ya terminaron (devoluciones.vencidas) y Pendientes pasadas (expiracion)
+            models.Index(fields=['estado_reserva', 'fecha_uso', 'hora_fin'], name='reserva_estado_fecha_fin'),
+        ]
     
     def __str__(self):
         return f"Reserva {self.id_reserva} - {self.id_usuario.nom_completo} - {self.fecha_uso}"
@@ -192,4 +336,197 @@ class AsignacionEquipo(models.Model):
         unique_together = ('id_reserva', 'id_equipo')
     
     def __str__(self):
-        return f"Asignación {self.id_asig_equipo} - Reserva {self.id_reserva.id_reserva}"
\ No newline at end of file
+        return f"Asignación {self.id_asig_equipo} - Reserva {self.id_reserva.id_reserva}"
+
+class UsoEquipoMensual(models.Model):
+    """Tabla: Tb_USO_EQUIPO_MENSUAL - Horas de uso de cada equipo por mes (ver Gestion_Equipos.uso_equipos)"""
+    id_uso = models.AutoField(primary_key=True, db_column='ID_Uso')
+    mes = models.DateField(db_column='Mes', help_text='Primer día del mes')
+    horas = models.FloatField(db_column='Horas')
+    reservas = models.IntegerField(db_column='Reservas')
+    calculado_hasta = models.DateField(db_column='Calculado_Hasta',
+                                       help_text='Día (excluido) hasta el que se calculó: la marca de agua')
+    
+    # Relaciones
+    id_equipo = models.ForeignKey(
+        Equipo,
+        on_delete=models.CASCADE,
+        db_column='ID_Equipo',
+        related_name='uso_mensual'
+    )
+    
+    class Meta:
+        db_table = 'Tb_USO_EQUIPO_MENSUAL'
+        verbose_name = 'Uso Mensual de Equipo'
+        verbose_name_plural = 'Uso Mensual de Equipos'
+        unique_together = ('id_equipo', 'mes')
+        indexes = [
+            # Borrado de los meses que se recalculan
+            models.Index(fields=['mes'], name='uso_equipo_mes'),
+        ]
+    
+    def __str__(self):
+        return f"Equipo {self.id_equipo_id} - {self.mes:%Y-%m}: {self.horas} h"
+
+# ==================== NOTIFICACIONES ====================
+
+class Notificacion(models.Model):
+    """Tabla: Tb_NOTIFICACION - Avisos al docente cuando su reserva cambia de estado"""
+    TIPO_CHOICES = [
+        ('aprobada', 'Reserva aprobada'),
+        ('rechazada', 'Reserva rechazada'),
+        ('cancelada', 'Reserva cancelada'),
+        ('finalizada', 'Reserva finalizada'),
+        ('expirada', 'Reserva expirada'),
+    ]
+    
+    id_notificacion = models.AutoField(primary_key=True, db_column='ID_Notificacion')
+    tipo = models.CharField(max_length=20, choices=TIPO_CHOICES, db_column='Tipo')
+    mensaje = models.CharField(max_length=255, db_column='Mensaje')
+    fecha_creacion = models.DateTimeField(auto_now_add=True, db_column='Fecha_Creacion')
+    
+    # Relaciones
+    id_usuario = models.ForeignKey(
+        Usuario,
+        on_delete=models.CASCADE,
+        db_column='ID_Usuario',
+        help_text='Docente que recibe la notificación'
+    )
+    id_reserva = models.ForeignKey(
+        Reserva,
+        on_delete=models.CASCADE,
+        db_column='ID_Reserva'
+    )
+    
+    class Meta:
+        db_table = 'Tb_NOTIFICACION'
+        verbose_name = 'Notificación'
+        verbose_name_plural = 'Notificaciones'
+        # Bandeja por cursor: WHERE usuario = ? AND id > ? ORDER BY id
+        indexes = [
+            models.Index(fields=['id_usuario', 'id_notificacion'], name='notificacion_usuario_cursor'),
+        ]
+    
+    def __str__(self):
+        return f"Notificación {self.id_notificacion} - Reserva #{self.id_reserva_id}"
+
+
+class EventoDashboard(models.Model):
+    """
+    Tabla: Tb_EVENTO_DASHBOARD - Eventos en vivo del dashboard cuando la cache
+    no tiene incr() atómico (tabla de cache de Django, ver Gestion_Equipos.eventos)
+    """
+    id_evento = models.BigAutoField(primary_key=True, db_column='ID_Evento')
+    tipo = models.CharField(max_length=30, db_column='Tipo')
+    datos = models.JSONField(default=dict, db_column='Datos')
+    fecha = models.DateTimeField(auto_now_add=True, db_index=True, db_column='Fecha')
+
+    class Meta:
+        db_table = 'Tb_EVENTO_DASHBOARD'
+        verbose_name = 'Evento del dashboard'
+        verbose_name_plural = 'Eventos del dashboard'
+
+    def __str__(self):
+        return f"Evento {self.id_evento} - {self.tipo}"
+
+
+# ==================== ARCHIVO HISTÓRICO ====================
+# Copias de las reservas terminadas hace más de ARCHIVO_PERIODOS periodos, con
+# sus asignaciones, supervisores y evidencias (ver Gestion_Equipos.archivo).
+# Mismos IDs y nombres de campo que las tablas vivas para que los reportes las
+# consulten igual; las vistas de operación solo usan las tablas vivas.
+
+class ReservaHistorica(models.Model):
+    """Tabla: Tb_RESERVA_HISTORICA - Reservas archivadas"""
+    id_reserva = models.IntegerField(primary_key=True, db_column='ID_Reserva')
+    fecha_uso = models.DateField(db_column='Fecha_Uso')
+    hora_inicio = models.TimeField(db_column='Hora_Inicio')
+    hora_fin = models.TimeField(db_column='Hora_Fin')
+    cant_solicitada = models.IntegerField(db_column='Cant_Solicitada')
+    estado_reserva = models.CharField(max_length=20, db_column='Estado_Reserva')
+    responsable_entrega = models.CharField(max_length=150, db_column='Responsable_Entrega')
+    telefono_contacto = models.CharField(max_length=10, db_column='Telefono_Contacto')
+    motivo_rechazo = models.TextField(db_column='Motivo_Rechazo', blank=True, null=True)
+    observaciones = models.TextField(db_column='Observaciones', blank=True, null=True)
+    fecha_entrega = models.DateTimeField(db_column='Fecha_Entrega', blank=True, null=True)
+    fecha_devolucion = models.DateTimeField(db_column='Fecha_Devolucion', blank=True, null=True)
+    devolucion_vencida = models.BooleanField(default=False, db_column='Devolucion_Vencida')
+    fecha_actualizacion = models.DateTimeField(db_column='Fecha_Actualizacion')
+    fecha_archivado = models.DateTimeField(auto_now_add=True, db_column='Fecha_Archivado')
+    
+    # Relaciones (sin nombre inverso: el historial se consulta desde aquí)
+    id_usuario = models.ForeignKey(Usuario, on_delete=models.CASCADE, db_column='ID_Usuario', related_name='+')
+    id_asignatura = models.ForeignKey(Asignatura, on_delete=models.CASCADE, db_column='ID_Asignatura', related_name='+')
+    id_aula = models.ForeignKey(Aula, on_delete=models.CASCADE, db_column='ID_Aula', related_name='+')
+    id_carrera = models.ForeignKey(Carrera, on_delete=models.CASCADE, db_column='ID_Carrera', related_name='+')
+    id_serie = models.ForeignKey(SerieReserva, on_delete=models.SET_NULL, null=True, blank=True,
+                                 db_column='ID_Serie', related_name='+')
+    
+    class Meta:
+        db_table = 'Tb_RESERVA_HISTORICA'
+        verbose_name = 'Reserva Histórica'
+        verbose_name_plural = 'Reservas Históricas'
+        indexes = [
+            # Reportes por mes (archivo.historial)
+            models.Index(fields=['fecha_uso', 'estado_reserva'], name='reserva_hist_fecha_estado'),
+        ]
+    
+    def __str__(self):
+        return f"Reserva histórica {self.id_reserva} - {self.fecha_uso}"
+
+
+class AsignacionEquipoHistorica(models.Model):
+    """Tabla: Tb_ASIGNACION_EQUIPO_HISTORICA - Asignaciones de las reservas archivadas"""
+    id_asig_equipo = models.IntegerField(primary_key=True, db_column='ID_AsigEquipo')
+    fecha_registro = models.DateTimeField(db_column='Fecha_Registro')
+    id_reserva = models.ForeignKey(ReservaHistorica, on_delete=models.CASCADE, db_column='ID_Reserva',
+                                   related_name='asignaciones')
+    id_equipo = models.ForeignKey(Equipo, on_delete=models.CASCADE, db_column='ID_Equipo', related_name='+')
+    
+    class Meta:
+        db_table = 'Tb_ASIGNACION_EQUIPO_HISTORICA'
+        verbose_name = 'Asignación de Equipo Histórica'
+        verbose_name_plural = 'Asignaciones de Equipos Históricas'
+    
+    def __str__(self):
+        return f"Asignación histórica {self.id_asig_equipo} - Reserva {self.id_reserva_id}"
+
+
+class SupervisorReservaHistorica(models.Model):
+    """Tabla: Tb_SUPERVISOR_RESERVA_HISTORICA - Supervisores de las reservas archivadas"""
+    id_supervisor_reserva = models.IntegerField(primary_key=True, db_column='ID_SupervisorReserva')
+    id_reserva = models.ForeignKey(ReservaHistorica, on_delete=models.CASCADE, db_column='ID_Reserva',
+                                   related_name='supervisores')
+    id_supervisor = models.ForeignKey(Usuario, on_delete=models.CASCADE, db_column='ID_Supervisor', related_name='+')
+    
+    class Meta:
+        db_table = 'Tb_SUPERVISOR_RESERVA_HISTORICA'
+        verbose_name = 'Supervisor de Reserva Histórica'
+        verbose_name_plural = 'Supervisores de Reservas Históricas'
+    
+    def __str__(self):
+        return f"Supervisor {self.id_supervisor_id} - Reserva histórica #{self.id_reserva_id}"
+
+
+class EvidenciaReservaHistorica(models.Model):
+    """Tabla: Tb_EVIDENCIA_RESERVA_HISTORICA - Datos de las evidencias archivadas (la foto, en MEDIA_ROOT o en un paquete)"""
+    id_evidencia = models.IntegerField(primary_key=True, db_column='ID_Evidencia')
+    tipo_evidencia = models.CharField(max_length=20, choices=EvidenciaReserva.TIPO_EVIDENCIA_CHOICES,
+                                      db_column='Tipo_Evidencia')
+    foto = models.CharField(max_length=100, db_column='Foto', help_text='Ruta original del archivo en MEDIA_ROOT')
+    descripcion = models.TextField(db_column='Descripcion', blank=True, null=True)
+    fecha_subida = models.DateTimeField(db_column='Fecha_Subida')
+    paquete = models.CharField(max_length=7, null=True, blank=True, db_column='Paquete',
+                               help_text='Mes (AAAA-MM) del paquete donde quedó la foto (ver Gestion_Equipos.paquetes_evidencias)')
+    miniatura = models.CharField(max_length=100, blank=True, default='', db_column='Miniatura',
+                                 help_text='Ruta de la miniatura en MEDIA_ROOT')
+    id_reserva = models.ForeignKey(ReservaHistorica, on_delete=models.CASCADE, db_column='ID_Reserva',
+                                   related_name='evidencias')
+    
+    class Meta:
+        db_table = 'Tb_EVIDENCIA_RESERVA_HISTORICA'
+        verbose_name = 'Evidencia de Reserva Histórica'
+        verbose_name_plural = 'Evidencias de Reservas Históricas'
+    
+    def __str__(self):
+        return f"Evidencia histórica {self.id_evidencia} - Reserva #{self.id_reserva_id}"
@@ -0,0 +1,61 @@
+"""
+Notificaciones de los docentes (tabla Tb_NOTIFICACION).
+
+Se escribe una fila cuando una reserva pasa a Aprobada, Rechazada (o la
+cancela el docente), Finalizada o Expirada, en la misma transacción que el
+cambio. Los cambios masivos (update(), sin señales) llaman a notificar().
+Las páginas del docente las consultan por cursor (views.api.notificaciones_docente):
+solo las filas con id mayor al último visto, usando el índice (usuario, id).
+"""
+
+from django.dispatch import receiver
+
+from Gestion_Equipos.models import Notificacion
+from Gestion_Equipos.senales import estado_reserva_cambiado
+
+
+# Prefijo que cancelar_reserva agrega al motivo cuando cancela el propio docente
+PREFIJO_CANCELACION = '[CANCELADA POR DOCENTE]'
+
+
+def _tipo_y_mensaje(reserva):
+    referencia = f'Su reserva #{reserva.id_reserva} del {reserva.fecha_uso:%d/%m/%Y}'
+    estado = reserva.estado_reserva
+    motivo = reserva.motivo_rechazo or ''
+
+    if estado == 'Aprobada':
+        return 'aprobada', f'{referencia} fue aprobada.'
+    if estado == 'Rechazada' and motivo.startswith(PREFIJO_CANCELACION):
+        return 'cancelada', f'{referencia} fue cancelada.'
+    if estado == 'Rechazada':
+        return 'rechazada', f'{referencia} fue rechazada. Motivo: {motivo}'
+    if estado == 'Finalizada':
+        return 'finalizada', f'{referencia} fue finalizada.'
+    if estado == 'Expirada':
+        return 'expirada', f'{referencia} expiró sin ser aprobada.'
+    return None, None
+
+
+def _notificacion(reserva):
+    tipo, mensaje = _tipo_y_mensaje(reserva)
+    if tipo:
+        max_mensaje = Notificacion._meta.get_field('mensaje').max_length
+        return Notificacion(
+            id_usuario_id=reserva.id_usuario_id,
+            id_reserva_id=reserva.id_reserva,
+            tipo=tipo,
+            mensaje=mensaje[:max_mensaje],
+        )
+    return None
+
+
+def notificar(reservas):
+    """Notifica en un solo INSERT el estado actual de varias reservas."""
+    Notificacion.objects.bulk_create(filter(None, map(_notificacion, reservas)), batch_size=500)
+
+
+@receiver(estado_reserva_cambiado)
+def _notificar_docente(sender, reserva, anterior, **kwargs):
+    notificacion = _notificacion(reserva)
+    if notificacion:
+        notificacion.save()
@@ -0,0 +1,186 @@
+"""
+Paquetes mensuales de las fotos de evidencia archivadas (almacenamiento frío).
+
+media/evidencias/ crece varios GB por periodo y las fotos de los periodos
+cerrados casi no se miran. compactar() (comando `compactar_evidencias`,
+programado después de `archivar_reservas`) toma las evidencias de reservas
+archivadas (EvidenciaReservaHistorica) que aún no están empaquetadas y, por
+mes de la reserva:
+
+- recodifica cada foto en JPEG de menor calidad y tamaño
+  (EVIDENCIAS_CALIDAD, EVIDENCIAS_LADO_MAX) y la agrega al final del paquete
+  AAAA-MM.paq en EVIDENCIAS_PAQUETES_DIR (fuera de MEDIA_ROOT),
+- reescribe el índice AAAA-MM.idx: registros de tamaño fijo (id_evidencia,
+  posición, tamaño) ordenados por id_evidencia,
+- guarda una miniatura en media/evidencias/miniaturas/, que sigue servida
+  como cualquier archivo de MEDIA_URL,
+- anota paquete y miniatura en la fila y, confirmada la transacción, borra
+  la foto original.
+
+leer() (vista foto_evidencia_archivada) abre el índice con mmap, busca el id
+con búsqueda binaria sin cargarlo entero y lee solo los bytes de esa foto del
+paquete. Si el proceso se corta a medio camino, la siguiente ejecución vuelve
+a agregar las fotos pendientes y el índice se queda con la última copia.
+"""
+
+import bisect
+import mmap
+import os
+import struct
+from io import BytesIO
+from itertools import groupby
+from pathlib import Path
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import transaction
+
+from PIL import Image, ImageOps
+
+from Gestion_Equipos.models import EvidenciaReservaHistorica
+
+
+# Registro del índice: id_evidencia, posición y tamaño en el paquete
+REGISTRO = struct.Struct('<qqq')
+
+CARPETA_MINIATURAS = 'evidencias/miniaturas'
+
+
+def _config(nombre, defecto):
+    return getattr(settings, f'EVIDENCIAS_{nombre}', defecto)
+
+
+def _rutas(paquete):
+    carpeta = Path(_config('PAQUETES_DIR', Path(settings.BASE_DIR) / 'evidencias_frias'))
+    return carpeta / f'{paquete}.paq', carpeta / f'{paquete}.idx'
+
+
+# ======================================================
+# IMÁGENES
+# ======================================================
+
+def _jpeg(imagen, lado, calidad):
+    copia = imagen.copy()
+    copia.thumbnail((lado, lado))
+    salida = BytesIO()
+    copia.save(salida, 'JPEG', quality=calidad, optimize=True)
+    return salida.getvalue()
+
+
+def recodificar(contenido):
+    """(foto recodificada, miniatura) en JPEG a partir de los bytes originales."""
+    imagen = ImageOps.exif_transpose(Image.open(BytesIO(contenido))).convert('RGB')
+    return (
+        _jpeg(imagen, _config('LADO_MAX', 1600), _config('CALIDAD', 70)),
+        _jpeg(imagen, _config('MINIATURA_LADO', 320), _config('CALIDAD', 70)),
+    )
+
+
+# ======================================================
+# ÍNDICE
+# ======================================================
+
+def _leer_indice(ruta):
+    """{id_evidencia: (posición, tamaño)} de un índice existente."""
+    if not ruta.exists():
+        return {}
+    datos = ruta.read_bytes()
+    return {id_evidencia: (posicion, tamano) for id_evidencia, posicion, tamano in REGISTRO.iter_unpack(datos)}
+
+
+def _escribir_indice(ruta, registros):
+    temporal = ruta.with_suffix('.idx.tmp')
+    temporal.write_bytes(b''.join(
+        REGISTRO.pack(id_evidencia, *registros[id_evidencia]) for id_evidencia in sorted(registros)
+    ))
+    # Los lectores con el índice anterior abierto (mmap) lo siguen viendo entero
+    os.replace(temporal, ruta)
+
+
+def buscar(paquete, id_evidencia):
+    """(posición, tamaño) de la foto en el paquete, o None."""
+    _, ruta_indice = _rutas(paquete)
+    try:
+        archivo = open(ruta_indice, 'rb')
+    except FileNotFoundError:
+        return None
+    with archivo, mmap.mmap(archivo.fileno(), 0, access=mmap.ACCESS_READ) as indice:
+        total = len(indice) // REGISTRO.size
+        i = bisect.bisect_left(range(total), id_evidencia, key=lambda n: REGISTRO.unpack_from(indice, n * REGISTRO.size)[0])
+        if i < total:
+            encontrado, posicion, tamano = REGISTRO.unpack_from(indice, i * REGISTRO.size)
+            if encontrado == id_evidencia:
+                return posicion, tamano
+    return None
+
+
+def leer(paquete, id_evidencia):
+    """Bytes JPEG de una foto empaquetada, o None si no está."""
+    ubicacion = buscar(paquete, id_evidencia)
+    if ubicacion is None:
+        return None
+    posicion, tamano = ubicacion
+    ruta_paquete, _ = _rutas(paquete)
+    with open(ruta_paquete, 'rb') as archivo:
+        archivo.seek(posicion)
+        return archivo.read(tamano)
+
+
+# ======================================================
+# COMPACTACIÓN
+# ======================================================
+
+def pendientes():
+    """Evidencias archivadas cuya foto sigue suelta en MEDIA_ROOT."""
+    return EvidenciaReservaHistorica.objects.filter(paquete__isnull=True)
+
+
+def _empaquetar_mes(paquete, evidencias):
+    ruta_paquete, ruta_indice = _rutas(paquete)
+    ruta_paquete.parent.mkdir(parents=True, exist_ok=True)
+    registros = _leer_indice(ruta_indice)
+    empaquetadas, faltantes = [], 0
+
+    with open(ruta_paquete, 'ab') as archivo:
+        for evidencia in evidencias:
+            try:
+                with default_storage.open(evidencia.foto) as original:
+                    foto, miniatura = recodificar(original.read())
+            except (FileNotFoundError, OSError):
+                faltantes += 1  # sin archivo o no es una imagen: queda pendiente
+                continue
+            registros[evidencia.id_evidencia] = (archivo.tell(), len(foto))
+            archivo.write(foto)
+            evidencia.miniatura = default_storage.save(
+                f'{CARPETA_MINIATURAS}/{evidencia.id_evidencia}.jpg', ContentFile(miniatura)
+            )
+            evidencia.paquete = paquete
+            empaquetadas.append(evidencia)
+        archivo.flush()
+        os.fsync(archivo.fileno())
+
+    if empaquetadas:
+        _escribir_indice(ruta_indice, registros)
+        originales = [evidencia.foto for evidencia in empaquetadas]
+
+        def borrar_originales():
+            for nombre in originales:
+                default_storage.delete(nombre)
+
+        with transaction.atomic():
+            EvidenciaReservaHistorica.objects.bulk_update(empaquetadas, ['paquete', 'miniatura'])
+            transaction.on_commit(borrar_originales)
+    return len(empaquetadas), faltantes
+
+
+def compactar():
+    """Empaqueta por mes las fotos pendientes. Devuelve {'fotos', 'paquetes', 'faltantes'}."""
+    evidencias = pendientes().select_related('id_reserva').order_by('id_reserva__fecha_uso', 'id_evidencia')
+    resultado = {'fotos': 0, 'paquetes': 0, 'faltantes': 0}
+    for paquete, del_mes in groupby(evidencias.iterator(), key=lambda e: f'{e.id_reserva.fecha_uso:%Y-%m}'):
+        fotos, faltantes = _empaquetar_mes(paquete, sorted(del_mes, key=lambda e: e.id_evidencia))
+        resultado['fotos'] += fotos
+        resultado['paquetes'] += bool(fotos)
+        resultado['faltantes'] += faltantes
+    return resultado
@@ -0,0 +1,167 @@
+"""
+Presupuesto de consultas SQL de cada URL de Gestion_Equipos/urls.py.
+
+Lo usan las pruebas (PresupuestoConsultasMixin) y los comandos benchmark_*,
+que ejecutan los mismos escenarios contra la base de datos configurada.
+"""
+
+from datetime import date, timedelta
+
+from core.models import Rack
+from core.testing import Presupuesto
+from Gestion_Equipos import archivo, calendario
+from Gestion_Equipos.models import AsignacionEquipo, EvidenciaReserva, Reserva, SerieReserva, SupervisorReserva
+
+
+ADMIN = 'administrador'
+DOCENTE = 'docente'
+
+
+def reserva_pendiente(datos):
+    return {'reserva_id': datos['reserva_pendiente'].id_reserva}
+
+
+def reserva_aprobada(datos):
+    return {'reserva_id': datos['reserva_aprobada'].id_reserva}
+
+
+def equipo(datos):
+    return {'equipo_id': datos['equipos'][0].id_equipo}
+
+
+def serie_pendiente(datos):
+    """Serie del docente con sus reservas pendientes."""
+    serie = SerieReserva.objects.create(
+        frecuencia='semanal', fecha_inicio=date.today(), fecha_fin=date.today() + timedelta(days=28),
+        id_usuario=datos['docente'],
+    )
+    Reserva.objects.filter(id_usuario=datos['docente'], estado_reserva='Pendiente').update(id_serie=serie)
+    return {'serie': serie}
+
+
+def asignacion(datos):
+    return {'asignacion': AsignacionEquipo.objects.create(
+        id_reserva=datos['reserva_aprobada'], id_equipo=datos['equipos'][0]
+    )}
+
+
+def supervisor_asignado(datos):
+    return {'supervisor_reserva': SupervisorReserva.objects.create(
+        id_reserva=datos['reserva_aprobada'], id_supervisor=datos['supervisor']
+    )}
+
+
+def evidencia(datos):
+    return {'evidencia': EvidenciaReserva.objects.create(
+        id_reserva=datos['reserva_aprobada'], tipo_evidencia='uso', foto='evidencias/uso.jpg'
+    )}
+
+
+def evidencia_archivada(datos):
+    """Evidencia de una reserva finalizada que pasó al archivo (foto aún sin empaquetar)."""
+    reserva = datos['reserva_aprobada']
+    Reserva.objects.filter(pk=reserva.pk).update(estado_reserva='Finalizada')
+    archivada = evidencia(datos)['evidencia']
+    archivo.archivar_lote([reserva.pk])
+    return {'evidencia': archivada}
+
+
+def rack_destino(datos):
+    """Otro rack con lugar para todos los equipos: el lote los mueve de verdad."""
+    return {'rack_destino': Rack.objects.create(
+        nom_rack='R-DESTINO', ubicacion='Bodega', capacidad_total=len(datos['equipos']),
+        capacidad_func=len(datos['equipos']), estado_rack='Disponible',
+    )}
+
+
+def historial_pasado(datos):
+    """Una reserva finalizada la semana pasada: el pronóstico necesita historial."""
+    Reserva.objects.filter(pk=datos['reserva_aprobada'].pk).update(
+        fecha_uso=date.today() - timedelta(days=7), estado_reserva='Finalizada'
+    )
+    return {}
+
+
+def calendario_docente(datos):
+    id_docente = datos['docente'].id_usuario
+    return {'tipo': calendario.DOCENTE, 'id_objeto': id_docente, 'token': calendario.token(calendario.DOCENTE, id_docente)}
+
+
+PRESUPUESTOS = {
+    # --- Reservas (Docente) ---
+    # cancelar_serie: una serie de 3 reservas, UPDATE + notificación por cada una
+    'crear_reserva': Presupuesto(6, rol=DOCENTE),
+    'mis_reservas': Presupuesto(3, rol=DOCENTE),
+    'cancelar_reserva': Presupuesto(4, rol=DOCENTE, metodo='post', kwargs=reserva_pendiente,
+                                    datos={'motivo': 'Cambio de horario'}),
+    'cancelar_serie': Presupuesto(11, rol=DOCENTE, metodo='post', preparar=serie_pendiente,
+                                  kwargs=lambda d: {'serie_id': d['serie'].id_serie},
+                                  datos={'motivo': 'Cambio de horario'}),
+
+    # --- Gestión de Equipos / Reportes (Admin) ---
+    'gestionar_equipos': Presupuesto(9, rol=ADMIN),
+    'ver_reportes': Presupuesto(12, rol=ADMIN),
+    'descargar_reporte_excel': Presupuesto(9, rol=ADMIN),
+    'pronostico_demanda': Presupuesto(7, rol=ADMIN, preparar=historial_pasado),
+    'descargar_pronostico_excel': Presupuesto(7, rol=ADMIN, preparar=historial_pasado),
+    'reporte_uso_equipos': Presupuesto(4, rol=ADMIN),
+
+    # --- Gestión de Reservas (Admin) ---
+    'gestionar_reservas_list': Presupuesto(6, rol=ADMIN),
+    'gestionar_reserva_detalle': Presupuesto(10, rol=ADMIN, kwargs=reserva_aprobada),
+
+    # --- Aprobar/Rechazar/Detalle ---
+    # Las series guardan reserva por reserva (UPDATE + notificación por cada una de las 3)
+    'aprobar_reserva': Presupuesto(4, rol=ADMIN, metodo='post', kwargs=reserva_pendiente),
+    'aprobar_serie': Presupuesto(11, rol=ADMIN, metodo='post', preparar=serie_pendiente,
+                                 kwargs=lambda d: {'serie_id': d['serie'].id_serie}),
+    'rechazar_reserva': Presupuesto(4, rol=ADMIN, metodo='post', kwargs=reserva_pendiente,
+                                    datos={'motivo': 'Sin equipos'}),
+    'detalle_reserva': Presupuesto(3, rol=ADMIN, kwargs=reserva_aprobada),
+    'eventos_dashboard': Presupuesto(1, rol=ADMIN),
+
+    # --- CRUD de Equipos ---
+    'crear_equipo': Presupuesto(6, rol=ADMIN, metodo='post', datos=lambda d: {
+        'nom_equipo': 'CHR-900', 'num_serie': 'NUEVA001', 'modelo': 'HP 14',
+        'id_estado': d['equipos'][0].id_estado_equipo_id, 'id_rack': d['rack'].id_rack,
+    }),
+    'editar_equipo': Presupuesto(7, rol=ADMIN, metodo='post', kwargs=equipo, datos=lambda d: {
+        'nom_equipo': 'CHR-000', 'num_serie': 'SERIE00000', 'modelo': 'HP 14',
+        'id_estado': d['equipos'][0].id_estado_equipo_id, 'id_rack': d['rack'].id_rack,
+    }),
+    'eliminar_equipo': Presupuesto(7, rol=ADMIN, metodo='post', kwargs=equipo),
+    'detalle_equipo': Presupuesto(3, rol=ADMIN, kwargs=equipo),
+    'api_actualizar_equipos_lote': Presupuesto(8, rol=ADMIN, metodo='post', preparar=rack_destino, datos=lambda d: {
+        'equipo_ids': [e.id_equipo for e in d['equipos']], 'id_rack': d['rack_destino'].id_rack,
+    }),
+
+    # --- APIs de Creación de Reservas ---
+    'autocompletar_responsable': Presupuesto(1, rol=DOCENTE, datos={'q': 'usu'}),
+    'filtrar_aulas': Presupuesto(1, rol=DOCENTE, datos=lambda d: {'bloque_id': d['bloque'].id_bloque}),
+    'filtrar_asignaturas': Presupuesto(1, rol=DOCENTE, datos=lambda d: {'carrera_id': d['carrera'].id_carrera}),
+    'notificaciones_docente': Presupuesto(2, rol=DOCENTE, datos={'desde': 0}),
+
+    # --- Calendarios ICS ---
+    'calendario_reservas': Presupuesto(1, kwargs=calendario_docente),
+
+    # --- APIs de Gestión de Reservas ---
+    'api_asignar_rack': Presupuesto(10, rol=ADMIN, metodo='post', kwargs=reserva_aprobada,
+                                    datos=lambda d: {'rack_id': d['rack'].id_rack}),
+    'api_desasignar_todos_equipos': Presupuesto(10, rol=ADMIN, metodo='post', preparar=asignacion,
+                                                kwargs=reserva_aprobada),
+    'api_desasignar_equipo': Presupuesto(7, rol=ADMIN, metodo='post', preparar=asignacion,
+                                         kwargs=lambda d: {'asignacion_id': d['asignacion'].id_asig_equipo}),
+    'api_asignar_supervisor': Presupuesto(8, rol=ADMIN, metodo='post', kwargs=reserva_aprobada,
+                                          datos=lambda d: {'supervisor_id': d['supervisor'].id_usuario}),
+    'api_desasignar_supervisor': Presupuesto(3, rol=ADMIN, metodo='post', preparar=supervisor_asignado,
+                                             kwargs=lambda d: {
+                                                 'supervisor_reserva_id': d['supervisor_reserva'].id_supervisor_reserva
+                                             }),
+    'api_eliminar_evidencia': Presupuesto(3, rol=ADMIN, metodo='post', preparar=evidencia,
+                                          kwargs=lambda d: {'evidencia_id': d['evidencia'].id_evidencia}),
+    'foto_evidencia_archivada': Presupuesto(3, rol=ADMIN, estado=302, preparar=evidencia_archivada,
+                                            kwargs=lambda d: {'evidencia_id': d['evidencia'].id_evidencia}),
+    'api_actualizar_gestion': Presupuesto(3, rol=ADMIN, metodo='post', kwargs=reserva_aprobada,
+                                          datos={'observaciones': 'Todo en orden'}),
+    'api_finalizar_reserva': Presupuesto(8, rol=ADMIN, metodo='post', kwargs=reserva_aprobada),
+}
@@ -0,0 +1,234 @@
+"""
+Pronóstico de la demanda de Chromebooks para planificar la compra de equipos.
+
+cargar() trae en una sola consulta las reservas aprobadas y finalizadas de los
+últimos PRONOSTICO_ANIOS_HISTORIA años, vivas y archivadas (ver archivo.py),
+y las convierte en arreglos NumPy. demanda() arma con ellas un arreglo
+semana × día × franja con los equipos en uso a la vez en cada franja de
+PRONOSTICO_FRANJA_MINUTOS: suma la cantidad en la franja de inicio, la resta
+en la de fin y acumula (np.add.at + cumsum), sin recorrer las reservas una
+por una. Sobre ese arreglo se calcula:
+
+- el perfil semanal (promedio por día y franja de las semanas con actividad)
+  y el estacional (pico semanal promedio por mes),
+- los percentiles del pico semanal por carrera y por facultad,
+- la proyección del pico del próximo periodo frente a la flota actual: el
+  percentil 95 de los picos del último periodo, corregido por el crecimiento
+  respecto al mismo periodo del año anterior.
+
+NumPy es opcional, como openpyxl en los reportes: sin él la página lo avisa.
+El resultado se guarda en la cache por PRONOSTICO_CACHE_SEGUNDOS.
+"""
+
+import math
+from datetime import date, timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import CharField
+from django.db.models.functions import Cast
+
+from core.models import Carrera, Facultad
+from Gestion_Equipos import archivo
+from Gestion_Equipos.recurrencia import capacidad
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+# Reservas que realmente usaron (o usarán) equipos
+ESTADOS_DEMANDA = ('Aprobada', 'Finalizada')
+
+DIAS = ['Lunes', 'Martes', 'Miércoles', 'Jueves', 'Viernes', 'Sábado', 'Domingo']
+MESES = ['Enero', 'Febrero', 'Marzo', 'Abril', 'Mayo', 'Junio', 'Julio',
+         'Agosto', 'Septiembre', 'Octubre', 'Noviembre', 'Diciembre']
+PERCENTILES = (50, 90, 95)
+
+
+def _config(nombre, defecto):
+    return getattr(settings, f'PRONOSTICO_{nombre}', defecto)
+
+
+def _franjas_por_dia():
+    return 24 * 60 // _config('FRANJA_MINUTOS', 30)
+
+
+# ======================================================
+# CARGA Y ARREGLO DE DEMANDA
+# ======================================================
+
+def cargar(hoy):
+    """
+    Historial como arreglos (uno por columna) alineados a semanas que empiezan
+    en lunes. Devuelve None si no hay reservas en el periodo.
+    """
+    franja = _config('FRANJA_MINUTOS', 30)
+    desde = hoy - timedelta(days=365 * _config('ANIOS_HISTORIA', 3))
+    desde -= timedelta(days=desde.weekday())
+
+    # Fecha y horas como texto: NumPy las convierte en bloque, sin crear un
+    # date/time de Python por fila (lo más lento de la carga). Reservas vivas
+    # y archivadas en una consulta (UNION ALL)
+    filas = list(archivo.historial(
+        estado_reserva__in=ESTADOS_DEMANDA, fecha_uso__gte=desde, fecha_uso__lt=hoy,
+    ).values_list(
+        Cast('fecha_uso', CharField()), Cast('hora_inicio', CharField()), Cast('hora_fin', CharField()),
+        'cant_solicitada', 'id_carrera_id',
+    ).unidas())
+    if not filas:
+        return None
+
+    fechas, inicios, fines, cantidades, carreras = zip(*filas)
+    dias = (np.array(fechas, dtype='datetime64[D]') - np.datetime64(desde, 'D')).astype(np.int64)
+    minutos_inicio, minutos_fin = (
+        np.char.add('1970-01-01T', np.array(horas)).astype('datetime64[m]').astype(np.int64)
+        for horas in (inicios, fines)
+    )
+    # Facultad de cada reserva a partir de su carrera, sin JOIN en la consulta grande
+    catalogo = Carrera.objects.values_list('id_carrera', 'id_facultad_id', 'nom_carrera')
+    facultad_de = {id_carrera: id_facultad for id_carrera, id_facultad, _ in catalogo}
+    ids_carrera, posiciones = np.unique(np.asarray(carreras, dtype=np.int64), return_inverse=True)
+    facultades = np.array([facultad_de.get(int(c), 0) for c in ids_carrera], dtype=np.int64)
+    return {
+        'desde': desde,
+        'semanas': (hoy - desde).days // 7 + 1,
+        'semana': dias // 7,
+        'dia': dias % 7,
+        # La franja de fin es la primera que ya no se usa (redondeo hacia arriba)
+        'inicio': minutos_inicio // franja,
+        'fin': -(-minutos_fin // franja),
+        'cantidad': np.asarray(cantidades, dtype=np.int64),
+        'carrera': ids_carrera[posiciones],
+        'facultad': facultades[posiciones],
+        'nombres_carrera': {id_carrera: nombre for id_carrera, _, nombre in catalogo},
+    }
+
+
+def demanda(historial, filtro=None):
+    """Equipos en uso a la vez: arreglo (semanas, 7 días, franjas del día)."""
+    franjas = _franjas_por_dia()
+    semana, dia, inicio, fin, cantidad = (
+        historial[campo] if filtro is None else historial[campo][filtro]
+        for campo in ('semana', 'dia', 'inicio', 'fin', 'cantidad')
+    )
+    cambios = np.zeros((historial['semanas'], 7, franjas + 1), dtype=np.int64)
+    np.add.at(cambios, (semana, dia, inicio), cantidad)
+    np.add.at(cambios, (semana, dia, fin), -cantidad)
+    return np.cumsum(cambios, axis=2)[:, :, :franjas]
+
+
+def _percentiles(picos):
+    activos = picos[picos > 0]
+    if not activos.size:
+        return None
+    valores = np.percentile(activos, PERCENTILES)
+    return {
+        **{f'p{p}': round(float(v), 1) for p, v in zip(PERCENTILES, valores)},
+        'maximo': int(activos.max()),
+        'semanas': int(activos.size),
+    }
+
+
+def _por_grupo(historial, campo, nombres):
+    """Percentiles del pico semanal de cada carrera o facultad, de mayor a menor p95."""
+    resultado = []
+    for grupo in np.unique(historial[campo]):
+        estadisticas = _percentiles(demanda(historial, historial[campo] == grupo).max(axis=(1, 2)))
+        if estadisticas:
+            resultado.append({'nombre': nombres.get(int(grupo), f'#{grupo}'), **estadisticas})
+    return sorted(resultado, key=lambda fila: (-fila['p95'], fila['nombre']))
+
+
+# ======================================================
+# PERFILES Y PROYECCIÓN
+# ======================================================
+
+def _perfil_semanal(total, activas):
+    """Promedio de equipos en uso por día y franja; solo los días y el rango horario con demanda."""
+    if not activas.any():
+        return {'franjas': [], 'filas': []}
+    franja = _config('FRANJA_MINUTOS', 30)
+    promedio = total[activas].mean(axis=0)
+    dias = np.flatnonzero(promedio.any(axis=1))
+    franjas = np.flatnonzero(promedio.any(axis=0))
+    rango = range(franjas[0], franjas[-1] + 1)
+    return {
+        'franjas': [f'{i * franja // 60:02d}:{i * franja % 60:02d}' for i in rango],
+        'filas': [
+            {'dia': DIAS[d], 'valores': [round(float(promedio[d, i]), 1) for i in rango]}
+            for d in dias
+        ],
+    }
+
+
+def _perfil_mensual(picos, desde):
+    """Pico semanal promedio de cada mes (semanas con actividad), para ver la estacionalidad del año."""
+    meses = np.array([(desde + timedelta(weeks=int(s))).month - 1 for s in range(picos.size)])
+    resultado = []
+    for mes in range(12):
+        activos = picos[(meses == mes) & (picos > 0)]
+        if activos.size:
+            resultado.append({'mes': MESES[mes], 'pico': round(float(activos.mean()), 1)})
+    return resultado
+
+
+def _proyeccion(picos):
+    periodo = _config('SEMANAS_PERIODO', 20)
+    ultimo = picos[-periodo:]
+    anterior = picos[-periodo - 52:-52] if picos.size > 52 + periodo else picos[:0]
+    activos_ultimo, activos_anterior = ultimo[ultimo > 0], anterior[anterior > 0]
+
+    pico_periodo = float(np.percentile(activos_ultimo, 95)) if activos_ultimo.size else 0.0
+    crecimiento = 0.0
+    if activos_ultimo.size and activos_anterior.size:
+        # Mismo periodo del año anterior: compara semanas de la misma época del año
+        crecimiento = min(max(activos_ultimo.mean() / activos_anterior.mean() - 1, -0.5), 1.0)
+
+    flota = capacidad()
+    proyeccion = math.ceil(pico_periodo * (1 + crecimiento))
+    return {
+        'pico_periodo': round(pico_periodo, 1),
+        'crecimiento': round(float(crecimiento) * 100, 1),
+        'proyeccion': proyeccion,
+        'flota': flota,
+        'holgura': flota - proyeccion,
+    }
+
+
+def calcular(hoy=None):
+    """Todo el pronóstico como datos simples (para la plantilla y el Excel)."""
+    hoy = hoy or date.today()
+    historial = cargar(hoy)
+    if historial is None:
+        return None
+
+    total = demanda(historial)
+    picos = total.max(axis=(1, 2))
+    activas = picos > 0
+    return {
+        'desde': historial['desde'],
+        'hasta': hoy - timedelta(days=1),
+        'reservas': int(historial['cantidad'].size),
+        'semanas_activas': int(activas.sum()),
+        'franja_minutos': _config('FRANJA_MINUTOS', 30),
+        'general': _percentiles(picos),
+        'perfil_semanal': _perfil_semanal(total, activas),
+        'perfil_mensual': _perfil_mensual(picos, historial['desde']),
+        'carreras': _por_grupo(historial, 'carrera', historial['nombres_carrera']),
+        'facultades': _por_grupo(
+            historial, 'facultad', dict(Facultad.objects.values_list('id_facultad', 'nom_facultad'))
+        ),
+        'proyeccion': _proyeccion(picos),
+    }
+
+
+def obtener():
+    """calcular() de hoy, desde la cache si ya se calculó."""
+    clave = f'pronostico_demanda:{date.today():%Y%m%d}'
+    resultado = cache.get(clave)
+    if resultado is None:
+        resultado = calcular()
+        cache.set(clave, resultado, _config('CACHE_SEGUNDOS', 3600))
+    return resultado
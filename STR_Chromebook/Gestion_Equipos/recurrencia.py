@@ -0,0 +1,134 @@
+"""
+Reservas recurrentes: la misma clase cada semana (o cada dos) durante el semestre.
+
+expandir() genera las fechas de la serie y conflictos() revisa todas contra
+las reservas existentes con una sola consulta (más el conteo de equipos en
+servicio), en lugar de una consulta por fecha: trae las reservas activas que
+se cruzan con el horario en cualquiera de las fechas y arma en memoria, por
+día, la ocupación del aula y la demanda de Chromebooks minuto a minuto.
+
+crear_serie() inserta las fechas libres con bulk_create, enlazadas a una
+SerieReserva para aprobarlas o cancelarlas juntas. bulk_create no envía
+post_save, así que se envía aquí: los eventos del dashboard, la cache de
+fragmentos y los calendarios se enteran igual que con save().
+"""
+
+from collections import defaultdict
+from datetime import date, timedelta
+from itertools import accumulate
+
+from django.conf import settings
+from django.db import router, transaction
+from django.db.models.signals import post_save
+
+from Gestion_Equipos.models import Equipo, Reserva, SerieReserva
+
+
+# Estados que ocupan el aula y los equipos
+ESTADOS_ACTIVOS = ('Pendiente', 'Aprobada')
+
+# Equipos que no cuentan para la capacidad
+ESTADOS_FUERA_DE_SERVICIO = ('En Mantenimiento', 'Dado de baja')
+
+DIAS_ENTRE_FECHAS = {'semanal': 7, 'quincenal': 14}
+
+
+def feriados():
+    """Fechas de settings.FERIADOS (AAAA-MM-DD)."""
+    return {date.fromisoformat(fecha) for fecha in getattr(settings, 'FERIADOS', [])}
+
+
+def expandir(fecha_inicio, fecha_fin, frecuencia, omitir=()):
+    """Fechas de la serie entre fecha_inicio y fecha_fin (inclusive), sin las de `omitir`."""
+    paso = timedelta(days=DIAS_ENTRE_FECHAS[frecuencia])
+    fechas = []
+    fecha = fecha_inicio
+    while fecha <= fecha_fin:
+        if fecha not in omitir:
+            fechas.append(fecha)
+        fecha += paso
+    return fechas
+
+
+def capacidad():
+    """Chromebooks que se pueden prestar (todos menos los de mantenimiento o de baja)."""
+    equipos = Equipo.objects.all()
+    for estado in ESTADOS_FUERA_DE_SERVICIO:
+        equipos = equipos.exclude(id_estado_equipo__nom_estado__iexact=estado)
+    return equipos.count()
+
+
+def _minuto(hora):
+    return hora.hour * 60 + hora.minute
+
+
+def _demanda_maxima(cambios):
+    """Máximo de equipos pedidos a la vez, dados los (minuto, +cantidad / -cantidad) de un día."""
+    # En el mismo minuto, las salidas antes que las entradas: 08:00-10:00 y 10:00-12:00 no se cruzan
+    return max(accumulate(cantidad for _, cantidad in sorted(cambios)), default=0)
+
+
+def conflictos(fechas, hora_inicio, hora_fin, id_aula, cant_solicitada):
+    """{fecha: motivo} de las fechas en que el aula está ocupada o no alcanzan los equipos."""
+    existentes = Reserva.objects.filter(
+        fecha_uso__in=fechas,
+        estado_reserva__in=ESTADOS_ACTIVOS,
+        hora_inicio__lt=hora_fin,
+        hora_fin__gt=hora_inicio,
+    ).values_list('fecha_uso', 'hora_inicio', 'hora_fin', 'id_aula_id', 'cant_solicitada')
+
+    # La consulta ya trae solo las que se cruzan con el horario pedido;
+    # la demanda se recorta a ese horario
+    desde, hasta = _minuto(hora_inicio), _minuto(hora_fin)
+    aula_ocupada = set()
+    cambios = defaultdict(list)
+    for fecha, inicio, fin, aula, cantidad in existentes:
+        if aula == id_aula:
+            aula_ocupada.add(fecha)
+        cambios[fecha] += [(max(_minuto(inicio), desde), cantidad), (min(_minuto(fin), hasta), -cantidad)]
+
+    disponibles = capacidad()
+    resultado = {}
+    for fecha in fechas:
+        if fecha in aula_ocupada:
+            resultado[fecha] = 'El aula ya está reservada en ese horario'
+        elif _demanda_maxima(cambios[fecha]) + cant_solicitada > disponibles:
+            resultado[fecha] = 'No hay suficientes Chromebooks en ese horario'
+    return resultado
+
+
+def crear_serie(plantilla, frecuencia, fecha_fin, omitir_feriados=True):
+    """
+    Crea la serie a partir de `plantilla`, la primera reserva sin guardar (como
+    la deja ReservaForm.save(commit=False)). Devuelve (serie, reservas creadas,
+    {fecha: motivo} de las fechas que chocan). Si todas chocan no crea nada y
+    la serie es None.
+    """
+    fechas = expandir(plantilla.fecha_uso, fecha_fin, frecuencia, feriados() if omitir_feriados else ())
+    omitidas = conflictos(
+        fechas, plantilla.hora_inicio, plantilla.hora_fin, plantilla.id_aula_id, plantilla.cant_solicitada
+    )
+    libres = [fecha for fecha in fechas if fecha not in omitidas]
+    if not libres:
+        return None, [], omitidas
+
+    campos = {
+        campo.attname: getattr(plantilla, campo.attname)
+        for campo in Reserva._meta.concrete_fields if not campo.primary_key
+    }
+    with transaction.atomic():
+        serie = SerieReserva.objects.create(
+            id_usuario_id=plantilla.id_usuario_id, frecuencia=frecuencia,
+            fecha_inicio=libres[0], fecha_fin=libres[-1],
+        )
+        reservas = Reserva.objects.bulk_create([
+            Reserva(**{**campos, 'fecha_uso': fecha, 'id_serie_id': serie.id_serie}) for fecha in libres
+        ])
+        if reservas[0].pk is None:
+            # MySQL no devuelve los IDs de un INSERT masivo
+            reservas = list(serie.reservas.order_by('fecha_uso'))
+
+        using = router.db_for_write(Reserva)
+        for reserva in reservas:
+            post_save.send(sender=Reserva, instance=reserva, created=True, update_fields=None, raw=False, using=using)
+    return serie, reservas, omitidas
@@ -0,0 +1,28 @@
+"""
+Señales propias de Gestion_Equipos.
+
+estado_reserva_cambiado se envía al guardar una reserva existente cuyo estado
+cambió, con el estado anterior (argumentos: reserva, anterior). La usan los
+eventos en vivo del dashboard y las notificaciones de los docentes.
+"""
+
+from django.db.models.signals import post_init, post_save
+from django.dispatch import Signal, receiver
+
+from Gestion_Equipos.models import Reserva
+
+
+estado_reserva_cambiado = Signal()
+
+
+@receiver(post_init, sender=Reserva)
+def _reserva_cargada(sender, instance, **kwargs):
+    # __dict__: no disparar la consulta de un campo diferido (.only()/.defer())
+    instance._estado_guardado = instance.__dict__.get('estado_reserva')
+
+
+@receiver(post_save, sender=Reserva)
+def _reserva_guardada(sender, instance, created, **kwargs):
+    anterior, instance._estado_guardado = instance._estado_guardado, instance.estado_reserva
+    if not created and instance.estado_reserva != anterior:
+        estado_reserva_cambiado.send(sender=Reserva, reserva=instance, anterior=anterior)
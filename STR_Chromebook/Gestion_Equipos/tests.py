@@ -1,3 +1,894 @@
-from django.test import TestCase
+import tempfile
+from datetime import date, datetime, time, timedelta
+from io import BytesIO, StringIO
+from pathlib import Path
+from unittest import mock, skipIf
 
-# Create your tests here.
+from asgiref.sync import async_to_sync, sync_to_async
+from PIL import Image
+
+import json
+
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection, transaction
+from django.db.models import Count
+from django.test import AsyncClient, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from core.models import Rack, Usuario
+from core.testing import PresupuestoConsultasMixin, crear_datos_base, iniciar_sesion, silenciar_registro_acceso
+from Gestion_Equipos import (
+    archivo, calendario, devoluciones, eventos, expiracion, paquetes_evidencias, pronostico, urls, uso_equipos
+)
+from Gestion_Equipos.eventos import aeventos_desde
+from Gestion_Equipos.models import (
+    Reserva, SerieReserva, Equipo, EstadoEquipo, HistorialEquipo, AsignacionEquipo, Notificacion, UsoEquipoMensual,
+    EvidenciaReserva, SupervisorReserva, ReservaHistorica, AsignacionEquipoHistorica, EvidenciaReservaHistorica,
+    EventoDashboard
+)
+from Gestion_Equipos.presupuestos import PRESUPUESTOS
+from Gestion_Equipos.recurrencia import conflictos, expandir
+
+
+class PresupuestoConsultasGestionEquiposTest(PresupuestoConsultasMixin, TestCase):
+    """Presupuesto de consultas SQL de cada URL de Gestion_Equipos/urls.py"""
+
+    urls = urls
+    presupuestos = PRESUPUESTOS
+
+
+class ApiAsyncTest(TestCase):
+    """Las APIs JSON async atendidas por el manejador ASGI (AsyncClient)."""
+
+    client_class = AsyncClient
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.datos = crear_datos_base()
+
+    def setUp(self):
+        silenciar_registro_acceso(self)
+
+    async def test_detalle_reserva_con_sesion(self):
+        url = reverse('detalle_reserva', args=[self.datos['reserva_aprobada'].id_reserva])
+        self.assertEqual((await self.client.get(url)).json()['error'], 'No autenticado')
+
+        await sync_to_async(iniciar_sesion)(self.client, self.datos['administrador'], 'administrador')
+        response = await self.client.get(url)
+        self.assertIn('Server-Timing', response)
+        self.assertEqual(response.json()['reserva']['docente']['nombre'], self.datos['docente'].nom_completo)
+
+        response = await self.client.get(reverse('detalle_equipo', args=[0]))
+        self.assertFalse(response.json()['success'])
+
+    async def test_filtros_y_autocompletar(self):
+        response = await self.client.get(reverse('filtrar_aulas'), {'bloque_id': self.datos['bloque'].id_bloque})
+        self.assertEqual(response.json()['aulas'], [{'id_aula': self.datos['aula'].id_aula, 'nom_aula': 'A-101'}])
+
+        response = await self.client.get(reverse('autocompletar_responsable'), {'q': 'docente'})
+        self.assertEqual(response.json()['results'], ['USUARIO DOCENTE'])
+
+
+class GetCondicionalTest(TestCase):
+    """ETag / Last-Modified: 304 con solo la consulta de la marca, y cambio de versión con update()."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.datos = crear_datos_base()
+
+    def setUp(self):
+        silenciar_registro_acceso(self)
+        iniciar_sesion(self.client, self.datos['administrador'], 'administrador')
+
+    def test_detalle_y_lista_responden_304_hasta_que_cambian(self):
+        equipo = self.datos['equipos'][0]
+        url = reverse('detalle_equipo', args=[equipo.id_equipo])
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('private', response['Cache-Control'])
+
+        with self.assertNumQueries(2):  # sesión + marca
+            response = self.client.get(url, headers={'If-None-Match': response['ETag']})
+        self.assertEqual(response.status_code, 304)
+
+        # update() masivo (como en gestion.py) también cambia la versión
+        etag = response['ETag']
+        Equipo.objects.filter(id_equipo=equipo.id_equipo).update(modelo='Otro')
+        response = self.client.get(url, headers={'If-None-Match': etag})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['equipo']['modelo'], 'Otro')
+
+        url = reverse('gestionar_reservas_list')
+        etag = self.client.get(url)['ETag']
+        self.assertEqual(self.client.get(url, headers={'If-None-Match': etag}).status_code, 304)
+        self.datos['reserva_pendiente'].delete()
+        self.assertEqual(self.client.get(url, headers={'If-None-Match': etag}).status_code, 200)
+
+    def test_cambio_de_catalogo_invalida_las_paginas_que_lo_muestran(self):
+        url = reverse('gestionar_equipos')
+        etag = self.client.get(url)['ETag']
+        self.assertEqual(self.client.get(url, headers={'If-None-Match': etag}).status_code, 304)
+
+        # Un rack renombrado en el admin no toca ningún Equipo
+        rack = Rack.objects.first()
+        rack.nom_rack = 'Rack renombrado'
+        with self.captureOnCommitCallbacks(execute=True):
+            rack.save()
+        response = self.client.get(url, headers={'If-None-Match': etag})
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'Rack renombrado')
+
+        url = reverse('detalle_reserva', args=[self.datos['reserva_pendiente'].id_reserva])
+        etag = self.client.get(url)['ETag']
+        aula = self.datos['reserva_pendiente'].id_aula
+        aula.nom_aula = 'Aula nueva'
+        with self.captureOnCommitCallbacks(execute=True):
+            aula.save()
+        response = self.client.get(url, headers={'If-None-Match': etag})
+        self.assertEqual(response.json()['reserva']['aula'], 'Aula nueva')
+
+
+class EventosDashboardTest(TestCase):
+    """Eventos en vivo del dashboard: señales -> cache -> stream SSE."""
+
+    client_class = AsyncClient
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.datos = crear_datos_base()
+
+    def setUp(self):
+        silenciar_registro_acceso(self)
+        cache.clear()
+
+    def test_aprobar_publica_evento_y_stream_lo_entrega(self):
+        reserva = self.datos['reserva_pendiente']
+        with self.captureOnCommitCallbacks(execute=True):
+            reserva.estado_reserva = 'Aprobada'
+            reserva.save()
+            equipo = self.datos['equipos'][0]
+            equipo.save()  # sin cambio de estado: no publica
+
+        eventos, completo = async_to_sync(aeventos_desde)(0)
+        self.assertTrue(completo)
+        self.assertEqual([e['tipo'] for e in eventos], ['reserva_aprobada'])
+
+        async def leer_stream():
+            await sync_to_async(iniciar_sesion)(self.client, self.datos['administrador'], 'administrador')
+            response = await self.client.get(reverse('eventos_dashboard'), {'desde': 0})
+            self.assertEqual(response['Content-Type'], 'text/event-stream')
+            return b''.join([parte async for parte in response.streaming_content]).decode()
+
+        with override_settings(EVENTOS_DURACION_MAX_SEGUNDOS=0):
+            contenido = async_to_sync(leer_stream)()
+
+        mensajes = [json.loads(linea[6:]) for linea in contenido.splitlines() if linea.startswith('data: ')]
+        self.assertEqual(mensajes[0]['fila']['id'], reserva.id_reserva)
+        self.assertEqual(mensajes[1]['tipo'], 'contadores')
+        self.assertEqual(mensajes[1]['pendientes'], 2)
+        self.assertIn(f"id: {eventos[0]['id']}", contenido)
+
+    def test_transaccion_revertida_no_publica(self):
+        with self.captureOnCommitCallbacks(execute=False) as callbacks:
+            self.datos['reserva_pendiente'].estado_reserva = 'Rechazada'
+            self.datos['reserva_pendiente'].save()
+        # El evento, las versiones de las tablas del estado anterior y del nuevo, y los calendarios
+        self.assertEqual(len(callbacks), 4)
+        self.assertEqual(async_to_sync(aeventos_desde)(0), ([], True))
+
+    @override_settings(CACHES={'default': {
+        'BACKEND': 'django.core.cache.backends.db.DatabaseCache', 'LOCATION': 'Tb_CACHE',
+    }})
+    def test_con_tabla_de_cache_el_registro_va_a_la_bd(self):
+        self.assertTrue(eventos.en_bd())
+
+    @override_settings(EVENTOS_EN_BD=True)
+    def test_registro_en_bd_numera_sin_repetir_y_espera_los_huecos(self):
+        numeros = [eventos.publicar('equipo_estado', equipos=[i]) for i in range(4)]
+        self.assertEqual(len(set(numeros)), 4)
+        self.assertEqual(eventos.ultimo_evento(), numeros[-1])
+
+        leidos, completo = async_to_sync(aeventos_desde)(numeros[0])
+        self.assertTrue(completo)
+        self.assertEqual([e['id'] for e in leidos], numeros[1:])
+        self.assertEqual(leidos[0]['equipos'], [1])
+
+        # Un ID sin confirmar (aquí, borrado) detiene la lectura mientras es reciente
+        EventoDashboard.objects.filter(id_evento=numeros[2]).delete()
+        leidos, _ = async_to_sync(aeventos_desde)(numeros[0])
+        self.assertEqual([e['id'] for e in leidos], [numeros[1]])
+        EventoDashboard.objects.filter(id_evento=numeros[3]).update(
+            fecha=timezone.now() - timedelta(seconds=eventos.HUECO_SEGUNDOS + 1)
+        )
+        leidos, completo = async_to_sync(aeventos_desde)(numeros[0])
+        self.assertEqual([e['id'] for e in leidos], [numeros[1], numeros[3]])
+
+        # El último entregado ya se borró por retención: el cliente debe recargar
+        EventoDashboard.objects.filter(id_evento__lte=numeros[1]).delete()
+        self.assertFalse(async_to_sync(aeventos_desde)(numeros[1])[1])
+
+
+class NotificacionesTest(TestCase):
+    """Notificaciones del docente al cambiar el estado de sus reservas, por cursor."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.datos = crear_datos_base()
+
+    def setUp(self):
+        silenciar_registro_acceso(self)
+
+    def test_cambios_de_estado_y_cursor(self):
+        iniciar_sesion(self.client, self.datos['administrador'], 'administrador')
+        pendiente, otra = self.datos['reservas'][0], self.datos['reservas'][1]
+        self.client.post(reverse('aprobar_reserva', args=[pendiente.id_reserva]))
+        self.client.post(reverse('rechazar_reserva', args=[otra.id_reserva]),
+                         {'motivo': 'Sin equipos'}, content_type='application/json')
+        self.client.post(reverse('aprobar_reserva', args=[pendiente.id_reserva]))  # sin cambio: no notifica
+
+        self.assertEqual(
+            list(Notificacion.objects.order_by('id_notificacion').values_list('tipo', flat=True)),
+            ['aprobada', 'rechazada']
+        )
+
+        iniciar_sesion(self.client, self.datos['docente'], 'docente')
+        url = reverse('notificaciones_docente')
+        datos = self.client.get(url).json()
+        self.assertEqual([n['tipo'] for n in datos['notificaciones']], ['aprobada', 'rechazada'])
+        self.assertIn('Sin equipos', datos['notificaciones'][1]['mensaje'])
+
+        # Sin cursor continúa desde lo ya entregado en la sesión; con cursor, desde ahí
+        self.assertEqual(self.client.get(url).json()['notificaciones'], [])
+        self.assertEqual(len(self.client.get(url, {'desde': datos['notificaciones'][0]['id']}).json()['notificaciones']), 1)
+
+    @override_settings(NOTIFICACIONES_MAX_LOTE=3)
+    def test_lotes_por_cursor_sin_saltarse_ninguna(self):
+        docente, reserva = self.datos['docente'], self.datos['reservas'][0]
+        creadas = [
+            Notificacion.objects.create(id_usuario=docente, id_reserva=reserva, tipo='aprobada', mensaje=f'Aviso {i}')
+            for i in range(7)
+        ]
+
+        iniciar_sesion(self.client, docente, 'docente')
+        url = reverse('notificaciones_docente')
+        recibidas, cursor, lotes = [], 0, 0
+        while True:
+            datos = self.client.get(url, {'desde': cursor}).json()
+            lotes += 1
+            if not datos['notificaciones']:
+                break
+            self.assertLessEqual(len(datos['notificaciones']), 3)
+            recibidas += [n['id'] for n in datos['notificaciones']]
+            cursor = datos['cursor']
+
+        self.assertEqual(recibidas, [n.id_notificacion for n in creadas])
+        self.assertEqual(lotes, 4)
+        self.assertEqual(self.client.get(url).json()['notificaciones'], [])
+
+
+class CalendarioTest(TestCase):
+    """Calendario .ics por token: cacheado, 304 sin consultas y regenerado al cambiar una reserva."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.datos = crear_datos_base()
+
+    def setUp(self):
+        silenciar_registro_acceso(self)
+        cache.clear()
+
+    def test_calendario_del_docente(self):
+        url = calendario.url_calendario(calendario.DOCENTE, self.datos['docente'].id_usuario)
+        response = self.client.get(url)
+        self.assertEqual(response['Content-Type'], 'text/calendar; charset=utf-8')
+        contenido = response.content.decode()
+        self.assertTrue(contenido.startswith('BEGIN:VCALENDAR\r\n'))
+        self.assertIn('STATUS:TENTATIVE', contenido)
+
+        with self.assertNumQueries(0):
+            response = self.client.get(url, headers={'If-None-Match': response['ETag']})
+        self.assertEqual(response.status_code, 304)
+
+        self.assertEqual(self.client.get(url[:-5] + '0.ics').status_code, 404)
+        self.assertEqual(self.client.get(url.replace('docente', 'bloque')).status_code, 404)
+
+        etag = response['ETag']
+        with self.captureOnCommitCallbacks(execute=True):
+            reserva = self.datos['reserva_pendiente']
+            reserva.estado_reserva = 'Aprobada'
+            reserva.save()
+        response = self.client.get(url, headers={'If-None-Match': etag})
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+
+class SerieReservaTest(TestCase):
+    """Series semanales: una verificación de choques para todas las fechas, bulk_create y acciones por serie."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.datos = crear_datos_base()
+        cls.inicio = cls.datos['reserva_pendiente'].fecha_uso
+
+    def setUp(self):
+        silenciar_registro_acceso(self)
+
+    def formulario(self, semanas, **extra):
+        d = self.datos
+        return {
+            'fecha_uso': self.inicio, 'hora_inicio': '08:30', 'hora_fin': '09:30',
+            'id_carrera': d['carrera'].id_carrera, 'id_asignatura': d['asignatura'].id_asignatura,
+            'bloque': d['bloque'].id_bloque, 'id_aula': d['aula'].id_aula, 'cant_solicitada': 2,
+            'responsable_entrega': 'responsable', 'telefono_contacto': '0999999999',
+            'repetir': 'semanal', 'repetir_hasta': self.inicio + timedelta(weeks=semanas - 1),
+            **extra,
+        }
+
+    def test_conflictos_por_aula_y_por_capacidad(self):
+        fechas = expandir(self.inicio, self.inicio + timedelta(days=27), 'semanal', omitir={self.inicio + timedelta(days=7)})
+        self.assertEqual(len(fechas), 3)
+
+        # Aula: la pendiente (08:00-09:00) y la aprobada del mismo horario la ocupan; la rechazada no cuenta
+        with self.assertNumQueries(2):
+            choques = conflictos(fechas, time(8, 30), time(9, 30), self.datos['aula'].id_aula, 1)
+        self.assertEqual(list(choques), [self.inicio])
+
+        # Capacidad (6 equipos): a las 09:00 salen 4 y entran 4, la demanda máxima es 4, no 8
+        self.assertEqual(conflictos(fechas, time(8, 30), time(9, 30), 0, 2), {})
+        self.assertEqual(list(conflictos(fechas, time(8, 30), time(9, 30), 0, 3)), [self.inicio])
+
+    def test_crear_aprobar_y_cancelar_serie(self):
+        iniciar_sesion(self.client, self.datos['docente'], 'docente')
+        url = reverse('crear_reserva')
+
+        # Las consultas no dependen del número de fechas (la primera petición calienta las caches)
+        self.client.post(url, self.formulario(2, hora_inicio='15:00', hora_fin='16:00'))
+        with CaptureQueriesContext(connection) as corta:
+            self.client.post(url, self.formulario(4))
+        with CaptureQueriesContext(connection) as larga:
+            self.client.post(url, self.formulario(16, hora_inicio='13:00', hora_fin='14:00'))
+        self.assertEqual(len(corta), len(larga))
+
+        serie = SerieReserva.objects.order_by('id_serie')[1]
+        # La primera fecha choca con la reserva pendiente del aula
+        self.assertEqual(serie.reservas.count(), 3)
+        self.assertEqual(serie.fecha_inicio, self.inicio + timedelta(weeks=1))
+
+        iniciar_sesion(self.client, self.datos['administrador'], 'administrador')
+        self.assertEqual(self.client.post(reverse('aprobar_serie', args=[serie.id_serie])).json()['aprobadas'], 3)
+        self.assertEqual(Notificacion.objects.filter(tipo='aprobada').count(), 3)
+
+        iniciar_sesion(self.client, self.datos['docente'], 'docente')
+        response = self.client.post(reverse('cancelar_serie', args=[serie.id_serie]),
+                                    {'motivo': 'Fin del curso'}, content_type='application/json')
+        self.assertEqual(response.json()['canceladas'], 3)
+        self.assertFalse(serie.reservas.exclude(estado_reserva='Rechazada').exists())
+
+
+@skipIf(pronostico.np is None, 'requiere numpy')
+class PronosticoTest(TestCase):
+    """Pronóstico de demanda: equipos en uso a la vez por franja, percentiles y proyección."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.datos = d = crear_datos_base()
+        cls.hoy = date.today()
+        lunes = cls.hoy - timedelta(days=cls.hoy.weekday() + 14)
+        for fecha, inicio, fin, cantidad in (
+            (lunes, time(8), time(10), 4),
+            (lunes, time(9), time(11), 3),  # 09:00-10:00: 7 equipos a la vez
+            (lunes + timedelta(weeks=1), time(8), time(9), 2),
+        ):
+            Reserva.objects.create(
+                fecha_uso=fecha, hora_inicio=inicio, hora_fin=fin, cant_solicitada=cantidad,
+                estado_reserva='Finalizada', responsable_entrega='RESPONSABLE', telefono_contacto='0999999999',
+                id_usuario=d['docente'], id_asignatura=d['asignatura'], id_aula=d['aula'], id_carrera=d['carrera']
+            )
+
+    def setUp(self):
+        silenciar_registro_acceso(self)
+        cache.clear()
+
+    def test_picos_percentiles_y_proyeccion(self):
+        with self.assertNumQueries(4):  # reservas, carreras, facultades, flota
+            datos = pronostico.calcular(self.hoy)
+
+        self.assertEqual(datos['reservas'], 3)
+        self.assertEqual(datos['general'], {'p50': 4.5, 'p90': 6.5, 'p95': 6.8, 'maximo': 7, 'semanas': 2})
+        self.assertEqual(datos['carreras'][0]['maximo'], 7)
+        self.assertEqual(datos['facultades'][0]['nombre'], self.datos['facultad'].nom_facultad)
+
+        perfil = datos['perfil_semanal']
+        self.assertEqual(perfil['filas'][0]['dia'], 'Lunes')
+        self.assertEqual(perfil['franjas'][0], '08:00')
+        self.assertEqual(perfil['filas'][0]['valores'][perfil['franjas'].index('09:30')], 3.5)
+
+        # 6 equipos disponibles contra un pico proyectado de 7
+        self.assertEqual(datos['proyeccion']['proyeccion'], 7)
+        self.assertEqual(datos['proyeccion']['holgura'], -1)
+
+    def test_pagina_y_excel(self):
+        iniciar_sesion(self.client, self.datos['administrador'], 'administrador')
+        self.assertContains(self.client.get(reverse('pronostico_demanda')), 'Faltan equipos')
+        response = self.client.get(reverse('descargar_pronostico_excel'))
+        self.assertEqual(response['Content-Type'], 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet')
+
+
+@skipIf(uso_equipos.np is None, 'numpy no está instalado')
+class UsoEquiposTest(TestCase):
+    """Horas de uso por equipo: cálculo con NumPy, actualización incremental y reporte."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.datos = d = crear_datos_base()
+        # La reserva aprobada (09:00-10:00, dentro de dos días) con dos equipos;
+        # el primero también en la pendiente, que no cuenta
+        cls.equipo_1, cls.equipo_2 = d['equipos'][:2]
+        AsignacionEquipo.objects.bulk_create([
+            AsignacionEquipo(id_reserva=d['reserva_aprobada'], id_equipo=cls.equipo_1),
+            AsignacionEquipo(id_reserva=d['reserva_aprobada'], id_equipo=cls.equipo_2),
+            AsignacionEquipo(id_reserva=d['reserva_pendiente'], id_equipo=cls.equipo_1),
+        ])
+        cls.hoy = d['reserva_aprobada'].fecha_uso + timedelta(days=1)
+
+    def setUp(self):
+        silenciar_registro_acceso(self)
+
+    def horas(self):
+        return dict(UsoEquipoMensual.objects.values_list('id_equipo_id', 'horas'))
+
+    def test_actualizacion_incremental(self):
+        resultado = uso_equipos.actualizar(self.hoy)
+        self.assertEqual((resultado['desde'], resultado['filas'], resultado['equipos']), (None, 2, 2))
+        self.assertEqual(self.horas(), {self.equipo_1.id_equipo: 1.0, self.equipo_2.id_equipo: 1.0})
+        self.assertEqual(uso_equipos.marca_agua(), self.hoy)
+        self.assertEqual(Equipo.objects.get(pk=self.equipo_1.pk).horas_uso, 1.0)  # contador sincronizado
+
+        # Sin cambios: solo recalcula desde el mes de la marca (menos el reproceso) y no toca equipos
+        resultado = uso_equipos.actualizar(self.hoy)
+        self.assertEqual(resultado['desde'], (self.hoy - timedelta(days=7)).replace(day=1))
+        self.assertEqual(resultado['equipos'], 0)
+
+        # Entrega y devolución registradas: cuentan las horas reales (1,5 h);
+        # una devolución dos días después no es creíble y se usa el horario
+        reserva = self.datos['reserva_aprobada']
+        entrega = timezone.make_aware(datetime.combine(reserva.fecha_uso, time(9)))
+        Reserva.objects.filter(pk=reserva.pk).update(
+            fecha_entrega=entrega, fecha_devolucion=entrega + timedelta(minutes=90)
+        )
+        self.assertEqual(uso_equipos.actualizar(self.hoy)['equipos'], 2)
+        self.assertEqual(set(self.horas().values()), {1.5})
+
+        Reserva.objects.filter(pk=reserva.pk).update(fecha_devolucion=entrega + timedelta(days=2))
+        uso_equipos.actualizar(self.hoy)
+        self.assertEqual(set(self.horas().values()), {1.0})
+
+    def test_reporte_y_detalle_equipo(self):
+        uso_equipos.actualizar(self.hoy)
+        iniciar_sesion(self.client, self.datos['administrador'], 'administrador')
+
+        # 6 equipos, 2 h en total: promedio 0,33 h; los usados con índice 3
+        datos = uso_equipos.resumen()
+        self.assertEqual(datos['mas_usados'][0]['indice'], 3.0)
+        self.assertEqual((datos['sobreusados'], datos['subusados']), (2, 4))
+        self.assertEqual(datos['racks'], [{'nombre': 'R1', 'equipos': 6, 'horas': 2.0, 'maximo': 1.0, 'promedio': 0.3}])
+        self.assertContains(self.client.get(reverse('reporte_uso_equipos')), self.equipo_1.nom_equipo)
+
+        response = self.client.get(reverse('detalle_equipo', args=[self.equipo_1.id_equipo]))
+        self.assertEqual(response.json()['equipo']['uso']['horas'], 1.0)
+        self.assertEqual(response.json()['equipo']['uso']['reservas'], 1)
+
+
+class AsignarRackTest(TestCase):
+    """Asignar un rack elige primero los equipos menos usados; finalizar les suma las horas."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.datos = crear_datos_base()
+
+    def setUp(self):
+        silenciar_registro_acceso(self)
+        iniciar_sesion(self.client, self.datos['administrador'], 'administrador')
+
+    def test_menos_usados_primero(self):
+        equipos = self.datos['equipos']
+        for horas, equipo in zip((30, 5, 20, 1, 10, 40), equipos):
+            Equipo.objects.filter(pk=equipo.pk).update(horas_uso=horas)
+        reserva = self.datos['reserva_aprobada']  # 2 equipos, 09:00-10:00
+
+        response = self.client.post(
+            reverse('api_asignar_rack', args=[reserva.id_reserva]),
+            json.dumps({'rack_id': self.datos['rack'].id_rack}), content_type='application/json'
+        )
+        self.assertTrue(response.json()['success'])
+        asignados = set(AsignacionEquipo.objects.filter(id_reserva=reserva).values_list('id_equipo_id', flat=True))
+        self.assertEqual(asignados, {equipos[3].id_equipo, equipos[1].id_equipo})
+
+        self.client.post(reverse('api_finalizar_reserva', args=[reserva.id_reserva]))
+        horas = dict(Equipo.objects.filter(pk__in=asignados).values_list('id_equipo', 'horas_uso'))
+        self.assertEqual(horas, {equipos[3].id_equipo: 2.0, equipos[1].id_equipo: 6.0})
+
+
+class ActualizarEquiposLoteTest(TestCase):
+    """Cambio de estado y de rack en lote: un UPDATE, historial por equipo y capacidad del rack destino."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.datos = crear_datos_base()
+        cls.mantenimiento = EstadoEquipo.objects.get(nom_estado='En Mantenimiento')
+        cls.destino = Rack.objects.create(
+            nom_rack='R2', ubicacion='Laboratorio', capacidad_total=3,
+            capacidad_func=3, estado_rack='Disponible'
+        )
+
+    def setUp(self):
+        silenciar_registro_acceso(self)
+        iniciar_sesion(self.client, self.datos['administrador'], 'administrador')
+
+    def actualizar(self, equipos, **cambios):
+        return self.client.post(
+            reverse('api_actualizar_equipos_lote'),
+            json.dumps({'equipo_ids': [e.id_equipo for e in equipos], **cambios}), content_type='application/json'
+        ).json()
+
+    def test_cambia_estado_y_rack_con_historial(self):
+        movidos, quedan = self.datos['equipos'][:3], self.datos['equipos'][3:]
+        respuesta = self.actualizar(
+            movidos, id_estado=self.mantenimiento.id_estado_equipo, id_rack=self.destino.id_rack
+        )
+
+        self.assertEqual(respuesta, {'success': True, 'actualizados': 3})
+        self.assertEqual(
+            set(Equipo.objects.filter(pk__in=[e.pk for e in movidos])
+                .values_list('id_estado_equipo_id', 'id_rack_id')),
+            {(self.mantenimiento.id_estado_equipo, self.destino.id_rack)}
+        )
+        self.assertFalse(Equipo.objects.filter(pk__in=[e.pk for e in quedan], id_rack=self.destino).exists())
+
+        historial = HistorialEquipo.objects.order_by('id_equipo_id')
+        self.assertEqual([h.id_equipo_id for h in historial], [e.id_equipo for e in movidos])
+        for registro, equipo in zip(historial, movidos):
+            self.assertEqual(
+                (registro.id_estado_anterior_id, registro.id_estado_nuevo_id,
+                 registro.id_rack_anterior_id, registro.id_rack_nuevo_id, registro.id_usuario_id),
+                (equipo.id_estado_equipo_id, self.mantenimiento.id_estado_equipo,
+                 self.datos['rack'].id_rack, self.destino.id_rack, self.datos['administrador'].id_usuario)
+            )
+
+    def test_solo_estado_conserva_el_rack(self):
+        equipo = self.datos['equipos'][0]
+        self.assertTrue(self.actualizar([equipo], id_estado=self.mantenimiento.id_estado_equipo)['success'])
+
+        equipo.refresh_from_db()
+        self.assertEqual(equipo.id_rack_id, self.datos['rack'].id_rack)
+        registro = HistorialEquipo.objects.get()
+        self.assertEqual((registro.id_rack_anterior_id, registro.id_rack_nuevo_id),
+                         (self.datos['rack'].id_rack, self.datos['rack'].id_rack))
+
+    def test_rechaza_lote_que_excede_la_capacidad(self):
+        equipos = self.datos['equipos']
+        self.assertTrue(self.actualizar(equipos[:1], id_rack=self.destino.id_rack)['success'])
+        HistorialEquipo.objects.all().delete()
+
+        # El que ya está en el destino no cuenta: 1 + 2 entrantes caben en 3
+        self.assertEqual(self.actualizar(equipos[:3], id_rack=self.destino.id_rack),
+                         {'success': True, 'actualizados': 2})
+        self.assertEqual(HistorialEquipo.objects.count(), 2)
+
+        respuesta = self.actualizar(
+            equipos[3:4], id_estado=self.mantenimiento.id_estado_equipo, id_rack=self.destino.id_rack
+        )
+        self.assertFalse(respuesta['success'])
+        self.assertIn('Ocupados: 3 de 3', respuesta['error'])
+        self.assertEqual(
+            Equipo.objects.values_list('id_rack__nom_rack', 'id_estado_equipo__nom_estado').get(pk=equipos[3].pk),
+            ('R1', 'Disponible')
+        )
+        self.assertEqual(HistorialEquipo.objects.count(), 2)
+
+    def test_los_que_no_cambian_no_se_tocan(self):
+        equipos = self.datos['equipos'][:3]
+        self.actualizar(equipos[:1], id_estado=self.mantenimiento.id_estado_equipo)
+        HistorialEquipo.objects.all().delete()
+        antes = dict(Equipo.objects.values_list('id_equipo', 'fecha_actualizacion'))
+
+        respuesta = self.actualizar(
+            equipos, id_estado=self.mantenimiento.id_estado_equipo, id_rack=self.datos['rack'].id_rack
+        )
+
+        self.assertEqual(respuesta, {'success': True, 'actualizados': 2})
+        self.assertEqual(
+            sorted(HistorialEquipo.objects.values_list('id_equipo_id', flat=True)),
+            [equipos[1].id_equipo, equipos[2].id_equipo]
+        )
+        despues = dict(Equipo.objects.values_list('id_equipo', 'fecha_actualizacion'))
+        self.assertEqual(despues[equipos[0].id_equipo], antes[equipos[0].id_equipo])
+        self.assertNotEqual(despues[equipos[1].id_equipo], antes[equipos[1].id_equipo])
+
+        self.assertEqual(self.actualizar(equipos, id_estado=self.mantenimiento.id_estado_equipo),
+                         {'success': True, 'actualizados': 0})
+        self.assertEqual(HistorialEquipo.objects.count(), 2)
+
+
+class DevolucionesVencidasTest(TestCase):
+    """Reservas Aprobadas que terminaron sin devolución: marca, finalización tras la gracia y total del dashboard."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.datos = crear_datos_base()
+
+    def setUp(self):
+        silenciar_registro_acceso(self)
+        cache.clear()
+        self.reserva = self.datos['reserva_aprobada']  # 2 equipos, 08:00-09:00
+        Reserva.objects.filter(estado_reserva='Aprobada').exclude(pk=self.reserva.pk).update(estado_reserva='Finalizada')
+        en_uso = EstadoEquipo.objects.get(nom_estado='En uso')
+        self.equipos = self.datos['equipos'][:2]
+        for equipo in self.equipos:
+            AsignacionEquipo.objects.create(id_reserva=self.reserva, id_equipo=equipo)
+        Equipo.objects.filter(pk__in=[e.pk for e in self.equipos]).update(id_estado_equipo=en_uso)
+
+    def momento(self, hora):
+        return timezone.make_aware(datetime.combine(self.reserva.fecha_uso, time(hora)))
+
+    def test_marca_y_finaliza_pasada_la_gracia(self):
+        self.assertEqual(devoluciones.detectar(self.momento(8), gracia_horas=2)['marcadas'], 0)
+
+        resultado = devoluciones.detectar(self.momento(10), gracia_horas=2)
+        self.assertEqual(resultado, {'marcadas': 1, 'finalizadas': 0, 'pendientes': 1})
+        self.assertTrue(Reserva.objects.get(pk=self.reserva.pk).devolucion_vencida)
+        self.assertEqual(devoluciones.contar(), 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            resultado = devoluciones.detectar(self.momento(12), gracia_horas=2)
+        self.assertEqual(resultado, {'marcadas': 0, 'finalizadas': 1, 'pendientes': 0})
+        reserva = Reserva.objects.get(pk=self.reserva.pk)
+        self.assertEqual(reserva.estado_reserva, 'Finalizada')
+        self.assertIn(devoluciones.NOTA_FINALIZADA_SOLA, reserva.observaciones)
+        estados = set(Equipo.objects.filter(pk__in=[e.pk for e in self.equipos])
+                      .values_list('id_estado_equipo__nom_estado', flat=True))
+        self.assertEqual(estados, {'Disponible'})
+
+    def test_no_finaliza_dos_veces_si_el_administrador_se_adelanta(self):
+        original, llamadas = devoluciones.vencidas, []
+
+        def vencidas_con_carrera(ahora=None):
+            llamadas.append(ahora)
+            if len(llamadas) == 3:
+                # Entre la lista y el bloqueo, el administrador registra la devolución
+                with transaction.atomic():
+                    devoluciones.finalizar_reserva(Reserva.objects.select_for_update().get(pk=self.reserva.pk))
+            return original(ahora)
+
+        horas = list(Equipo.objects.filter(pk__in=[e.pk for e in self.equipos]).values_list('horas_uso', flat=True))
+        with mock.patch.object(devoluciones, 'vencidas', vencidas_con_carrera), \
+                self.captureOnCommitCallbacks(execute=True):
+            resultado = devoluciones.detectar(self.momento(12), gracia_horas=2)
+
+        self.assertEqual(resultado['finalizadas'], 0)
+        self.assertNotIn(devoluciones.NOTA_FINALIZADA_SOLA, Reserva.objects.get(pk=self.reserva.pk).observaciones or '')
+        self.assertEqual(
+            list(Equipo.objects.filter(pk__in=[e.pk for e in self.equipos]).values_list('horas_uso', flat=True)),
+            [h + devoluciones.horas_reserva(self.reserva) for h in horas]
+        )
+        self.assertEqual(Notificacion.objects.filter(id_reserva=self.reserva, tipo='finalizada').count(), 1)
+
+    def test_total_en_cache_y_dashboard(self):
+        devoluciones.detectar(self.momento(11), gracia_horas=0)
+        with self.assertNumQueries(0):
+            self.assertEqual(devoluciones.contar(), 1)
+
+        iniciar_sesion(self.client, self.datos['administrador'], 'administrador')
+        response = self.client.get(reverse('dashboard_administrador'))
+        self.assertContains(response, 'terminaron sin registrar la devolución')
+
+        # Devolución registrada a mano: el total se recalcula
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse('api_finalizar_reserva', args=[self.reserva.id_reserva]))
+        self.assertEqual(devoluciones.contar(), 0)
+        self.assertNotContains(self.client.get(reverse('dashboard_administrador')), 'terminaron sin registrar')
+
+    def test_comando(self):
+        salida = StringIO()
+        call_command('detectar_vencidas', '--simular', stdout=salida)
+        self.assertIn('0 reservas', salida.getvalue())
+
+
+class ExpiracionPendientesTest(TestCase):
+    """Las Pendientes con fecha pasada expiran en bloque y sus docentes reciben el aviso."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.datos = crear_datos_base()
+
+    def setUp(self):
+        silenciar_registro_acceso(self)
+        cache.clear()
+
+    def test_expira_en_bloque_y_notifica(self):
+        fecha = self.datos['reserva_pendiente'].fecha_uso
+        self.assertEqual(expiracion.expirar(fecha), 0)
+
+        dia_siguiente = fecha + timedelta(days=1)
+        pendientes = list(Reserva.objects.filter(estado_reserva='Pendiente').values_list('pk', flat=True))
+        with self.captureOnCommitCallbacks(execute=True):
+            with self.assertNumQueries(5):  # savepoint, SELECT, UPDATE, INSERT, release
+                self.assertEqual(expiracion.expirar(dia_siguiente), len(pendientes))
+
+        self.assertFalse(Reserva.objects.filter(estado_reserva='Pendiente').exists())
+        self.assertEqual(Reserva.objects.filter(estado_reserva='Expirada').count(), len(pendientes))
+        notificaciones = Notificacion.objects.filter(tipo='expirada')
+        self.assertEqual(sorted(notificaciones.values_list('id_reserva_id', flat=True)), sorted(pendientes))
+        self.assertIn('expiró', notificaciones[0].mensaje)
+        # Las Aprobadas del mismo día no se tocan
+        self.assertTrue(Reserva.objects.filter(estado_reserva='Aprobada').exists())
+
+        iniciar_sesion(self.client, self.datos['administrador'], 'administrador')
+        response = self.client.get(reverse('dashboard_administrador'))
+        self.assertEqual(response.context['total_pendientes'], 0)
+
+    def test_actualiza_solo_las_filas_notificadas(self):
+        fecha = self.datos['reserva_pendiente'].fecha_uso
+        insertada = []
+
+        def insertar_antes_del_update(execute, sql, params, many, context):
+            # Una Pendiente vencida que llega entre el SELECT ... FOR UPDATE y el UPDATE
+            if sql.startswith('UPDATE') and not insertada:
+                insertada.append(Reserva.objects.create(
+                    fecha_uso=fecha, hora_inicio=time(15), hora_fin=time(16), cant_solicitada=1,
+                    estado_reserva='Pendiente', responsable_entrega='RESPONSABLE', telefono_contacto='0999999999',
+                    id_usuario=self.datos['docente'], id_asignatura=self.datos['asignatura'],
+                    id_aula=self.datos['aula'], id_carrera=self.datos['carrera'],
+                ))
+            return execute(sql, params, many, context)
+
+        with connection.execute_wrapper(insertar_antes_del_update):
+            expiradas = expiracion.expirar(fecha + timedelta(days=1))
+
+        self.assertTrue(insertada)
+        self.assertEqual(Reserva.objects.get(pk=insertada[0].pk).estado_reserva, 'Pendiente')
+        self.assertEqual(
+            sorted(Reserva.objects.filter(estado_reserva='Expirada').values_list('pk', flat=True)),
+            sorted(Notificacion.objects.filter(tipo='expirada').values_list('id_reserva_id', flat=True)),
+        )
+        self.assertEqual(Reserva.objects.filter(estado_reserva='Expirada').count(), expiradas)
+
+
+class ArchivoHistoricoTest(TestCase):
+    """Las reservas terminadas de periodos anteriores pasan a las tablas históricas; los reportes las siguen viendo."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.datos = crear_datos_base()
+        cls.hoy = date(2026, 10, 19)
+        reserva = cls.datos['reserva_aprobada']
+        cls.antiguas = []
+        for fecha in (date(2025, 6, 30), date(2025, 7, 1)):
+            antigua = Reserva.objects.create(
+                fecha_uso=fecha, hora_inicio=time(8), hora_fin=time(10), cant_solicitada=1,
+                estado_reserva='Finalizada', responsable_entrega='RESPONSABLE', telefono_contacto='0999999999',
+                id_usuario=reserva.id_usuario, id_asignatura=reserva.id_asignatura,
+                id_aula=reserva.id_aula, id_carrera=reserva.id_carrera,
+            )
+            AsignacionEquipo.objects.create(id_reserva=antigua, id_equipo=cls.datos['equipos'][0])
+            cls.antiguas.append(antigua)
+        SupervisorReserva.objects.create(id_reserva=cls.antiguas[0], id_supervisor=cls.datos['supervisor'])
+        EvidenciaReserva.objects.create(id_reserva=cls.antiguas[0], tipo_evidencia='uso', foto='evidencias/uso.jpg')
+        Notificacion.objects.create(id_usuario=reserva.id_usuario, id_reserva=cls.antiguas[0],
+                                    tipo='finalizada', mensaje='Finalizada')
+
+    def setUp(self):
+        silenciar_registro_acceso(self)
+
+    def test_inicio_periodo(self):
+        self.assertEqual(archivo.inicio_periodo(self.hoy), date(2026, 7, 1))
+        self.assertEqual(archivo.corte(self.hoy, 2), date(2025, 7, 1))
+        self.assertEqual(archivo.inicio_periodo(date(2026, 3, 1), 3), date(2024, 7, 1))
+
+    def test_archiva_por_lotes_con_sus_datos(self):
+        vieja, reciente = self.antiguas
+        self.assertEqual(archivo.archivar(self.hoy, periodos=2, lote=1), 1)
+        self.assertEqual(archivo.archivar(self.hoy, periodos=2, lote=1), 0)
+
+        self.assertFalse(Reserva.objects.filter(pk=vieja.pk).exists())
+        self.assertTrue(Reserva.objects.filter(pk=reciente.pk).exists())  # del periodo que se conserva
+        historica = ReservaHistorica.objects.get(pk=vieja.pk)
+        self.assertEqual((historica.estado_reserva, historica.id_usuario_id), ('Finalizada', vieja.id_usuario_id))
+        self.assertEqual(historica.supervisores.get().id_supervisor_id, self.datos['supervisor'].pk)
+        self.assertEqual(EvidenciaReservaHistorica.objects.get().foto, 'evidencias/uso.jpg')
+        self.assertEqual(AsignacionEquipoHistorica.objects.get().id_reserva_id, vieja.pk)
+        self.assertFalse(AsignacionEquipo.objects.filter(id_reserva_id=vieja.pk).exists())
+        self.assertFalse(Notificacion.objects.filter(id_reserva_id=vieja.pk).exists())
+
+    def test_reportes_leen_vivas_y_archivadas(self):
+        for antigua in self.antiguas:
+            Reserva.objects.filter(pk=antigua.pk).update(fecha_uso=date(2025, 3, 10))
+        archivo.archivar_lote([self.antiguas[0].pk])
+
+        mes = archivo.historial(fecha_uso__year=2025, fecha_uso__month=3)
+        self.assertEqual(mes.count(), 2)
+        self.assertEqual(mes.agrupar('estado_reserva', cantidad=Count('pk')),
+                         [{'estado_reserva': 'Finalizada', 'cantidad': 2}])
+        self.assertEqual(len(list(mes.order_by('-fecha_uso', '-id_reserva'))), 2)
+
+        iniciar_sesion(self.client, self.datos['administrador'], 'administrador')
+        response = self.client.get(reverse('ver_reportes'), {'mes': 3, 'anio': 2025})
+        self.assertEqual(response.context['total_reservas'], 2)
+        self.assertEqual(response.context['racks_mas_usados'][0]['total_equipos'], 2)
+        self.assertEqual(uso_equipos.actualizar(self.hoy, completo=True)['filas'], 1)  # 2 asignaciones, un mes
+
+
+class PaquetesEvidenciasTest(TestCase):
+    """Las fotos de reservas archivadas se empaquetan por mes y se sirven de a una desde el paquete."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.datos = crear_datos_base()
+
+    def setUp(self):
+        silenciar_registro_acceso(self)
+        carpeta = tempfile.TemporaryDirectory()
+        self.addCleanup(carpeta.cleanup)
+        self.media = Path(carpeta.name) / 'media'
+        configuracion = override_settings(MEDIA_ROOT=self.media, EVIDENCIAS_PAQUETES_DIR=Path(carpeta.name) / 'frias')
+        configuracion.enable()
+        self.addCleanup(configuracion.disable)
+
+    def evidencia_archivada(self, color):
+        reserva = self.datos['reserva_aprobada']
+        antigua = Reserva.objects.create(
+            fecha_uso=date(2025, 3, 10), hora_inicio=time(8), hora_fin=time(10), cant_solicitada=1,
+            estado_reserva='Finalizada', responsable_entrega='RESPONSABLE', telefono_contacto='0999999999',
+            id_usuario=reserva.id_usuario, id_asignatura=reserva.id_asignatura,
+            id_aula=reserva.id_aula, id_carrera=reserva.id_carrera,
+        )
+        foto = BytesIO()
+        Image.new('RGB', (2400, 1800), color).save(foto, 'PNG')
+        evidencia = EvidenciaReserva.objects.create(
+            id_reserva=antigua, tipo_evidencia='uso', foto=SimpleUploadedFile('uso.png', foto.getvalue())
+        )
+        archivo.archivar_lote([antigua.pk])
+        return EvidenciaReservaHistorica.objects.get(pk=evidencia.pk)
+
+    def test_empaqueta_por_mes_y_sirve_una_foto(self):
+        primera = self.evidencia_archivada('red')
+        original = self.media / primera.foto
+        self.assertTrue(original.exists())
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(paquetes_evidencias.compactar(), {'fotos': 1, 'paquetes': 1, 'faltantes': 0})
+        primera.refresh_from_db()
+        self.assertEqual(primera.paquete, '2025-03')
+        self.assertFalse(original.exists())
+        self.assertTrue((self.media / primera.miniatura).exists())
+
+        # Una foto archivada después va al mismo paquete; el índice tiene las dos
+        segunda = self.evidencia_archivada('blue')
+        with self.captureOnCommitCallbacks(execute=True):
+            paquetes_evidencias.compactar()
+        self.assertIsNone(paquetes_evidencias.buscar('2025-03', 0))
+
+        iniciar_sesion(self.client, self.datos['administrador'], 'administrador')
+        for evidencia, color in ((primera, (255, 0, 0)), (segunda, (0, 0, 255))):
+            response = self.client.get(reverse('foto_evidencia_archivada', args=[evidencia.id_evidencia]))
+            self.assertEqual(response['Content-Type'], 'image/jpeg')
+            imagen = Image.open(BytesIO(response.content))
+            self.assertEqual(imagen.size, (1600, 1200))
+            self.assertTrue(all(abs(a - b) < 10 for a, b in zip(imagen.getpixel((800, 600)), color)))
+
+
+class SeedBenchmarkTest(TestCase):
+    """El generador de datos sintéticos produce un conjunto coherente."""
+
+    def test_seed_benchmark_escala_minima(self):
+        call_command('seed_benchmark', scale=0.0001, stdout=StringIO())
+
+        self.assertEqual(Equipo.objects.count(), 30)
+        self.assertEqual(Usuario.objects.filter(id_tipo_usuario__nom_rol='Docente').count(), 5)
+        self.assertEqual(Reserva.objects.count(), 50)
+        self.assertTrue(AsignacionEquipo.objects.exists())
+        self.assertFalse(Reserva.objects.filter(estado_reserva='Finalizada', fecha_devolucion__isnull=True).exists())
@@ -6,6 +6,7 @@ urlpatterns = [
     path('reserva/nueva/', views.crear_reserva, name='crear_reserva'),
     path('mis-reservas/', views.mis_reservas, name='mis_reservas'),  
     path('reserva/<int:reserva_id>/cancelar/', views.cancelar_reserva, name='cancelar_reserva'),  
+    path('serie/<int:serie_id>/cancelar/', views.cancelar_serie, name='cancelar_serie'),
     
     # --- Vistas de Gestión de Equipos (Admin) ---
     path('equipos/', views.gestionar_equipos, name='gestionar_equipos'),
@@ -13,6 +14,9 @@ urlpatterns = [
     # --- Vistas de Reportes (Admin) ---
     path('reportes/', views.ver_reportes, name='ver_reportes'),
     path('reportes/descargar-excel/', views.descargar_reporte_excel, name='descargar_reporte_excel'),
+    path('reportes/pronostico/', views.pronostico_demanda, name='pronostico_demanda'),
+    path('reportes/pronostico/excel/', views.descargar_pronostico_excel, name='descargar_pronostico_excel'),
+    path('reportes/uso-equipos/', views.reporte_uso_equipos, name='reporte_uso_equipos'),
     
     # --- Vistas de Gestión de Reservas (Admin) ---
     path('reservas/', views.gestionar_reservas_list, name='gestionar_reservas_list'),
@@ -20,19 +24,26 @@ urlpatterns = [
     
     # --- APIs para Dashboard (Aprobar/Rechazar) ---
     path('reserva/<int:reserva_id>/aprobar/', views.aprobar_reserva, name='aprobar_reserva'),
+    path('serie/<int:serie_id>/aprobar/', views.aprobar_serie, name='aprobar_serie'),
     path('reserva/<int:reserva_id>/rechazar/', views.rechazar_reserva, name='rechazar_reserva'),
     path('reserva/<int:reserva_id>/detalle/', views.detalle_reserva, name='detalle_reserva'),
+    path('api/eventos/', views.eventos_dashboard, name='eventos_dashboard'),
     
     # --- APIs para CRUD de Equipos ---
     path('equipo/crear/', views.crear_equipo, name='crear_equipo'),
     path('equipo/<int:equipo_id>/editar/', views.editar_equipo, name='editar_equipo'),
     path('equipo/<int:equipo_id>/eliminar/', views.eliminar_equipo, name='eliminar_equipo'),
     path('equipo/<int:equipo_id>/detalle/', views.detalle_equipo, name='detalle_equipo'),
+    path('equipos/actualizar-lote/', views.api_actualizar_equipos_lote, name='api_actualizar_equipos_lote'),
     
     # --- APIs para Creación de Reservas (Docente) ---
     path('api/autocompletar-responsable/', views.autocompletar_responsable, name='autocompletar_responsable'),
     path('api/filtrar-aulas/', views.filtrar_aulas_por_bloque, name='filtrar_aulas'),
     path('api/filtrar-asignaturas/', views.filtrar_asignaturas_por_carrera, name='filtrar_asignaturas'),
+    path('api/notificaciones/', views.notificaciones_docente, name='notificaciones_docente'),
+    
+    # --- Calendarios ICS (suscripción con token, sin sesión) ---
+    path('calendario/<str:tipo>/<int:id_objeto>/<str:token>.ics', views.calendario_reservas, name='calendario_reservas'),
     
     # --- APIs de Gestión de Reservas (Admin) ---
     path('api/reservas/<int:reserva_id>/asignar-rack/', views.api_asignar_rack, name='api_asignar_rack'),
@@ -41,6 +52,7 @@ urlpatterns = [
     path('api/reservas/<int:reserva_id>/asignar-supervisor/', views.api_asignar_supervisor, name='api_asignar_supervisor'),
     path('api/reservas/desasignar-supervisor/<int:supervisor_reserva_id>/', views.api_desasignar_supervisor, name='api_desasignar_supervisor'),
     path('api/reservas/eliminar-evidencia/<int:evidencia_id>/', views.api_eliminar_evidencia, name='api_eliminar_evidencia'),
+    path('evidencias/archivadas/<int:evidencia_id>/', views.foto_evidencia_archivada, name='foto_evidencia_archivada'),
     path('api/reservas/<int:reserva_id>/actualizar-gestion/', views.api_actualizar_gestion, name='api_actualizar_gestion'),
     path('api/reservas/<int:reserva_id>/finalizar/', views.api_finalizar_reserva, name='api_finalizar_reserva'),
 ]
\ No newline at end of file
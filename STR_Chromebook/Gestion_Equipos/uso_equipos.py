@@ -0,0 +1,300 @@
+"""
+Horas de uso de cada Chromebook, para detectar los equipos sobreusados (que
+fallan antes) y los que quedan guardados, y repartir mejor el desgaste.
+
+actualizar() (comando `actualizar_uso_equipos`, programado cada noche) trae
+las reservas usadas con su horario y, aparte, sus asignaciones como pares de
+enteros (reserva, equipo); NumPy las cruza con np.searchsorted. Cada
+asignación vale las horas reales de su reserva (fecha_entrega a
+fecha_devolucion) si están registradas y son creíbles, o las del horario
+(hora_inicio a hora_fin). Se suman por equipo y mes (np.unique +
+np.bincount) y se guardan en UsoEquipoMensual.
+
+La actualización es incremental: la marca de agua es el día hasta el que se
+calculó la última vez (Max de calculado_hasta). Solo se recalculan, desde el
+primer día del mes, los meses que tocan los USO_EQUIPOS_DIAS_REPROCESO días
+anteriores a la marca y los siguientes hasta ayer (borrar e insertar esos
+meses), para recoger las reservas que se finalizan o corrigen tarde. Con
+`--completo` se recalcula todo el historial, también el archivado (archivo.py).
+
+Al terminar, Equipo.horas_uso (el contador que usa api_asignar_rack para
+elegir primero los equipos menos usados) se iguala al total de la tabla.
+Durante el día, api_finalizar_reserva le suma las horas de la reserva con
+un update(F()) masivo (horas_reserva()); la corrida de la noche corrige
+cualquier diferencia.
+
+resumen() lee esa tabla (una consulta, más la marca de agua) para el
+reporte: horas por equipo y por rack (el rack actual del equipo) y el índice
+de uso de cada equipo frente al promedio de la flota en servicio.
+"""
+
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import CharField, F, FloatField, IntegerField, Max, OuterRef, Q, Subquery, Sum, Value
+from django.db.models.functions import Cast, Coalesce
+from django.utils import timezone
+
+from Gestion_Equipos import archivo
+from Gestion_Equipos.models import Equipo, UsoEquipoMensual
+from Gestion_Equipos.recurrencia import ESTADOS_FUERA_DE_SERVICIO
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+# Reservas en las que los equipos asignados se usaron
+ESTADOS_USO = ('Aprobada', 'Finalizada')
+
+# Índice de uso (horas del equipo / promedio de la flota) fuera de este rango
+SOBREUSO = 1.5
+SUBUSO = 0.5
+
+
+def _config(nombre, defecto):
+    return getattr(settings, f'USO_EQUIPOS_{nombre}', defecto)
+
+
+# ======================================================
+# CÁLCULO (NUMPY)
+# ======================================================
+
+def _fechas_hora(valores):
+    """Textos de fecha y hora de la BD a datetime64; los NULL quedan como NaT."""
+    arreglo = np.array(valores, dtype=object)
+    arreglo[arreglo == None] = 'NaT'  # noqa: E711 (comparación elemento a elemento)
+    return arreglo.astype('datetime64[s]')
+
+
+def _minutos(horas):
+    return np.char.add('1970-01-01T', np.array(horas)).astype('datetime64[m]').astype(np.int64)
+
+
+def cargar(desde, hasta):
+    """
+    Reservas usadas con fecha_uso en [desde, hasta) (desde None: todo el
+    historial) y sus asignaciones, como arreglos. Las fechas y horas se traen
+    como texto y NumPy las convierte en bloque; las asignaciones, que son
+    muchas más, solo como enteros.
+    """
+    filtros = {'estado_reserva__in': ESTADOS_USO, 'fecha_uso__lt': hasta}
+    if desde is not None:
+        filtros['fecha_uso__gte'] = desde
+    # Vivas y archivadas (archivo.py) en una consulta con UNION ALL
+    filas = list(archivo.historial(**filtros).values_list(
+        'id_reserva',
+        Cast('fecha_uso', CharField()),
+        Cast('hora_inicio', CharField()),
+        Cast('hora_fin', CharField()),
+        Cast('fecha_entrega', CharField()),
+        Cast('fecha_devolucion', CharField()),
+    ).unidas().order_by('id_reserva'))
+    if not filas:
+        return None
+
+    asignaciones = np.array(
+        list(archivo.asignaciones(**{f'id_reserva__{filtro}': valor for filtro, valor in filtros.items()})
+             .values_list('id_reserva_id', 'id_equipo_id').unidas()),
+        dtype=np.int64,
+    ).reshape(-1, 2)
+
+    ids, fechas, inicios, fines, entregas, devoluciones = zip(*filas)
+    return {
+        'fecha': np.array(fechas, dtype='datetime64[D]'),
+        'inicio': _minutos(inicios),
+        'fin': _minutos(fines),
+        'entrega': _fechas_hora(entregas),
+        'devolucion': _fechas_hora(devoluciones),
+        # Posición de la reserva de cada asignación (los ids vienen ordenados)
+        'reserva': np.searchsorted(np.asarray(ids, dtype=np.int64), asignaciones[:, 0]),
+        'equipo': asignaciones[:, 1],
+    }
+
+
+def horas_por_reserva(historial):
+    """Horas reales si entrega y devolución son creíbles; si no, las del horario de la reserva."""
+    programadas = np.clip(historial['fin'] - historial['inicio'], 0, None) / 60
+    reales = historial['devolucion'] - historial['entrega']
+    validas = ~np.isnat(reales)
+    reales = np.where(validas, reales, np.timedelta64(0, 's')).astype(np.int64) / 3600
+    # Una devolución registrada días después (p. ej. al finalizar tarde) no es uso real
+    validas &= (reales > 0) & (reales <= _config('HORAS_REALES_MAX', 12))
+    return np.where(validas, reales, programadas)
+
+
+def horas_reserva(reserva):
+    """horas_por_reserva() de una sola reserva, sin NumPy (al finalizarla)."""
+    if reserva.fecha_entrega and reserva.fecha_devolucion:
+        reales = (reserva.fecha_devolucion - reserva.fecha_entrega).total_seconds() / 3600
+        if 0 < reales <= _config('HORAS_REALES_MAX', 12):
+            return reales
+    minutos = (reserva.hora_fin.hour * 60 + reserva.hora_fin.minute) - (
+        reserva.hora_inicio.hour * 60 + reserva.hora_inicio.minute
+    )
+    return max(minutos, 0) / 60
+
+
+def resumir(historial):
+    """[(id_equipo, mes, horas, reservas)] sumando las asignaciones de cada equipo por mes."""
+    if historial is None or not historial['equipo'].size:
+        return []
+    meses = historial['fecha'].astype('datetime64[M]').astype(np.int64)[historial['reserva']]
+    # Clave única equipo-mes: los meses desde 1970 caben de sobra en 10^4
+    claves, posiciones = np.unique(historial['equipo'] * 10_000 + meses, return_inverse=True)
+    horas = np.bincount(posiciones, weights=horas_por_reserva(historial)[historial['reserva']])
+    reservas = np.bincount(posiciones)
+    primeros_dias = (claves % 10_000).astype('datetime64[M]').astype('datetime64[D]').tolist()
+    return [
+        (int(clave // 10_000), mes, round(float(h), 2), int(r))
+        for clave, mes, h, r in zip(claves, primeros_dias, horas, reservas)
+    ]
+
+
+# ======================================================
+# ACTUALIZACIÓN INCREMENTAL
+# ======================================================
+
+def marca_agua():
+    """Día (excluido) hasta el que se calculó el uso; None si nunca se calculó."""
+    return UsoEquipoMensual.objects.aggregate(hasta=Max('calculado_hasta'))['hasta']
+
+
+def actualizar(hoy=None, completo=False):
+    """
+    Recalcula los meses desde la marca de agua (menos los días de reproceso)
+    hasta ayer. Devuelve {'desde', 'filas', 'equipos'}: primer día
+    recalculado (None si fue todo), filas guardadas y equipos cuyo uso cambió.
+    """
+    hoy = hoy or timezone.localdate()
+    marca = None if completo else marca_agua()
+    desde = None
+    if marca is not None:
+        desde = (min(marca, hoy) - timedelta(days=_config('DIAS_REPROCESO', 7))).replace(day=1)
+
+    nuevas = resumir(cargar(desde, hoy))
+    recalculadas = UsoEquipoMensual.objects.all()
+    if desde is not None:
+        recalculadas = recalculadas.filter(mes__gte=desde)
+
+    with transaction.atomic():
+        anteriores = set(recalculadas.values_list('id_equipo_id', 'mes', 'horas', 'reservas'))
+        cambiados = {fila[0] for fila in anteriores.symmetric_difference(nuevas)}
+        recalculadas.delete()
+        UsoEquipoMensual.objects.bulk_create([
+            UsoEquipoMensual(id_equipo_id=equipo, mes=mes, horas=horas, reservas=reservas, calculado_hasta=hoy)
+            for equipo, mes, horas, reservas in nuevas
+        ], batch_size=_config('LOTE', 1000))
+        sincronizar_contadores()
+        # Nueva versión del detalle del equipo (GET condicional, ver core.condicional)
+        Equipo.objects.filter(id_equipo__in=cambiados).tocar()
+
+    return {'desde': desde, 'filas': len(nuevas), 'equipos': len(cambiados)}
+
+
+def sincronizar_contadores():
+    """Equipo.horas_uso = total de UsoEquipoMensual de cada equipo (un solo UPDATE)."""
+    total = (
+        UsoEquipoMensual.objects.filter(id_equipo=OuterRef('pk'))
+        .values('id_equipo').annotate(total=Sum('horas')).values('total')
+    )
+    # Sin sellar fecha_actualizacion: el contador no se muestra, no cambia la versión del equipo
+    return Equipo.objects.update(
+        horas_uso=Coalesce(Subquery(total), Value(0.0), output_field=FloatField()),
+        fecha_actualizacion=F('fecha_actualizacion'),
+    )
+
+
+# ======================================================
+# LECTURA (REPORTE Y DETALLE DEL EQUIPO)
+# ======================================================
+
+def meses_recientes():
+    return _config('MESES_RECIENTES', 3)
+
+
+def _desde_recientes():
+    """Primer día de los últimos meses_recientes() meses (el actual incluido)."""
+    mes = timezone.localdate().replace(day=1)
+    for _ in range(meses_recientes() - 1):
+        mes = (mes - timedelta(days=1)).replace(day=1)
+    return mes
+
+
+def con_uso(equipos):
+    """Anota a un queryset de Equipo sus horas, horas_recientes, reservas y ultimo_mes (misma consulta)."""
+    return equipos.annotate(
+        horas=Coalesce(Sum('uso_mensual__horas'), Value(0.0), output_field=FloatField()),
+        horas_recientes=Coalesce(
+            Sum('uso_mensual__horas', filter=Q(uso_mensual__mes__gte=_desde_recientes())),
+            Value(0.0), output_field=FloatField(),
+        ),
+        reservas=Coalesce(Sum('uso_mensual__reservas'), Value(0), output_field=IntegerField()),
+        ultimo_mes=Max('uso_mensual__mes'),
+    )
+
+
+def _alerta(indice):
+    if indice is None:
+        return ''
+    if indice >= SOBREUSO:
+        return 'sobreuso'
+    if indice <= SUBUSO:
+        return 'subuso'
+    return ''
+
+
+def resumen():
+    """Uso por equipo (con su índice frente al promedio de la flota en servicio) y por rack."""
+    equipos = list(
+        con_uso(Equipo.objects.select_related('id_rack', 'id_estado_equipo')).order_by('-horas', 'nom_equipo')
+    )
+    fuera = {estado.lower() for estado in ESTADOS_FUERA_DE_SERVICIO}
+    en_servicio = {e.id_equipo for e in equipos if e.id_estado_equipo.nom_estado.lower() not in fuera}
+    horas_servicio = [e.horas for e in equipos if e.id_equipo in en_servicio]
+    promedio = sum(horas_servicio) / len(horas_servicio) if horas_servicio else 0
+
+    filas = []
+    racks = {}
+    for equipo in equipos:
+        servicio = equipo.id_equipo in en_servicio
+        indice = round(equipo.horas / promedio, 2) if promedio and servicio else None
+        fila = {
+            'id': equipo.id_equipo,
+            'nombre': equipo.nom_equipo,
+            'num_serie': equipo.num_serie,
+            'estado': equipo.id_estado_equipo.nom_estado,
+            'rack': equipo.id_rack.nom_rack if equipo.id_rack else 'Sin asignar',
+            'horas': round(equipo.horas, 1),
+            'horas_recientes': round(equipo.horas_recientes, 1),
+            'reservas': equipo.reservas,
+            'ultimo_mes': equipo.ultimo_mes,
+            'indice': indice,
+            'alerta': _alerta(indice),
+            'en_servicio': servicio,
+        }
+        filas.append(fila)
+        rack = racks.setdefault(fila['rack'], {'nombre': fila['rack'], 'equipos': 0, 'horas': 0.0, 'maximo': 0.0})
+        rack['equipos'] += 1
+        rack['horas'] += equipo.horas
+        rack['maximo'] = max(rack['maximo'], equipo.horas)
+
+    for rack in racks.values():
+        rack['promedio'] = round(rack['horas'] / rack['equipos'], 1)
+        rack['horas'] = round(rack['horas'], 1)
+        rack['maximo'] = round(rack['maximo'], 1)
+
+    lista = _config('LISTA', 20)
+    servicio = [fila for fila in filas if fila['en_servicio']]
+    return {
+        'marca_agua': marca_agua(),
+        'promedio': round(promedio, 1),
+        'meses_recientes': meses_recientes(),
+        'mas_usados': servicio[:lista],
+        'menos_usados': servicio[::-1][:lista],
+        'sobreusados': sum(1 for fila in filas if fila['alerta'] == 'sobreuso'),
+        'subusados': sum(1 for fila in filas if fila['alerta'] == 'subuso'),
+        'racks': sorted(racks.values(), key=lambda rack: -rack['promedio']),
+    }
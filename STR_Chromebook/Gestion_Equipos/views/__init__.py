@@ -6,4 +6,6 @@ El __init__.py los une para que Django los pueda encontrar.
 # Importar todo desde los archivos de vistas
 from .core import *
 from .reportes import *
-from .gestion import *
\ No newline at end of file
+from .gestion import *
+from .api import *
+from .calendario import *
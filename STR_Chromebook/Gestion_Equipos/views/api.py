@@ -0,0 +1,343 @@
+# ======================================================
+# APIs JSON ASYNC
+# (Consultas livianas de los formularios y modales, eventos y notificaciones)
+# ======================================================
+#
+# Bajo ASGI (uvicorn) estas vistas no ocupan un hilo por petición: usan el
+# ORM async (aget, async for) y leen la sesión con aget(). Bajo WSGI siguen
+# funcionando igual (Django las ejecuta con async_to_sync).
+
+import asyncio
+import json
+import logging
+import time
+
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.db.models import Count, Q
+from django.shortcuts import aget_object_or_404
+from django.http import JsonResponse, StreamingHttpResponse
+
+# Importar Modelos
+from core.autenticacion import requiere_rol
+from core.condicional import acon_catalogos, condicional
+from core.models import Usuario, Aula, Asignatura
+from Gestion_Equipos.eventos import aeventos_desde, aultimo_evento
+from Gestion_Equipos.uso_equipos import con_uso, meses_recientes
+from Gestion_Equipos.models import Reserva, Equipo, Notificacion
+
+logger = logging.getLogger(__name__)
+
+
+# ======================================================
+# APIs (AJAX) - CREACIÓN DE RESERVA (DOCENTE)
+# ======================================================
+
+async def autocompletar_responsable(request):
+    """API para autocompletar nombres de responsables"""
+
+    if request.method == 'GET':
+        query = request.GET.get('q', '').strip()
+
+        if len(query) < 2:
+            return JsonResponse({'results': []})
+
+        # Buscar usuarios que coincidan con el query
+        usuarios = Usuario.objects.filter(
+            nom_completo__icontains=query
+        ).values_list('nom_completo', flat=True)[:10]
+
+        # Convertir a mayúsculas
+        results = [nombre.upper() async for nombre in usuarios]
+
+        return JsonResponse({'results': results})
+
+    return JsonResponse({'results': []})
+
+
+async def filtrar_aulas_por_bloque(request):
+    """API para filtrar aulas según el bloque seleccionado"""
+
+    if request.method == 'GET':
+        bloque_id = request.GET.get('bloque_id')
+
+        if not bloque_id:
+            return JsonResponse({'aulas': []})
+
+        aulas = Aula.objects.filter(id_bloque_id=bloque_id).values('id_aula', 'nom_aula')
+
+        return JsonResponse({'aulas': [aula async for aula in aulas]})
+
+    return JsonResponse({'aulas': []})
+
+
+async def filtrar_asignaturas_por_carrera(request):
+    """API para filtrar asignaturas según la carrera seleccionada"""
+
+    if request.method == 'GET':
+        carrera_id = request.GET.get('carrera_id')
+
+        if not carrera_id:
+            return JsonResponse({'asignaturas': []})
+
+        try:
+            # Convertir a entero y validar
+            carrera_id = int(carrera_id)
+
+            # Filtrar asignaturas por carrera
+            asignaturas = Asignatura.objects.filter(
+                id_carrera_id=carrera_id
+            ).values('id_asignatura', 'nom_asignatura').order_by('nom_asignatura')
+
+            # Convertir a lista
+            asignaturas_list = [asignatura async for asignatura in asignaturas]
+
+            return JsonResponse({
+                'asignaturas': asignaturas_list,
+                'count': len(asignaturas_list)
+            })
+
+        except ValueError:
+            return JsonResponse({'error': 'ID de carrera inválido', 'asignaturas': []})
+        except Exception as e:
+            logger.exception('Error al filtrar asignaturas de la carrera %s', carrera_id)
+            return JsonResponse({'error': str(e), 'asignaturas': []})
+
+    return JsonResponse({'asignaturas': []})
+
+
+# ======================================================
+# APIs (AJAX) - DETALLES (MODALES)
+# ======================================================
+
+async def _marca_reserva(request, reserva_id):
+    return await acon_catalogos(
+        await Reserva.objects.filter(id_reserva=reserva_id).values_list('fecha_actualizacion').afirst()
+    )
+
+
+async def _marca_equipo(request, equipo_id):
+    return await acon_catalogos(
+        await Equipo.objects.filter(id_equipo=equipo_id).values_list('fecha_actualizacion').afirst()
+    )
+
+
+@requiere_rol(api=True)
+@condicional(_marca_reserva)
+async def detalle_reserva(request, reserva_id):
+    """Vista para obtener detalles completos de una reserva (JSON)"""
+
+    try:
+        reserva = await aget_object_or_404(Reserva.objects.select_related(
+            'id_usuario', 'id_asignatura', 'id_carrera__id_facultad', 'id_aula__id_bloque'
+        ), id_reserva=reserva_id)
+
+        # Construir respuesta JSON con todos los detalles
+        data = {
+            'success': True,
+            'reserva': {
+                'id': reserva.id_reserva,
+                'fecha_uso': reserva.fecha_uso.strftime('%d/%m/%Y'),
+                'hora_inicio': reserva.hora_inicio.strftime('%H:%M'),
+                'hora_fin': reserva.hora_fin.strftime('%H:%M'),
+                'estado': reserva.estado_reserva,
+                'cant_solicitada': reserva.cant_solicitada,
+                'responsable_entrega': reserva.responsable_entrega,
+                'telefono_contacto': reserva.telefono_contacto,
+                'motivo_rechazo': reserva.motivo_rechazo if reserva.motivo_rechazo else '',
+                'docente': {
+                    'nombre': reserva.id_usuario.nom_completo,
+                    'cedula': reserva.id_usuario.cedula,
+                    'email': reserva.id_usuario.email,
+                    'telefono': reserva.id_usuario.telefono,
+                },
+                'asignatura': reserva.id_asignatura.nom_asignatura,
+                'carrera': reserva.id_carrera.nom_carrera,
+                'facultad': reserva.id_carrera.id_facultad.nom_facultad if reserva.id_carrera.id_facultad else 'N/A',
+                'bloque': reserva.id_aula.id_bloque.nom_bloque,
+                'aula': reserva.id_aula.nom_aula,
+            }
+        }
+
+        return JsonResponse(data)
+    except Exception as e:
+        return JsonResponse({'success': False, 'error': str(e)})
+
+
+@requiere_rol(api=True)
+@condicional(_marca_equipo)
+async def detalle_equipo(request, equipo_id):
+    """Vista para obtener detalles de un equipo (JSON)"""
+
+    try:
+        equipo = await aget_object_or_404(
+            con_uso(Equipo.objects.select_related('id_estado_equipo', 'id_rack')),
+            id_equipo=equipo_id
+        )
+
+        data = {
+            'success': True,
+            'equipo': {
+                'id': equipo.id_equipo,
+                'nom_equipo': equipo.nom_equipo,
+                'num_serie': equipo.num_serie,
+                'modelo': equipo.modelo,
+                'id_estado': equipo.id_estado_equipo.id_estado_equipo,
+                'estado': equipo.id_estado_equipo.nom_estado,
+                'id_rack': equipo.id_rack.id_rack if equipo.id_rack else None,
+                'rack': equipo.id_rack.nom_rack if equipo.id_rack else 'Sin asignar',
+                'ubicacion': equipo.id_rack.ubicacion if equipo.id_rack else 'N/A',
+                'uso': {
+                    'horas': round(equipo.horas, 1),
+                    'horas_recientes': round(equipo.horas_recientes, 1),
+                    'meses_recientes': meses_recientes(),
+                    'reservas': equipo.reservas,
+                    'ultimo_mes': equipo.ultimo_mes.strftime('%m/%Y') if equipo.ultimo_mes else None,
+                },
+            }
+        }
+
+        return JsonResponse(data)
+    except Exception as e:
+        return JsonResponse({'success': False, 'error': str(e)})
+
+
+# ======================================================
+# EVENTOS EN VIVO - DASHBOARD ADMIN (Server-Sent Events)
+# ======================================================
+
+@requiere_rol('administrador', api=True)
+async def eventos_dashboard(request):
+    """
+    Stream SSE con los cambios de reservas y equipos (ver Gestion_Equipos.eventos).
+    Empieza después del evento `desde` (o Last-Event-ID al reconectar). Bajo
+    WSGI entrega lo pendiente y cierra: el navegador vuelve a pedir tras `retry`.
+    """
+    try:
+        ultimo = int(request.headers.get('Last-Event-ID') or request.GET['desde'])
+    except (KeyError, ValueError):
+        ultimo = await aultimo_evento()
+
+    continuo = isinstance(request, ASGIRequest)
+    response = StreamingHttpResponse(_flujo_eventos(ultimo, continuo), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'  # nginx: no acumular el stream
+    return response
+
+
+def _mensaje_sse(datos, id_evento=None):
+    lineas = f'id: {id_evento}\n' if id_evento is not None else ''
+    return f'{lineas}data: {json.dumps(datos, ensure_ascii=False)}\n\n'
+
+
+async def _flujo_eventos(ultimo, continuo):
+    intervalo = getattr(settings, 'EVENTOS_INTERVALO_SEGUNDOS', 1)
+    fin = time.monotonic() + getattr(settings, 'EVENTOS_DURACION_MAX_SEGUNDOS', 300)
+    ultimo_envio = time.monotonic()
+
+    yield f"retry: {getattr(settings, 'EVENTOS_REINTENTO_MS', 3000)}\n\n"
+    while True:
+        eventos, completo = await aeventos_desde(ultimo)
+        if not completo:
+            # Se perdieron eventos (expiraron o el cliente estuvo desconectado mucho tiempo)
+            yield _mensaje_sse({'tipo': 'recargar'})
+            return
+
+        if eventos:
+            filas = await _filas_reservas({e['reserva'] for e in eventos if 'reserva' in e})
+            for evento in eventos:
+                if 'reserva' in evento:
+                    evento = {**evento, 'fila': filas.get(evento['reserva'])}
+                yield _mensaje_sse(evento, evento['id'])
+            ultimo = eventos[-1]['id']
+            yield _mensaje_sse({'tipo': 'contadores', **await _contadores()})
+            ultimo_envio = time.monotonic()
+        elif time.monotonic() - ultimo_envio > 15:
+            yield ': latido\n\n'  # comentario SSE: mantiene viva la conexión a través de proxies
+            ultimo_envio = time.monotonic()
+
+        if not continuo or time.monotonic() > fin:
+            return
+        await asyncio.sleep(intervalo)
+
+
+async def _filas_reservas(reserva_ids):
+    """Datos de las filas de las tablas del dashboard (una consulta por lote)."""
+    if not reserva_ids:
+        return {}
+    filas = Reserva.objects.filter(id_reserva__in=reserva_ids).values(
+        'id_reserva', 'fecha_uso', 'hora_inicio', 'hora_fin', 'cant_solicitada', 'motivo_rechazo', 'id_serie',
+        'id_usuario__nom_completo', 'id_carrera__nom_carrera', 'id_aula__nom_aula', 'id_aula__id_bloque__nom_bloque',
+    )
+    return {
+        fila['id_reserva']: {
+            'id': fila['id_reserva'],
+            'fecha': fila['fecha_uso'].strftime('%d/%m/%Y'),
+            'hora': f"{fila['hora_inicio']:%H:%M} - {fila['hora_fin']:%H:%M}",
+            'docente': fila['id_usuario__nom_completo'],
+            'carrera': fila['id_carrera__nom_carrera'],
+            'bloque': fila['id_aula__id_bloque__nom_bloque'],
+            'aula': fila['id_aula__nom_aula'],
+            'cantidad': fila['cant_solicitada'],
+            'motivo': fila['motivo_rechazo'] or '',
+            'serie': fila['id_serie'],
+        }
+        async for fila in filas
+    }
+
+
+async def _contadores():
+    """Las mismas cifras de las tarjetas del dashboard (dashboard_administrador)."""
+    contadores = await Equipo.objects.aaggregate(
+        disponibles=Count('pk', filter=Q(id_estado_equipo__nom_estado='Disponible')),
+        en_uso=Count('pk', filter=Q(id_estado_equipo__nom_estado='En uso')),
+        mantenimiento=Count('pk', filter=Q(id_estado_equipo__nom_estado__iexact='En Mantenimiento')),
+    )
+    contadores['pendientes'] = await Reserva.objects.filter(estado_reserva='Pendiente').acount()
+    return contadores
+
+
+# ======================================================
+# NOTIFICACIONES (DOCENTE)
+# ======================================================
+
+@requiere_rol('docente', api=True)
+async def notificaciones_docente(request):
+    """
+    Notificaciones del docente posteriores al cursor `desde` (id de la última
+    vista), de la más antigua a la más reciente y como máximo
+    NOTIFICACIONES_MAX_LOTE. El cursor devuelto es el id de la última
+    entregada: el cliente vuelve a pedir hasta recibir un lote vacío, sin
+    saltarse ninguna. Sin cursor continúa desde lo último que se le entregó en
+    su sesión, así que muestra lo nuevo desde su última visita.
+    """
+    try:
+        cursor = int(request.GET['desde'])
+    except (KeyError, ValueError):
+        cursor = await request.session.aget('notificaciones_vistas', 0)
+
+    usuario_id = await request.session.aget('usuario_id')
+    limite = getattr(settings, 'NOTIFICACIONES_MAX_LOTE', 20)
+    filas = Notificacion.objects.filter(
+        id_usuario_id=usuario_id, id_notificacion__gt=cursor
+    ).order_by('id_notificacion').values(
+        'id_notificacion', 'tipo', 'mensaje', 'fecha_creacion', 'id_reserva_id'
+    )[:limite]
+
+    notificaciones = [
+        {
+            'id': fila['id_notificacion'],
+            'tipo': fila['tipo'],
+            'mensaje': fila['mensaje'],
+            'fecha': fila['fecha_creacion'].isoformat(),
+            'reserva': fila['id_reserva_id'],
+        }
+        async for fila in filas
+    ]
+
+    if notificaciones:
+        cursor = notificaciones[-1]['id']
+        if cursor > await request.session.aget('notificaciones_vistas', 0):
+            await request.session.aset('notificaciones_vistas', cursor)
+
+    return JsonResponse({'success': True, 'notificaciones': notificaciones, 'cursor': cursor})
@@ -0,0 +1,25 @@
+# ======================================================
+# CALENDARIOS ICS (Suscripción desde Google Calendar, Outlook, etc.)
+# ======================================================
+
+from django.http import Http404, HttpResponse
+from django.utils.cache import get_conditional_response, patch_cache_control
+
+from Gestion_Equipos.calendario import AULA, DOCENTE, obtener, token_valido
+
+
+def calendario_reservas(request, tipo, id_objeto, token):
+    """
+    Calendario .ics de un docente o de un aula. Sin sesión: lo protege el token
+    de la URL. Con el .ics en la cache, la respuesta (o el 304) no consulta la BD.
+    """
+    if tipo not in (DOCENTE, AULA) or not token_valido(tipo, id_objeto, token):
+        raise Http404('Calendario no encontrado')
+
+    etag, contenido = obtener(tipo, id_objeto)
+    response = get_conditional_response(request, etag=etag) or HttpResponse(
+        contenido, content_type='text/calendar; charset=utf-8'
+    )
+    response['ETag'] = etag
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
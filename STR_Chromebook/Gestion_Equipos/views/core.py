@@ -6,14 +6,19 @@
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib import messages
 from django.http import JsonResponse
-from django.db import models
+from django.db import models, transaction
 from django.utils import timezone
 from datetime import datetime, timedelta
 import json
 
 # Importar Modelos
-from core.models import Usuario, Aula, Asignatura, Rack
-from Gestion_Equipos.models import Reserva, Equipo, EstadoEquipo
+from core.autenticacion import requiere_rol
+from core.condicional import con_catalogos, condicional, marca_queryset
+from core.models import Rack
+from Gestion_Equipos.calendario import DOCENTE, url_calendario
+from Gestion_Equipos.eventos import publicar_equipos
+from Gestion_Equipos.models import Reserva, SerieReserva, Equipo, EstadoEquipo, HistorialEquipo
+from Gestion_Equipos.recurrencia import crear_serie
 
 # Importar Forms
 from Gestion_Equipos.forms import ReservaForm
@@ -23,21 +28,11 @@ from Gestion_Equipos.forms import ReservaForm
 # VISTAS DE RESERVA (DOCENTE)
 # ======================================================
 
+@requiere_rol('docente', mensaje='Solo los docentes pueden crear reservas.')
 def crear_reserva(request):
     """Vista para crear una nueva reserva de Chromebooks"""
     
-    # Verificar sesión
-    if not request.session.get('usuario_id'):
-        messages.error(request, 'Debe iniciar sesión.')
-        return redirect('login')
-    
-    # Verificar que sea docente
-    if request.session.get('usuario_tipo') != 'docente':
-        messages.error(request, 'Solo los docentes pueden crear reservas.')
-        return redirect('dashboard')
-    
-    usuario_id = request.session.get('usuario_id')
-    usuario = Usuario.objects.get(id_usuario=usuario_id)
+    usuario = request.usuario
     
     if request.method == 'POST':
         form = ReservaForm(request.POST)
@@ -50,6 +45,29 @@ def crear_reserva(request):
             # Convertir responsable a mayúsculas
             reserva.responsable_entrega = reserva.responsable_entrega.upper()
             
+            if form.cleaned_data['repetir']:
+                # Serie: todas las fechas se revisan juntas y se crean solo las libres
+                serie, reservas, omitidas = crear_serie(
+                    reserva, form.cleaned_data['repetir'], form.cleaned_data['repetir_hasta'],
+                    omitir_feriados=form.cleaned_data['omitir_feriados']
+                )
+                detalle_omitidas = ''.join(
+                    f'<br>• {fecha:%d/%m/%Y}: {motivo}' for fecha, motivo in sorted(omitidas.items())
+                )
+                if serie is None:
+                    messages.error(request, f'Ninguna fecha de la serie está disponible.{detalle_omitidas}')
+                    return render(request, 'docente/crear_reserva.html', {'usuario': usuario, 'form': form})
+                
+                messages.success(
+                    request,
+                    f'✅ Serie #{serie.id_serie} creada con {len(reservas)} reservas '
+                    f'(del {serie.fecha_inicio:%d/%m/%Y} al {serie.fecha_fin:%d/%m/%Y}). '
+                    f'Estado: <strong>Pendiente de aprobación</strong>.'
+                )
+                if omitidas:
+                    messages.warning(request, f'No se reservaron {len(omitidas)} fechas:{detalle_omitidas}')
+                return redirect('dashboard_docente')
+            
             reserva.save()
             
             messages.success(
@@ -72,19 +90,28 @@ def crear_reserva(request):
     return render(request, 'docente/crear_reserva.html', context)
 
 
-def mis_reservas(request):
-    """Vista para ver todas las reservas del docente"""
+def _puede_cancelar(reserva, ahora):
+    """El docente puede cancelar si está Pendiente, o Aprobada y faltan más de 24 horas."""
+    # Combinar fecha y hora de uso
+    fecha_hora_uso = datetime.combine(reserva.fecha_uso, reserva.hora_inicio)
+    # Convertir a timezone-aware
+    if timezone.is_naive(fecha_hora_uso):
+        fecha_hora_uso = timezone.make_aware(fecha_hora_uso)
     
-    if not request.session.get('usuario_id'):
-        messages.error(request, 'Debe iniciar sesión.')
-        return redirect('login')
+    # Calcular diferencia en horas
+    diferencia = (fecha_hora_uso - ahora).total_seconds() / 3600
     
-    if request.session.get('usuario_tipo') != 'docente':
-        messages.error(request, 'Acceso denegado.')
-        return redirect('dashboard')
+    return (
+        reserva.estado_reserva == 'Pendiente' or 
+        (reserva.estado_reserva == 'Aprobada' and diferencia > 24)
+    )
+
+
+@requiere_rol('docente')
+def mis_reservas(request):
+    """Vista para ver todas las reservas del docente"""
     
-    usuario_id = request.session.get('usuario_id')
-    usuario = Usuario.objects.get(id_usuario=usuario_id)
+    usuario = request.usuario
     
     # Obtener todas las reservas del docente ordenadas por fecha
     reservas = Reserva.objects.filter(
@@ -96,40 +123,21 @@ def mis_reservas(request):
     # Calcular si cada reserva puede cancelarse (24 horas de antelación)
     ahora = timezone.now()
     for reserva in reservas:
-        # Combinar fecha y hora de uso
-        fecha_hora_uso = datetime.combine(reserva.fecha_uso, reserva.hora_inicio)
-        # Convertir a timezone-aware
-        if timezone.is_naive(fecha_hora_uso):
-            fecha_hora_uso = timezone.make_aware(fecha_hora_uso)
-        
-        # Calcular diferencia en horas
-        diferencia = (fecha_hora_uso - ahora).total_seconds() / 3600
-        
-        # Puede cancelar si:
-        # 1. Estado es Pendiente, O
-        # 2. Estado es Aprobada Y faltan más de 24 horas
-        reserva.puede_cancelar = (
-            reserva.estado_reserva == 'Pendiente' or 
-            (reserva.estado_reserva == 'Aprobada' and diferencia > 24)
-        )
+        reserva.puede_cancelar = _puede_cancelar(reserva, ahora)
     
     context = {
         'usuario': usuario,
-        'reservas': reservas
+        'reservas': reservas,
+        'url_calendario': request.build_absolute_uri(url_calendario(DOCENTE, usuario.id_usuario)),
     }
     
     return render(request, 'docente/mis_reservas.html', context)
 
 
+@requiere_rol('docente', api=True)
 def cancelar_reserva(request, reserva_id):
     """Vista para cancelar una reserva (AJAX)"""
     
-    if not request.session.get('usuario_id'):
-        return JsonResponse({'success': False, 'error': 'Debe iniciar sesión'})
-    
-    if request.session.get('usuario_tipo') != 'docente':
-        return JsonResponse({'success': False, 'error': 'Acceso denegado'})
-    
     if request.method == 'POST':
         try:
             data = json.loads(request.body)
@@ -138,8 +146,7 @@ def cancelar_reserva(request, reserva_id):
             if not motivo:
                 return JsonResponse({'success': False, 'error': 'Debe proporcionar un motivo de cancelación'})
             
-            usuario_id = request.session.get('usuario_id')
-            reserva = get_object_or_404(Reserva, id_reserva=reserva_id, id_usuario_id=usuario_id)
+            reserva = get_object_or_404(Reserva, id_reserva=reserva_id, id_usuario_id=request.session['usuario_id'])
             
             # Validar que pueda cancelarse
             ahora = timezone.now()
@@ -180,98 +187,49 @@ def cancelar_reserva(request, reserva_id):
     return JsonResponse({'success': False, 'error': 'Método no permitido'})
 
 
-# ======================================================
-# APIs (AJAX) - CREACIÓN DE RESERVA (DOCENTE)
-# ======================================================
-
-def autocompletar_responsable(request):
-    """API para autocompletar nombres de responsables"""
-    
-    if request.method == 'GET':
-        query = request.GET.get('q', '').strip()
-        
-        if len(query) < 2:
-            return JsonResponse({'results': []})
-        
-        # Buscar usuarios que coincidan con el query
-        usuarios = Usuario.objects.filter(
-            nom_completo__icontains=query
-        ).values_list('nom_completo', flat=True)[:10]
-        
-        # Convertir a mayúsculas
-        results = [nombre.upper() for nombre in usuarios]
-        
-        return JsonResponse({'results': results})
-    
-    return JsonResponse({'results': []})
-
-
-def filtrar_aulas_por_bloque(request):
-    """API para filtrar aulas según el bloque seleccionado"""
-    
-    if request.method == 'GET':
-        bloque_id = request.GET.get('bloque_id')
-        
-        if not bloque_id:
-            return JsonResponse({'aulas': []})
-        
-        aulas = Aula.objects.filter(id_bloque_id=bloque_id).values('id_aula', 'nom_aula')
-        
-        return JsonResponse({'aulas': list(aulas)})
-    
-    return JsonResponse({'aulas': []})
-
-
-def filtrar_asignaturas_por_carrera(request):
-    """API para filtrar asignaturas según la carrera seleccionada"""
+@requiere_rol('docente', api=True)
+def cancelar_serie(request, serie_id):
+    """Cancela las reservas de una serie que todavía pueden cancelarse (AJAX)"""
     
-    if request.method == 'GET':
-        carrera_id = request.GET.get('carrera_id')
-        
-        if not carrera_id:
-            return JsonResponse({'asignaturas': []})
-        
+    if request.method == 'POST':
         try:
-            # Convertir a entero y validar
-            carrera_id = int(carrera_id)
-            
-            # Filtrar asignaturas por carrera
-            asignaturas = Asignatura.objects.filter(
-                id_carrera_id=carrera_id
-            ).values('id_asignatura', 'nom_asignatura').order_by('nom_asignatura')
+            data = json.loads(request.body)
+            motivo = data.get('motivo', '').strip()
             
-            # Convertir a lista
-            asignaturas_list = list(asignaturas)
+            if not motivo:
+                return JsonResponse({'success': False, 'error': 'Debe proporcionar un motivo de cancelación'})
             
-            # Debug: imprimir en consola
-            print(f"DEBUG - Carrera ID: {carrera_id}")
-            print(f"DEBUG - Asignaturas encontradas: {len(asignaturas_list)}")
-            print(f"DEBUG - Asignaturas: {asignaturas_list}")
+            serie = get_object_or_404(SerieReserva, id_serie=serie_id, id_usuario_id=request.session['usuario_id'])
             
-            return JsonResponse({
-                'asignaturas': asignaturas_list,
-                'count': len(asignaturas_list)
-            })
+            # Una por una con save(): cada docente recibe su notificación y se
+            # actualizan el dashboard y los calendarios (ver senales.py)
+            ahora = timezone.now()
+            canceladas = 0
+            with transaction.atomic():
+                for reserva in serie.reservas.filter(estado_reserva__in=['Pendiente', 'Aprobada']).select_for_update():
+                    if _puede_cancelar(reserva, ahora):
+                        reserva.estado_reserva = 'Rechazada'
+                        reserva.motivo_rechazo = f'[CANCELADA POR DOCENTE] {motivo}'
+                        reserva.save()
+                        canceladas += 1
+            
+            messages.success(request, f'✅ {canceladas} reservas de la serie #{serie_id} canceladas.')
+            return JsonResponse({'success': True, 'canceladas': canceladas})
             
-        except ValueError:
-            return JsonResponse({'error': 'ID de carrera inválido', 'asignaturas': []})
         except Exception as e:
-            print(f"ERROR en filtrar_asignaturas_por_carrera: {str(e)}")
-            return JsonResponse({'error': str(e), 'asignaturas': []})
+            return JsonResponse({'success': False, 'error': str(e)})
     
-    return JsonResponse({'asignaturas': []})
+    return JsonResponse({'success': False, 'error': 'Método no permitido'})
+
 
 # ======================================================
 # APIs (AJAX) - DASHBOARD ADMIN (Aprobar/Rechazar)
 # ======================================================
 
+@requiere_rol('administrador', api=True)
 def aprobar_reserva(request, reserva_id):
     """Vista para aprobar una reserva"""
     
-    # Verificar que sea administrador
-    if request.session.get('usuario_tipo') != 'administrador':
-        return JsonResponse({'success': False, 'error': 'Acceso denegado'})
-    
     if request.method == 'POST':
         try:
             reserva = get_object_or_404(Reserva, id_reserva=reserva_id)
@@ -287,13 +245,33 @@ def aprobar_reserva(request, reserva_id):
     return JsonResponse({'success': False, 'error': 'Método no permitido'})
 
 
+@requiere_rol('administrador', api=True)
+def aprobar_serie(request, serie_id):
+    """Aprueba todas las reservas pendientes de una serie"""
+    
+    if request.method == 'POST':
+        try:
+            serie = get_object_or_404(SerieReserva, id_serie=serie_id)
+            
+            # save() por reserva: cada aprobación notifica al docente (ver senales.py)
+            with transaction.atomic():
+                pendientes = list(serie.reservas.filter(estado_reserva='Pendiente').select_for_update())
+                for reserva in pendientes:
+                    reserva.estado_reserva = 'Aprobada'
+                    reserva.save()
+            
+            messages.success(request, f'✅ {len(pendientes)} reservas de la serie #{serie_id} aprobadas.')
+            return JsonResponse({'success': True, 'aprobadas': len(pendientes)})
+        except Exception as e:
+            return JsonResponse({'success': False, 'error': str(e)})
+    
+    return JsonResponse({'success': False, 'error': 'Método no permitido'})
+
+
+@requiere_rol('administrador', api=True)
 def rechazar_reserva(request, reserva_id):
     """Vista para rechazar una reserva con motivo"""
     
-    # Verificar que sea administrador
-    if request.session.get('usuario_tipo') != 'administrador':
-        return JsonResponse({'success': False, 'error': 'Acceso denegado'})
-    
     if request.method == 'POST':
         try:
             data = json.loads(request.body)
@@ -316,64 +294,16 @@ def rechazar_reserva(request, reserva_id):
     return JsonResponse({'success': False, 'error': 'Método no permitido'})
 
 
-def detalle_reserva(request, reserva_id):
-    """Vista para obtener detalles completos de una reserva (JSON)"""
-    
-    # Verificar que sea administrador o docente
-    if not request.session.get('usuario_id'):
-        return JsonResponse({'success': False, 'error': 'No autenticado'})
-    
-    try:
-        reserva = get_object_or_404(Reserva, id_reserva=reserva_id)
-        
-        # Construir respuesta JSON con todos los detalles
-        data = {
-            'success': True,
-            'reserva': {
-                'id': reserva.id_reserva,
-                'fecha_uso': reserva.fecha_uso.strftime('%d/%m/%Y'),
-                'hora_inicio': reserva.hora_inicio.strftime('%H:%M'),
-                'hora_fin': reserva.hora_fin.strftime('%H:%M'),
-                'estado': reserva.estado_reserva,
-                'cant_solicitada': reserva.cant_solicitada,
-                'responsable_entrega': reserva.responsable_entrega,
-                'telefono_contacto': reserva.telefono_contacto,
-                'motivo_rechazo': reserva.motivo_rechazo if reserva.motivo_rechazo else '',
-                'docente': {
-                    'nombre': reserva.id_usuario.nom_completo,
-                    'cedula': reserva.id_usuario.cedula,
-                    'email': reserva.id_usuario.email,
-                    'telefono': reserva.id_usuario.telefono,
-                },
-                'asignatura': reserva.id_asignatura.nom_asignatura,
-                'carrera': reserva.id_carrera.nom_carrera,
-                'facultad': reserva.id_carrera.id_facultad.nom_facultad if reserva.id_carrera.id_facultad else 'N/A',
-                'bloque': reserva.id_aula.id_bloque.nom_bloque,
-                'aula': reserva.id_aula.nom_aula,
-            }
-        }
-        
-        return JsonResponse(data)
-    except Exception as e:
-        return JsonResponse({'success': False, 'error': str(e)})
-
 # ======================================================
 # VISTAS DE GESTIÓN DE EQUIPOS (ADMIN)
 # ======================================================
 
+@requiere_rol('administrador')
+@condicional(lambda request: con_catalogos(marca_queryset(Equipo.objects.all())))
 def gestionar_equipos(request):
     """Vista para gestionar equipos (CRUD de Chromebooks)"""
     
-    # Verificar que sea administrador
-    if not request.session.get('usuario_id'):
-        messages.error(request, 'Debe iniciar sesión.')
-        return redirect('login')
-    
-    if request.session.get('usuario_tipo') != 'administrador':
-        messages.error(request, 'Acceso denegado.')
-        return redirect('dashboard')
-    
-    usuario = Usuario.objects.get(id_usuario=request.session.get('usuario_id'))
+    usuario = request.usuario
     
     # Filtros
     estado_filtro = request.GET.get('estado', '')
@@ -428,12 +358,10 @@ def gestionar_equipos(request):
 # APIs (AJAX) - CRUD DE EQUIPOS (ADMIN)
 # ======================================================
 
+@requiere_rol('administrador', api=True)
 def crear_equipo(request):
     """Vista para crear un nuevo equipo"""
     
-    if request.session.get('usuario_tipo') != 'administrador':
-        return JsonResponse({'success': False, 'error': 'Acceso denegado'})
-    
     if request.method == 'POST':
         try:
             data = json.loads(request.body)
@@ -474,12 +402,10 @@ def crear_equipo(request):
     return JsonResponse({'success': False, 'error': 'Método no permitido'})
 
 
+@requiere_rol('administrador', api=True)
 def editar_equipo(request, equipo_id):
     """Vista para editar un equipo"""
     
-    if request.session.get('usuario_tipo') != 'administrador':
-        return JsonResponse({'success': False, 'error': 'Acceso denegado'})
-    
     if request.method == 'POST':
         try:
             data = json.loads(request.body)
@@ -522,12 +448,10 @@ def editar_equipo(request, equipo_id):
     return JsonResponse({'success': False, 'error': 'Método no permitido'})
 
 
+@requiere_rol('administrador', api=True)
 def eliminar_equipo(request, equipo_id):
     """Vista para eliminar (o dar de baja) un equipo"""
     
-    if request.session.get('usuario_tipo') != 'administrador':
-        return JsonResponse({'success': False, 'error': 'Acceso denegado'})
-    
     if request.method == 'POST':
         try:
             equipo = get_object_or_404(Equipo, id_equipo=equipo_id)
@@ -545,30 +469,103 @@ def eliminar_equipo(request, equipo_id):
     return JsonResponse({'success': False, 'error': 'Método no permitido'})
 
 
-def detalle_equipo(request, equipo_id):
-    """Vista para obtener detalles de un equipo (JSON)"""
-    
-    if not request.session.get('usuario_id'):
-        return JsonResponse({'success': False, 'error': 'No autenticado'})
+@requiere_rol('administrador', api=True)
+@transaction.atomic
+def api_actualizar_equipos_lote(request):
+    """
+    API para cambiar el estado y/o mover de rack varios equipos a la vez.
+    Recibe {'equipo_ids': [...], 'id_estado': ..., 'id_rack': ...}; si la
+    clave 'id_rack' viene con valor nulo, los equipos quedan sin rack.
+    """
     
-    try:
-        equipo = get_object_or_404(Equipo, id_equipo=equipo_id)
-        
-        data = {
-            'success': True,
-            'equipo': {
-                'id': equipo.id_equipo,
-                'nom_equipo': equipo.nom_equipo,
-                'num_serie': equipo.num_serie,
-                'modelo': equipo.modelo,
-                'id_estado': equipo.id_estado_equipo.id_estado_equipo,
-                'estado': equipo.id_estado_equipo.nom_estado,
-                'id_rack': equipo.id_rack.id_rack if equipo.id_rack else None,
-                'rack': equipo.id_rack.nom_rack if equipo.id_rack else 'Sin asignar',
-                'ubicacion': equipo.id_rack.ubicacion if equipo.id_rack else 'N/A',
+    if request.method == 'POST':
+        try:
+            data = json.loads(request.body)
+            equipo_ids = {int(equipo_id) for equipo_id in data.get('equipo_ids', [])}
+            
+            if not equipo_ids:
+                return JsonResponse({'success': False, 'error': 'Debe seleccionar al menos un equipo'})
+            
+            cambiar_estado = bool(data.get('id_estado'))
+            cambiar_rack = 'id_rack' in data
+            
+            if not cambiar_estado and not cambiar_rack:
+                return JsonResponse({'success': False, 'error': 'Debe indicar un estado o un rack de destino'})
+            
+            # Estado actual de los equipos (una sola consulta, bloqueando las filas)
+            equipos_actuales = list(
+                Equipo.objects.select_for_update().filter(
+                    id_equipo__in=equipo_ids
+                ).values_list('id_equipo', 'id_estado_equipo_id', 'id_rack_id')
+            )
+            
+            if len(equipos_actuales) != len(equipo_ids):
+                return JsonResponse({'success': False, 'error': 'Alguno de los equipos seleccionados no existe'})
+            
+            cambios = {}
+            
+            if cambiar_estado:
+                estado = EstadoEquipo.objects.get(id_estado_equipo=data['id_estado'])
+                cambios['id_estado_equipo'] = estado
+            
+            if cambiar_rack:
+                rack = Rack.objects.select_for_update().get(id_rack=data['id_rack']) if data['id_rack'] else None
+                
+                # <<<=====================================================>>>
+                # <<< VALIDACIÓN: Capacidad del Rack destino (una vez)    >>>
+                # <<<=====================================================>>>
+                if rack:
+                    entrantes = sum(1 for _, _, rack_id in equipos_actuales if rack_id != rack.id_rack)
+                    conteo_actual = Equipo.objects.filter(id_rack=rack).count()
+                    if conteo_actual + entrantes > rack.capacidad_total:
+                        return JsonResponse({
+                            'success': False,
+                            'error': f'No se pueden mover {entrantes} equipos al Rack {rack.nom_rack} '
+                                     f'(Ocupados: {conteo_actual} de {rack.capacidad_total})'
+                        })
+                # <<<=====================================================>>>
+                cambios['id_rack'] = rack
+            
+            estado_nuevo_id = cambios['id_estado_equipo'].id_estado_equipo if cambiar_estado else None
+            rack_nuevo = cambios.get('id_rack')
+            rack_nuevo_id = rack_nuevo.id_rack if rack_nuevo else None
+            
+            # Solo los equipos que cambian: los que ya tienen el estado y el rack
+            # destino no se tocan (ni historial ni fecha_actualizacion, que es su ETag)
+            cambian_estado = {
+                equipo_id for equipo_id, estado_id, _ in equipos_actuales
+                if cambiar_estado and estado_id != estado_nuevo_id
             }
-        }
-        
-        return JsonResponse(data)
-    except Exception as e:
-        return JsonResponse({'success': False, 'error': str(e)})
\ No newline at end of file
+            cambiados = [
+                (equipo_id, estado_id, rack_id) for equipo_id, estado_id, rack_id in equipos_actuales
+                if equipo_id in cambian_estado or (cambiar_rack and rack_id != rack_nuevo_id)
+            ]
+            
+            # Un único UPDATE para los equipos que cambian
+            actualizados = 0
+            if cambiados:
+                actualizados = Equipo.objects.filter(
+                    id_equipo__in=[equipo_id for equipo_id, _, _ in cambiados]
+                ).update(**cambios)
+            
+            # Registrar el historial en bloque
+            HistorialEquipo.objects.bulk_create([
+                HistorialEquipo(
+                    id_equipo_id=equipo_id,
+                    id_estado_anterior_id=estado_id,
+                    id_estado_nuevo_id=estado_nuevo_id if cambiar_estado else estado_id,
+                    id_rack_anterior_id=rack_id,
+                    id_rack_nuevo_id=rack_nuevo_id if cambiar_rack else rack_id,
+                    id_usuario_id=request.session.get('usuario_id'),
+                )
+                for equipo_id, estado_id, rack_id in cambiados
+            ])
+            publicar_equipos(cambian_estado)
+            
+            messages.success(request, f'✅ {actualizados} equipos actualizados exitosamente.')
+            return JsonResponse({'success': True, 'actualizados': actualizados})
+        except Exception as e:
+            transaction.set_rollback(True)
+            return JsonResponse({'success': False, 'error': str(e)})
+    
+    return JsonResponse({'success': False, 'error': 'Método no permitido'})
@@ -5,17 +5,25 @@
 
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib import messages
-from django.http import JsonResponse
+from django.core.files.storage import default_storage
+from django.http import Http404, HttpResponse, JsonResponse
+from django.utils.cache import patch_cache_control
 from django.db.models import Count, Q, F
 from django.db import transaction # ¡Importante para las nuevas APIs!
 from datetime import datetime
 import json
 
 # Importar Modelos
+from core.autenticacion import requiere_rol
+from core.condicional import con_catalogos, condicional, marca_queryset
 from core.models import Usuario, Rack
+from Gestion_Equipos.calendario import AULA, url_calendario
+from Gestion_Equipos import paquetes_evidencias
+from Gestion_Equipos.eventos import publicar_equipos
+from Gestion_Equipos.devoluciones import finalizar_reserva
 from Gestion_Equipos.models import (
     Reserva, Equipo, EstadoEquipo, AsignacionEquipo, 
-    SupervisorReserva, EvidenciaReserva
+    SupervisorReserva, EvidenciaReserva, EvidenciaReservaHistorica
 )
 
 # Importar Forms
@@ -26,24 +34,19 @@ from Gestion_Equipos.forms import EvidenciaReservaForm
 # VISTAS HTML (PÁGINAS)
 # ======================================================
 
+@requiere_rol('administrador')
+@condicional(lambda request: con_catalogos(marca_queryset(Reserva.objects.all())))
 def gestionar_reservas_list(request):
     """
     Vista principal para que el admin vea TODAS las reservas (Pendientes,
     Aprobadas, etc.) y pueda gestionarlas.
     """
-    if not request.session.get('usuario_id'):
-        messages.error(request, 'Debe iniciar sesión.')
-        return redirect('login')
-    if request.session.get('usuario_tipo') != 'administrador':
-        messages.error(request, 'Acceso denegado.')
-        return redirect('dashboard')
-
-    usuario = Usuario.objects.get(id_usuario=request.session.get('usuario_id'))
+    usuario = request.usuario
 
     estado_filtro = request.GET.get('estado', '')
     
     reservas_list = Reserva.objects.select_related(
-        'id_usuario', 'id_carrera', 'id_aula', 'id_aula__id_bloque'
+        'id_usuario', 'id_carrera', 'id_asignatura', 'id_aula', 'id_aula__id_bloque'
     ).prefetch_related(
         'supervisores', 
         'asignacionequipo_set' # Usamos el related_name por defecto
@@ -65,19 +68,13 @@ def gestionar_reservas_list(request):
     return render(request, 'administrador/gestionar_reservas_list.html', context)
 
 
+@requiere_rol('administrador')
 def gestionar_reserva_detalle(request, reserva_id):
     """
     Vista detallada para GESTIONAR una reserva específica.
     Aquí es donde asignas Racks, supervisores y subes evidencia.
     """
-    if not request.session.get('usuario_id'):
-        messages.error(request, 'Debe iniciar sesión.')
-        return redirect('login')
-    if request.session.get('usuario_tipo') != 'administrador':
-        messages.error(request, 'Acceso denegado.')
-        return redirect('dashboard')
-
-    usuario = Usuario.objects.get(id_usuario=request.session.get('usuario_id'))
+    usuario = request.usuario
     reserva = get_object_or_404(Reserva.objects.select_related(
         'id_usuario', 'id_carrera', 'id_aula__id_bloque'
     ), id_reserva=reserva_id)
@@ -150,6 +147,7 @@ def gestionar_reserva_detalle(request, reserva_id):
         'supervisores_disponibles': supervisores_disponibles,
         'evidencias': evidencias,
         'form_evidencia': form_evidencia,
+        'url_calendario_aula': request.build_absolute_uri(url_calendario(AULA, reserva.id_aula_id)),
     }
     
     return render(request, 'administrador/gestionar_reserva_detalle.html', context)
@@ -159,13 +157,11 @@ def gestionar_reserva_detalle(request, reserva_id):
 # --- APIs (AJAX) - GESTIÓN DE RESERVAS (ADMIN) ---
 # ======================================================
 
+@requiere_rol('administrador', api=True)
 def api_asignar_rack(request, reserva_id):
     """
     API para asignar automáticament 'equipos_necesarios' desde un Rack.
     """
-    if request.session.get('usuario_tipo') != 'administrador':
-        return JsonResponse({'success': False, 'error': 'Acceso denegado'})
-    
     if request.method == 'POST':
         try:
             reserva = get_object_or_404(Reserva, id_reserva=reserva_id)
@@ -183,11 +179,16 @@ def api_asignar_rack(request, reserva_id):
             if equipos_necesarios <= 0:
                 return JsonResponse({'success': False, 'error': 'Ya se asignó la cantidad total de equipos solicitados.'})
 
-            # Buscar equipos 'Disponibles' (ignorando mayúsculas)
+            # Buscar equipos 'Disponibles' (ignorando mayúsculas), primero los menos usados.
+            # El estado se resuelve antes para que el filtro y el orden usen el índice
+            # equipo_rack_estado_uso (sin JOIN ni ordenar todo el rack)
+            estados_disponible = list(EstadoEquipo.objects.filter(
+                nom_estado__iexact='Disponible'
+            ).values_list('id_estado_equipo', flat=True))
             equipos_para_asignar = Equipo.objects.filter(
                 id_rack=rack,
-                id_estado_equipo__nom_estado__iexact='Disponible' 
-            )[:equipos_necesarios]
+                id_estado_equipo__in=estados_disponible
+            ).order_by('horas_uso', 'id_equipo')[:equipos_necesarios]
 
             if len(equipos_para_asignar) < equipos_necesarios:
                 return JsonResponse({'success': False, 'error': f'El Rack {rack.nom_rack} solo tiene {len(equipos_para_asignar)} equipos disponibles. Se necesitan {equipos_necesarios}.'})
@@ -206,6 +207,8 @@ def api_asignar_rack(request, reserva_id):
             
             AsignacionEquipo.objects.bulk_create(nuevas_asignaciones)
             Equipo.objects.bulk_update(equipos_para_asignar, ['id_estado_equipo'])
+            Reserva.objects.filter(id_reserva=reserva.id_reserva).tocar()  # cambió su conteo de equipos
+            publicar_equipos(equipo.id_equipo for equipo in equipos_para_asignar)
 
             messages.success(request, f'✅ {len(nuevas_asignaciones)} equipos asignados exitosamente desde {rack.nom_rack}.')
             return JsonResponse({'success': True, 'asignados': len(nuevas_asignaciones)})
@@ -215,14 +218,12 @@ def api_asignar_rack(request, reserva_id):
     return JsonResponse({'success': False, 'error': 'Método no permitido'})
 
 
+@requiere_rol('administrador', api=True)
 @transaction.atomic # Asegura que toda la operación falle o tenga éxito
 def api_desasignar_todos_equipos(request, reserva_id):
     """
     API para quitar TODOS los equipos de una reserva y devolverlos a 'Disponible'.
     """
-    if request.session.get('usuario_tipo') != 'administrador':
-        return JsonResponse({'success': False, 'error': 'Acceso denegado'})
-
     if request.method == 'POST':
         try:
             reserva = get_object_or_404(Reserva, id_reserva=reserva_id)
@@ -241,6 +242,8 @@ def api_desasignar_todos_equipos(request, reserva_id):
             
             # Actualizar todos los equipos correspondientes a 'Disponible'
             Equipo.objects.filter(id_equipo__in=equipo_ids).update(id_estado_equipo=estado_disponible)
+            Reserva.objects.filter(id_reserva=reserva.id_reserva).tocar()
+            publicar_equipos(equipo_ids)
             
             messages.info(request, f'♻️ Se quitaron {len(equipo_ids)} equipos de la reserva.')
             return JsonResponse({'success': True})
@@ -250,13 +253,11 @@ def api_desasignar_todos_equipos(request, reserva_id):
     return JsonResponse({'success': False, 'error': 'Método no permitido'})
 
 
+@requiere_rol('administrador', api=True)
 def api_desasignar_equipo(request, asignacion_id):
     """
     API para quitar UN equipo de una reserva y devolverlo a 'Disponible'.
     """
-    if request.session.get('usuario_tipo') != 'administrador':
-        return JsonResponse({'success': False, 'error': 'Acceso denegado'})
-
     if request.method == 'POST':
         try:
             asignacion = get_object_or_404(AsignacionEquipo, id_asig_equipo=asignacion_id)
@@ -267,6 +268,7 @@ def api_desasignar_equipo(request, asignacion_id):
             equipo.save()
             
             asignacion.delete()
+            Reserva.objects.filter(id_reserva=asignacion.id_reserva_id).tocar()
             return JsonResponse({'success': True})
             
         except Exception as e:
@@ -274,19 +276,19 @@ def api_desasignar_equipo(request, asignacion_id):
     return JsonResponse({'success': False, 'error': 'Método no permitido'})
 
 
+@requiere_rol('administrador', api=True)
 def api_asignar_supervisor(request, reserva_id):
     """
     API para asignar un supervisor a una reserva (usando tu modelo).
     """
-    if request.session.get('usuario_tipo') != 'administrador':
-        return JsonResponse({'success': False, 'error': 'Acceso denegado'})
-
     if request.method == 'POST':
         try:
             reserva = get_object_or_404(Reserva, id_reserva=reserva_id)
             data = json.loads(request.body)
             supervisor_id = data.get('supervisor_id')
-            supervisor = get_object_or_404(Usuario, id_usuario=supervisor_id)
+            supervisor = get_object_or_404(
+                Usuario.objects.select_related('id_tipo_usuario'), id_usuario=supervisor_id
+            )
 
             if supervisor.id_tipo_usuario.nom_rol != 'Supervisor':
                  return JsonResponse({'success': False, 'error': 'Este usuario no es Supervisor'})
@@ -314,13 +316,11 @@ def api_asignar_supervisor(request, reserva_id):
     return JsonResponse({'success': False, 'error': 'Método no permitido'})
 
 
+@requiere_rol('administrador', api=True)
 def api_desasignar_supervisor(request, supervisor_reserva_id):
     """
     API para quitar un supervisor de una reserva.
     """
-    if request.session.get('usuario_tipo') != 'administrador':
-        return JsonResponse({'success': False, 'error': 'Acceso denegado'})
-
     if request.method == 'POST':
         try:
             asignacion = get_object_or_404(SupervisorReserva, id_supervisor_reserva=supervisor_reserva_id)
@@ -331,13 +331,11 @@ def api_desasignar_supervisor(request, supervisor_reserva_id):
     return JsonResponse({'success': False, 'error': 'Método no permitido'})
 
 
+@requiere_rol('administrador', api=True)
 def api_eliminar_evidencia(request, evidencia_id):
     """
     API para eliminar una foto de evidencia.
     """
-    if request.session.get('usuario_tipo') != 'administrador':
-        return JsonResponse({'success': False, 'error': 'Acceso denegado'})
-
     if request.method == 'POST':
         try:
             evidencia = get_object_or_404(EvidenciaReserva, id_evidencia=evidencia_id)
@@ -353,13 +351,30 @@ def api_eliminar_evidencia(request, evidencia_id):
     return JsonResponse({'success': False, 'error': 'Método no permitido'})
 
 
+@requiere_rol('administrador')
+def foto_evidencia_archivada(request, evidencia_id):
+    """
+    Foto de una evidencia archivada: si ya está en un paquete mensual se extrae
+    solo esa foto (índice con mmap); si no, se redirige al archivo original.
+    """
+    evidencia = get_object_or_404(EvidenciaReservaHistorica, id_evidencia=evidencia_id)
+    if not evidencia.paquete:
+        return redirect(default_storage.url(evidencia.foto))
+
+    foto = paquetes_evidencias.leer(evidencia.paquete, evidencia.id_evidencia)
+    if foto is None:
+        raise Http404('La foto no está en el paquete')
+    response = HttpResponse(foto, content_type='image/jpeg')
+    # Una foto empaquetada ya no cambia
+    patch_cache_control(response, private=True, max_age=86400)
+    return response
+
+
+@requiere_rol('administrador', api=True)
 def api_actualizar_gestion(request, reserva_id):
     """
     API para guardar observaciones y timestamps de la reserva.
     """
-    if request.session.get('usuario_tipo') != 'administrador':
-        return JsonResponse({'success': False, 'error': 'Acceso denegado'})
-
     if request.method == 'POST':
         try:
             reserva = get_object_or_404(Reserva, id_reserva=reserva_id)
@@ -391,43 +406,25 @@ def api_actualizar_gestion(request, reserva_id):
 
 
 # --- ¡NUEVA API PARA FINALIZAR! ---
+@requiere_rol('administrador', api=True)
 @transaction.atomic
 def api_finalizar_reserva(request, reserva_id):
     """
     API para marcar una reserva como 'Finalizada' y devolver todos
     los equipos asignados a 'Disponible'.
     """
-    if request.session.get('usuario_tipo') != 'administrador':
-        return JsonResponse({'success': False, 'error': 'Acceso denegado'})
-
     if request.method == 'POST':
         try:
-            reserva = get_object_or_404(Reserva, id_reserva=reserva_id)
+            # Bloqueada: detectar_vencidas podría estar finalizándola a la vez
+            reserva = get_object_or_404(Reserva.objects.select_for_update(), id_reserva=reserva_id)
             
             # 1. Verificar que la reserva esté 'Aprobada'
             if reserva.estado_reserva != 'Aprobada':
                 return JsonResponse({'success': False, 'error': f'Solo se pueden finalizar reservas "Aprobadas". Esta reserva está "{reserva.estado_reserva}".'})
 
-            # 2. Encontrar todas las asignaciones y equipos
-            asignaciones = AsignacionEquipo.objects.filter(id_reserva=reserva)
-            equipo_ids = list(asignaciones.values_list('id_equipo_id', flat=True))
-            
-            # 3. Poner todos los equipos como 'Disponible'
-            estado_disponible, _ = EstadoEquipo.objects.get_or_create(nom_estado='Disponible')
-            Equipo.objects.filter(id_equipo__in=equipo_ids).update(id_estado_equipo=estado_disponible)
-            
-            # 4. (Opcional) Borrar las asignaciones, ya que la reserva terminó
-            # asignaciones.delete() 
-            # -> O puedes dejarlas para el historial. Decidimos dejarlas.
-
-            # 5. Marcar la reserva como 'Finalizada'
-            reserva.estado_reserva = 'Finalizada'
-            
-            # (Opcional) Sellar la fecha de devolución si está vacía
-            if not reserva.fecha_devolucion:
-                reserva.fecha_devolucion = datetime.now()
-
-            reserva.save()
+            # 2. Devolver los equipos a 'Disponible' y marcarla 'Finalizada'
+            #    (las asignaciones quedan para el historial)
+            finalizar_reserva(reserva)
             
             messages.success(request, f'✅ Reserva #{reserva.id_reserva} marcada como "Finalizada".')
             return JsonResponse({'success': True, 'redirect_url': request.build_absolute_uri(redirect('gestionar_reservas_list').url)})
@@ -5,13 +5,15 @@
 from django.shortcuts import render, redirect
 from django.contrib import messages
 from django.http import HttpResponse
-from django.db.models import Count, Q
+from django.db.models import Count, Sum
 from datetime import datetime
 import calendar
 
 # Importar Modelos
-from core.models import Usuario
-from Gestion_Equipos.models import Reserva, Equipo, AsignacionEquipo
+from core.autenticacion import requiere_rol
+from core.replicas import leer_de_replica
+from Gestion_Equipos.models import Equipo
+from Gestion_Equipos import archivo, pronostico, uso_equipos
 
 # Importar openpyxl
 try:
@@ -23,17 +25,12 @@ except ImportError:
     print("Ejecuta: pip install openpyxl")
 
 
+@requiere_rol('administrador')
+@leer_de_replica()
 def ver_reportes(request):
     """Vista para visualizar y generar reportes"""
     
-    if not request.session.get('usuario_id'):
-        messages.error(request, 'Debe iniciar sesión.')
-        return redirect('login')
-    if request.session.get('usuario_tipo') != 'administrador':
-        messages.error(request, 'Acceso denegado.')
-        return redirect('dashboard')
-    
-    usuario = Usuario.objects.get(id_usuario=request.session.get('usuario_id'))
+    usuario = request.usuario
     
     mes_filtro = request.GET.get('mes', datetime.now().month)
     anio_filtro = request.GET.get('anio', datetime.now().year)
@@ -45,46 +42,41 @@ def ver_reportes(request):
         mes_filtro = datetime.now().month
         anio_filtro = datetime.now().year
     
-    # 1. Obtener reservas del mes
-    reservas_mes = Reserva.objects.filter(
+    # 1. Obtener reservas del mes (vivas y archivadas)
+    reservas_mes = archivo.historial(
         fecha_uso__month=mes_filtro,
         fecha_uso__year=anio_filtro
     ).select_related('id_usuario', 'id_carrera', 'id_asignatura', 'id_aula', 'id_aula__id_bloque')
     
-    # 2. Estadísticas generales
-    total_reservas = reservas_mes.count()
-    reservas_aprobadas = reservas_mes.filter(estado_reserva='Aprobada').count()
-    reservas_rechazadas = reservas_mes.filter(estado_reserva='Rechazada').count()
-    reservas_pendientes = reservas_mes.filter(estado_reserva='Pendiente').count()
-    reservas_finalizadas = reservas_mes.filter(estado_reserva__iexact='Finalizada').count()
-    total_equipos_solicitados = sum([r.cant_solicitada for r in reservas_mes.filter(estado_reserva='Aprobada')])
+    # 2. Estadísticas generales (una consulta agrupada por estado)
+    por_estado = {
+        fila['estado_reserva']: fila
+        for fila in reservas_mes.agrupar('estado_reserva', cantidad=Count('pk'), equipos=Sum('cant_solicitada'))
+    }
+    total_reservas = sum(fila['cantidad'] for fila in por_estado.values())
+    reservas_aprobadas = por_estado.get('Aprobada', {}).get('cantidad', 0)
+    reservas_rechazadas = por_estado.get('Rechazada', {}).get('cantidad', 0)
+    reservas_pendientes = por_estado.get('Pendiente', {}).get('cantidad', 0)
+    reservas_finalizadas = por_estado.get('Finalizada', {}).get('cantidad', 0)
+    total_equipos_solicitados = por_estado.get('Aprobada', {}).get('equipos', 0)
 
     # 3. Reservas por Carrera
-    reservas_por_carrera = reservas_mes.values(
-        'id_carrera__nom_carrera'
-    ).annotate(
-        cantidad=Count('id_reserva')
-    ).order_by('-cantidad')
+    reservas_por_carrera = reservas_mes.agrupar('id_carrera__nom_carrera', cantidad=Count('id_reserva'))
     
     # 4. Reservas por Docente
-    reservas_por_docente = reservas_mes.values(
-        'id_usuario__nom_completo'
-    ).annotate(
-        cantidad=Count('id_reserva')
-    ).order_by('-cantidad')[:10]
+    reservas_por_docente = reservas_mes.agrupar('id_usuario__nom_completo', cantidad=Count('id_reserva'))[:10]
     
     # 5. Racks más usados (basado en equipos asignados en reservas FINALIZADAS)
-    reservas_finalizadas_ids = reservas_mes.filter(estado_reserva__iexact='Finalizada').values_list('id_reserva', flat=True)
-        
-    racks_mas_usados = AsignacionEquipo.objects.filter(
-        id_reserva_id__in=reservas_finalizadas_ids,
+    racks_mas_usados = archivo.asignaciones(
+        id_reserva__fecha_uso__month=mes_filtro,
+        id_reserva__fecha_uso__year=anio_filtro,
+        id_reserva__estado_reserva='Finalizada',
         id_equipo__id_rack__isnull=False # Solo contar equipos que tienen un rack
-    ).values(
+    ).agrupar(
         'id_equipo__id_rack__nom_rack', # Agrupar por nombre de rack
-        'id_equipo__id_rack__ubicacion'
-    ).annotate(
+        'id_equipo__id_rack__ubicacion',
         total_equipos=Count('id_equipo') # Contar cuántos equipos de ese rack se usaron
-    ).order_by('-total_equipos')
+    )
 
     
     # 6. Selectores de Mes/Año
@@ -107,13 +99,11 @@ def ver_reportes(request):
     return render(request, 'administrador/ver_reportes.html', context)
 
 
+@requiere_rol('administrador')
+@leer_de_replica()
 def descargar_reporte_excel(request):
     """Vista para descargar reporte mensual en Excel"""
     
-    if request.session.get('usuario_tipo') != 'administrador':
-        messages.error(request, 'Acceso denegado.')
-        return redirect('dashboard')
-    
     if Workbook is None:
         messages.error(request, 'La librería openpyxl no está instalada. No se puede generar el reporte.')
         return redirect('ver_reportes')
@@ -142,13 +132,17 @@ def descargar_reporte_excel(request):
     ws.merge_cells('A2:L2')
     ws['A2'].alignment = Alignment(horizontal='center')
     
-    # Obtener TODAS las reservas del mes
-    reservas = Reserva.objects.filter(
+    # Obtener TODAS las reservas del mes (vivas y archivadas)
+    reservas = archivo.historial(
         fecha_uso__month=mes,
         fecha_uso__year=anio
     ).select_related(
         'id_usuario', 'id_carrera', 'id_asignatura', 'id_aula', 'id_aula__id_bloque'
     ).order_by('fecha_uso', 'hora_inicio')
+    por_estado = {
+        fila['estado_reserva']: fila
+        for fila in reservas.agrupar('estado_reserva', cantidad=Count('pk'), equipos=Sum('cant_solicitada'))
+    }
     
     # --- Estadísticas Generales ---
     current_row = 4
@@ -157,35 +151,28 @@ def descargar_reporte_excel(request):
     current_row += 1
     
     ws[f'A{current_row}'] = 'Total de Reservas:'
-    ws[f'B{current_row}'] = reservas.count()
-    current_row += 1
-    ws[f'A{current_row}'] = 'Aprobadas:'
-    ws[f'B{current_row}'] = reservas.filter(estado_reserva='Aprobada').count()
-    current_row += 1
-    ws[f'A{current_row}'] = 'Rechazadas:'
-    ws[f'B{current_row}'] = reservas.filter(estado_reserva='Rechazada').count()
-    current_row += 1
-    ws[f'A{current_row}'] = 'Pendientes:'
-    ws[f'B{current_row}'] = reservas.filter(estado_reserva='Pendiente').count()
-    current_row += 1
-    ws[f'A{current_row}'] = 'Finalizadas:'
-    ws[f'B{current_row}'] = reservas.filter(estado_reserva__iexact='Finalizada').count()
+    ws[f'B{current_row}'] = sum(fila['cantidad'] for fila in por_estado.values())
     current_row += 1
+    for etiqueta, estado in (('Aprobadas:', 'Aprobada'), ('Rechazadas:', 'Rechazada'),
+                             ('Pendientes:', 'Pendiente'), ('Finalizadas:', 'Finalizada')):
+        ws[f'A{current_row}'] = etiqueta
+        ws[f'B{current_row}'] = por_estado.get(estado, {}).get('cantidad', 0)
+        current_row += 1
     ws[f'A{current_row}'] = 'Total Equipos Solicitados:'
-    ws[f'B{current_row}'] = sum([r.cant_solicitada for r in reservas.filter(Q(estado_reserva='Aprobada') | Q(estado_reserva__iexact='Finalizada'))])
+    ws[f'B{current_row}'] = sum(por_estado.get(estado, {}).get('equipos', 0) for estado in ('Aprobada', 'Finalizada'))
     current_row += 1
     
     # --- Racks más usados del mes ---
     current_row += 1  # Espacio en blanco
-    reservas_finalizadas_ids = reservas.filter(estado_reserva__iexact='Finalizada').values_list('id_reserva', flat=True)
-    racks_mas_usados = AsignacionEquipo.objects.filter(
-        id_reserva_id__in=reservas_finalizadas_ids,
+    racks_mas_usados = archivo.asignaciones(
+        id_reserva__fecha_uso__month=mes,
+        id_reserva__fecha_uso__year=anio,
+        id_reserva__estado_reserva='Finalizada',
         id_equipo__id_rack__isnull=False
-    ).values(
-        'id_equipo__id_rack__nom_rack'
-    ).annotate(
+    ).agrupar(
+        'id_equipo__id_rack__nom_rack',
         cantidad=Count('id_equipo')
-    ).order_by('-cantidad')
+    )
     
     ws[f'A{current_row}'] = 'Racks más usados del mes:'
     ws[f'A{current_row}'].font = subtitle_font
@@ -249,4 +236,120 @@ def descargar_reporte_excel(request):
     response['Content-Disposition'] = f'attachment; filename="{filename}"'
     
     wb.save(response)
-    return response
\ No newline at end of file
+    return response
+
+
+# ======================================================
+# PRONÓSTICO DE DEMANDA (planificación de la flota)
+# ======================================================
+
+@requiere_rol('administrador')
+@leer_de_replica()
+def pronostico_demanda(request):
+    """Picos de demanda históricos y proyección del próximo periodo frente a la flota"""
+    
+    if pronostico.np is None:
+        messages.error(request, 'La librería numpy no está instalada. No se puede calcular el pronóstico.')
+        return redirect('ver_reportes')
+    
+    context = {
+        'usuario': request.usuario,
+        'pronostico': pronostico.obtener(),
+    }
+    
+    return render(request, 'administrador/pronostico_demanda.html', context)
+
+
+def _hoja_tabla(ws, fila, titulo, encabezados, filas, estilos):
+    """Escribe un título, los encabezados y las filas; devuelve la siguiente fila libre."""
+    header_fill, header_font, subtitle_font, border = estilos
+    ws.cell(row=fila, column=1, value=titulo).font = subtitle_font
+    fila += 1
+    for col_num, header in enumerate(encabezados, 1):
+        cell = ws.cell(row=fila, column=col_num, value=header)
+        cell.fill = header_fill; cell.font = header_font; cell.border = border
+        cell.alignment = Alignment(horizontal='center', vertical='center')
+    for valores in filas:
+        fila += 1
+        for col_num, valor in enumerate(valores, 1):
+            ws.cell(row=fila, column=col_num, value=valor).border = border
+    return fila + 2
+
+
+@requiere_rol('administrador')
+@leer_de_replica()
+def descargar_pronostico_excel(request):
+    """Descarga el pronóstico de demanda en una hoja de Excel"""
+    
+    if Workbook is None or pronostico.np is None:
+        messages.error(request, 'Faltan las librerías openpyxl o numpy. No se puede generar el pronóstico.')
+        return redirect('ver_reportes')
+    
+    datos = pronostico.obtener()
+    if datos is None:
+        messages.warning(request, 'No hay reservas aprobadas en el historial para calcular el pronóstico.')
+        return redirect('pronostico_demanda')
+    
+    wb = Workbook()
+    ws = wb.active
+    ws.title = 'Pronóstico'
+    estilos = (
+        PatternFill(start_color="016BB8", end_color="016BB8", fill_type="solid"),
+        Font(bold=True, color="FFFFFF", size=12),
+        Font(bold=True, size=12),
+        Border(left=Side(style='thin'), right=Side(style='thin'), top=Side(style='thin'), bottom=Side(style='thin')),
+    )
+    
+    ws['A1'] = 'PRONÓSTICO DE DEMANDA DE CHROMEBOOKS'
+    ws['A1'].font = Font(bold=True, size=14)
+    ws['A2'] = (f"Historial del {datos['desde']:%d/%m/%Y} al {datos['hasta']:%d/%m/%Y} "
+                f"({datos['reservas']} reservas, {datos['semanas_activas']} semanas con actividad)")
+    
+    proyeccion = datos['proyeccion']
+    fila = _hoja_tabla(ws, 4, 'PROYECCIÓN DEL PRÓXIMO PERIODO', ['Indicador', 'Valor'], [
+        ['Pico del último periodo (p95)', proyeccion['pico_periodo']],
+        ['Crecimiento anual (%)', proyeccion['crecimiento']],
+        ['Pico proyectado', proyeccion['proyeccion']],
+        ['Flota en servicio', proyeccion['flota']],
+        ['Holgura (flota - proyectado)', proyeccion['holgura']],
+    ], estilos)
+    
+    encabezados = ['Nombre'] + [f'p{p}' for p in pronostico.PERCENTILES] + ['Máximo', 'Semanas']
+    columnas = [f'p{p}' for p in pronostico.PERCENTILES] + ['maximo', 'semanas']
+    for titulo, grupos in (('PICO SEMANAL POR FACULTAD', datos['facultades']),
+                           ('PICO SEMANAL POR CARRERA', datos['carreras'])):
+        fila = _hoja_tabla(ws, fila, titulo, encabezados, [
+            [grupo['nombre']] + [grupo[c] for c in columnas] for grupo in grupos
+        ], estilos)
+    
+    fila = _hoja_tabla(ws, fila, 'PICO SEMANAL PROMEDIO POR MES', ['Mes', 'Pico'], [
+        [mes['mes'], mes['pico']] for mes in datos['perfil_mensual']
+    ], estilos)
+    
+    perfil = datos['perfil_semanal']
+    _hoja_tabla(ws, fila, 'EQUIPOS EN USO PROMEDIO POR DÍA Y HORA', ['Día'] + perfil['franjas'], [
+        [f['dia']] + f['valores'] for f in perfil['filas']
+    ], estilos)
+    
+    ws.column_dimensions['A'].width = 40
+    
+    response = HttpResponse(
+        content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+    )
+    response['Content-Disposition'] = f'attachment; filename="Pronostico_Chromebooks_{datetime.now():%Y%m%d}.xlsx"'
+    
+    wb.save(response)
+    return response
+
+
+@requiere_rol('administrador')
+@leer_de_replica()
+def reporte_uso_equipos(request):
+    """Horas de uso por equipo y por rack, para repartir el desgaste de la flota"""
+    
+    context = {
+        'usuario': request.usuario,
+        'uso': uso_equipos.resumen(),
+    }
+    
+    return render(request, 'administrador/uso_equipos.html', context)
@@ -0,0 +1,38 @@
+"""
+Selección del entorno de configuración.
+
+DJANGO_SETTINGS_MODULE sigue siendo 'STR_Chromebook.settings'; el entorno se
+elige con la variable STR_ENTORNO (dev por defecto):
+
+    STR_ENTORNO=dev    -> settings/dev.py    (DEBUG, cache local, sin reutilizar conexiones)
+    STR_ENTORNO=prod   -> settings/prod.py   (conexiones persistentes, cache compartida...)
+    STR_ENTORNO=bench  -> settings/bench.py  (como prod, pero sin servicios externos)
+
+También se puede apuntar DJANGO_SETTINGS_MODULE directamente a un submódulo,
+por ejemplo STR_Chromebook.settings.prod.
+
+Variables de entorno reconocidas (todas opcionales salvo en prod):
+    DJANGO_SECRET_KEY, DJANGO_DEBUG, DJANGO_ALLOWED_HOSTS (separados por coma)
+    DB_MOTOR (mysql|sqlite), DB_NAME, DB_USER, DB_PASSWORD, DB_HOST, DB_PORT
+    DB_CONN_MAX_AGE, DB_CONN_HEALTH_CHECKS
+    DB_REPLICA_NAME, DB_REPLICA_HOST (réplica de lectura para reportes, ver core.replicas),
+    DB_REPLICA_USER, DB_REPLICA_PASSWORD, DB_REPLICA_PORT, DB_REPLICA_PEGAJOSA_SEGUNDOS
+    REDIS_URL (prod: cache compartida en Redis; sin ella, cache en la BD)
+    SESION_MOTOR (db|cached_db|cache|cookie), SESION_DURACION (segundos)
+    SERVER_TIMING, LOG_ACCESO_NIVEL, PERFILADOR_MUESTREO
+    ESTATICOS_DESDE_DJANGO (prod: servir STATIC_ROOT desde la aplicación)
+"""
+
+import os
+
+_entorno = os.environ.get('STR_ENTORNO', 'dev')
+
+if _entorno == 'prod':
+    from .prod import *  # noqa: F401,F403
+elif _entorno == 'bench':
+    from .bench import *  # noqa: F401,F403
+elif _entorno == 'dev':
+    from .dev import *  # noqa: F401,F403
+else:
+    from django.core.exceptions import ImproperlyConfigured
+    raise ImproperlyConfigured(f"STR_ENTORNO desconocido: {_entorno!r} (use dev, prod o bench)")
@@ -0,0 +1,344 @@
+"""
+Django settings for STR_Chromebook project - configuración común.
+
+Los entornos (dev.py, prod.py, bench.py) importan este módulo y ajustan lo
+necesario. Los valores que cambian entre máquinas se leen de variables de
+entorno (ver STR_Chromebook/settings/__init__.py).
+
+Generated by 'django-admin startproject' using Django 5.2.7.
+
+For more information on this file, see
+https://docs.djangoproject.com/en/5.2/topics/settings/
+
+For the full list of settings and their values, see
+https://docs.djangoproject.com/en/5.2/ref/settings/
+"""
+
+import os
+from pathlib import Path
+
+# Build paths inside the project like this: BASE_DIR / 'subdir'.
+BASE_DIR = Path(__file__).resolve().parent.parent.parent
+
+
+def env(nombre, defecto=None):
+    return os.environ.get(nombre, defecto)
+
+
+def env_bool(nombre, defecto=False):
+    valor = os.environ.get(nombre)
+    if valor is None:
+        return defecto
+    return valor.strip().lower() in ('1', 'true', 'si', 'sí', 'yes', 'on')
+
+
+def env_int(nombre, defecto):
+    return int(os.environ.get(nombre, defecto))
+
+
+def env_lista(nombre, defecto=()):
+    valor = os.environ.get(nombre)
+    if valor is None:
+        return list(defecto)
+    return [elemento.strip() for elemento in valor.split(',') if elemento.strip()]
+
+
+# Quick-start development settings - unsuitable for production
+# See https://docs.djangoproject.com/en/5.2/howto/deployment/checklist/
+
+# SECURITY WARNING: keep the secret key used in production secret!
+SECRET_KEY = env('DJANGO_SECRET_KEY', 'django-insecure-_han-aru(afr5er$gl*3+gvwz37zeemi8#f%%*o*se+#af)bd5')
+
+# SECURITY WARNING: don't run with debug turned on in production!
+DEBUG = env_bool('DJANGO_DEBUG', False)
+
+ALLOWED_HOSTS = env_lista('DJANGO_ALLOWED_HOSTS')
+
+
+# Application definition
+
+INSTALLED_APPS = [
+    'django.contrib.admin',
+    'django.contrib.auth',
+    'django.contrib.contenttypes',
+    'django.contrib.sessions',
+    'django.contrib.messages',
+    'django.contrib.staticfiles',
+    #Aplicaciones core - Gestion_Equipo
+    'core',
+    'Gestion_Equipos',
+]
+
+MIDDLEWARE = [
+    'core.middleware.InstrumentacionSQLMiddleware',
+    'core.middleware.MetricasPeticionMiddleware',
+    'django.middleware.security.SecurityMiddleware',
+    'django.contrib.sessions.middleware.SessionMiddleware',
+    'core.middleware.UsuarioActualMiddleware',
+    'django.middleware.common.CommonMiddleware',
+    'django.middleware.csrf.CsrfViewMiddleware',
+    'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'django.contrib.messages.middleware.MessageMiddleware',
+    'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'core.middleware.LecturaReplicaMiddleware',
+    'core.middleware.PerfiladorMiddleware',
+]
+
+ROOT_URLCONF = 'STR_Chromebook.urls'
+
+TEMPLATES = [
+    {
+        # DjangoTemplates + medición del tiempo de renderizado (Server-Timing)
+        'BACKEND': 'core.plantillas.DjangoTemplatesMedidas',
+        'DIRS': [BASE_DIR / 'templates'],
+        'APP_DIRS': True,
+        'OPTIONS': {
+            'context_processors': [
+                'django.template.context_processors.debug',
+                'django.template.context_processors.request',
+                'django.contrib.auth.context_processors.auth',
+                'django.contrib.messages.context_processors.messages',
+            ],
+        },
+    },
+]
+
+WSGI_APPLICATION = 'STR_Chromebook.wsgi.application'
+
+
+# Database
+# https://docs.djangoproject.com/en/5.2/ref/settings/#databases
+
+# DB_MOTOR=mysql (por defecto) o sqlite (DB_NAME es entonces la ruta del archivo).
+# CONN_MAX_AGE=0 abre una conexión nueva por petición; prod.py la reutiliza.
+
+if env('DB_MOTOR', 'mysql') == 'sqlite':
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': env('DB_NAME', str(BASE_DIR / 'db.sqlite3')),
+        }
+    }
+else:
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.mysql',
+            'NAME': env('DB_NAME', 'str_chromebook'),
+            'USER': env('DB_USER', 'root'),
+            'PASSWORD': env('DB_PASSWORD', ''),
+            'HOST': env('DB_HOST', '127.0.0.1'),
+            'PORT': env('DB_PORT', '3306'),
+            'OPTIONS': {
+                'init_command': "SET sql_mode='STRICT_TRANS_TABLES'",
+                'charset': 'utf8mb4'
+            },
+        }
+    }
+
+DATABASES['default']['CONN_MAX_AGE'] = env_int('DB_CONN_MAX_AGE', 0)
+DATABASES['default']['CONN_HEALTH_CHECKS'] = env_bool('DB_CONN_HEALTH_CHECKS', False)
+
+# Réplica de lectura (opcional) para reportes y exportaciones
+# (core.replicas). Se activa con DB_REPLICA_NAME (con sqlite, la ruta de otro
+# archivo) o DB_REPLICA_HOST; usuario, clave y puerto son los de la primaria
+# salvo DB_REPLICA_USER, DB_REPLICA_PASSWORD y DB_REPLICA_PORT.
+#
+# El alias existe siempre (sin réplica apunta a la misma base y nada lo usa,
+# porque el router no se instala): `manage.py test` lo crea como TEST MIRROR
+# de la BD de pruebas y core/tests.py instala el router para probarlo.
+
+REPLICA_ALIAS = 'replica'
+REPLICA_PEGAJOSA_SEGUNDOS = env_int('DB_REPLICA_PEGAJOSA_SEGUNDOS', 5)
+
+DATABASES[REPLICA_ALIAS] = {
+    **DATABASES['default'],
+    'NAME': env('DB_REPLICA_NAME', DATABASES['default']['NAME']),
+    'TEST': {'MIRROR': 'default'},
+}
+if 'HOST' in DATABASES['default']:
+    for clave in ('HOST', 'PORT', 'USER', 'PASSWORD'):
+        DATABASES[REPLICA_ALIAS][clave] = env(f'DB_REPLICA_{clave}', DATABASES['default'][clave])
+
+if env('DB_REPLICA_NAME') or env('DB_REPLICA_HOST'):
+    DATABASE_ROUTERS = ['core.replicas.RouterReplica']
+
+
+# Cache (local al proceso; prod.py usa un backend compartido)
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'str-chromebook',
+    }
+}
+
+
+# Sesiones (SESION_MOTOR). La sesión guarda solo la identidad del usuario
+# (usuario_id, nombre, tipo, cédula, username) y los mensajes van en cookie
+# (FallbackStorage), así que cualquiera de estos motores sirve:
+#   db         tabla django_session: un SELECT por petición (por defecto en dev)
+#   cached_db  lectura desde la cache, escritura también en la BD (por defecto en prod)
+#   cache      solo cache: sin E/S en la BD; se pierde al reiniciar la cache
+#   cookie     cookie firmada: sin E/S en servidor; el logout no invalida una copia
+#              robada de la cookie hasta que expire (acortar SESION_DURACION)
+# Las sesiones vencidas en la BD se eliminan con: python manage.py limpiar_sesiones
+
+SESION_MOTORES = {
+    'db': 'django.contrib.sessions.backends.db',
+    'cached_db': 'django.contrib.sessions.backends.cached_db',
+    'cache': 'django.contrib.sessions.backends.cache',
+    'cookie': 'django.contrib.sessions.backends.signed_cookies',
+}
+SESSION_ENGINE = SESION_MOTORES[env('SESION_MOTOR', 'db')]
+SESSION_COOKIE_AGE = env_int('SESION_DURACION', 60 * 60 * 24 * 14)
+
+
+# Instrumentación SQL por petición (core.middleware.InstrumentacionSQLMiddleware)
+# Las peticiones que superen cualquiera de los dos umbrales se registran en el
+# logger 'str_chromebook.sql' con sus consultas más costosas.
+SQL_UMBRAL_CONSULTAS = 30
+SQL_UMBRAL_TIEMPO_MS = 500
+
+# Foto del usuario en cache por sesión (core.autenticacion); se invalida sola
+# cuando el usuario cambia, el tiempo solo limita cuánto ocupa en la cache
+USUARIO_CACHE_SEGUNDOS = 3600
+
+# Cabecera Server-Timing (db/tpl/app) en cada respuesta; el registro JSON de
+# acceso va al logger 'str_chromebook.acceso' (ver LOGGING)
+SERVER_TIMING = env_bool('SERVER_TIMING', True)
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'formatters': {
+        'mensaje': {'format': '%(message)s'},
+    },
+    'handlers': {
+        'consola': {'class': 'logging.StreamHandler'},
+        'acceso': {'class': 'logging.StreamHandler', 'formatter': 'mensaje'},
+    },
+    'loggers': {
+        'str_chromebook.sql': {'handlers': ['consola'], 'level': 'WARNING', 'propagate': False},
+        'str_chromebook.acceso': {
+            'handlers': ['acceso'], 'level': env('LOG_ACCESO_NIVEL', 'INFO'), 'propagate': False,
+        },
+    },
+}
+
+# Eventos en vivo del dashboard del administrador (Gestion_Equipos.eventos)
+# Se guardan en la cache (compartida en prod; con la tabla de cache, en
+# Tb_EVENTO_DASHBOARD porque su incr() no es atómico) y el stream SSE los consulta
+# cada EVENTOS_INTERVALO_SEGUNDOS; cada conexión dura como máximo
+# EVENTOS_DURACION_MAX_SEGUNDOS y el navegador se reconecta sin perder eventos.
+EVENTOS_RETENCION_SEGUNDOS = 600
+EVENTOS_INTERVALO_SEGUNDOS = 1
+EVENTOS_DURACION_MAX_SEGUNDOS = 300
+EVENTOS_REINTENTO_MS = 3000
+
+# Tablas de los dashboards cacheadas como fragmentos de plantilla
+# (Gestion_Equipos.fragmentos). Se renuevan al cambiar una reserva; este es el
+# máximo que puede tardar en verse un cambio de nombre de docente, carrera o aula.
+DASHBOARD_FRAGMENTOS_SEGUNDOS = 300
+
+# Calendarios .ics de reservas por docente y por aula (Gestion_Equipos.calendario).
+# Se regeneran al cambiar una reserva; incluyen las reservas desde hace
+# CALENDARIO_DIAS_ATRAS días.
+CALENDARIO_DIAS_ATRAS = env_int('CALENDARIO_DIAS_ATRAS', 30)
+CALENDARIO_CACHE_SEGUNDOS = 86400
+
+# Reservas recurrentes (Gestion_Equipos.recurrencia): duración máxima de una
+# serie y feriados que se omiten, como fechas AAAA-MM-DD separadas por comas.
+RESERVAS_SERIE_MAX_DIAS = 182
+FERIADOS = env_lista('FERIADOS')
+
+# Pronóstico de demanda (Gestion_Equipos.pronostico, requiere numpy): años de
+# historial, tamaño de la franja horaria y semanas de un periodo académico.
+PRONOSTICO_ANIOS_HISTORIA = 3
+PRONOSTICO_FRANJA_MINUTOS = 30
+PRONOSTICO_SEMANAS_PERIODO = 20
+PRONOSTICO_CACHE_SEGUNDOS = 3600
+
+# Uso por equipo (Gestion_Equipos.uso_equipos, comando actualizar_uso_equipos):
+# días antes de la marca de agua que se recalculan en cada corrida, máximo de
+# horas reales creíbles de una entrega y meses de "uso reciente".
+USO_EQUIPOS_DIAS_REPROCESO = env_int('USO_EQUIPOS_DIAS_REPROCESO', 7)
+USO_EQUIPOS_HORAS_REALES_MAX = 12
+USO_EQUIPOS_MESES_RECIENTES = 3
+
+# Devoluciones vencidas (Gestion_Equipos.devoluciones, comando detectar_vencidas):
+# horas después del fin de la reserva para finalizarla sola (0: nunca) y
+# duración del total del dashboard si no lo calculó el comando.
+VENCIDAS_GRACIA_HORAS = env_int('VENCIDAS_GRACIA_HORAS', 0)
+VENCIDAS_CACHE_SEGUNDOS = 300
+
+# Archivo histórico (Gestion_Equipos.archivo, comando archivar_reservas): se
+# archivan las reservas terminadas de hace más de ARCHIVO_PERIODOS periodos,
+# que empiezan en los meses de ARCHIVO_MESES_INICIO, en lotes de ARCHIVO_LOTE.
+ARCHIVO_PERIODOS = env_int('ARCHIVO_PERIODOS', 2)
+ARCHIVO_MESES_INICIO = (1, 7)
+ARCHIVO_LOTE = 1000
+
+# Paquetes de evidencias archivadas (Gestion_Equipos.paquetes_evidencias,
+# comando compactar_evidencias): carpeta fuera de MEDIA_ROOT, calidad JPEG y
+# lado máximo en píxeles de la foto recodificada y de la miniatura.
+EVIDENCIAS_PAQUETES_DIR = env('EVIDENCIAS_PAQUETES_DIR', str(BASE_DIR / 'evidencias_frias'))
+EVIDENCIAS_CALIDAD = env_int('EVIDENCIAS_CALIDAD', 70)
+EVIDENCIAS_LADO_MAX = 1600
+EVIDENCIAS_MINIATURA_LADO = 320
+
+# Perfilado bajo demanda (core.middleware.PerfiladorMiddleware)
+# Un administrador agrega ?perfilar=1 a cualquier URL (o ?perfilar=on/off para
+# toda su sesión). PERFILADOR_MUESTREO perfila además esa fracción de peticiones.
+# Consultar los perfiles con: python manage.py perfiles
+PERFILADOR_DIR = BASE_DIR / 'perfiles'
+PERFILADOR_MUESTREO = float(env('PERFILADOR_MUESTREO', 0.0))
+PERFILADOR_MAX_ARCHIVOS = 200
+PERFILADOR_TOP = 30
+
+
+# Password validation
+# https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
+
+AUTH_PASSWORD_VALIDATORS = [
+    {
+        'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator',
+    },
+    {
+        'NAME': 'django.contrib.auth.password_validation.MinimumLengthValidator',
+    },
+    {
+        'NAME': 'django.contrib.auth.password_validation.CommonPasswordValidator',
+    },
+    {
+        'NAME': 'django.contrib.auth.password_validation.NumericPasswordValidator',
+    },
+]
+
+
+# Internationalization
+# https://docs.djangoproject.com/en/5.2/topics/i18n/
+
+LANGUAGE_CODE = 'en-us'
+
+TIME_ZONE = 'UTC'
+
+USE_I18N = True
+
+USE_TZ = True
+
+
+# Static files (CSS, JavaScript, Images)
+# https://docs.djangoproject.com/en/5.2/howto/static-files/
+
+STATIC_URL = 'static/'
+STATICFILES_DIRS = [BASE_DIR / 'static']  # ← Carpeta donde están tus archivos estáticos
+STATIC_ROOT = BASE_DIR / 'staticfiles'     # ← Para producción
+
+# Media files
+MEDIA_URL = '/media/'
+MEDIA_ROOT = BASE_DIR / 'media'
+
+# Default primary key field type
+# https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
+
+DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
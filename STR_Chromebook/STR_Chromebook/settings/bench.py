@@ -0,0 +1,29 @@
+"""
+Configuración para benchmarks y pruebas de carga: el mismo perfil que prod
+(DEBUG desactivado, conexiones persistentes, cached loader, sesiones cached_db)
+pero sin servicios externos: cache en memoria del proceso y estáticos sin
+manifest, para no depender de Redis ni de collectstatic.
+
+    STR_ENTORNO=bench DB_MOTOR=sqlite DB_NAME=/tmp/bench.sqlite3 python manage.py benchmark_vistas
+"""
+
+import os
+
+# Valores que prod.py exige, con defaults seguros para una máquina local
+os.environ.setdefault('DJANGO_SECRET_KEY', 'bench-no-usar-en-produccion')
+os.environ.setdefault('DJANGO_ALLOWED_HOSTS', 'localhost,127.0.0.1,testserver')
+os.environ.setdefault('DJANGO_HTTPS', '0')
+
+from .prod import *  # noqa: F401,F403,E402
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'str-chromebook-bench',
+    }
+}
+
+STORAGES = {
+    'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+    'staticfiles': {'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage'},
+}
@@ -0,0 +1,9 @@
+"""
+Configuración de desarrollo local: DEBUG activo, cache en memoria del
+proceso y una conexión a la BD por petición (como el runserver de siempre).
+"""
+
+from .base import *  # noqa: F401,F403
+from .base import env_bool
+
+DEBUG = env_bool('DJANGO_DEBUG', True)
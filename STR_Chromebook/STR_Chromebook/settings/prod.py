@@ -0,0 +1,99 @@
+"""
+Configuración de producción.
+
+- Conexiones persistentes a MySQL (CONN_MAX_AGE) con verificación de salud
+  antes de reutilizarlas (CONN_HEALTH_CHECKS).
+- Cache compartida entre procesos/servidores: Redis si se define REDIS_URL
+  (requiere el paquete `redis`); si no, tabla de cache en la BD
+  (python manage.py createcachetable).
+- Plantillas compiladas una sola vez por proceso (cached loader).
+- Sesiones cached_db por defecto: lectura desde la cache, escritura también
+  en la BD (SESION_MOTOR=cache o cookie para no tocar la BD, ver base.py).
+- Estáticos con hash en el nombre, minificados y precomprimidos (.gz/.br)
+  por collectstatic (core.estaticos); EstaticosMiddleware los sirve con cache
+  inmutable si no hay un servidor web delante (ESTATICOS_DESDE_DJANGO=0 lo omite).
+"""
+
+from copy import deepcopy
+
+from django.core.exceptions import ImproperlyConfigured
+
+from .base import *  # noqa: F401,F403
+from .base import DATABASES, MIDDLEWARE, SESION_MOTORES, TEMPLATES, env, env_bool, env_int, env_lista
+
+# Copias: los ajustes de abajo no deben modificar los objetos de base.py
+DATABASES = deepcopy(DATABASES)
+TEMPLATES = deepcopy(TEMPLATES)
+
+DEBUG = False
+
+SECRET_KEY = env('DJANGO_SECRET_KEY')
+if not SECRET_KEY:
+    raise ImproperlyConfigured('Defina DJANGO_SECRET_KEY para el entorno prod')
+
+ALLOWED_HOSTS = env_lista('DJANGO_ALLOWED_HOSTS')
+if not ALLOWED_HOSTS:
+    raise ImproperlyConfigured('Defina DJANGO_ALLOWED_HOSTS para el entorno prod')
+
+
+# Base de datos: reutilizar la conexión entre peticiones del mismo worker
+
+for _bd in DATABASES.values():  # la primaria y la réplica, si hay
+    _bd['CONN_MAX_AGE'] = env_int('DB_CONN_MAX_AGE', 300)
+    _bd['CONN_HEALTH_CHECKS'] = env_bool('DB_CONN_HEALTH_CHECKS', True)
+
+
+# Cache compartida
+
+if env('REDIS_URL'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': env('REDIS_URL'),
+            'KEY_PREFIX': 'str',
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+            'LOCATION': 'Tb_CACHE',
+            'KEY_PREFIX': 'str',
+        }
+    }
+
+
+# Plantillas: cached loader explícito (no admite APP_DIRS junto a 'loaders')
+
+TEMPLATES[0]['APP_DIRS'] = False
+TEMPLATES[0]['OPTIONS']['loaders'] = [
+    ('django.template.loaders.cached.Loader', [
+        'django.template.loaders.filesystem.Loader',
+        'django.template.loaders.app_directories.Loader',
+    ]),
+]
+TEMPLATES[0]['OPTIONS']['context_processors'] = [
+    procesador for procesador in TEMPLATES[0]['OPTIONS']['context_processors']
+    if procesador != 'django.template.context_processors.debug'
+]
+
+
+# Sesiones y estáticos
+
+SESSION_ENGINE = SESION_MOTORES[env('SESION_MOTOR', 'cached_db')]
+
+STORAGES = {
+    'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+    'staticfiles': {'BACKEND': 'core.estaticos.EstaticosComprimidosStorage'},
+}
+
+if env_bool('ESTATICOS_DESDE_DJANGO', True):
+    MIDDLEWARE = ['core.middleware.EstaticosMiddleware', *MIDDLEWARE]
+
+
+# HTTPS detrás de un proxy (desactivar con DJANGO_HTTPS=0 si se sirve por HTTP)
+
+if env_bool('DJANGO_HTTPS', True):
+    SECURE_PROXY_SSL_HEADER = ('HTTP_X_FORWARDED_PROTO', 'https')
+    SESSION_COOKIE_SECURE = True
+    CSRF_COOKIE_SECURE = True
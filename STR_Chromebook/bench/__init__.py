@@ -0,0 +1,4 @@
+"""
+Herramientas de medición de rendimiento que se ejecutan fuera del servidor
+(pruebas de carga contra una instancia local).
+"""
@@ -0,0 +1,174 @@
+"""
+Concurrencia de las APIs JSON async: ASGI (uvicorn) frente a WSGI (gunicorn).
+
+Levanta el proyecto con cada servidor y el mismo número de workers, y lanza
+contra él `--concurrencia` clientes simultáneos (sesiones de administrador)
+que llaman en bucle a las APIs livianas: filtrar_aulas, filtrar_asignaturas,
+autocompletar_responsable, detalle_reserva y detalle_equipo. Reporta por
+servidor y por endpoint: throughput, tasa de error y percentiles de latencia.
+
+Con WSGI cada worker sync atiende una petición a la vez; con ASGI un worker
+atiende muchas, aunque las consultas del ORM async se siguen ejecutando en
+el hilo de BD del worker (sync_to_async), así que la ganancia viene sobre
+todo de no esperar la red/sesión con un hilo bloqueado.
+
+Necesita `uvicorn` y `gunicorn` instalados, los datos de `manage.py
+seed_benchmark` y los mismos settings que el servidor. Desde la carpeta que
+contiene manage.py:
+
+    STR_ENTORNO=bench python -m bench.asgi --workers 2 --concurrencia 64 --duracion 30
+    STR_ENTORNO=bench python -m bench.asgi --servidores asgi --json asgi.json
+"""
+
+import argparse
+import importlib.util
+import json
+import random
+import sys
+import threading
+import time
+
+# bench.carga configura Django al importarse
+from bench.carga import Metricas, Sesion, iniciar_servidor
+
+from django.db import connection
+from django.urls import reverse
+
+from core.models import Usuario, Bloque, Carrera
+from Gestion_Equipos.models import Reserva, Equipo
+
+
+SERVIDORES = {
+    'asgi': ('uvicorn', lambda puerto, workers: [
+        sys.executable, '-m', 'uvicorn', 'STR_Chromebook.asgi:application',
+        '--host', '127.0.0.1', '--port', str(puerto), '--workers', str(workers),
+        '--no-access-log', '--log-level', 'warning',
+    ]),
+    'wsgi': ('gunicorn', lambda puerto, workers: [
+        sys.executable, '-m', 'gunicorn', 'STR_Chromebook.wsgi:application',
+        '--bind', f'127.0.0.1:{puerto}', '--workers', str(workers), '--log-level', 'warning',
+    ]),
+}
+
+
+def cargar_catalogos(clave):
+    """IDs con los que se arman las peticiones a las APIs."""
+    return {
+        'clave': clave,
+        'admin': Usuario.objects.filter(
+            id_tipo_usuario__nom_rol__iexact='Administrador'
+        ).values_list('username', flat=True).first(),
+        'bloques': list(Bloque.objects.values_list('id_bloque', flat=True)),
+        'carreras': list(Carrera.objects.values_list('id_carrera', flat=True)),
+        'reservas': list(Reserva.objects.values_list('id_reserva', flat=True)[:1000]),
+        'equipos': list(Equipo.objects.values_list('id_equipo', flat=True)[:1000]),
+    }
+
+
+def guion_api(sesion, catalogos, rng, fin):
+    """Un cliente llama a las APIs JSON en bucle, como los formularios y modales."""
+    while time.time() < fin:
+        opcion = rng.randrange(5)
+        if opcion == 0:
+            sesion.peticion('filtrar_aulas', reverse('filtrar_aulas') + f"?bloque_id={rng.choice(catalogos['bloques'])}")
+        elif opcion == 1:
+            sesion.peticion('filtrar_asignaturas',
+                            reverse('filtrar_asignaturas') + f"?carrera_id={rng.choice(catalogos['carreras'])}")
+        elif opcion == 2:
+            sesion.peticion('autocompletar_responsable', reverse('autocompletar_responsable') + '?q=do')
+        elif opcion == 3:
+            sesion.peticion('detalle_reserva', reverse('detalle_reserva', args=[rng.choice(catalogos['reservas'])]))
+        else:
+            sesion.peticion('detalle_equipo', reverse('detalle_equipo', args=[rng.choice(catalogos['equipos'])]))
+
+
+def medir(url, catalogos, concurrencia, duracion, semilla):
+    """Inicia `concurrencia` sesiones contra `url` y devuelve el resumen de métricas."""
+    rng = random.Random(semilla)
+
+    # El login no se cuenta en la medición
+    sesiones = []
+    for _ in range(concurrencia):
+        sesion = Sesion(url, Metricas())
+        if sesion.login(catalogos['admin'], catalogos['clave'], 'admin'):
+            sesiones.append(sesion)
+    if not sesiones:
+        raise SystemExit(f'No se pudo iniciar sesión en {url} (¿--clave correcta?).')
+
+    metricas = Metricas()
+    for sesion in sesiones:
+        sesion.metricas = metricas
+
+    fin = time.time() + duracion
+    hilos = [
+        threading.Thread(target=guion_api, args=(sesion, catalogos, random.Random(rng.random()), fin))
+        for sesion in sesiones
+    ]
+    inicio = time.time()
+    for hilo in hilos:
+        hilo.start()
+    for hilo in hilos:
+        hilo.join()
+    segundos = time.time() - inicio
+
+    endpoints = metricas.resumen(segundos)
+    total = sum(r['peticiones'] for r in endpoints.values())
+    return {
+        'sesiones': len(sesiones),
+        'segundos': round(segundos, 1),
+        'throughput_rps': round(total / segundos, 2),
+        'endpoints': endpoints,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--servidores', nargs='+', choices=list(SERVIDORES), default=list(SERVIDORES))
+    parser.add_argument('--workers', type=int, default=2, help='Workers de cada servidor (el mismo para ambos).')
+    parser.add_argument('--concurrencia', type=int, default=64, help='Clientes simultáneos.')
+    parser.add_argument('--duracion', type=int, default=30, help='Segundos de prueba por servidor.')
+    parser.add_argument('--puerto', type=int, default=8766)
+    parser.add_argument('--clave', default='bench', help='Contraseña de los usuarios generados.')
+    parser.add_argument('--semilla', type=int, default=7)
+    parser.add_argument('--json', help='Guardar el resumen en este archivo JSON.')
+    args = parser.parse_args()
+
+    for nombre in args.servidores:
+        paquete = SERVIDORES[nombre][0]
+        if importlib.util.find_spec(paquete) is None:
+            raise SystemExit(f'Falta el paquete {paquete!r} para el servidor {nombre}: pip install {paquete}')
+
+    catalogos = cargar_catalogos(args.clave)
+    if not catalogos['admin'] or not catalogos['reservas'] or not catalogos['equipos']:
+        raise SystemExit('Faltan datos. Ejecute primero: python manage.py seed_benchmark')
+    connection.close()
+
+    resumen = {
+        'base_datos': connection.vendor,
+        'workers': args.workers,
+        'concurrencia': args.concurrencia,
+        'servidores': {},
+    }
+    for nombre in args.servidores:
+        comando = SERVIDORES[nombre][1](args.puerto, args.workers)
+        servidor, url = iniciar_servidor(args.puerto, comando)
+        try:
+            resumen['servidores'][nombre] = medir(url, catalogos, args.concurrencia, args.duracion, args.semilla)
+        finally:
+            servidor.terminate()
+            servidor.wait()
+
+    print(f"{'servidor':8} {'endpoint':26} {'pet.':>7} {'rps':>8} {'error':>6} {'rech.':>5} {'p50':>8} {'p95':>8} {'p99':>8}")
+    for nombre, datos in resumen['servidores'].items():
+        for endpoint, r in datos['endpoints'].items():
+            print(f"{nombre:8} {endpoint:26} {r['peticiones']:7d} {r['throughput_rps']:8.1f} "
+                  f"{r['tasa_error']:6.1%} {r['rechazos']:5d} {r['p50_ms']:8.1f} {r['p95_ms']:8.1f} {r['p99_ms']:8.1f}")
+        print(f"{nombre:8} {'TOTAL':26} {'':7} {datos['throughput_rps']:8.1f}")
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as archivo:
+            json.dump(resumen, archivo, indent=2, ensure_ascii=False)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,379 @@
+"""
+Prueba de carga para el pico del primer día de clases.
+
+Simula sesiones concurrentes de docentes (login, crear reserva, ver sus
+reservas) y de administradores (login, listar pendientes, aprobar, asignar
+rack, finalizar) contra un servidor local, y reporta por endpoint:
+throughput, tasa de error, percentiles de latencia y errores de bloqueo.
+En MySQL también reporta las esperas de bloqueo y deadlocks de InnoDB
+observados durante la prueba.
+
+Necesita los datos de `manage.py seed_benchmark` y los mismos settings que
+el servidor (se usan para leer IDs de la base de datos). Desde la carpeta
+que contiene manage.py:
+
+    python -m bench.carga --iniciar-servidor --docentes 200 --admins 5 --duracion 60
+    python -m bench.carga --url http://127.0.0.1:8000 --docentes 50 --json carga.json
+"""
+
+import argparse
+import http.cookiejar
+import json
+import os
+import random
+import subprocess
+import sys
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from collections import defaultdict
+from datetime import date, timedelta
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'STR_Chromebook.settings')
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.db import connection  # noqa: E402
+from django.db.models import Count, Q  # noqa: E402
+from django.urls import reverse  # noqa: E402
+
+from core.metricas import percentil  # noqa: E402
+from core.models import Usuario, Aula, Asignatura, DocenteCarrera, Rack  # noqa: E402
+from Gestion_Equipos.models import Reserva  # noqa: E402
+
+# Textos de error que delatan contención de bloqueos en MySQL/SQLite
+ERRORES_BLOQUEO = ('deadlock', 'lock wait timeout', 'database is locked')
+
+
+# ======================================================
+# MÉTRICAS
+# ======================================================
+
+class Metricas:
+    """Acumula latencias y resultados por endpoint; seguro entre hilos."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.latencias = defaultdict(list)
+        self.errores = defaultdict(int)
+        self.rechazos = defaultdict(int)
+        self.bloqueos = defaultdict(int)
+
+    def registrar(self, endpoint, duracion, error=False, rechazo=False, bloqueo=False):
+        with self.lock:
+            self.latencias[endpoint].append(duracion * 1000)
+            self.errores[endpoint] += error
+            self.rechazos[endpoint] += rechazo
+            self.bloqueos[endpoint] += bloqueo
+
+    def resumen(self, segundos):
+        resultado = {}
+        for endpoint, latencias in sorted(self.latencias.items()):
+            latencias = sorted(latencias)
+            total = len(latencias)
+            resultado[endpoint] = {
+                'peticiones': total,
+                'throughput_rps': round(total / segundos, 2),
+                'tasa_error': round(self.errores[endpoint] / total, 4),
+                'rechazos': self.rechazos[endpoint],
+                'errores_bloqueo': self.bloqueos[endpoint],
+                'p50_ms': round(percentil(latencias, 50), 2),
+                'p95_ms': round(percentil(latencias, 95), 2),
+                'p99_ms': round(percentil(latencias, 99), 2),
+                'max_ms': round(latencias[-1], 2),
+            }
+        return resultado
+
+
+def metricas_bloqueo_bd():
+    """Contadores de bloqueos de InnoDB (solo MySQL/MariaDB)."""
+    if connection.vendor != 'mysql':
+        return {}
+    metricas = {}
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SHOW GLOBAL STATUS WHERE Variable_name IN "
+            "('Innodb_row_lock_waits', 'Innodb_row_lock_time', 'Innodb_deadlocks')"
+        )
+        metricas.update({nombre: int(valor) for nombre, valor in cursor.fetchall()})
+        try:
+            cursor.execute(
+                "SELECT NAME, COUNT FROM information_schema.INNODB_METRICS "
+                "WHERE NAME IN ('lock_deadlocks', 'lock_timeouts', 'lock_row_lock_waits')"
+            )
+            metricas.update({nombre: int(valor) for nombre, valor in cursor.fetchall()})
+        except Exception:
+            pass
+    return metricas
+
+
+# ======================================================
+# CLIENTE HTTP
+# ======================================================
+
+class SinRedirecciones(urllib.request.HTTPRedirectHandler):
+    """Mide cada petición por separado: las redirecciones no se siguen."""
+
+    def redirect_request(self, *args, **kwargs):
+        return None
+
+
+class Sesion:
+    """Navegador mínimo: cookies, token CSRF y métricas por endpoint."""
+
+    def __init__(self, base_url, metricas):
+        self.base_url = base_url.rstrip('/')
+        self.metricas = metricas
+        self.cookies = http.cookiejar.CookieJar()
+        self.opener = urllib.request.build_opener(
+            urllib.request.HTTPCookieProcessor(self.cookies), SinRedirecciones
+        )
+
+    def csrf(self):
+        for cookie in self.cookies:
+            if cookie.name == 'csrftoken':
+                return cookie.value
+        return ''
+
+    def peticion(self, endpoint, ruta, datos=None, json_body=None):
+        cabeceras = {'X-CSRFToken': self.csrf(), 'Referer': self.base_url + ruta}
+        cuerpo = None
+        if json_body is not None:
+            cuerpo = json.dumps(json_body).encode()
+            cabeceras['Content-Type'] = 'application/json'
+        elif datos is not None:
+            cuerpo = urllib.parse.urlencode(datos).encode()
+            cabeceras['Content-Type'] = 'application/x-www-form-urlencoded'
+
+        solicitud = urllib.request.Request(self.base_url + ruta, data=cuerpo, headers=cabeceras)
+        inicio = time.perf_counter()
+        try:
+            with self.opener.open(solicitud, timeout=60) as respuesta:
+                estado, contenido = respuesta.status, respuesta.read()
+        except urllib.error.HTTPError as e:
+            estado, contenido = e.code, e.read()
+        except (urllib.error.URLError, OSError):
+            self.metricas.registrar(endpoint, time.perf_counter() - inicio, error=True)
+            return None, {}
+        duracion = time.perf_counter() - inicio
+
+        texto = contenido.decode('utf-8', errors='replace')
+        datos_json = {}
+        if json_body is not None or texto.startswith('{'):
+            try:
+                datos_json = json.loads(texto)
+            except ValueError:
+                pass
+
+        mensaje_error = str(datos_json.get('error', '')).lower() if estado < 500 else texto[:2000].lower()
+        self.metricas.registrar(
+            endpoint, duracion,
+            error=estado >= 500,
+            rechazo=datos_json.get('success') is False,
+            bloqueo=any(patron in mensaje_error for patron in ERRORES_BLOQUEO),
+        )
+        return estado, datos_json
+
+    def login(self, username, clave, perfil):
+        self.peticion('login (GET)', reverse('login'))
+        estado, _ = self.peticion('login (POST)', reverse('login'), datos={
+            'username': username, 'password': clave, 'perfil': perfil,
+        })
+        return estado == 302
+
+
+# ======================================================
+# GUIONES DE SESIÓN
+# ======================================================
+
+def guion_docente(sesion, docente, catalogos, rng, fin):
+    """Un docente entra, crea reservas y revisa su listado hasta el final de la prueba."""
+    if not sesion.login(docente['username'], catalogos['clave'], 'docente'):
+        return
+    while time.time() < fin:
+        carrera = rng.choice(docente['carreras'])
+        id_aula, id_bloque = rng.choice(catalogos['aulas'])
+        hora = rng.randint(7, 14)
+
+        sesion.peticion('crear_reserva (GET)', reverse('crear_reserva'))
+        sesion.peticion('crear_reserva (POST)', reverse('crear_reserva'), datos={
+            'fecha_uso': (date.today() + timedelta(days=rng.randint(1, 30))).isoformat(),
+            'hora_inicio': f'{hora:02d}:00',
+            'hora_fin': f'{hora + 2:02d}:00',
+            'id_carrera': carrera,
+            'id_asignatura': rng.choice(catalogos['asignaturas'][carrera]),
+            'bloque': id_bloque,
+            'id_aula': id_aula,
+            'cant_solicitada': rng.randint(5, 30),
+            'responsable_entrega': 'RESPONSABLE CARGA',
+            'telefono_contacto': '0999999999',
+        })
+        sesion.peticion('mis_reservas', reverse('mis_reservas'))
+        sesion.peticion('dashboard_docente', reverse('dashboard_docente'))
+
+
+def guion_administrador(sesion, admin, catalogos, rng, fin):
+    """Un administrador aprueba, asigna equipos y finaliza reservas pendientes."""
+    if not sesion.login(admin, catalogos['clave'], 'admin'):
+        return
+    while time.time() < fin:
+        sesion.peticion('gestionar_reservas_list', reverse('gestionar_reservas_list') + '?estado=Pendiente')
+
+        pendientes = list(Reserva.objects.filter(
+            estado_reserva='Pendiente', fecha_uso__gte=date.today()
+        ).values_list('id_reserva', flat=True)[:50])
+        if not pendientes:
+            time.sleep(0.5)
+            continue
+        reserva_id = rng.choice(pendientes)
+
+        sesion.peticion('aprobar_reserva', reverse('aprobar_reserva', args=[reserva_id]), json_body={})
+        if not catalogos['racks']:
+            continue
+        sesion.peticion('api_asignar_rack', reverse('api_asignar_rack', args=[reserva_id]),
+                        json_body={'rack_id': rng.choice(catalogos['racks'])})
+        sesion.peticion('api_finalizar_reserva', reverse('api_finalizar_reserva', args=[reserva_id]),
+                        json_body={})
+
+
+def cargar_catalogos(num_docentes, clave):
+    """IDs que los guiones necesitan para construir peticiones válidas."""
+    carreras_por_docente = defaultdict(list)
+    for id_usuario, id_carrera in DocenteCarrera.objects.values_list('id_usuario_id', 'id_carrera_id'):
+        carreras_por_docente[id_usuario].append(id_carrera)
+
+    docentes = [
+        {'username': username, 'carreras': carreras_por_docente[id_usuario]}
+        for id_usuario, username in Usuario.objects.filter(
+            id_tipo_usuario__nom_rol='Docente', id_usuario__in=list(carreras_por_docente)
+        ).values_list('id_usuario', 'username')[:num_docentes]
+    ]
+    asignaturas = defaultdict(list)
+    for id_asignatura, id_carrera in Asignatura.objects.values_list('id_asignatura', 'id_carrera_id'):
+        asignaturas[id_carrera].append(id_asignatura)
+
+    racks = list(Rack.objects.annotate(
+        disponibles=Count('equipo', filter=Q(equipo__id_estado_equipo__nom_estado__iexact='Disponible'))
+    ).filter(disponibles__gte=5).values_list('id_rack', flat=True))
+
+    return {
+        'clave': clave,
+        'docentes': docentes,
+        'admins': list(Usuario.objects.filter(
+            id_tipo_usuario__nom_rol__iexact='Administrador'
+        ).values_list('username', flat=True)),
+        'aulas': list(Aula.objects.values_list('id_aula', 'id_bloque_id')),
+        'asignaturas': asignaturas,
+        'racks': racks,
+    }
+
+
+# ======================================================
+# EJECUCIÓN
+# ======================================================
+
+def iniciar_servidor(puerto, comando=None):
+    """Levanta el servidor (runserver si no se indica `comando`) y espera a que responda."""
+    proceso = subprocess.Popen(
+        comando or [sys.executable, 'manage.py', 'runserver', f'127.0.0.1:{puerto}', '--noreload'],
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    url = f'http://127.0.0.1:{puerto}'
+    for _ in range(100):
+        try:
+            urllib.request.urlopen(url + reverse('login'), timeout=1)
+            return proceso, url
+        except urllib.error.HTTPError:
+            return proceso, url
+        except (urllib.error.URLError, OSError):
+            time.sleep(0.2)
+    proceso.terminate()
+    raise SystemExit('El servidor local no respondió a tiempo.')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--url', default='http://127.0.0.1:8000', help='Servidor a probar.')
+    parser.add_argument('--iniciar-servidor', action='store_true',
+                        help='Levantar `manage.py runserver` en --puerto durante la prueba.')
+    parser.add_argument('--puerto', type=int, default=8765)
+    parser.add_argument('--docentes', type=int, default=50, help='Sesiones concurrentes de docentes.')
+    parser.add_argument('--admins', type=int, default=3, help='Sesiones concurrentes de administradores.')
+    parser.add_argument('--duracion', type=int, default=30, help='Segundos de prueba.')
+    parser.add_argument('--clave', default='bench', help='Contraseña de los usuarios generados.')
+    parser.add_argument('--semilla', type=int, default=7)
+    parser.add_argument('--json', help='Guardar el resumen en este archivo JSON.')
+    args = parser.parse_args()
+
+    catalogos = cargar_catalogos(args.docentes, args.clave)
+    if not catalogos['docentes'] or not catalogos['admins']:
+        raise SystemExit('Faltan datos. Ejecute primero: python manage.py seed_benchmark')
+
+    servidor = None
+    url = args.url
+    if args.iniciar_servidor:
+        servidor, url = iniciar_servidor(args.puerto)
+
+    metricas = Metricas()
+    rng = random.Random(args.semilla)
+    bloqueos_antes = metricas_bloqueo_bd()
+    connection.close()  # cada hilo abre su propia conexión
+
+    fin = time.time() + args.duracion
+    hilos = []
+    for i in range(args.docentes):
+        docente = catalogos['docentes'][i % len(catalogos['docentes'])]
+        hilos.append(threading.Thread(target=guion_docente, args=(
+            Sesion(url, metricas), docente, catalogos, random.Random(rng.random()), fin
+        )))
+    for i in range(args.admins):
+        admin = catalogos['admins'][i % len(catalogos['admins'])]
+        hilos.append(threading.Thread(target=guion_administrador, args=(
+            Sesion(url, metricas), admin, catalogos, random.Random(rng.random()), fin
+        )))
+
+    inicio = time.time()
+    for hilo in hilos:
+        hilo.start()
+    for hilo in hilos:
+        hilo.join()
+    segundos = time.time() - inicio
+
+    if servidor:
+        servidor.terminate()
+        servidor.wait()
+
+    bloqueos_despues = metricas_bloqueo_bd()
+    resumen = {
+        'url': url,
+        'base_datos': connection.vendor,
+        'docentes': args.docentes,
+        'admins': args.admins,
+        'segundos': round(segundos, 1),
+        'endpoints': metricas.resumen(segundos),
+        'bloqueos_bd': {
+            nombre: valor - bloqueos_antes.get(nombre, 0)
+            for nombre, valor in bloqueos_despues.items()
+        },
+    }
+
+    print(f"{'endpoint':28} {'pet.':>6} {'rps':>7} {'error':>6} {'rech.':>5} {'bloq.':>5} "
+          f"{'p50':>8} {'p95':>8} {'p99':>8}")
+    for endpoint, r in resumen['endpoints'].items():
+        print(f"{endpoint:28} {r['peticiones']:6d} {r['throughput_rps']:7.1f} {r['tasa_error']:6.1%} "
+              f"{r['rechazos']:5d} {r['errores_bloqueo']:5d} "
+              f"{r['p50_ms']:8.1f} {r['p95_ms']:8.1f} {r['p99_ms']:8.1f}")
+    if resumen['bloqueos_bd']:
+        print('Bloqueos InnoDB durante la prueba:', resumen['bloqueos_bd'])
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as archivo:
+            json.dump(resumen, archivo, indent=2, ensure_ascii=False)
+
+
+if __name__ == '__main__':
+    main()
@@ -26,6 +26,7 @@ class UsuarioAdmin(admin.ModelAdmin):
     form = UsuarioAdminForm  
     list_display = ('id_usuario', 'username', 'nom_completo', 'cedula', 'email', 'id_tipo_usuario', 'telefono')
     list_filter = ('id_tipo_usuario',)
+    list_select_related = ('id_tipo_usuario',)
     search_fields = ('nom_completo', 'cedula', 'email', 'username')
     
     fieldsets = (
@@ -54,6 +55,7 @@ class CarreraAdmin(admin.ModelAdmin):
 class AsignaturaAdmin(admin.ModelAdmin):
     list_display = ('id_asignatura', 'nom_asignatura', 'get_carrera', 'get_facultad')
     list_filter = ('id_carrera__id_facultad', 'id_carrera')
+    list_select_related = ('id_carrera__id_facultad',)
     search_fields = ('nom_asignatura', 'id_carrera__nom_carrera')
     
     def get_carrera(self, obj):
@@ -73,6 +75,7 @@ class FacultadAdmin(admin.ModelAdmin):
 class DocenteCarreraAdmin(admin.ModelAdmin):
     list_display = ('id_docente_carrera', 'get_docente', 'get_carrera')
     list_filter = ('id_carrera',)
+    list_select_related = ('id_usuario', 'id_carrera')
     search_fields = ('id_usuario__nom_completo', 'id_carrera__nom_carrera')
     
     def get_docente(self, obj):
@@ -96,6 +99,7 @@ class BloqueAdmin(admin.ModelAdmin):
 class AulaAdmin(admin.ModelAdmin):
     list_display = ('id_aula', 'nom_aula', 'get_bloque')
     list_filter = ('id_bloque',)
+    list_select_related = ('id_bloque',)
     search_fields = ('nom_aula',)
     
     def get_bloque(self, obj):
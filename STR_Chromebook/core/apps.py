@@ -4,3 +4,10 @@ from django.apps import AppConfig
 class CoreConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'core'
+
+    def ready(self):
+        # Señales que invalidan la foto en cache del usuario (request.usuario)
+        from core import autenticacion  # noqa: F401
+        # Señales de los catálogos que muestran las vistas con GET condicional
+        from core.condicional import conectar_catalogos
+        conectar_catalogos()
@@ -0,0 +1,229 @@
+"""
+Usuario actual de la petición y control de acceso por rol.
+
+La autenticación del proyecto se basa en la sesión (login_view guarda
+usuario_id y usuario_tipo). Aquí se resuelve el Usuario una sola vez por
+petición (request.usuario, ver core.middleware.UsuarioActualMiddleware) y se
+guarda en la cache una "foto" compacta del usuario asociada a la sesión, para
+no consultar Tb_USUARIO en cada petición.
+
+La foto se invalida sola cuando el usuario (o su rol/título) se modifica: cada
+usuario tiene un número de versión en la cache que cambia con post_save. Una
+foto sin versión en la cache no vale (la versión pudo salir de la cache y
+volver a crearse): antes de leer el usuario de la BD se crea la versión con
+cache.add(), y si la cache no la guarda, la foto no se guarda.
+
+Las vistas async usan `await request.ausuario()` (aobtener_usuario): la
+misma lógica con la sesión, la cache y el ORM en sus variantes async.
+"""
+
+import hashlib
+import time
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction
+
+from django.conf import settings
+from django.contrib import messages
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.http import JsonResponse
+from django.shortcuts import redirect
+
+from core.models import TipoUsuario, TituloProfesional, Usuario
+
+
+# Campos que se guardan en la cache (la contraseña queda diferida: se consulta solo si se usa)
+_CAMPOS_USUARIO = [
+    campo.attname for campo in Usuario._meta.concrete_fields if campo.name != 'password'
+]
+_CAMPOS_TIPO = [campo.attname for campo in TipoUsuario._meta.concrete_fields]
+_CAMPOS_TITULO = [campo.attname for campo in TituloProfesional._meta.concrete_fields]
+
+
+def _clave_sesion(session_key):
+    # Con sesiones en cookie firmada la "clave" es la cookie completa: se resume
+    return f'usuario_sesion:{hashlib.sha1((session_key or "").encode()).hexdigest()}'
+
+
+def _clave_version(usuario_id):
+    return f'usuario_version:{usuario_id}'
+
+
+def _foto(usuario, version):
+    titulo = usuario.id_titulo
+    return {
+        'version': version,
+        'usuario': [getattr(usuario, campo) for campo in _CAMPOS_USUARIO],
+        'tipo': [getattr(usuario.id_tipo_usuario, campo) for campo in _CAMPOS_TIPO],
+        'titulo': [getattr(titulo, campo) for campo in _CAMPOS_TITULO] if titulo else None,
+    }
+
+
+def _desde_foto(foto):
+    """Reconstruye el Usuario (con rol y título ya cargados) sin tocar la BD."""
+    usuario = Usuario.from_db(DEFAULT_DB_ALIAS, _CAMPOS_USUARIO, foto['usuario'])
+    usuario.id_tipo_usuario = TipoUsuario.from_db(DEFAULT_DB_ALIAS, _CAMPOS_TIPO, foto['tipo'])
+    usuario.id_titulo = (
+        TituloProfesional.from_db(DEFAULT_DB_ALIAS, _CAMPOS_TITULO, foto['titulo'])
+        if foto['titulo'] else None
+    )
+    return usuario
+
+
+def _foto_vigente(en_cache, claves, usuario_id):
+    """Usuario reconstruido desde la cache, o None si la foto falta o está obsoleta."""
+    foto, version = en_cache.get(claves[0]), en_cache.get(claves[1])
+    if foto and version is not None and foto['version'] == version and foto['usuario'][0] == usuario_id:
+        return _desde_foto(foto)
+    return None
+
+
+def _version(en_cache, clave):
+    """Versión del usuario; si falta, la crea (antes de consultar la BD, así un cambio posterior la deja obsoleta)."""
+    version = en_cache.get(clave)
+    if version is None:
+        cache.add(clave, time.time_ns(), None)
+        version = cache.get(clave)
+    return version
+
+
+async def _aversion(en_cache, clave):
+    version = en_cache.get(clave)
+    if version is None:
+        await cache.aadd(clave, time.time_ns(), None)
+        version = await cache.aget(clave)
+    return version
+
+
+def _consulta_usuario(usuario_id):
+    return Usuario.objects.select_related('id_tipo_usuario', 'id_titulo').filter(id_usuario=usuario_id)
+
+
+def obtener_usuario(request):
+    """
+    Devuelve el Usuario de la sesión (con id_tipo_usuario e id_titulo cargados)
+    o None si no hay sesión iniciada. Se resuelve una sola vez por petición.
+    """
+    if hasattr(request, '_usuario_actual'):
+        return request._usuario_actual
+
+    usuario = None
+    usuario_id = request.session.get('usuario_id')
+    if usuario_id:
+        claves = [_clave_sesion(request.session.session_key), _clave_version(usuario_id)]
+        en_cache = cache.get_many(claves)
+        usuario = _foto_vigente(en_cache, claves, usuario_id)
+        if usuario is None:
+            version = _version(en_cache, claves[1])
+            usuario = _consulta_usuario(usuario_id).first()
+            if usuario is not None and version is not None:
+                cache.set(claves[0], _foto(usuario, version), getattr(settings, 'USUARIO_CACHE_SEGUNDOS', 3600))
+
+    request._usuario_actual = usuario
+    return usuario
+
+
+async def aobtener_usuario(request):
+    """Versión async de obtener_usuario() para vistas async (ASGI)."""
+    if hasattr(request, '_usuario_actual'):
+        return request._usuario_actual
+
+    usuario = None
+    usuario_id = await request.session.aget('usuario_id')
+    if usuario_id:
+        claves = [_clave_sesion(request.session.session_key), _clave_version(usuario_id)]
+        en_cache = await cache.aget_many(claves)
+        usuario = _foto_vigente(en_cache, claves, usuario_id)
+        if usuario is None:
+            version = await _aversion(en_cache, claves[1])
+            usuario = await _consulta_usuario(usuario_id).afirst()
+            if usuario is not None and version is not None:
+                await cache.aset(
+                    claves[0], _foto(usuario, version), getattr(settings, 'USUARIO_CACHE_SEGUNDOS', 3600)
+                )
+
+    request._usuario_actual = usuario
+    return usuario
+
+
+def olvidar_usuario(request):
+    """Descarta la foto de la sesión actual (al cerrar sesión)."""
+    if request.session.session_key:
+        cache.delete(_clave_sesion(request.session.session_key))
+
+
+def invalidar_usuarios(usuario_ids):
+    """Hace obsoletas las fotos en cache de estos usuarios, en todas sus sesiones."""
+    version = time.time_ns()
+    cache.set_many({_clave_version(usuario_id): version for usuario_id in usuario_ids}, None)
+
+
+@receiver([post_save, post_delete], sender=Usuario)
+def _usuario_modificado(sender, instance, **kwargs):
+    invalidar_usuarios([instance.id_usuario])
+
+
+@receiver(post_save, sender=TipoUsuario)
+@receiver(post_save, sender=TituloProfesional)
+def _catalogo_usuario_modificado(sender, instance, created, **kwargs):
+    if created:
+        return
+    campo = 'id_tipo_usuario' if sender is TipoUsuario else 'id_titulo'
+    invalidar_usuarios(
+        Usuario.objects.filter(**{campo: instance.pk}).values_list('id_usuario', flat=True)
+    )
+
+
+def requiere_rol(*roles, api=False, mensaje='Acceso denegado.'):
+    """
+    Exige sesión iniciada y, si se indican roles, que usuario_tipo sea uno de ellos.
+
+        @requiere_rol('administrador')            # página: redirige con mensaje
+        @requiere_rol('administrador', api=True)  # AJAX: {'success': False, 'error': ...}
+        @requiere_rol(api=True)                   # cualquier usuario autenticado
+
+    La verificación usa solo la sesión; request.usuario se consulta cuando la vista lo usa.
+    Funciona igual sobre vistas async (lee la sesión con aget()).
+    """
+    def denegar(request, usuario_id, usuario_tipo):
+        if not usuario_id:
+            if api:
+                return JsonResponse({'success': False, 'error': 'No autenticado'})
+            messages.error(request, 'Debe iniciar sesión.')
+            return redirect('login')
+
+        if roles and usuario_tipo not in roles:
+            if api:
+                return JsonResponse({'success': False, 'error': 'Acceso denegado'})
+            messages.error(request, mensaje)
+            return redirect('dashboard')
+
+        return None
+
+    def decorador(vista):
+        if iscoroutinefunction(vista):
+            @wraps(vista)
+            async def envoltura_async(request, *args, **kwargs):
+                respuesta = denegar(
+                    request,
+                    await request.session.aget('usuario_id'),
+                    await request.session.aget('usuario_tipo'),
+                )
+                if respuesta is not None:
+                    return respuesta
+                return await vista(request, *args, **kwargs)
+            return envoltura_async
+
+        @wraps(vista)
+        def envoltura(request, *args, **kwargs):
+            respuesta = denegar(
+                request, request.session.get('usuario_id'), request.session.get('usuario_tipo')
+            )
+            if respuesta is not None:
+                return respuesta
+            return vista(request, *args, **kwargs)
+        return envoltura
+    return decorador
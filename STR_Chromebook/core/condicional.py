@@ -0,0 +1,151 @@
+"""
+GET condicional (ETag / Last-Modified) para vistas de solo lectura.
+
+    @requiere_rol('administrador')
+    @condicional(marca_reservas)
+    def gestionar_reservas_list(request): ...
+
+`marca(request, *args, **kwargs)` hace una sola consulta barata (la fecha de
+actualización indexada, ver Gestion_Equipos.models.MarcaActualizacionQuerySet)
+y devuelve una tupla (ultima_modificacion, *resto), o None si no hay nada que
+marcar (la vista responde como siempre, p. ej. con su 404). Si el navegador
+ya tiene esa versión (If-None-Match / If-Modified-Since) se responde 304 sin
+ejecutar la vista; si no, la respuesta lleva ETag y Last-Modified y se marca
+`private, no-cache` para que el navegador la guarde y la revalide en cada uso.
+
+Las filas muestran también nombres de catálogos sin fecha_actualizacion
+(racks, estados, docentes, aulas...). Esas vistas agregan a su marca
+con_catalogos(): la hora del último cambio de cualquier modelo de CATALOGOS,
+que sus señales guardan en la cache al confirmarse la transacción.
+
+El ETag incluye al usuario de la sesión: la página muestra su nombre y un
+mismo equipo del laboratorio lo usan varias personas. Con mensajes pendientes
+(django.contrib.messages) no se responde 304, porque hay que mostrarlos.
+Para vistas async, `marca` también debe ser async.
+"""
+
+import hashlib
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction
+
+from django.apps import apps
+from django.contrib import messages
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, Max
+from django.db.models.signals import post_delete, post_save
+from django.utils import timezone
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date
+
+
+def marca_queryset(queryset):
+    """(última fecha_actualizacion, cantidad de filas) en una consulta: la cantidad detecta borrados."""
+    return tuple(queryset.aggregate(
+        ultima=Max('fecha_actualizacion'), total=Count('pk')
+    ).values())
+
+
+# Modelos cuyos nombres muestran las vistas condicionales sin formar parte de su marca
+CATALOGOS = (
+    'core.Usuario', 'core.Facultad', 'core.Carrera', 'core.Asignatura', 'core.Bloque', 'core.Aula',
+    'core.Rack', 'Gestion_Equipos.EstadoEquipo',
+)
+
+CLAVE_CATALOGOS = 'condicional:catalogos'
+
+
+def _con_cambio(marca, cambio):
+    # La fecha mayor para Last-Modified; el cambio también por separado para el ETag
+    return (max(marca[0], cambio), *marca[1:], cambio)
+
+
+def con_catalogos(marca):
+    """La marca de una vista más el último cambio de los catálogos que también muestra."""
+    if marca is None or marca[0] is None:
+        return marca
+    cambio = cache.get(CLAVE_CATALOGOS)
+    if cambio is None:
+        # Sin registro (cache vaciada o expulsada): se asume un cambio ahora
+        cache.add(CLAVE_CATALOGOS, timezone.now(), None)
+        cambio = cache.get(CLAVE_CATALOGOS)
+    return _con_cambio(marca, cambio)
+
+
+async def acon_catalogos(marca):
+    if marca is None or marca[0] is None:
+        return marca
+    cambio = await cache.aget(CLAVE_CATALOGOS)
+    if cambio is None:
+        await cache.aadd(CLAVE_CATALOGOS, timezone.now(), None)
+        cambio = await cache.aget(CLAVE_CATALOGOS)
+    return _con_cambio(marca, cambio)
+
+
+def _catalogo_modificado(sender, **kwargs):
+    transaction.on_commit(lambda: cache.set(CLAVE_CATALOGOS, timezone.now(), None))
+
+
+def conectar_catalogos():
+    """Conecta las señales de CATALOGOS (desde CoreConfig.ready)."""
+    for etiqueta in CATALOGOS:
+        modelo = apps.get_model(etiqueta)
+        post_save.connect(_catalogo_modificado, sender=modelo, dispatch_uid=f'catalogo_guardado:{etiqueta}')
+        post_delete.connect(_catalogo_modificado, sender=modelo, dispatch_uid=f'catalogo_borrado:{etiqueta}')
+
+
+def _validadores(marca, usuario_id):
+    if marca is None or marca[0] is None:
+        return None, None
+    resumen = hashlib.sha1(repr((usuario_id, *marca)).encode()).hexdigest()
+    return f'"{resumen}"', marca[0].timestamp()
+
+
+def _no_modificada(request, etag, ultima):
+    """304 (o 412) si el cliente ya tiene esta versión; None si hay que ejecutar la vista."""
+    respuesta = get_conditional_response(request, etag=etag, last_modified=ultima)
+    if respuesta is not None:
+        respuesta.headers.setdefault('ETag', etag)
+    return respuesta
+
+
+def _con_validadores(respuesta, etag, ultima):
+    if respuesta.status_code == 200:
+        respuesta.headers.setdefault('ETag', etag)
+        respuesta.headers.setdefault('Last-Modified', http_date(ultima))
+        patch_cache_control(respuesta, private=True, no_cache=True)
+    return respuesta
+
+
+def condicional(marca):
+    def decorador(vista):
+        if iscoroutinefunction(vista):
+            @wraps(vista)
+            async def envoltura_async(request, *args, **kwargs):
+                if request.method not in ('GET', 'HEAD'):
+                    return await vista(request, *args, **kwargs)
+
+                etag, ultima = _validadores(
+                    await marca(request, *args, **kwargs), await request.session.aget('usuario_id')
+                )
+                if etag is None:
+                    return await vista(request, *args, **kwargs)
+                return _no_modificada(request, etag, ultima) or _con_validadores(
+                    await vista(request, *args, **kwargs), etag, ultima
+                )
+            return envoltura_async
+
+        @wraps(vista)
+        def envoltura(request, *args, **kwargs):
+            if request.method not in ('GET', 'HEAD') or len(messages.get_messages(request)):
+                return vista(request, *args, **kwargs)
+
+            etag, ultima = _validadores(marca(request, *args, **kwargs), request.session.get('usuario_id'))
+            if etag is None:
+                return vista(request, *args, **kwargs)
+            return _no_modificada(request, etag, ultima) or _con_validadores(
+                vista(request, *args, **kwargs), etag, ultima
+            )
+        return envoltura
+    return decorador
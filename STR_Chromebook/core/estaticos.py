@@ -0,0 +1,195 @@
+"""
+Estáticos de producción: nombres con hash, minificación y copias precomprimidas.
+
+EstaticosComprimidosStorage (STORAGES['staticfiles'] en settings/prod.py)
+extiende ManifestStaticFilesStorage: después de que collectstatic escribe los
+archivos con el hash en el nombre, minifica los .js/.css y deja junto a cada
+archivo comprimible un .gz y, si está instalado el paquete `brotli`, un .br.
+core.middleware.EstaticosMiddleware los sirve con cache inmutable.
+
+Los minificadores son conservadores a propósito: quitan comentarios,
+sangrías, líneas vacías y espacios repetidos, sin reescribir el código.
+El JS conserva los saltos de línea para no depender de la inserción
+automática de punto y coma.
+"""
+
+import gzip
+import re
+from pathlib import Path
+
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+# Extensiones que vale la pena comprimir (las imágenes .webp/.png ya lo están)
+COMPRIMIBLES = {'.css', '.js', '.svg', '.json', '.txt', '.html', '.map', '.ico'}
+
+# Sufijo -> (Content-Encoding, función de compresión), en orden de preferencia
+COMPRESIONES = {'.gz': ('gzip', lambda datos: gzip.compress(datos, compresslevel=9, mtime=0))}
+if brotli is not None:
+    COMPRESIONES = {'.br': ('br', lambda datos: brotli.compress(datos, quality=11)), **COMPRESIONES}
+
+
+# ======================================================
+# MINIFICACIÓN
+# ======================================================
+
+_RE_CSS_COMENTARIO_O_CADENA = re.compile(r'("(?:\\.|[^"\\])*"|\'(?:\\.|[^\'\\])*\')|/\*.*?\*/', re.S)
+_RE_CSS_ESPACIOS = re.compile(r'\s+')
+_RE_CSS_SEPARADORES = re.compile(r'\s*([{};,>])\s*|(:)\s+')
+
+
+def minificar_css(codigo):
+    cadenas = []
+
+    def guardar(coincidencia):
+        # Las cadenas se apartan para que los reemplazos no las toquen
+        if coincidencia.group(1) is None:
+            return ' '
+        cadenas.append(coincidencia.group(1))
+        return f'\0{len(cadenas) - 1}\0'
+
+    codigo = _RE_CSS_COMENTARIO_O_CADENA.sub(guardar, codigo)
+    codigo = _RE_CSS_ESPACIOS.sub(' ', codigo)
+    codigo = _RE_CSS_SEPARADORES.sub(lambda c: c.group(1) or c.group(2), codigo)
+    codigo = codigo.replace(';}', '}').strip()
+    return re.sub(r'\0(\d+)\0', lambda c: cadenas[int(c.group(1))], codigo)
+
+
+# Antes de estas palabras clave, "/" abre una expresión regular y no es una división
+_PALABRAS_ANTES_DE_REGEX = {
+    'return', 'typeof', 'instanceof', 'in', 'of', 'new', 'delete', 'void',
+    'throw', 'case', 'do', 'else', 'yield', 'await',
+}
+
+
+def _fin_cadena(codigo, i):
+    """Índice siguiente al cierre de la cadena que empieza en i (incluye `${...}` anidados)."""
+    comilla = codigo[i]
+    i += 1
+    while i < len(codigo):
+        c = codigo[i]
+        if c == '\\':
+            i += 2
+            continue
+        if c == comilla:
+            return i + 1
+        if comilla == '`' and codigo.startswith('${', i):
+            i = _fin_expresion(codigo, i + 2)
+            continue
+        i += 1
+    return i
+
+
+def _fin_expresion(codigo, i):
+    profundidad = 1
+    while i < len(codigo) and profundidad:
+        c = codigo[i]
+        if c in '"\'`':
+            i = _fin_cadena(codigo, i)
+            continue
+        profundidad += {'{': 1, '}': -1}.get(c, 0)
+        i += 1
+    return i
+
+
+def _fin_regex(codigo, i):
+    en_clase = False
+    i += 1
+    while i < len(codigo) and codigo[i] != '\n':
+        c = codigo[i]
+        if c == '\\':
+            i += 2
+            continue
+        if c == '[':
+            en_clase = True
+        elif c == ']':
+            en_clase = False
+        elif c == '/' and not en_clase:
+            return i + 1
+        i += 1
+    return i
+
+
+def _abre_regex(linea):
+    """¿Un "/" después de lo ya escrito en la línea empieza una expresión regular?"""
+    previo = linea.rstrip()
+    if not previo:
+        return True
+    if previo[-1] in ')]}' or previo[-1].isalnum() or previo[-1] in '_$':
+        palabra = re.search(r'[\w$]+$', previo)
+        return bool(palabra) and palabra.group() in _PALABRAS_ANTES_DE_REGEX
+    return True
+
+
+def minificar_js(codigo):
+    lineas = ['']
+    i = 0
+    while i < len(codigo):
+        c = codigo[i]
+        if c in '"\'`':
+            fin = _fin_cadena(codigo, i)
+            lineas[-1] += codigo[i:fin]
+            i = fin
+        elif codigo.startswith('//', i):
+            fin = codigo.find('\n', i)
+            i = len(codigo) if fin == -1 else fin
+        elif codigo.startswith('/*', i):
+            fin = codigo.find('*/', i + 2)
+            i = len(codigo) if fin == -1 else fin + 2
+            if not lineas[-1].endswith(' '):
+                lineas[-1] += ' '
+        elif c == '/' and _abre_regex(lineas[-1]):
+            fin = _fin_regex(codigo, i)
+            lineas[-1] += codigo[i:fin]
+            i = fin
+        elif c == '\n':
+            lineas.append('')
+            i += 1
+        elif c in ' \t\r':
+            if lineas[-1] and not lineas[-1].endswith(' '):
+                lineas[-1] += ' '
+            i += 1
+        else:
+            lineas[-1] += c
+            i += 1
+    return '\n'.join(linea.strip() for linea in lineas if linea.strip())
+
+
+MINIFICADORES = {'.css': minificar_css, '.js': minificar_js}
+
+
+# ======================================================
+# STORAGE
+# ======================================================
+
+def comprimir(ruta):
+    """Escribe las variantes precomprimidas de `ruta` que resulten más chicas que el original."""
+    datos = ruta.read_bytes()
+    for sufijo, (_, compresion) in COMPRESIONES.items():
+        comprimido = compresion(datos)
+        if len(comprimido) < len(datos):
+            ruta.with_name(ruta.name + sufijo).write_bytes(comprimido)
+
+
+class EstaticosComprimidosStorage(ManifestStaticFilesStorage):
+    """ManifestStaticFilesStorage + minificación de JS/CSS y copias .gz/.br de los archivos con hash."""
+
+    def post_process(self, paths, dry_run=False, **options):
+        yield from super().post_process(paths, dry_run, **options)
+        if dry_run:
+            return
+
+        # hashed_files tiene el nombre final de cada archivo (el CSS pasa por
+        # varias rondas de reemplazo de url() y deja nombres intermedios)
+        for nombre in set(self.hashed_files.values()):
+            ruta = Path(self.path(nombre))
+            minificar = MINIFICADORES.get(ruta.suffix)
+            if minificar and '.min.' not in ruta.name:
+                ruta.write_text(minificar(ruta.read_text(encoding='utf-8')), encoding='utf-8')
+            if ruta.suffix in COMPRIMIBLES:
+                comprimir(ruta)
@@ -0,0 +1,64 @@
+"""
+Elimina las sesiones vencidas de la tabla django_session en lotes.
+
+A diferencia de `clearsessions` (un único DELETE sobre toda la tabla, que en
+MySQL bloquea filas durante mucho tiempo si hay muchas vencidas), borra por
+lotes de claves primarias con una transacción corta por lote. Pensado para
+ejecutarse programado, por ejemplo con cron cada noche:
+
+    15 3 * * *  cd /srv/STR_Chromebook && python manage.py limpiar_sesiones --lote 5000
+
+Con SESION_MOTOR=cache o cookie no hay nada que limpiar: las sesiones
+caducan solas (TTL de la cache / max_age de la cookie).
+"""
+
+import time
+
+from django.conf import settings
+from django.contrib.sessions.models import Session
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+MOTORES_EN_BD = (
+    'django.contrib.sessions.backends.db',
+    'django.contrib.sessions.backends.cached_db',
+)
+
+
+class Command(BaseCommand):
+    help = 'Elimina por lotes las sesiones vencidas de la base de datos.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--lote', type=int, default=5000,
+                            help='Sesiones eliminadas por transacción.')
+        parser.add_argument('--pausa', type=float, default=0.0,
+                            help='Segundos de espera entre lotes (para no saturar la BD en horario activo).')
+        parser.add_argument('--simular', action='store_true',
+                            help='Solo cuenta las sesiones vencidas, sin eliminarlas.')
+
+    def handle(self, *args, **options):
+        if settings.SESSION_ENGINE not in MOTORES_EN_BD:
+            self.stdout.write(
+                f'SESSION_ENGINE={settings.SESSION_ENGINE}: las sesiones no se guardan en la BD, nada que limpiar.'
+            )
+            return
+
+        ahora = timezone.now()
+        vencidas = Session.objects.filter(expire_date__lt=ahora)
+
+        if options['simular']:
+            self.stdout.write(f'{vencidas.count()} sesiones vencidas.')
+            return
+
+        total = 0
+        while True:
+            claves = list(vencidas.values_list('session_key', flat=True)[:options['lote']])
+            if not claves:
+                break
+            eliminadas, _ = Session.objects.filter(session_key__in=claves).delete()
+            total += eliminadas
+            self.stdout.write(f'  {total} eliminadas...')
+            if options['pausa']:
+                time.sleep(options['pausa'])
+
+        self.stdout.write(self.style.SUCCESS(f'{total} sesiones vencidas eliminadas.'))
@@ -0,0 +1,115 @@
+"""
+Lista y resume los perfiles capturados por core.middleware.PerfiladorMiddleware.
+
+    python manage.py perfiles                      # últimos perfiles
+    python manage.py perfiles --resumen            # agregado por vista
+    python manage.py perfiles --ver <nombre>       # resumen top-N de un perfil
+    python manage.py perfiles --ver <nombre> --orden tottime --top 40
+    python manage.py perfiles --limpiar
+"""
+
+import json
+import pstats
+from collections import defaultdict
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from core.metricas import percentil
+
+
+class Command(BaseCommand):
+    help = 'Lista, resume y elimina los perfiles cProfile capturados por el perfilador bajo demanda.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--ver', metavar='NOMBRE',
+                            help='Muestra el perfil indicado (nombre o prefijo, sin extensión).')
+        parser.add_argument('--resumen', action='store_true',
+                            help='Agrupa los perfiles por vista: cantidad, p50/p95 y SQL medio.')
+        parser.add_argument('--vista', default='',
+                            help='Considerar solo perfiles cuya vista contenga este texto.')
+        parser.add_argument('--limite', type=int, default=20,
+                            help='Cantidad de perfiles a listar (los más recientes).')
+        parser.add_argument('--orden', default='cumulative',
+                            help='Criterio de pstats para --ver (cumulative, tottime, ncalls...).')
+        parser.add_argument('--top', type=int, default=25,
+                            help='Funciones a mostrar con --ver.')
+        parser.add_argument('--limpiar', action='store_true',
+                            help='Elimina todos los perfiles capturados.')
+
+    def handle(self, *args, **options):
+        self.directorio = Path(getattr(settings, 'PERFILADOR_DIR', settings.BASE_DIR / 'perfiles'))
+        if not self.directorio.exists():
+            self.stdout.write(f'No hay perfiles en {self.directorio}')
+            return
+
+        if options['limpiar']:
+            archivos = [a for a in self.directorio.iterdir() if a.suffix in ('.prof', '.txt', '.json')]
+            for archivo in archivos:
+                archivo.unlink()
+            self.stdout.write(self.style.SUCCESS(f'{len(archivos)} archivos eliminados.'))
+        elif options['ver']:
+            self.ver(options['ver'], options['orden'], options['top'])
+        elif options['resumen']:
+            self.resumen(self.cargar(options['vista']))
+        else:
+            self.listar(self.cargar(options['vista'])[-options['limite']:])
+
+    def cargar(self, vista):
+        """Metadatos (.json) de los perfiles, del más antiguo al más reciente."""
+        perfiles = []
+        for ruta in sorted(self.directorio.glob('*.json')):
+            with open(ruta, encoding='utf-8') as archivo:
+                metadatos = json.load(archivo)
+            if vista in metadatos['vista']:
+                metadatos['nombre'] = ruta.stem
+                perfiles.append(metadatos)
+        return perfiles
+
+    def listar(self, perfiles):
+        for p in perfiles:
+            self.stdout.write(
+                f"{p['nombre'][:22]}  {p['metodo']:6} {p['vista']:32} {p['duracion_ms']:9.1f}ms  "
+                f"{p['consultas'] if p['consultas'] is not None else '-':>4} consultas  "
+                f"{p['bd_ms'] if p['bd_ms'] is not None else 0:8.1f}ms BD"
+            )
+        self.stdout.write(f'{len(perfiles)} perfiles en {self.directorio}')
+
+    def resumen(self, perfiles):
+        por_vista = defaultdict(list)
+        for p in perfiles:
+            por_vista[p['vista']].append(p)
+
+        self.stdout.write(f"{'vista':32} {'n':>4} {'p50 ms':>9} {'p95 ms':>9} {'consultas':>10} {'BD ms':>8}")
+        for vista, lista in sorted(por_vista.items(), key=lambda item: -len(item[1])):
+            tiempos = sorted(p['duracion_ms'] for p in lista)
+            consultas = [p['consultas'] for p in lista if p['consultas'] is not None]
+            bd = [p['bd_ms'] for p in lista if p['bd_ms'] is not None]
+            self.stdout.write(
+                f"{vista:32} {len(lista):4d} {percentil(tiempos, 50):9.1f} {percentil(tiempos, 95):9.1f} "
+                f"{sum(consultas) / len(consultas) if consultas else 0:10.1f} "
+                f"{sum(bd) / len(bd) if bd else 0:8.1f}"
+            )
+
+    def ver(self, nombre, orden, top):
+        candidatos = sorted(self.directorio.glob(f'{nombre}*.prof'))
+        if not candidatos:
+            raise CommandError(f'No existe el perfil {nombre}')
+        ruta = candidatos[-1]
+
+        metadatos = ruta.with_suffix('.json')
+        if metadatos.exists():
+            with open(metadatos, encoding='utf-8') as archivo:
+                p = json.load(archivo)
+            self.stdout.write(f"{p['metodo']} {p['ruta']} ({p['vista']}) - {p['duracion_ms']:.1f}ms")
+            if p['consultas'] is not None:
+                self.stdout.write(f"SQL: {p['consultas']} consultas, {p['bd_ms']:.1f}ms")
+                for entrada in p['sql'][:10]:
+                    self.stdout.write(
+                        f"  {entrada['cantidad']}x {entrada['duracion_ms']:.1f}ms "
+                        f"[{entrada['origen']}] {entrada['sql'][:200]}"
+                    )
+            self.stdout.write('')
+
+        pstats.Stats(str(ruta), stream=self.stdout).strip_dirs().sort_stats(orden).print_stats(top)
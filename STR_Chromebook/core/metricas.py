@@ -0,0 +1,14 @@
+"""
+Estadísticas de latencia compartidas por los comandos benchmark_*, el
+resumen de perfiles (manage.py perfiles) y la prueba de carga (bench/carga.py).
+"""
+
+import math
+
+
+def percentil(valores, p):
+    """Percentil por rango más cercano (valores ya ordenados)."""
+    if not valores:
+        return 0.0
+    indice = max(0, min(len(valores) - 1, math.ceil(p / 100 * len(valores)) - 1))
+    return valores[indice]
@@ -0,0 +1,582 @@
+"""
+Middlewares transversales del proyecto.
+
+Todos admiten peticiones sync (WSGI) y async (ASGI): así las vistas async no
+se ejecutan a través de un hilo por culpa de un middleware solo-sync.
+"""
+
+import cProfile
+import contextvars
+import io
+import json
+import logging
+import mimetypes
+import pstats
+import random
+import re
+import sys
+import time
+from collections import defaultdict
+from contextlib import ExitStack
+from datetime import datetime
+from pathlib import Path
+
+from functools import partial
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.http import FileResponse
+from django.utils.cache import get_conditional_response
+from django.utils.functional import SimpleLazyObject
+from django.utils.http import http_date
+
+from core import replicas
+from core.autenticacion import aobtener_usuario, obtener_usuario
+from core.estaticos import COMPRESIONES, COMPRIMIBLES
+
+logger = logging.getLogger('str_chromebook.sql')
+logger_acceso = logging.getLogger('str_chromebook.acceso')
+
+
+# ======================================================
+# INSTRUMENTACIÓN SQL POR PETICIÓN
+# ======================================================
+
+_RE_ESPACIOS = re.compile(r'\s+')
+_RE_LISTA_IN = re.compile(r'IN \((?:%s, )*%s\)')
+
+
+def normalizar_sql(sql):
+    """
+    Reduce una consulta a su "forma": colapsa espacios y las listas
+    IN (%s, %s, ...) para que las consultas repetidas se agrupen juntas.
+    """
+    sql = _RE_ESPACIOS.sub(' ', sql).strip()
+    return _RE_LISTA_IN.sub('IN (...)', sql)
+
+
+def _punto_de_llamada():
+    """Devuelve 'archivo:línea (función)' del primer frame que pertenece al proyecto."""
+    base = str(settings.BASE_DIR)
+    frame = sys._getframe(2)
+    while frame is not None:
+        archivo = frame.f_code.co_filename
+        if archivo.startswith(base) and 'site-packages' not in archivo and archivo != __file__:
+            return f"{archivo[len(base) + 1:]}:{frame.f_lineno} ({frame.f_code.co_name})"
+        frame = frame.f_back
+    return 'desconocido'
+
+
+class MiddlewareDual:
+    """
+    Base para middlewares que funcionan tanto en modo sync como async.
+    Las subclases implementan __call__ (sync) y __acall__ (async).
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.es_async = iscoroutinefunction(get_response)
+        if self.es_async:
+            markcoroutinefunction(self)
+
+
+class RegistroConsultas:
+    """
+    Envoltorio para connection.execute_wrapper() que cuenta las consultas
+    de una petición y acumula su duración, agrupadas por SQL normalizado.
+    """
+
+    def __init__(self):
+        self.total = 0
+        self.duracion = 0.0
+        self.por_consulta = defaultdict(lambda: {'cantidad': 0, 'duracion': 0.0, 'origen': None})
+
+    def __call__(self, execute, sql, params, many, context):
+        inicio = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duracion = time.perf_counter() - inicio
+            self.total += 1
+            self.duracion += duracion
+            entrada = self.por_consulta[normalizar_sql(sql)]
+            entrada['cantidad'] += 1
+            entrada['duracion'] += duracion
+            if entrada['origen'] is None:
+                entrada['origen'] = _punto_de_llamada()
+
+    @property
+    def duracion_ms(self):
+        return self.duracion * 1000
+
+    def peores(self, limite=5):
+        """Consultas normalizadas ordenadas por tiempo total acumulado."""
+        return sorted(
+            self.por_consulta.items(),
+            key=lambda item: item[1]['duracion'],
+            reverse=True
+        )[:limite]
+
+
+class InstrumentacionSQLMiddleware(MiddlewareDual):
+    """
+    Cuenta las consultas y el tiempo de BD de cada petición. Si se supera
+    SQL_UMBRAL_CONSULTAS o SQL_UMBRAL_TIEMPO_MS, registra un aviso con las
+    consultas más costosas (normalizadas) y el punto del código que las emitió.
+
+    El registro queda disponible en request.registro_sql para otras capas.
+    """
+
+    def __init__(self, get_response):
+        super().__init__(get_response)
+        self.umbral_consultas = getattr(settings, 'SQL_UMBRAL_CONSULTAS', 30)
+        self.umbral_ms = getattr(settings, 'SQL_UMBRAL_TIEMPO_MS', 500)
+
+    def __call__(self, request):
+        if self.es_async:
+            return self.__acall__(request)
+
+        registro = RegistroConsultas()
+        request.registro_sql = registro
+
+        with self._instrumentar(registro):
+            response = self.get_response(request)
+
+        self._revisar(request, registro)
+        return response
+
+    async def __acall__(self, request):
+        registro = RegistroConsultas()
+        request.registro_sql = registro
+
+        # Las conexiones son por hilo: se instrumentan las del hilo donde
+        # sync_to_async ejecuta el ORM y las vistas sync de esta petición
+        instrumentacion = await sync_to_async(self._instrumentar)(registro)
+        try:
+            response = await self.get_response(request)
+        finally:
+            await sync_to_async(instrumentacion.close)()
+
+        self._revisar(request, registro)
+        return response
+
+    @staticmethod
+    def _instrumentar(registro):
+        stack = ExitStack()
+        for conexion in connections.all():
+            stack.enter_context(conexion.execute_wrapper(registro))
+        return stack
+
+    def _revisar(self, request, registro):
+        if registro.total > self.umbral_consultas or registro.duracion_ms > self.umbral_ms:
+            self._registrar_exceso(request, registro)
+
+    def _registrar_exceso(self, request, registro):
+        detalle = '\n'.join(
+            f"  {datos['cantidad']}x {datos['duracion'] * 1000:.1f}ms [{datos['origen']}] {sql[:300]}"
+            for sql, datos in registro.peores()
+        )
+        logger.warning(
+            '%s %s: %d consultas, %.1fms en BD\n%s',
+            request.method, request.path, registro.total, registro.duracion_ms, detalle
+        )
+
+
+# ======================================================
+# USUARIO ACTUAL
+# ======================================================
+
+class UsuarioActualMiddleware(MiddlewareDual):
+    """
+    Expone request.usuario: el Usuario de la sesión (con rol y título cargados)
+    o None. Es perezoso: solo se resuelve (cache o una consulta) si la vista
+    lo usa. Las vistas async usan `await request.ausuario()`.
+    Debe ir después de SessionMiddleware.
+    """
+
+    def __call__(self, request):
+        request.usuario = SimpleLazyObject(lambda: obtener_usuario(request))
+        request.ausuario = partial(aobtener_usuario, request)
+        return self.get_response(request)
+
+
+# ======================================================
+# LECTURAS EN LA RÉPLICA
+# ======================================================
+
+class LecturaReplicaMiddleware(MiddlewareDual):
+    """
+    Lectura después de escritura con réplica (ver core.replicas): abre el
+    estado de la petición para el router y, si la petición escribió, deja la
+    cookie que mantiene las lecturas del navegador en la primaria durante
+    REPLICA_PEGAJOSA_SEGUNDOS. Sin RouterReplica en DATABASE_ROUTERS se
+    desactiva solo.
+    """
+
+    def __init__(self, get_response):
+        if 'core.replicas.RouterReplica' not in settings.DATABASE_ROUTERS:
+            raise MiddlewareNotUsed
+        super().__init__(get_response)
+        self.segundos = getattr(settings, 'REPLICA_PEGAJOSA_SEGUNDOS', 5)
+
+    def __call__(self, request):
+        if self.es_async:
+            return self.__acall__(request)
+
+        with replicas.peticion(self._pegada(request)) as estado:
+            response = self.get_response(request)
+        return self._marcar(estado, response)
+
+    async def __acall__(self, request):
+        # sync_to_async copia el contexto: el ORM de la vista ve el mismo estado
+        with replicas.peticion(self._pegada(request)) as estado:
+            response = await self.get_response(request)
+        return self._marcar(estado, response)
+
+    def _pegada(self, request):
+        try:
+            return time.time() - float(request.COOKIES.get(replicas.COOKIE, 0)) < self.segundos
+        except ValueError:
+            return False
+
+    def _marcar(self, estado, response):
+        if estado.escribio:
+            response.set_cookie(
+                replicas.COOKIE, f'{time.time():.3f}', max_age=self.segundos, httponly=True, samesite='Lax'
+            )
+        return response
+
+
+# ======================================================
+# SERVER-TIMING Y REGISTRO DE ACCESO
+# ======================================================
+
+class MedicionPeticion:
+    """
+    Tiempos de una petición. El backend de plantillas (core.plantillas)
+    acumula aquí el tiempo de renderizado descontando el SQL que se
+    ejecuta dentro de la plantilla (querysets perezosos).
+    """
+
+    def __init__(self, registro):
+        self.registro = registro
+        self.plantillas = 0.0
+        self.profundidad = 0
+
+    @property
+    def bd(self):
+        return self.registro.duracion if self.registro else 0.0
+
+
+medicion_actual = contextvars.ContextVar('medicion_actual', default=None)
+
+
+class MetricasPeticionMiddleware(MiddlewareDual):
+    """
+    Divide la latencia de cada petición en BD, plantillas y Python:
+
+      - Cabecera Server-Timing: db;dur, tpl;dur, app;dur, total;dur y el número
+        de consultas (visible en la pestaña Network/Timing del navegador).
+      - Una línea JSON por petición en el logger 'str_chromebook.acceso' con la
+        vista resuelta, para graficar la latencia por vista desde los logs.
+
+    Debe ir justo después de InstrumentacionSQLMiddleware (usa request.registro_sql).
+    SERVER_TIMING = False omite la cabecera pero mantiene el registro.
+    """
+
+    def __init__(self, get_response):
+        super().__init__(get_response)
+        self.cabecera = getattr(settings, 'SERVER_TIMING', True)
+
+    def __call__(self, request):
+        if self.es_async:
+            return self.__acall__(request)
+
+        medicion = MedicionPeticion(getattr(request, 'registro_sql', None))
+        token = medicion_actual.set(medicion)
+        inicio = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            medicion_actual.reset(token)
+
+        self._registrar(request, response, medicion, time.perf_counter() - inicio)
+        return response
+
+    async def __acall__(self, request):
+        medicion = MedicionPeticion(getattr(request, 'registro_sql', None))
+        token = medicion_actual.set(medicion)
+        inicio = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            medicion_actual.reset(token)
+
+        self._registrar(request, response, medicion, time.perf_counter() - inicio)
+        return response
+
+    def _registrar(self, request, response, medicion, total):
+        bd_ms = medicion.bd * 1000
+        tpl_ms = medicion.plantillas * 1000
+        total_ms = total * 1000
+        app_ms = max(0.0, total_ms - bd_ms - tpl_ms)
+        consultas = medicion.registro.total if medicion.registro else 0
+
+        if self.cabecera:
+            response['Server-Timing'] = (
+                f'db;dur={bd_ms:.1f};desc="{consultas} consultas", '
+                f'tpl;dur={tpl_ms:.1f}, app;dur={app_ms:.1f}, total;dur={total_ms:.1f}'
+            )
+
+        if logger_acceso.isEnabledFor(logging.INFO):
+            sesion = getattr(request, 'session', None)
+            logger_acceso.info(json.dumps({
+                'ts': datetime.now().isoformat(timespec='milliseconds'),
+                'metodo': request.method,
+                'ruta': request.path,
+                'vista': request.resolver_match.view_name if request.resolver_match else None,
+                'status': response.status_code,
+                'dur_ms': round(total_ms, 2),
+                'db_ms': round(bd_ms, 2),
+                'tpl_ms': round(tpl_ms, 2),
+                'app_ms': round(app_ms, 2),
+                'consultas': consultas,
+                # Solo si la vista ya cargó la sesión: no agregar una consulta por el log
+                'usuario_id': sesion.get('usuario_id') if sesion is not None and sesion.accessed else None,
+                'bytes': None if response.streaming else len(response.content),
+            }, ensure_ascii=False))
+
+
+# ======================================================
+# PERFILADO BAJO DEMANDA
+# ======================================================
+
+class PerfiladorMiddleware(MiddlewareDual):
+    """
+    Ejecuta la petición bajo cProfile cuando:
+      - un administrador agrega ?perfilar=1 a la URL,
+      - un administrador activó el perfilado para su sesión (?perfilar=on / ?perfilar=off), o
+      - la petición cae en la fracción PERFILADOR_MUESTREO (0 = nunca).
+
+    Por cada petición perfilada se escriben en PERFILADOR_DIR un .prof
+    (abrible con snakeviz/pstats), un .txt con las PERFILADOR_TOP funciones
+    más costosas y un .json con los tiempos SQL. Se conservan como máximo
+    PERFILADOR_MAX_ARCHIVOS perfiles; los más antiguos se eliminan.
+
+    Debe ir al final de MIDDLEWARE (necesita la sesión y así mide sobre todo la vista).
+    La sesión solo se consulta si la petición trae la bandera (parámetro o cookie
+    'perfilar'), para no agregar una consulta a las peticiones normales.
+
+    En modo async el perfil cubre todo lo que ejecute el event loop mientras
+    dura la petición (también otras peticiones concurrentes).
+    """
+
+    COOKIE = 'perfilar'
+
+    def __init__(self, get_response):
+        super().__init__(get_response)
+        self.directorio = Path(getattr(settings, 'PERFILADOR_DIR', settings.BASE_DIR / 'perfiles'))
+        self.muestreo = getattr(settings, 'PERFILADOR_MUESTREO', 0.0)
+        self.max_archivos = getattr(settings, 'PERFILADOR_MAX_ARCHIVOS', 200)
+        self.top = getattr(settings, 'PERFILADOR_TOP', 30)
+
+    def __call__(self, request):
+        if self.es_async:
+            return self.__acall__(request)
+
+        bandera = request.GET.get('perfilar')
+        if not (self._solicitado(request, bandera) or self._muestreado()):
+            return self._sin_perfil(request, bandera, self.get_response(request))
+
+        perfil = cProfile.Profile()
+        inicio = time.perf_counter()
+        perfil.enable()
+        try:
+            response = self.get_response(request)
+        finally:
+            perfil.disable()
+        duracion_ms = (time.perf_counter() - inicio) * 1000
+
+        nombre = self._guardar(request, perfil, duracion_ms)
+        return self._con_perfil(bandera, response, nombre)
+
+    async def __acall__(self, request):
+        bandera = request.GET.get('perfilar')
+        solicitado = (
+            (bandera or request.COOKIES.get(self.COOKIE))
+            and await sync_to_async(self._solicitado)(request, bandera)
+        )
+        if not (solicitado or self._muestreado()):
+            return self._sin_perfil(request, bandera, await self.get_response(request))
+
+        perfil = cProfile.Profile()
+        inicio = time.perf_counter()
+        perfil.enable()
+        try:
+            response = await self.get_response(request)
+        finally:
+            perfil.disable()
+        duracion_ms = (time.perf_counter() - inicio) * 1000
+
+        nombre = await sync_to_async(self._guardar)(request, perfil, duracion_ms)
+        return self._con_perfil(bandera, response, nombre)
+
+    def _sin_perfil(self, request, bandera, response):
+        if request.COOKIES.get(self.COOKIE) and bandera != 'on':
+            response.delete_cookie(self.COOKIE)
+        return response
+
+    def _con_perfil(self, bandera, response, nombre):
+        response['X-Perfil'] = nombre
+        if bandera == 'on':
+            response.set_cookie(self.COOKIE, '1', httponly=True, samesite='Lax')
+        return response
+
+    def _solicitado(self, request, bandera):
+        """Un administrador pidió el perfil (parámetro o bandera guardada en su sesión)."""
+        if bandera or request.COOKIES.get(self.COOKIE):
+            if request.session.get('usuario_tipo') == 'administrador':
+                if bandera == 'on':
+                    request.session['perfilar'] = True
+                elif bandera == 'off':
+                    request.session.pop('perfilar', None)
+                return bandera in ('1', 'on') or (bandera != 'off' and bool(request.session.get('perfilar')))
+        return False
+
+    def _muestreado(self):
+        return self.muestreo > 0 and random.random() < self.muestreo
+
+    def _guardar(self, request, perfil, duracion_ms):
+        self.directorio.mkdir(parents=True, exist_ok=True)
+        vista = request.resolver_match.view_name if request.resolver_match else 'sin_vista'
+        nombre = f"{datetime.now():%Y%m%d-%H%M%S-%f}_{vista}_{duracion_ms:.0f}ms"
+        base = self.directorio / nombre
+
+        perfil.dump_stats(f'{base}.prof')
+
+        salida = io.StringIO()
+        pstats.Stats(perfil, stream=salida).strip_dirs().sort_stats('cumulative').print_stats(self.top)
+
+        registro = getattr(request, 'registro_sql', None)
+        sql = [
+            {'sql': consulta, 'cantidad': datos['cantidad'],
+             'duracion_ms': round(datos['duracion'] * 1000, 3), 'origen': datos['origen']}
+            for consulta, datos in (registro.peores(limite=self.top) if registro else [])
+        ]
+        metadatos = {
+            'fecha': datetime.now().isoformat(timespec='seconds'),
+            'metodo': request.method,
+            'ruta': request.get_full_path(),
+            'vista': vista,
+            'usuario_id': request.session.get('usuario_id'),
+            'duracion_ms': round(duracion_ms, 3),
+            'consultas': registro.total if registro else None,
+            'bd_ms': round(registro.duracion_ms, 3) if registro else None,
+            'sql': sql,
+        }
+        with open(f'{base}.json', 'w', encoding='utf-8') as archivo:
+            json.dump(metadatos, archivo, indent=2, ensure_ascii=False)
+
+        with open(f'{base}.txt', 'w', encoding='utf-8') as archivo:
+            archivo.write(f"{request.method} {metadatos['ruta']} ({vista}) - {duracion_ms:.1f}ms\n")
+            if registro:
+                archivo.write(f"SQL: {registro.total} consultas, {registro.duracion_ms:.1f}ms\n")
+                for entrada in sql:
+                    archivo.write(
+                        f"  {entrada['cantidad']}x {entrada['duracion_ms']:.1f}ms "
+                        f"[{entrada['origen']}] {entrada['sql'][:300]}\n"
+                    )
+            archivo.write('\n')
+            archivo.write(salida.getvalue())
+
+        self._rotar()
+        return nombre
+
+    def _rotar(self):
+        perfiles = sorted(self.directorio.glob('*.prof'))
+        for antiguo in perfiles[:max(0, len(perfiles) - self.max_archivos)]:
+            for extension in ('.prof', '.txt', '.json'):
+                antiguo.with_suffix(extension).unlink(missing_ok=True)
+
+
+# ======================================================
+# ESTÁTICOS PRECOMPRIMIDOS
+# ======================================================
+
+# Nombre con el hash de ManifestStaticFilesStorage: styles.2fa36419599a.css
+_RE_NOMBRE_CON_HASH = re.compile(r'\.[0-9a-f]{12}\.\w+$')
+
+
+class EstaticosMiddleware(MiddlewareDual):
+    """
+    Sirve STATIC_ROOT (lo que deja collectstatic, ver core.estaticos) cuando no
+    hay un servidor web delante que lo haga.
+
+      - Elige la variante precomprimida (.br, .gz) que acepte el navegador
+        (Accept-Encoding) y responde con Vary: Accept-Encoding.
+      - Los nombres con hash nunca cambian de contenido: cache de un año e
+        `immutable`, el navegador no vuelve a preguntar.
+      - Los nombres originales (sin hash) se revalidan con Last-Modified
+        cada ESTATICOS_MAX_AGE_SIN_HASH segundos.
+
+    Debe ir primero en MIDDLEWARE: un estático no necesita sesión, métricas ni
+    perfilado. Lo que no está en STATIC_ROOT sigue su camino normal.
+    """
+
+    def __init__(self, get_response):
+        super().__init__(get_response)
+        self.prefijo = '/' + settings.STATIC_URL.lstrip('/')
+        self.raiz = Path(settings.STATIC_ROOT).resolve()
+        self.max_age_sin_hash = getattr(settings, 'ESTATICOS_MAX_AGE_SIN_HASH', 60)
+
+    def __call__(self, request):
+        if self.es_async:
+            return self.__acall__(request)
+        return self._servir(request) or self.get_response(request)
+
+    async def __acall__(self, request):
+        return self._servir(request) or await self.get_response(request)
+
+    def _servir(self, request):
+        if request.method not in ('GET', 'HEAD') or not request.path.startswith(self.prefijo):
+            return None
+
+        ruta = (self.raiz / request.path[len(self.prefijo):]).resolve()
+        if not ruta.is_relative_to(self.raiz) or not ruta.is_file():
+            return None
+
+        modificado = ruta.stat().st_mtime
+        con_hash = bool(_RE_NOMBRE_CON_HASH.search(ruta.name))
+        if not con_hash:
+            no_modificado = get_conditional_response(request, last_modified=int(modificado))
+            if no_modificado is not None:
+                return no_modificado
+
+        archivo, codificacion = ruta, None
+        aceptadas = request.headers.get('Accept-Encoding', '')
+        for sufijo, (nombre_codificacion, _) in COMPRESIONES.items():
+            variante = ruta.with_name(ruta.name + sufijo)
+            if re.search(rf'\b{nombre_codificacion}\b', aceptadas) and variante.is_file():
+                archivo, codificacion = variante, nombre_codificacion
+                break
+
+        response = FileResponse(
+            archivo.open('rb'),
+            content_type=mimetypes.guess_type(ruta.name)[0] or 'application/octet-stream',
+        )
+        if codificacion:
+            response['Content-Encoding'] = codificacion
+        if ruta.suffix in COMPRIMIBLES:
+            response['Vary'] = 'Accept-Encoding'
+        response['Last-Modified'] = http_date(modificado)
+        response['X-Content-Type-Options'] = 'nosniff'
+        response['Cache-Control'] = (
+            'public, max-age=31536000, immutable' if con_hash
+            else f'public, max-age={self.max_age_sin_hash}'
+        )
+        return response
@@ -0,0 +1,40 @@
+"""
+Backend de plantillas Django que mide el tiempo de renderizado para
+core.middleware.MetricasPeticionMiddleware (métrica tpl de Server-Timing).
+"""
+
+import time
+
+from django.template.backends.django import DjangoTemplates, Template
+
+from core.middleware import medicion_actual
+
+
+class PlantillaMedida(Template):
+
+    def render(self, context=None, request=None):
+        medicion = medicion_actual.get()
+        # Fuera de una petición, o plantilla anidada (render_to_string dentro
+        # de otra plantilla): ya se cuenta en el renderizado exterior.
+        if medicion is None or medicion.profundidad:
+            return super().render(context, request)
+
+        medicion.profundidad += 1
+        bd_inicial = medicion.bd
+        inicio = time.perf_counter()
+        try:
+            return super().render(context, request)
+        finally:
+            medicion.profundidad -= 1
+            medicion.plantillas += (time.perf_counter() - inicio) - (medicion.bd - bd_inicial)
+
+
+class DjangoTemplatesMedidas(DjangoTemplates):
+    """DjangoTemplates cuyas plantillas registran su tiempo en la petición actual."""
+
+    def from_string(self, template_code):
+        return PlantillaMedida(self.engine.from_string(template_code), self)
+
+    def get_template(self, template_name):
+        plantilla = super().get_template(template_name)
+        return PlantillaMedida(plantilla.template, self)
@@ -0,0 +1,21 @@
+"""
+Presupuesto de consultas SQL de cada URL de core/urls.py.
+
+Lo usan las pruebas (PresupuestoConsultasMixin) y los comandos benchmark_*.
+"""
+
+from core.testing import Presupuesto
+
+
+PRESUPUESTOS = {
+    'login': Presupuesto(6, metodo='post', json=False, estado=302, datos=lambda d: {
+        'username': d['docente'].username, 'password': d['clave'], 'perfil': 'docente',
+    }),
+    'logout': Presupuesto(2, rol='docente', estado=302),
+    'recuperar_datos': Presupuesto(1, metodo='post', json=False, estado=302, datos=lambda d: {
+        'cedula_recuperar': d['docente'].cedula,
+    }),
+    'dashboard': Presupuesto(1, rol='docente', estado=302),
+    'dashboard_docente': Presupuesto(7, rol='docente'),
+    'dashboard_administrador': Presupuesto(11, rol='administrador'),
+}
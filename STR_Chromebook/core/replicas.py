@@ -0,0 +1,99 @@
+"""
+Lecturas de reportes y análisis desde una réplica de la BD.
+
+Los reportes, sus exportaciones a Excel, el pronóstico y el uso de equipos
+hacen agregados pesados sobre la misma instancia MySQL que recibe las
+escrituras de reservas. Con una réplica configurada (DB_REPLICA_NAME /
+DB_REPLICA_HOST, ver settings/base.py) se instala RouterReplica:
+
+- las consultas de lectura de los modelos de REPLICA_APPS que se ejecutan
+  dentro de leer_de_replica() (como bloque o decorador de vista) van al alias
+  REPLICA_ALIAS; el resto, y todas las escrituras, van a la primaria,
+- si la petición ya escribió, sus lecturas siguientes vuelven a la primaria,
+- LecturaReplicaMiddleware deja una cookie tras cada petición que escribe:
+  durante REPLICA_PEGAJOSA_SEGUNDOS las lecturas de ese navegador se quedan
+  en la primaria, para que lo recién guardado se vea aunque la réplica
+  todavía no lo tenga.
+
+Los dashboards no usan la réplica: sus fragmentos cacheados y el cursor del
+stream de eventos se versionan en la primaria, y una página armada con datos
+atrasados quedaría guardada bajo la versión nueva.
+
+Sin réplica el router no se instala y leer_de_replica() no cambia nada.
+"""
+
+import contextvars
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+
+
+# Tablas del proyecto: sesiones, cache en BD, admin, etc. siempre en la primaria
+REPLICA_APPS = ('core', 'Gestion_Equipos')
+
+COOKIE = 'bd_primaria'
+
+
+class EstadoPeticion:
+    """Lo que el router sabe de la petición en curso (lo crea el middleware)."""
+
+    def __init__(self, pegada=False):
+        self.pegada = pegada
+        self.escribio = False
+
+
+_en_replica = contextvars.ContextVar('en_replica', default=False)
+_peticion = contextvars.ContextVar('peticion_replica', default=None)
+
+
+def _config(nombre, defecto):
+    return getattr(settings, f'REPLICA_{nombre}', defecto)
+
+
+@contextmanager
+def leer_de_replica():
+    """Las lecturas de este bloque (o de la vista decorada) pueden ir a la réplica."""
+    token = _en_replica.set(True)
+    try:
+        yield
+    finally:
+        _en_replica.reset(token)
+
+
+@contextmanager
+def peticion(pegada=False):
+    """Estado de una petición: el middleware lo abre alrededor de la vista."""
+    estado = EstadoPeticion(pegada)
+    token = _peticion.set(estado)
+    try:
+        yield estado
+    finally:
+        _peticion.reset(token)
+
+
+class RouterReplica:
+
+    def db_for_read(self, model, **hints):
+        if not _en_replica.get() or model._meta.app_label not in REPLICA_APPS:
+            return None
+        estado = _peticion.get()
+        if estado is not None and (estado.pegada or estado.escribio):
+            return None
+        return _config('ALIAS', 'replica')
+
+    def db_for_write(self, model, **hints):
+        estado = _peticion.get()
+        if estado is not None and model._meta.app_label in REPLICA_APPS:
+            estado.escribio = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Las dos son la misma base: un objeto leído en la réplica se guarda en la primaria
+        return True
+
+    def allow_migrate(self, db, app_label, **hints):
+        # La réplica recibe el esquema por replicación
+        if db == _config('ALIAS', 'replica'):
+            return False
+        return None
@@ -0,0 +1,231 @@
+"""
+Utilidades para las pruebas del proyecto.
+
+La pieza principal es PresupuestoConsultasMixin: cada URL con nombre de
+un urls.py debe declarar cuántas consultas SQL puede ejecutar como máximo.
+Si una vista supera su presupuesto, o si se agrega una URL sin presupuesto,
+la prueba falla.
+"""
+
+import logging
+from datetime import date, time, timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from django.urls import URLPattern, reverse
+
+from core.models import (
+    TipoUsuario, Usuario, Facultad, Carrera, Asignatura,
+    DocenteCarrera, Bloque, Aula, Rack
+)
+
+
+CLAVE = 'clave'
+
+
+def crear_datos_base(num_reservas=3, num_equipos=6):
+    """
+    Crea un conjunto mínimo pero completo de datos: roles, un administrador,
+    un docente, un supervisor, catálogos académicos e infraestructura,
+    equipos y reservas en los distintos estados.
+
+    Devuelve un diccionario con los objetos creados.
+    """
+    from Gestion_Equipos.models import EstadoEquipo, Equipo, Reserva
+
+    rol_admin = TipoUsuario.objects.create(nom_rol='Administrador')
+    rol_docente = TipoUsuario.objects.create(nom_rol='Docente')
+    rol_supervisor = TipoUsuario.objects.create(nom_rol='Supervisor')
+
+    def crear_usuario(username, rol, cedula):
+        usuario = Usuario(
+            nom_completo=f'Usuario {username}', cedula=cedula, telefono='0999999999',
+            email=f'{username}@uni.edu.ec', username=username, id_tipo_usuario=rol
+        )
+        usuario.set_password(CLAVE)
+        usuario.save()
+        return usuario
+
+    administrador = crear_usuario('admin', rol_admin, '0000000001')
+    docente = crear_usuario('docente', rol_docente, '0000000002')
+    supervisor = crear_usuario('superv', rol_supervisor, '0000000003')
+
+    facultad = Facultad.objects.create(nom_facultad='Ciencias')
+    carrera = Carrera.objects.create(nom_carrera='Software', id_facultad=facultad)
+    asignatura = Asignatura.objects.create(nom_asignatura='Programación', id_carrera=carrera)
+    DocenteCarrera.objects.create(id_usuario=docente, id_carrera=carrera)
+
+    bloque = Bloque.objects.create(nom_bloque='A')
+    aula = Aula.objects.create(nom_aula='A-101', id_bloque=bloque)
+    rack = Rack.objects.create(
+        nom_rack='R1', ubicacion='Bodega', capacidad_total=30,
+        capacidad_func=30, estado_rack='Disponible'
+    )
+
+    disponible = EstadoEquipo.objects.create(nom_estado='Disponible')
+    EstadoEquipo.objects.create(nom_estado='En uso')
+    EstadoEquipo.objects.create(nom_estado='En Mantenimiento')
+
+    equipos = Equipo.objects.bulk_create([
+        Equipo(nom_equipo=f'CHR-{i:03d}', num_serie=f'SERIE{i:05d}', modelo='HP 14',
+               id_rack=rack, id_estado_equipo=disponible)
+        for i in range(num_equipos)
+    ])
+
+    manana = date.today() + timedelta(days=2)
+    reservas = []
+    for estado in ('Pendiente', 'Aprobada', 'Rechazada'):
+        for i in range(num_reservas):
+            reservas.append(Reserva.objects.create(
+                fecha_uso=manana, hora_inicio=time(8 + i), hora_fin=time(9 + i),
+                cant_solicitada=2, estado_reserva=estado,
+                responsable_entrega='RESPONSABLE', telefono_contacto='0999999999',
+                id_usuario=docente, id_asignatura=asignatura, id_aula=aula, id_carrera=carrera
+            ))
+
+    return {
+        'clave': CLAVE,
+        'administrador': administrador,
+        'docente': docente,
+        'supervisor': supervisor,
+        'facultad': facultad,
+        'carrera': carrera,
+        'asignatura': asignatura,
+        'bloque': bloque,
+        'aula': aula,
+        'rack': rack,
+        'equipos': equipos,
+        'reservas': reservas,
+        'reserva_pendiente': reservas[0],
+        'reserva_aprobada': reservas[num_reservas],
+    }
+
+
+def iniciar_sesion(client, usuario, rol):
+    """Deja al cliente de pruebas con la misma sesión que crea login_view."""
+    sesion = client.session
+    sesion['usuario_id'] = usuario.id_usuario
+    sesion['usuario_nombre'] = usuario.nom_completo
+    sesion['usuario_tipo'] = rol
+    sesion['usuario_cedula'] = usuario.cedula
+    sesion['usuario_username'] = usuario.username
+    sesion.save()
+    # Con sesiones en cookie firmada la clave cambia al guardar
+    client.cookies[settings.SESSION_COOKIE_NAME] = sesion.session_key
+
+
+class Presupuesto:
+    """
+    Presupuesto de consultas de una URL.
+
+    - max_consultas: número máximo de consultas permitido.
+    - rol: 'administrador', 'docente' o None (anónimo).
+    - metodo: 'get' o 'post'.
+    - kwargs: función que recibe el diccionario de datos y devuelve los
+      argumentos de la URL (p. ej. lambda d: {'reserva_id': ...}).
+    - datos: cuerpo del POST o parámetros GET; también puede ser una función.
+    - json: si es False, el POST se envía como formulario en lugar de JSON.
+    - estado: código HTTP esperado. Las respuestas JSON además deben traer
+      success distinto de False y ningún 'error': el presupuesto mide el
+      camino que hace el trabajo, no una salida temprana.
+    - preparar: función que recibe el diccionario de datos y crea lo que la
+      petición necesita (asignaciones, series...). Devuelve un diccionario que
+      se agrega a los datos; lo que crea se revierte con la petición y sus
+      consultas no cuentan.
+    """
+
+    def __init__(self, max_consultas, rol=None, metodo='get', kwargs=None, datos=None, json=True,
+                 estado=200, preparar=None):
+        self.max_consultas = max_consultas
+        self.rol = rol
+        self.metodo = metodo
+        self.kwargs = kwargs
+        self.datos = datos
+        self.json = json
+        self.estado = estado
+        self.preparar = preparar
+
+
+def preparar_datos(presupuesto, datos):
+    """Datos del escenario más lo que cree su `preparar` (llamar dentro de la transacción que se revierte)."""
+    if presupuesto.preparar is None:
+        return datos
+    return {**datos, **presupuesto.preparar(datos)}
+
+
+def ejecutar_peticion(client, nombre, presupuesto, datos):
+    """Resuelve la URL `nombre` con los datos dados y la ejecuta según el presupuesto."""
+    kwargs = presupuesto.kwargs(datos) if presupuesto.kwargs else {}
+    url = reverse(nombre, kwargs=kwargs)
+    cuerpo = presupuesto.datos(datos) if callable(presupuesto.datos) else presupuesto.datos
+
+    if presupuesto.metodo == 'post' and presupuesto.json:
+        return client.post(url, cuerpo or {}, content_type='application/json')
+    if presupuesto.metodo == 'post':
+        return client.post(url, cuerpo or {})
+    return client.get(url, cuerpo or {})
+
+
+def silenciar_registro_acceso(test):
+    """Evita una línea JSON de acceso por cada petición en la salida de las pruebas."""
+    acceso = logging.getLogger('str_chromebook.acceso')
+    test.addCleanup(acceso.setLevel, acceso.level)
+    acceso.setLevel(logging.WARNING)
+
+
+class PresupuestoConsultasMixin:
+    """
+    Mixin para TestCase: definir `urls` (módulo urls.py) y `presupuestos`
+    ({nombre_url: Presupuesto}). Cada vista se ejecuta dentro de un
+    savepoint que se revierte, para que unas no afecten a las otras.
+    """
+
+    urls = None
+    presupuestos = {}
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.datos = crear_datos_base()
+
+    def setUp(self):
+        super().setUp()
+        silenciar_registro_acceso(self)
+
+    def test_todas_las_urls_tienen_presupuesto(self):
+        nombres = {
+            patron.name for patron in self.urls.urlpatterns
+            if isinstance(patron, URLPattern) and patron.name
+        }
+        faltantes = nombres - set(self.presupuestos)
+        self.assertFalse(faltantes, f'URLs sin presupuesto de consultas: {sorted(faltantes)}')
+
+    def test_presupuestos_de_consultas(self):
+        for nombre, presupuesto in self.presupuestos.items():
+            with self.subTest(url=nombre):
+                # Con la cache vacía: el presupuesto cubre el peor caso y no
+                # depende del orden de las entradas
+                cache.clear()
+                self.client.logout()
+                if presupuesto.rol:
+                    usuario = self.datos['administrador' if presupuesto.rol == 'administrador' else 'docente']
+                    iniciar_sesion(self.client, usuario, presupuesto.rol)
+
+                with transaction.atomic():
+                    datos = preparar_datos(presupuesto, self.datos)
+                    with CaptureQueriesContext(connection) as consultas:
+                        response = ejecutar_peticion(self.client, nombre, presupuesto, datos)
+                    transaction.set_rollback(True)
+
+                self.assertEqual(response.status_code, presupuesto.estado, f'{nombre}: estado inesperado')
+                if response.get('Content-Type', '').startswith('application/json'):
+                    cuerpo = response.json()
+                    self.assertIsNot(cuerpo.get('success'), False, f'{nombre}: {cuerpo}')
+                    self.assertNotIn('error', cuerpo, f'{nombre}: {cuerpo}')
+                self.assertLessEqual(
+                    len(consultas), presupuesto.max_consultas,
+                    f'{nombre} ejecutó {len(consultas)} consultas '
+                    f'(presupuesto: {presupuesto.max_consultas}):\n'
+                    + '\n'.join(q['sql'] for q in consultas.captured_queries)
+                )
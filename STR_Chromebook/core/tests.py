@@ -1,3 +1,449 @@
-from django.test import TestCase
+import gzip
+import json
+import tempfile
+import time
+from datetime import timedelta
+from io import StringIO
+from pathlib import Path
+from unittest import mock
 
-# Create your tests here.
+from asgiref.sync import async_to_sync
+
+from django.contrib.sessions.models import Session
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import MiddlewareNotUsed
+from django.core.management import call_command
+from django.db import connection, connections, router
+from django.http import HttpResponse, HttpResponseNotFound
+from django.templatetags.static import static
+from django.test import (
+    AsyncClient, RequestFactory, SimpleTestCase, TestCase, TransactionTestCase, override_settings
+)
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from core import replicas, urls
+from core.estaticos import minificar_js
+from core.metricas import percentil
+from core.middleware import EstaticosMiddleware, LecturaReplicaMiddleware
+from core.models import Usuario
+from core.presupuestos import PRESUPUESTOS
+from core.testing import PresupuestoConsultasMixin, crear_datos_base, iniciar_sesion, silenciar_registro_acceso
+from Gestion_Equipos import archivo
+from Gestion_Equipos.fragmentos import TABLAS_ADMINISTRADOR, invalidar_tablas
+from Gestion_Equipos.models import Reserva
+
+
+class PresupuestoConsultasCoreTest(PresupuestoConsultasMixin, TestCase):
+    """Presupuesto de consultas SQL de cada URL de core/urls.py"""
+
+    urls = urls
+    presupuestos = PRESUPUESTOS
+
+
+class FragmentosDashboardTest(TestCase):
+    """Tablas de los dashboards cacheadas por versión (Gestion_Equipos.fragmentos)"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.datos = crear_datos_base()
+
+    def setUp(self):
+        silenciar_registro_acceso(self)
+        cache.clear()
+
+    def test_tablas_sin_consultas_hasta_que_cambia_una_reserva(self):
+        iniciar_sesion(self.client, self.datos['administrador'], 'administrador')
+        url = reverse('dashboard_administrador')
+        self.client.get(url)
+        invalidar_tablas(*TABLAS_ADMINISTRADOR.values())
+        with CaptureQueriesContext(connection) as primera:
+            self.client.get(url)
+        with CaptureQueriesContext(connection) as segunda:
+            self.client.get(url)
+        self.assertEqual(len(primera) - len(segunda), 3)  # una consulta por tabla
+
+        reserva = self.datos['reserva_pendiente']
+        with self.captureOnCommitCallbacks(execute=True):
+            reserva.estado_reserva = 'Rechazada'
+            reserva.motivo_rechazo = 'Sin equipos'
+            reserva.save()
+
+        response = self.client.get(url)
+        self.assertContains(response, 'Sin equipos')
+        self.assertContains(response, f'data-reserva="{reserva.id_reserva}"', count=1)
+
+    def test_proximas_del_docente(self):
+        iniciar_sesion(self.client, self.datos['docente'], 'docente')
+        url = reverse('dashboard_docente')
+        reserva = self.datos['reserva_pendiente']
+        self.assertNotContains(self.client.get(url), f'#{reserva.id_reserva}<')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            reserva.estado_reserva = 'Aprobada'
+            reserva.save()
+        self.assertContains(self.client.get(url), f'#{reserva.id_reserva}<')
+
+
+class PerfiladorTest(TestCase):
+    """Perfilado bajo demanda (core.middleware.PerfiladorMiddleware)"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.datos = crear_datos_base()
+
+    def setUp(self):
+        directorio = tempfile.TemporaryDirectory()
+        self.addCleanup(directorio.cleanup)
+        self.directorio = Path(directorio.name)
+        ajustes = override_settings(PERFILADOR_DIR=self.directorio, PERFILADOR_MAX_ARCHIVOS=2)
+        ajustes.enable()
+        self.addCleanup(ajustes.disable)
+
+    def test_administrador_con_bandera_genera_perfil(self):
+        silenciar_registro_acceso(self)
+        iniciar_sesion(self.client, self.datos['administrador'], 'administrador')
+        response = self.client.get(reverse('dashboard_administrador') + '?perfilar=1')
+
+        nombre = response['X-Perfil']
+        self.assertIn('dashboard_administrador', nombre)
+        for extension in ('.prof', '.txt', '.json'):
+            self.assertTrue((self.directorio / f'{nombre}{extension}').exists())
+
+        salida = StringIO()
+        call_command('perfiles', '--resumen', stdout=salida)
+        self.assertIn('dashboard_administrador', salida.getvalue())
+
+    def test_rotacion_y_docente_sin_perfil(self):
+        silenciar_registro_acceso(self)
+        iniciar_sesion(self.client, self.datos['docente'], 'docente')
+        response = self.client.get(reverse('dashboard_docente') + '?perfilar=1')
+        self.assertNotIn('X-Perfil', response)
+
+        iniciar_sesion(self.client, self.datos['administrador'], 'administrador')
+        self.client.get(reverse('dashboard_administrador') + '?perfilar=on')
+        for _ in range(3):
+            self.client.get(reverse('dashboard_administrador'))
+        self.assertEqual(len(list(self.directorio.glob('*.prof'))), 2)
+
+
+class MetricasPeticionTest(TestCase):
+    """Cabecera Server-Timing y registro JSON de acceso"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.datos = crear_datos_base()
+
+    def test_server_timing_y_registro_de_acceso(self):
+        iniciar_sesion(self.client, self.datos['administrador'], 'administrador')
+        with self.assertLogs('str_chromebook.acceso', 'INFO') as registros:
+            response = self.client.get(reverse('dashboard_administrador'))
+
+        metricas = {m.split(';')[0].strip() for m in response['Server-Timing'].split(',')}
+        self.assertEqual(metricas, {'db', 'tpl', 'app', 'total'})
+
+        linea = json.loads(registros.records[-1].getMessage())
+        self.assertEqual(linea['vista'], 'dashboard_administrador')
+        self.assertEqual(linea['status'], 200)
+        self.assertEqual(linea['usuario_id'], self.datos['administrador'].id_usuario)
+        self.assertGreater(linea['consultas'], 0)
+        self.assertGreater(linea['tpl_ms'], 0)
+
+    def test_consultas_contadas_bajo_asgi(self):
+        iniciar_sesion(self.client, self.datos['administrador'], 'administrador')
+        cliente = AsyncClient()
+        cliente.cookies = self.client.cookies
+        with self.assertLogs('str_chromebook.acceso', 'INFO') as registros:
+            async_to_sync(cliente.get)(reverse('dashboard_administrador'))
+
+        self.assertGreater(json.loads(registros.records[-1].getMessage())['consultas'], 0)
+
+
+class UsuarioActualTest(TestCase):
+    """request.usuario, su foto en cache y @requiere_rol"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.datos = crear_datos_base()
+
+    def setUp(self):
+        silenciar_registro_acceso(self)
+        cache.clear()
+
+    def consultas_usuario(self, url):
+        with CaptureQueriesContext(connection) as consultas:
+            response = self.client.get(url)
+        return response, [q['sql'] for q in consultas.captured_queries if 'FROM "Tb_USUARIO"' in q['sql']]
+
+    def test_foto_en_cache_e_invalidacion(self):
+        administrador = self.datos['administrador']
+        iniciar_sesion(self.client, administrador, 'administrador')
+        url = reverse('dashboard_administrador')
+
+        response, consultas = self.consultas_usuario(url)
+        self.assertEqual(len(consultas), 1)
+        self.assertIn('Tb_TIPO_USUARIO', consultas[0])
+        self.assertEqual(response.context['usuario'].id_tipo_usuario.nom_rol, 'Administrador')
+
+        response, consultas = self.consultas_usuario(url)
+        self.assertEqual(consultas, [])
+        self.assertEqual(response.context['usuario'].nom_completo, administrador.nom_completo)
+
+        administrador.nom_completo = 'Nombre Cambiado'
+        administrador.save()
+        response, consultas = self.consultas_usuario(url)
+        self.assertEqual(len(consultas), 1)
+        self.assertEqual(response.context['usuario'].nom_completo, 'Nombre Cambiado')
+
+    def test_foto_sin_version_en_cache_esta_obsoleta(self):
+        administrador = self.datos['administrador']
+        iniciar_sesion(self.client, administrador, 'administrador')
+        url = reverse('dashboard_administrador')
+        self.consultas_usuario(url)
+
+        # La versión sale de la cache (sin timeout, pero la cache puede descartarla)
+        # y el usuario cambia sin pasar por post_save
+        Usuario.objects.filter(pk=administrador.pk).update(nom_completo='Nombre Cambiado')
+        cache.delete(f'usuario_version:{administrador.pk}')
+
+        response, consultas = self.consultas_usuario(url)
+        self.assertEqual(len(consultas), 1)
+        self.assertEqual(response.context['usuario'].nom_completo, 'Nombre Cambiado')
+        # La foto nueva ya tiene versión: la siguiente petición no consulta
+        self.assertEqual(self.consultas_usuario(url)[1], [])
+
+    def test_requiere_rol(self):
+        url_api = reverse('aprobar_reserva', args=[self.datos['reserva_pendiente'].id_reserva])
+        self.assertEqual(self.client.post(url_api).json()['error'], 'No autenticado')
+        self.assertRedirects(
+            self.client.get(reverse('gestionar_equipos')), reverse('login'), fetch_redirect_response=False
+        )
+
+        iniciar_sesion(self.client, self.datos['docente'], 'docente')
+        self.assertEqual(self.client.post(url_api).json()['error'], 'Acceso denegado')
+        self.assertRedirects(
+            self.client.get(reverse('gestionar_equipos')), reverse('dashboard'), fetch_redirect_response=False
+        )
+
+
+class SesionesTest(TestCase):
+    """Motores de sesión alternativos y limpieza de sesiones vencidas"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.datos = crear_datos_base()
+
+    def setUp(self):
+        silenciar_registro_acceso(self)
+
+    @override_settings(SESSION_ENGINE='django.contrib.sessions.backends.signed_cookies')
+    def test_login_con_sesion_en_cookie_sin_tabla_de_sesiones(self):
+        with CaptureQueriesContext(connection) as consultas:
+            self.client.post(reverse('login'), {
+                'username': self.datos['docente'].username, 'password': self.datos['clave'], 'perfil': 'docente',
+            })
+            response = self.client.get(reverse('dashboard_docente'))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse([q for q in consultas.captured_queries if 'django_session' in q['sql']])
+
+    def test_limpiar_sesiones_por_lotes(self):
+        ahora = timezone.now()
+        Session.objects.bulk_create(
+            [Session(session_key=f'vencida{i}', session_data='', expire_date=ahora - timedelta(days=1))
+             for i in range(5)]
+            + [Session(session_key='vigente', session_data='', expire_date=ahora + timedelta(days=1))]
+        )
+
+        salida = StringIO()
+        call_command('limpiar_sesiones', '--lote', '2', stdout=salida)
+
+        self.assertIn('5 sesiones vencidas eliminadas', salida.getvalue())
+        self.assertEqual(list(Session.objects.values_list('session_key', flat=True)), ['vigente'])
+
+
+class EstaticosTest(SimpleTestCase):
+    """collectstatic con hash, minificación y .gz; EstaticosMiddleware sirve la variante comprimida"""
+
+    def setUp(self):
+        directorio = tempfile.TemporaryDirectory()
+        self.addCleanup(directorio.cleanup)
+        ajustes = override_settings(STATIC_ROOT=directorio.name, STORAGES={
+            'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+            'staticfiles': {'BACKEND': 'core.estaticos.EstaticosComprimidosStorage'},
+        })
+        ajustes.enable()
+        self.addCleanup(ajustes.disable)
+        call_command('collectstatic', '--noinput', verbosity=0)
+        self.middleware = EstaticosMiddleware(lambda request: HttpResponseNotFound())
+        self.peticiones = RequestFactory()
+
+    def test_variante_comprimida_con_cache_inmutable(self):
+        url = static('js/notificaciones.js')
+        self.assertRegex(url, r'notificaciones\.[0-9a-f]{12}\.js$')
+
+        response = self.middleware(self.peticiones.get(url, headers={'Accept-Encoding': 'gzip, deflate'}))
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(response['Content-Type'], 'text/javascript')
+        self.assertIn('immutable', response['Cache-Control'])
+        codigo = gzip.decompress(b''.join(response.streaming_content)).decode()
+        self.assertNotIn('/* ===', codigo)
+        self.assertIn('`${url}?desde=${cursor}`', codigo)
+
+        # Nombre original: sin inmutable y revalidable con If-Modified-Since
+        response = self.middleware(self.peticiones.get('/static/js/notificaciones.js'))
+        self.assertNotIn('Content-Encoding', response)
+        self.assertNotIn('immutable', response['Cache-Control'])
+        response = self.middleware(self.peticiones.get(
+            '/static/js/notificaciones.js', headers={'If-Modified-Since': response['Last-Modified']}
+        ))
+        self.assertEqual(response.status_code, 304)
+
+        self.assertEqual(self.middleware(self.peticiones.get('/static/../manage.py')).status_code, 404)
+
+    def test_minificar_js_respeta_cadenas_y_regex(self):
+        codigo = "var a = b / 2;  // fin\n\n    var r = /a\\/b[/]/g; /* x */ var s = 'http://x';"
+        self.assertEqual(minificar_js(codigo), "var a = b / 2;\nvar r = /a\\/b[/]/g; var s = 'http://x';")
+
+
+@override_settings(DATABASE_ROUTERS=['core.replicas.RouterReplica'], REPLICA_ALIAS='replica')
+class ReplicaTest(SimpleTestCase):
+    """Lecturas de reportes en la réplica; escrituras y lectura tras escritura en la primaria"""
+
+    def setUp(self):
+        self.peticiones = RequestFactory()
+
+    def _vista_que_escribe(self, request):
+        router.db_for_write(Reserva)
+        return HttpResponse()
+
+    def test_solo_lecturas_marcadas_van_a_la_replica(self):
+        self.assertEqual(Reserva.objects.all().db, 'default')
+        with replicas.leer_de_replica():
+            self.assertEqual(Reserva.objects.all().db, 'replica')
+            self.assertEqual(Session.objects.all().db, 'default')
+            self.assertEqual(router.db_for_write(Reserva), 'default')
+            with replicas.peticion(pegada=True):
+                self.assertEqual(Reserva.objects.all().db, 'default')
+            with replicas.peticion() as estado:
+                Reserva.objects.all().select_for_update()  # solo arma la consulta
+                self.assertEqual(Reserva.objects.all().db, 'replica')
+                router.db_for_write(Reserva)
+                self.assertTrue(estado.escribio)
+                self.assertEqual(Reserva.objects.all().db, 'default')
+
+    def test_cookie_tras_escribir_fija_la_primaria(self):
+        middleware = LecturaReplicaMiddleware(self._vista_que_escribe)
+        response = middleware(self.peticiones.post('/'))
+        cookie = response.cookies[replicas.COOKIE]
+        self.assertEqual(cookie['max-age'], settings.REPLICA_PEGAJOSA_SEGUNDOS)
+
+        estados = []
+        lectora = LecturaReplicaMiddleware(lambda request: estados.append(replicas._peticion.get()) or HttpResponse())
+        peticion = self.peticiones.get('/')
+        peticion.COOKIES[replicas.COOKIE] = cookie.value
+        self.assertNotIn(replicas.COOKIE, lectora(peticion).cookies)
+        peticion.COOKIES[replicas.COOKIE] = str(float(cookie.value) - settings.REPLICA_PEGAJOSA_SEGUNDOS - 1)
+        lectora(peticion)
+        self.assertEqual([estado.pegada for estado in estados], [True, False])
+
+    @override_settings(DATABASE_ROUTERS=[])
+    def test_sin_router_el_middleware_se_desactiva(self):
+        with self.assertRaises(MiddlewareNotUsed):
+            LecturaReplicaMiddleware(self._vista_que_escribe)
+
+
+
+@override_settings(DATABASE_ROUTERS=['core.replicas.RouterReplica'], REPLICA_ALIAS='replica')
+class ReplicaPeticionesTest(TransactionTestCase):
+    """
+    El router con dos conexiones reales: 'replica' es TEST MIRROR de la BD de
+    pruebas. TransactionTestCase porque con TestCase los datos quedarían sin
+    confirmar en 'default' y la réplica, otra conexión, no los vería.
+    """
+
+    databases = {'default', 'replica'}
+
+    def setUp(self):
+        silenciar_registro_acceso(self)
+        cache.clear()
+        self.datos = crear_datos_base()
+        iniciar_sesion(self.client, self.datos['administrador'], 'administrador')
+
+    def consultas(self, metodo, *args, **kwargs):
+        """Ejecuta la petición y devuelve (response, SQL en la primaria, SQL en la réplica)."""
+        with CaptureQueriesContext(connections['default']) as primaria, \
+                CaptureQueriesContext(connections['replica']) as replica:
+            response = metodo(*args, **kwargs)
+        return response, [q['sql'] for q in primaria], [q['sql'] for q in replica]
+
+    def reportes_que_escriben(self):
+        """ver_reportes con una escritura a mitad de la petición (antes de leer las asignaciones)."""
+        asignaciones = archivo.asignaciones
+        reserva = self.datos['reserva_aprobada']
+
+        def escribir_y_leer(*args, **kwargs):
+            Reserva.objects.filter(pk=reserva.pk).tocar()
+            return asignaciones(*args, **kwargs)
+
+        with mock.patch.object(archivo, 'asignaciones', side_effect=escribir_y_leer):
+            return self.consultas(self.client.get, reverse('ver_reportes'))
+
+    def test_reportes_leen_de_la_replica(self):
+        response, primaria, replica = self.consultas(self.client.get, reverse('ver_reportes'))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(any('Tb_RESERVA' in sql for sql in replica))
+        self.assertTrue(any('Tb_ASIGNACION_EQUIPO' in sql for sql in replica))
+        # En la primaria solo la sesión y el usuario (requiere_rol, fuera de leer_de_replica)
+        self.assertFalse(any('Tb_RESERVA' in sql for sql in primaria))
+        self.assertNotIn(replicas.COOKIE, response.cookies)
+
+    def test_escritura_devuelve_las_lecturas_a_la_primaria(self):
+        response, primaria, replica = self.reportes_que_escriben()
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(any(sql.startswith('SELECT') and 'Tb_RESERVA' in sql for sql in replica))
+        self.assertTrue(any(sql.startswith('UPDATE "Tb_RESERVA"') for sql in primaria))
+        # Lo leído después de escribir (asignaciones y la tabla de la plantilla) va a la primaria
+        self.assertFalse(any('Tb_ASIGNACION_EQUIPO' in sql for sql in replica))
+        self.assertTrue(any('Tb_ASIGNACION_EQUIPO' in sql for sql in primaria))
+        self.assertIn(replicas.COOKIE, response.cookies)
+
+    def test_cookie_mantiene_la_siguiente_peticion_en_la_primaria(self):
+        self.reportes_que_escriben()
+
+        response, primaria, replica = self.consultas(self.client.get, reverse('ver_reportes'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(replica, [])
+        self.assertTrue(any('Tb_RESERVA' in sql for sql in primaria))
+
+        self.client.cookies[replicas.COOKIE] = str(time.time() - settings.REPLICA_PEGAJOSA_SEGUNDOS - 1)
+        _, _, replica = self.consultas(self.client.get, reverse('ver_reportes'))
+        self.assertTrue(any('Tb_RESERVA' in sql for sql in replica))
+
+    def test_dashboards_no_usan_la_replica(self):
+        # Versionan su cache en la primaria (ver core.replicas)
+        for usuario, rol, vista in (
+            ('administrador', 'administrador', 'dashboard_administrador'),
+            ('docente', 'docente', 'dashboard_docente'),
+        ):
+            iniciar_sesion(self.client, self.datos[usuario], rol)
+            response, primaria, replica = self.consultas(self.client.get, reverse(vista))
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(replica, [], vista)
+            self.assertTrue(primaria)
+
+
+class PercentilTest(SimpleTestCase):
+    """Percentil por rango más cercano de core.metricas"""
+
+    def test_rango_mas_cercano(self):
+        valores = list(range(1, 101))
+        self.assertEqual(percentil(valores, 50), 50)
+        self.assertEqual(percentil(valores, 95), 95)
+        self.assertEqual(percentil(valores, 100), 100)
+        self.assertEqual(percentil([7], 99), 7)
+        self.assertEqual(percentil([], 50), 0.0)
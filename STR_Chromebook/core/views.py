@@ -1,6 +1,7 @@
 from django.shortcuts import render, redirect
 from django.contrib import messages
 from django.utils import timezone
+from core.autenticacion import olvidar_usuario, requiere_rol
 from core.models import Usuario
 
 def login_view(request):
@@ -22,7 +23,7 @@ def login_view(request):
         
         try:
             # Buscar usuario por username
-            usuario = Usuario.objects.get(username=username)
+            usuario = Usuario.objects.select_related('id_tipo_usuario').get(username=username)
             
             # Verificar el tipo de usuario según el perfil seleccionado
             tipo_usuario = usuario.id_tipo_usuario.nom_rol.lower()
@@ -58,6 +59,7 @@ def login_view(request):
 def logout_view(request):
     """Vista para cerrar sesión"""
     # Limpiar TODA la sesión (incluye mensajes)
+    olvidar_usuario(request)
     request.session.flush()
     
     # Agregar mensaje DESPUÉS de limpiar la sesión
@@ -70,13 +72,10 @@ def logout_view(request):
     return redirect('login')
 
 
+@requiere_rol()
 def dashboard_view(request):
     """Vista principal que redirige según el tipo de usuario"""
     
-    if not request.session.get('usuario_id'):
-        messages.error(request, 'Debe iniciar sesión.')
-        return redirect('login')
-    
     usuario_tipo = request.session.get('usuario_tipo')
     
     if usuario_tipo == 'administrador':
@@ -88,21 +87,14 @@ def dashboard_view(request):
         return redirect('login')
 
 
+@requiere_rol('docente')
 def dashboard_docente(request):
     """Dashboard principal del docente"""
     
-    if not request.session.get('usuario_id'):
-        messages.error(request, 'Debe iniciar sesión.')
-        return redirect('login')
-    
-    if request.session.get('usuario_tipo') != 'docente':
-        messages.error(request, 'Acceso denegado.')
-        return redirect('dashboard')
-    
-    usuario_id = request.session.get('usuario_id')
-    usuario = Usuario.objects.get(id_usuario=usuario_id)
+    usuario = request.usuario
     
     # Importar modelo de Reserva
+    from Gestion_Equipos.fragmentos import duracion, tabla_proximas, versiones
     from Gestion_Equipos.models import Reserva
     
     # Obtener estadísticas del docente
@@ -111,20 +103,16 @@ def dashboard_docente(request):
     reservas_aprobadas = Reserva.objects.filter(id_usuario=usuario, estado_reserva='Aprobada').count()
     reservas_rechazadas = Reserva.objects.filter(id_usuario=usuario, estado_reserva='Rechazada').count()
     
-    # Obtener próximas reservas (aprobadas, ordenadas por fecha)
+    # Obtener próximas reservas (aprobadas, ordenadas por fecha). Queda perezosa:
+    # solo se consulta si el fragmento cacheado de la plantilla no está vigente
+    hoy = timezone.now().date()
+    tabla = tabla_proximas(usuario.id_usuario)
     proximas_reservas = Reserva.objects.filter(
         id_usuario=usuario,
         estado_reserva='Aprobada',
-        fecha_uso__gte=timezone.now().date()
+        fecha_uso__gte=hoy
     ).select_related('id_asignatura', 'id_aula').order_by('fecha_uso', 'hora_inicio')[:5]
     
-    # 🆕 NOTIFICACIONES: Reservas aprobadas pendientes de uso
-    reservas_aprobadas_pendientes = Reserva.objects.filter(
-        id_usuario=usuario,
-        estado_reserva='Aprobada',
-        fecha_uso__gte=timezone.now().date()
-    ).select_related('id_asignatura').order_by('fecha_uso', 'hora_inicio')[:5]
-    
     context = {
         'usuario': usuario,
         'reservas_totales': reservas_totales,
@@ -132,30 +120,33 @@ def dashboard_docente(request):
         'reservas_aprobadas': reservas_aprobadas,
         'reservas_rechazadas': reservas_rechazadas,
         'proximas_reservas': proximas_reservas,
-        'reservas_aprobadas_pendientes': reservas_aprobadas_pendientes,  # 🆕 AÑADIDO
+        'hoy': hoy,
+        'version_proximas': versiones(tabla)[tabla],
+        'fragmentos_segundos': duracion(),
     }
     
     return render(request, 'docente/dashboard.html', context)
 
 
+@requiere_rol('administrador')
 def dashboard_administrador(request):
     """Dashboard principal del administrador"""
     
-    if not request.session.get('usuario_id'):
-        messages.error(request, 'Debe iniciar sesión.')
-        return redirect('login')
-    
-    if request.session.get('usuario_tipo') != 'administrador':
-        messages.error(request, 'Acceso denegado.')
-        return redirect('dashboard')
-    
-    usuario_id = request.session.get('usuario_id')
-    usuario = Usuario.objects.get(id_usuario=usuario_id)
+    usuario = request.usuario
     
     # Importar modelos necesarios
+    from Gestion_Equipos import devoluciones
+    from Gestion_Equipos.eventos import ultimo_evento
+    from Gestion_Equipos.fragmentos import TABLAS_ADMINISTRADOR, duracion, versiones
     from Gestion_Equipos.models import Reserva, Equipo
     from datetime import date
     
+    # Antes de las consultas: el stream en vivo sigue desde aquí sin perder cambios
+    evento_inicial = ultimo_evento()
+    # Versiones de las tablas cacheadas, también antes de las consultas. Los
+    # querysets de las tablas quedan perezosos: solo se ejecutan si su fragmento no está vigente
+    versiones_tablas = versiones(*TABLAS_ADMINISTRADOR.values())
+    
     # Estadísticas de reservas
     total_reservas_pendientes = Reserva.objects.filter(estado_reserva='Pendiente').count()
     total_equipos_disponibles = Equipo.objects.filter(id_estado_equipo__nom_estado='Disponible').count()
@@ -199,6 +190,10 @@ def dashboard_administrador(request):
         'reservas_aprobadas': reservas_aprobadas,
         'reservas_rechazadas': reservas_rechazadas,
         'reservas_hoy': reservas_hoy,
+        'total_vencidas': devoluciones.contar(),
+        'ultimo_evento': evento_inicial,
+        'versiones_tablas': versiones_tablas,
+        'fragmentos_segundos': duracion(),
     }
     
     return render(request, 'administrador/dashboard.html', context)
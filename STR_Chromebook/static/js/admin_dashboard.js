@@ -7,6 +7,7 @@
    - Lógica de Aprobar/Rechazar/Ver Detalle
    - Funciones de modales
    - Obtención de Cookie CSRF
+   - Eventos en vivo (contadores y tablas sin recargar)
 ================================================================= */
 
 // --- VARIABLES GLOBALES ---
@@ -58,6 +59,32 @@ window.aprobarReserva = function(reservaId) {
     });
 }
 
+window.aprobarSerie = function(serieId) {
+    if (!confirm(`¿Está seguro de aprobar todas las reservas pendientes de la serie #${serieId}?`)) {
+        return;
+    }
+
+    fetch(`/serie/${serieId}/aprobar/`, {
+        method: 'POST',
+        headers: {
+            'X-CSRFToken': getCookie('csrftoken'),
+            'Content-Type': 'application/json'
+        }
+    })
+    .then(response => response.json())
+    .then(data => {
+        if (data.success) {
+            location.reload();
+        } else {
+            alert('Error: ' + data.error);
+        }
+    })
+    .catch(error => {
+        console.error('Error:', error);
+        alert('Error al aprobar la serie');
+    });
+}
+
 window.mostrarModalRechazo = function(reservaId) {
     reservaIdParaRechazar = reservaId;
     document.getElementById('motivo-rechazo').value = '';
@@ -195,6 +222,136 @@ window.cerrarModalDetalle = function() {
     document.getElementById('modal-detalle').classList.remove('is-active');
 }
 
+// --- EVENTOS EN VIVO (Server-Sent Events) ---
+// El servidor avisa cuando se crea, aprueba, rechaza o finaliza una reserva
+// y cuando cambia el estado de un equipo (ver Gestion_Equipos/eventos.py).
+
+const TABLA_POR_ESTADO = {
+    'Pendiente': 'pendientes',
+    'Aprobada': 'aprobadas',
+    'Rechazada': 'rechazadas'
+};
+const FILAS_POR_TABLA = 10;  // Igual que dashboard_administrador
+
+function escaparHTML(texto) {
+    const div = document.createElement('div');
+    div.textContent = texto == null ? '' : String(texto);
+    return div.innerHTML;
+}
+
+function crearFilaReserva(tabla, f) {
+    const colorCantidad = { pendientes: 'is-info', aprobadas: 'is-success', rechazadas: 'is-danger' }[tabla];
+    const botonDetalle = `
+        <button class="button is-info is-small" onclick="verDetalle(${f.id})" title="Ver detalle">
+            <span class="icon"><i class="fas fa-eye"></i></span>
+        </button>`;
+
+    let html = `
+        <td>${escaparHTML(f.fecha)}</td>
+        <td>${escaparHTML(f.hora)}</td>
+        <td>${escaparHTML(f.docente)}</td>
+        <td>${escaparHTML(f.carrera)}</td>
+        <td><span class="tag is-light">${escaparHTML(f.bloque)}</span></td>
+        <td>${escaparHTML(f.aula)}</td>
+        <td><span class="tag ${colorCantidad}">${f.cantidad}</span></td>`;
+
+    if (tabla === 'rechazadas') {
+        const motivo = f.motivo.length > 30 ? f.motivo.slice(0, 30) + '...' : f.motivo;
+        html += `<td><span class="tag is-warning" title="${escaparHTML(f.motivo)}">${escaparHTML(motivo)}</span></td>`;
+    }
+
+    if (tabla === 'pendientes') {
+        html += `
+        <td>
+            <div class="buttons are-small">
+                <button class="button is-success is-small" onclick="aprobarReserva(${f.id})" title="Aprobar">
+                    <span class="icon"><i class="fas fa-check"></i></span>
+                </button>
+                ${f.serie ? `
+                <button class="button is-success is-light is-small" onclick="aprobarSerie(${f.serie})" title="Aprobar toda la serie #${f.serie}">
+                    <span class="icon"><i class="fas fa-check-double"></i></span>
+                </button>` : ''}
+                <button class="button is-danger is-small" onclick="mostrarModalRechazo(${f.id})" title="Rechazar">
+                    <span class="icon"><i class="fas fa-times"></i></span>
+                </button>
+                ${botonDetalle}
+            </div>
+        </td>`;
+    } else {
+        html += `<td>${botonDetalle}</td>`;
+    }
+
+    const fila = document.createElement('tr');
+    fila.dataset.reserva = f.id;
+    fila.innerHTML = html;
+    return fila;
+}
+
+// Devuelve false si la página debe recargarse (la pestaña destino no tenía tabla)
+function aplicarEventoReserva(evento) {
+    // Quitar la reserva de la tabla donde estaba
+    document.querySelectorAll(`tr[data-reserva="${evento.reserva}"]`).forEach(fila => fila.remove());
+
+    const tabla = TABLA_POR_ESTADO[evento.estado];
+    if (tabla && evento.fila) {
+        const cuerpo = document.getElementById(`filas-${tabla}`);
+        if (!cuerpo) {
+            return false;
+        }
+        cuerpo.prepend(crearFilaReserva(tabla, evento.fila));
+        while (cuerpo.rows.length > FILAS_POR_TABLA) {
+            cuerpo.deleteRow(-1);
+        }
+    }
+
+    // Cantidades de las pestañas
+    Object.values(TABLA_POR_ESTADO).forEach(t => {
+        const cuerpo = document.getElementById(`filas-${t}`);
+        const etiqueta = document.getElementById(`pestana-${t}`);
+        if (cuerpo && etiqueta) {
+            etiqueta.textContent = cuerpo.rows.length;
+        }
+    });
+    return true;
+}
+
+function actualizarContadores(c) {
+    const valores = {
+        'contador-pendientes': c.pendientes,
+        'accion-pendientes': c.pendientes,
+        'contador-disponibles': c.disponibles,
+        'contador-en-uso': c.en_uso,
+        'contador-mantenimiento': c.mantenimiento
+    };
+    Object.entries(valores).forEach(([id, valor]) => {
+        const elemento = document.getElementById(id);
+        if (elemento) {
+            elemento.textContent = valor;
+        }
+    });
+}
+
+function conectarEventosEnVivo() {
+    const dashboard = document.getElementById('dashboard-admin');
+    if (!dashboard || !window.EventSource) {
+        return;
+    }
+
+    // Al reconectar, el navegador envía Last-Event-ID y el servidor continúa desde ahí
+    const fuente = new EventSource(`${dashboard.dataset.eventosUrl}?desde=${dashboard.dataset.ultimoEvento}`);
+
+    fuente.onmessage = function(e) {
+        const evento = JSON.parse(e.data);
+
+        if (evento.tipo === 'contadores') {
+            actualizarContadores(evento);
+        } else if (evento.tipo === 'recargar' || (evento.reserva !== undefined && !aplicarEventoReserva(evento))) {
+            fuente.close();
+            location.reload();
+        }
+    };
+}
+
 // --- CÓDIGO QUE SE EJECUTA AL CARGAR LA PÁGINA ---
 document.addEventListener('DOMContentLoaded', function() {
 
@@ -239,4 +396,7 @@ document.addEventListener('DOMContentLoaded', function() {
         });
     });
 
+    // --- EVENTOS EN VIVO ---
+    conectarEventosEnVivo();
+
 });
\ No newline at end of file
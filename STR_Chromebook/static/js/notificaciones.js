@@ -0,0 +1,70 @@
+/* =================================================================
+   NOTIFICACIONES DEL DOCENTE
+   (templates/docente/*.html)
+
+   Consulta cada pocos segundos solo las notificaciones nuevas
+   (api/notificaciones/?desde=<cursor>) y las muestra en pantalla.
+   La primera consulta no envía cursor: el servidor devuelve lo
+   nuevo desde la última visita. Llegan por lotes de la más antigua
+   a la más reciente; si un lote trae algo se pide el siguiente de
+   inmediato, hasta recibir uno vacío.
+================================================================= */
+
+(function() {
+    const contenedor = document.getElementById('notificaciones-docente');
+    if (!contenedor) {
+        return;
+    }
+
+    const url = contenedor.dataset.url;
+    const intervalo = (parseInt(contenedor.dataset.intervalo, 10) || 15) * 1000;
+    const COLORES = {
+        'aprobada': 'is-success',
+        'rechazada': 'is-danger',
+        'cancelada': 'is-warning',
+        'finalizada': 'is-info',
+        'expirada': 'is-warning'
+    };
+    let cursor = null;
+
+    function mostrarNotificacion(n) {
+        const aviso = document.createElement('div');
+        aviso.className = `notification ${COLORES[n.tipo] || 'is-info'} is-light`;
+
+        const cerrar = document.createElement('button');
+        cerrar.className = 'delete';
+        cerrar.addEventListener('click', () => aviso.remove());
+
+        const texto = document.createElement('span');
+        texto.textContent = n.mensaje;
+
+        aviso.append(cerrar, texto);
+        contenedor.prepend(aviso);
+    }
+
+    function consultar() {
+        // Las pestañas ocultas no consultan; se ponen al día al volver
+        if (document.hidden) {
+            return;
+        }
+
+        fetch(cursor === null ? url : `${url}?desde=${cursor}`)
+            .then(response => response.json())
+            .then(data => {
+                if (!data.success) {
+                    return;
+                }
+                cursor = data.cursor;
+                // Vienen de la más antigua a la más reciente: la más reciente queda arriba
+                data.notificaciones.forEach(mostrarNotificacion);
+                if (data.notificaciones.length) {
+                    consultar();
+                }
+            })
+            .catch(error => console.error('Error:', error));
+    }
+
+    consultar();
+    setInterval(consultar, intervalo);
+    document.addEventListener('visibilitychange', consultar);
+})();